@@ -182,10 +182,60 @@ CSRF_COOKIE_SAMESITE = 'Lax'
 EOSDA_API_KEY = os.getenv('EOSDA_API_KEY', '')
 EOSDA_BASE_URL = 'https://api-connect.eos.com'  # Sin /api al final para Field Management
 
+# Límite de peticiones a EOSDA: token bucket compartido por todo el proceso
+EOSDA_MAX_REQUESTS_POR_MINUTO = int(os.getenv('EOSDA_MAX_REQUESTS_POR_MINUTO', '60'))
+EOSDA_RATE_LIMIT_RAFAGA = 5  # Peticiones que se pueden hacer seguidas antes de espaciar
+# Polling de tareas (backoff exponencial con jitter entre intentos)
+EOSDA_POLLING_ESPERA_INICIAL = 2.0  # segundos
+EOSDA_POLLING_ESPERA_MAXIMA = 30.0  # segundos
+EOSDA_POLLING_TIMEOUT = 300  # segundos máximos por tarea
+# Hilos usados para consultar tareas pendientes en lote (Statistics API)
+EOSDA_LOTE_MAX_WORKERS = int(os.getenv('EOSDA_LOTE_MAX_WORKERS', '4'))
+
+# Cliente HTTP compartido (informes/services/http_cliente.py)
+HTTP_POOL_MAXSIZE = 10  # conexiones keep-alive por host
+HTTP_REINTENTOS = 3  # solo métodos idempotentes, errores de red y 500/502/504
+HTTP_TIMEOUTS_POR_HOST = {
+    # host: (timeout de conexión, timeout de lectura)
+    'api-connect.eos.com': (5, 60),
+    'archive-api.open-meteo.com': (5, 30),
+    'nominatim.openstreetmap.org': (3, 10),
+}
+
+# Circuit breaker de servicios externos (EOSDA, Gemini) - estado compartido en BD
+CIRCUITO_UMBRAL_FALLOS = int(os.getenv('CIRCUITO_UMBRAL_FALLOS', '5'))  # fallos consecutivos para abrir
+CIRCUITO_SEGUNDOS_ABIERTO = int(os.getenv('CIRCUITO_SEGUNDOS_ABIERTO', '60'))  # espera antes de probar
+CIRCUITO_SEGUNDOS_SONDEO = 120  # tiempo reservado a la llamada de prueba (semiabierto)
+
 # Configuración de informes
 INFORMES_PDF_STORAGE = MEDIA_ROOT / 'informes' / 'pdfs'
 INFORMES_MAPAS_STORAGE = MEDIA_ROOT / 'informes' / 'mapas'
 INFORMES_GRAFICOS_STORAGE = MEDIA_ROOT / 'informes' / 'graficos'
+# Caché de gráficos matplotlib renderizados (PNG por hash de la serie) y procesos para renderizarlos
+INFORMES_GRAFICOS_CACHE = MEDIA_ROOT / 'informes' / 'graficos_cache'
+GRAFICOS_PROCESOS = int(os.getenv('GRAFICOS_PROCESOS', '2'))
+# Imágenes de la galería del PDF reducidas a su tamaño impreso y cacheadas por hash de la original
+INFORMES_IMAGENES_PDF_CACHE = MEDIA_ROOT / 'informes' / 'imagenes_pdf_cache'
+INFORMES_PDF_DPI_IMAGENES = int(os.getenv('INFORMES_PDF_DPI_IMAGENES', '150'))
+# Secciones del PDF cacheadas como fragmentos (por hash de sus entradas) y ensambladas con pypdf
+INFORMES_PDF_FRAGMENTOS = os.getenv('INFORMES_PDF_FRAGMENTOS', 'True').lower() == 'true'
+INFORMES_FRAGMENTOS_CACHE = MEDIA_ROOT / 'informes' / 'fragmentos_cache'
+# Pipeline de informes (cargar → analizar → graficos → ia → renderizar): etapas independientes en hilos
+INFORMES_PIPELINE_PARALELO = os.getenv('INFORMES_PIPELINE_PARALELO', 'True').lower() == 'true'
+# Generación en lote (manage.py generar_informes_lote): procesos y carpeta de ejecuciones/resúmenes
+INFORMES_LOTE_PROCESOS = int(os.getenv('INFORMES_LOTE_PROCESOS', '2'))
+INFORMES_LOTE_DIRECTORIO = MEDIA_ROOT / 'informes' / 'lotes'
+# Temporales donde ReportLab escribe el PDF antes de subirlo al storage (None = /tmp del sistema)
+INFORMES_PDF_DIRECTORIO_TEMPORAL = os.getenv('INFORMES_PDF_DIRECTORIO_TEMPORAL') or None
+# Analítica de flota (manage.py analizar_flota): meses de la ventana parcelas x meses
+ANALISIS_FLOTA_MESES = int(os.getenv('ANALISIS_FLOTA_MESES', '24'))
+# Instantáneas de análisis por parcela: ventana que el worker mantiene siempre al día (timeline)
+ANALISIS_INSTANTANEA_MESES = int(os.getenv('ANALISIS_INSTANTANEA_MESES', '12'))
+
+# Almacén de imágenes satelitales direccionado por contenido (SHA-256)
+IMAGENES_SATELITALES_DIRECTORIO = 'imagenes_satelitales/sha256'  # relativo a MEDIA_ROOT
+# Presupuesto de disco: por encima se desalojan (LRU) las imágenes sin referencias
+IMAGENES_SATELITALES_PRESUPUESTO_MB = int(os.getenv('IMAGENES_SATELITALES_PRESUPUESTO_MB', '2048'))
 
 # Configuración de mapas
 LEAFLET_CONFIG = {
@@ -295,3 +345,11 @@ LOGGING = {
 # ============================================================================
 # API Key para Google Gemini AI (análisis inteligente de informes)
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+# Timeout por llamada a generate_content (segundos)
+GEMINI_TIMEOUT_SEGUNDOS = int(os.getenv('GEMINI_TIMEOUT_SEGUNDOS', '90'))
+# Cuota de Gemini compartida por todos los hilos del proceso (free tier: 15/min)
+GEMINI_MAX_REQUESTS_POR_MINUTO = int(os.getenv('GEMINI_MAX_REQUESTS_POR_MINUTO', '15'))
+# Análisis de imágenes simultáneos al construir la galería del PDF
+GEMINI_MAX_CONCURRENCIA = int(os.getenv('GEMINI_MAX_CONCURRENCIA', '4'))
+# Días que un análisis de imagen de Gemini se reutiliza desde caché (AnalisisImagen)
+GEMINI_CACHE_ANALISIS_DIAS = int(os.getenv('GEMINI_CACHE_ANALISIS_DIAS', '90'))
@@ -7,7 +7,6 @@ Verifica configuración, headers, y autenticación
 import os
 import sys
 import django
-import requests
 import json
 
 # Configurar Django
@@ -15,6 +14,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'agrotech_historico.settings_pro
 django.setup()
 
 from django.conf import settings
+from informes.services.http_cliente import crear_sesion
 
 def diagnosticar_eosda():
     """Realiza un diagnóstico completo de la configuración de EOSDA"""
@@ -64,6 +64,8 @@ def diagnosticar_eosda():
     
     # Endpoint de prueba (obtener campos)
     test_url = f"{base_url_settings}/field-management/fields"
+    # Misma sesión (pool + métricas) que usa la aplicación
+    sesion = crear_sesion()
     
     # Prueba 1: Header x-api-key (método actual)
     print("\n🔍 Prueba 1: Header 'x-api-key'")
@@ -74,7 +76,7 @@ def diagnosticar_eosda():
         }
         print(f"  Headers: {json.dumps({k: v if k != 'x-api-key' else f'{v[:15]}...' for k, v in headers.items()}, indent=4)}")
         
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = sesion.get(test_url, headers=headers, timeout=10)
         print(f"  Status: {response.status_code}")
         print(f"  Response: {response.text[:200]}")
         
@@ -93,7 +95,7 @@ def diagnosticar_eosda():
             'Content-Type': 'application/json'
         }
         
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = sesion.get(test_url, headers=headers, timeout=10)
         print(f"  Status: {response.status_code}")
         print(f"  Response: {response.text[:200]}")
         
@@ -107,7 +109,7 @@ def diagnosticar_eosda():
     # Prueba 3: Query parameter
     print("\n🔍 Prueba 3: Query parameter '?api_key='")
     try:
-        response = requests.get(f"{test_url}?api_key={api_key_settings}", timeout=10)
+        response = sesion.get(f"{test_url}?api_key={api_key_settings}", timeout=10)
         print(f"  Status: {response.status_code}")
         print(f"  Response: {response.text[:200]}")
         
@@ -126,7 +128,7 @@ def diagnosticar_eosda():
             'Content-Type': 'application/json'
         }
         
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = sesion.get(test_url, headers=headers, timeout=10)
         print(f"  Status: {response.status_code}")
         print(f"  Response: {response.text[:200]}")
         
@@ -146,7 +148,7 @@ def diagnosticar_eosda():
             'x-api-key': api_key_settings,
             'Content-Type': 'application/json'
         }
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = sesion.get(test_url, headers=headers, timeout=10)
         
         print(f"Status Code: {response.status_code}")
         print(f"Headers de Respuesta:")
@@ -5,10 +5,11 @@ No requiere Django, solo variables de entorno
 """
 
 import os
-import requests
 import json
 from dotenv import load_dotenv
 
+from informes.services.http_cliente import crear_sesion
+
 # Cargar .env local si existe
 load_dotenv()
 
@@ -45,6 +46,8 @@ def diagnosticar_eosda():
     
     # Endpoint de prueba (obtener campos)
     test_url = f"{base_url}/field-management/fields"
+    # Misma sesión (pool + métricas) que usa la aplicación
+    sesion = crear_sesion()
     print(f"Endpoint de prueba: {test_url}\n")
     
     # Prueba 1: Header x-api-key (método recomendado por EOSDA)
@@ -55,7 +58,7 @@ def diagnosticar_eosda():
             'Content-Type': 'application/json'
         }
         
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = sesion.get(test_url, headers=headers, timeout=10)
         print(f"  ├─ Status: {response.status_code}")
         print(f"  ├─ Response: {response.text[:150]}{'...' if len(response.text) > 150 else ''}")
         
@@ -89,7 +92,7 @@ def diagnosticar_eosda():
             'Content-Type': 'application/json'
         }
         
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = sesion.get(test_url, headers=headers, timeout=10)
         print(f"  ├─ Status: {response.status_code}")
         print(f"  ├─ Response: {response.text[:100]}{'...' if len(response.text) > 100 else ''}")
         
@@ -108,7 +111,7 @@ def diagnosticar_eosda():
             'Content-Type': 'application/json'
         }
         
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = sesion.get(test_url, headers=headers, timeout=10)
         print(f"  ├─ Status: {response.status_code}")
         print(f"  ├─ Response: {response.text[:100]}{'...' if len(response.text) > 100 else ''}")
         
@@ -128,7 +131,7 @@ def diagnosticar_eosda():
             'x-api-key': api_key,
             'Content-Type': 'application/json'
         }
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = sesion.get(test_url, headers=headers, timeout=10)
         
         print(f"Status Code: {response.status_code}")
         print(f"\nHeaders de Respuesta:")
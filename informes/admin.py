@@ -14,6 +14,12 @@ from .models_configuracion import (
     CacheDatosEOSDA,
     EstadisticaUsoEOSDA
 )
+from .models_trabajos import TrabajoSegundoPlano
+from .models_imagenes import SolicitudImagenEOSDA, ImagenSatelitalAlmacenada, ClaveImagenSatelital
+from .models_circuitos import EstadoCircuito
+from .models_gemini import AnalisisImagen
+from .models_analisis import InstantaneaAnalisisParcela, ResumenAnalisisParcela
+from .models_escenas import EscenaIndiceParcela
 
 
 @admin.register(Parcela)
@@ -124,8 +130,8 @@ class InformeAdmin(admin.ModelAdmin):
     Administrador para el modelo Informe
     """
     list_display = ('titulo_corto', 'parcela', 'periodo_analisis_meses', 
-                    'fecha_generacion', 'estado_salud', 'tiene_pdf')
-    list_filter = ('periodo_analisis_meses', 'fecha_generacion')
+                    'fecha_generacion', 'estado_generacion', 'estado_salud', 'tiene_pdf')
+    list_filter = ('periodo_analisis_meses', 'estado_generacion', 'fecha_generacion')
     search_fields = ('titulo', 'parcela__nombre', 'resumen_ejecutivo')
     date_hierarchy = 'fecha_generacion'
     ordering = ('-fecha_generacion',)
@@ -148,7 +154,11 @@ class InformeAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Archivos Generados', {
-            'fields': ('archivo_pdf', 'mapa_ndvi_imagen', 'grafico_tendencias'),
+            'fields': ('archivo_pdf', ('sha256_pdf', 'tamaño_pdf_bytes'), 'mapa_ndvi_imagen', 'grafico_tendencias'),
+            'classes': ('collapse',)
+        }),
+        ('Generación', {
+            'fields': ('estado_generacion', 'progreso_generacion', 'mensaje_generacion', 'error_generacion'),
             'classes': ('collapse',)
         }),
         ('Metadatos Técnicos', {
@@ -157,7 +167,8 @@ class InformeAdmin(admin.ModelAdmin):
         })
     )
     
-    readonly_fields = ('fecha_generacion',)
+    readonly_fields = ('fecha_generacion', 'progreso_generacion', 'mensaje_generacion', 'error_generacion',
+                       'sha256_pdf', 'tamaño_pdf_bytes')
     
     def titulo_corto(self, obj):
         """Título truncado para la lista"""
@@ -218,6 +229,145 @@ class ConfiguracionAPIAdmin(admin.ModelAdmin):
     readonly_fields = ('fecha_ultima_consulta', 'consultas_realizadas')
 
 
+@admin.register(TrabajoSegundoPlano)
+class TrabajoSegundoPlanoAdmin(admin.ModelAdmin):
+    """
+    Administrador para la cola de trabajos en segundo plano
+    """
+    list_display = ('id', 'tipo', 'parcela', 'estado', 'progreso', 'intentos',
+                    'creado_en', 'finalizado_en')
+    list_filter = ('estado', 'tipo')
+    search_fields = ('parcela__nombre', 'clave_dedup', 'mensaje_error')
+    readonly_fields = ('creado_en', 'iniciado_en', 'finalizado_en', 'actualizado_en', 'worker')
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('parcela')
+
+
+@admin.register(SolicitudImagenEOSDA)
+class SolicitudImagenEOSDAAdmin(admin.ModelAdmin):
+    """
+    Administrador para las solicitudes de imágenes de Field Imagery API
+    """
+    list_display = ('id', 'indice_mensual', 'indice', 'view_id', 'estado', 'intentos', 'actualizado_en')
+    list_filter = ('estado', 'indice')
+    search_fields = ('view_id', 'request_id', 'field_id', 'indice_mensual__parcela__nombre')
+    readonly_fields = ('creado_en', 'actualizado_en')
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('indice_mensual__parcela')
+
+
+class ClaveImagenSatelitalInline(admin.TabularInline):
+    model = ClaveImagenSatelital
+    extra = 0
+    readonly_fields = ('field_id', 'view_id', 'indice', 'creado_en')
+
+
+@admin.register(ImagenSatelitalAlmacenada)
+class ImagenSatelitalAlmacenadaAdmin(admin.ModelAdmin):
+    """
+    Administrador para el almacén de imágenes direccionado por contenido
+    """
+    list_display = ('sha256_corto', 'tamaño_kb', 'referencias', 'ultimo_acceso', 'creado_en')
+    search_fields = ('sha256', 'claves__view_id', 'claves__field_id')
+    readonly_fields = ('sha256', 'ruta', 'tamaño_bytes', 'content_type', 'creado_en')
+    inlines = [ClaveImagenSatelitalInline]
+    
+    def sha256_corto(self, obj):
+        return f"{obj.sha256[:16]}…"
+    sha256_corto.short_description = 'SHA-256'
+    
+    def tamaño_kb(self, obj):
+        return f"{obj.tamaño_bytes / 1024:.0f} KB"
+    tamaño_kb.short_description = 'Tamaño'
+
+
+@admin.register(EstadoCircuito)
+class EstadoCircuitoAdmin(admin.ModelAdmin):
+    """
+    Administrador para los circuit breakers de EOSDA y Gemini
+    """
+    list_display = ('servicio', 'estado', 'fallos_consecutivos', 'abierto_hasta', 'aperturas',
+                    'ultimo_fallo', 'ultimo_exito')
+    readonly_fields = ('aperturas', 'ultimo_error', 'ultimo_fallo', 'ultimo_exito', 'actualizado_en')
+    actions = ['cerrar_circuitos']
+    
+    def cerrar_circuitos(self, request, queryset):
+        actualizados = queryset.update(
+            estado='cerrado', fallos_consecutivos=0, abierto_hasta=None, sondeo_hasta=None
+        )
+        self.message_user(request, f'{actualizados} circuito(s) cerrado(s) manualmente.')
+    cerrar_circuitos.short_description = "Cerrar circuitos seleccionados"
+
+
+@admin.register(AnalisisImagen)
+class AnalisisImagenAdmin(admin.ModelAdmin):
+    """
+    Administrador de la caché de análisis Gemini Vision por imagen
+    """
+    list_display = ('parcela', 'fecha_imagen', 'indice', 'valor_promedio', 'version_prompt',
+                    'usos', 'fecha_analisis', 'expira_en', 'vigente')
+    list_filter = ('indice', 'version_prompt', 'fecha_analisis')
+    search_fields = ('parcela__nombre', 'hash_imagen', 'clave_cache')
+    readonly_fields = ('clave_cache', 'hash_imagen', 'usos', 'ultimo_uso', 'fecha_analisis')
+    actions = ['invalidar_analisis']
+    
+    def vigente(self, obj):
+        return obj.vigente
+    vigente.boolean = True
+    
+    def invalidar_analisis(self, request, queryset):
+        from .services.cache_analisis_imagenes import invalidar
+        invalidados = invalidar(queryset)
+        self.message_user(request, f'{invalidados} análisis invalidado(s); se regenerarán en el próximo informe.')
+    invalidar_analisis.short_description = "Invalidar análisis seleccionados"
+
+
+@admin.register(ResumenAnalisisParcela)
+class ResumenAnalisisParcelaAdmin(admin.ModelAdmin):
+    """
+    Administrador de los resúmenes de analítica de flota (comando analizar_flota)
+    """
+    list_display = ('parcela', 'puntuacion_salud', 'requiere_atencion', 'ndvi_actual', 'ndvi_pendiente',
+                    'anomalias', 'ultimo_mes_con_datos', 'calculado_en')
+    list_filter = ('requiere_atencion', 'mes_pico')
+    search_fields = ('parcela__nombre', 'parcela__propietario')
+    readonly_fields = [campo.name for campo in ResumenAnalisisParcela._meta.fields]
+
+
+@admin.register(InstantaneaAnalisisParcela)
+class InstantaneaAnalisisParcelaAdmin(admin.ModelAdmin):
+    """
+    Administrador de las instantáneas materializadas del análisis por parcela
+    """
+    list_display = ('parcela', 'meses', 'filas', 'desactualizada', 'lecturas', 'segundos_calculo', 'calculada_en')
+    list_filter = ('desactualizada', 'meses')
+    search_fields = ('parcela__nombre', 'huella')
+    readonly_fields = ('huella', 'hash_valores', 'filas', 'ultima_consulta_api', 'mes_inicio',
+                       'calculada_en', 'segundos_calculo', 'lecturas')
+    actions = ['recalcular_instantaneas']
+    
+    def recalcular_instantaneas(self, request, queryset):
+        from .services.instantaneas_analisis import instantaneas_analisis
+        marcadas = instantaneas_analisis.marcar_desactualizadas(queryset.values_list('parcela_id', flat=True))
+        self.message_user(request, f'{marcadas} instantánea(s) marcada(s); el worker las recalculará.')
+    recalcular_instantaneas.short_description = "Recalcular instantáneas seleccionadas"
+
+
+@admin.register(EscenaIndiceParcela)
+class EscenaIndiceParcelaAdmin(admin.ModelAdmin):
+    """
+    Administrador de la serie a nivel de escena (estadísticas por escena e índice)
+    """
+    list_display = ('parcela', 'fecha', 'indice', 'promedio', 'minimo', 'maximo', 'nubosidad', 'view_id')
+    list_filter = ('indice',)
+    search_fields = ('parcela__nombre', 'view_id')
+    date_hierarchy = 'fecha'
+    list_select_related = ('parcela',)
+    readonly_fields = [campo.name for campo in EscenaIndiceParcela._meta.fields]
+
+
 # Personalización del admin site
 admin.site.site_header = "AgroTech Histórico - Administración"
 admin.site.site_title = "AgroTech Admin"
@@ -8,11 +8,13 @@ from .ndmi_analyzer import AnalizadorNDMI
 from .savi_analyzer import AnalizadorSAVI
 from .tendencias_analyzer import DetectorTendencias
 from .recomendaciones_engine import GeneradorRecomendaciones
+from .serie_temporal import SerieTemporal
 
 __all__ = [
     'AnalizadorNDVI',
     'AnalizadorNDMI', 
     'AnalizadorSAVI',
     'DetectorTendencias',
-    'GeneradorRecomendaciones'
+    'GeneradorRecomendaciones',
+    'SerieTemporal'
 ]
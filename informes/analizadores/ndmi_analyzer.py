@@ -2,8 +2,11 @@
 Analizador NDMI - Normalized Difference Moisture Index
 Interpreta contenido de humedad en vegetación
 """
-import statistics
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
+
+import numpy as np
+
+from .serie_temporal import SerieTemporal, cambio_medio, estadisticas_basicas
 
 
 class AnalizadorNDMI:
@@ -27,25 +30,28 @@ class AnalizadorNDMI:
     def __init__(self, tipo_cultivo: str = "General"):
         self.tipo_cultivo = tipo_cultivo
     
-    def analizar(self, datos_ndmi: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analiza serie temporal de NDMI"""
-        if not datos_ndmi:
+    def analizar(self, datos_ndmi: Union[SerieTemporal, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Analiza serie temporal de NDMI (SerieTemporal o lista de dicts mensuales)"""
+        if datos_ndmi is None or not len(datos_ndmi):
             return self._resultado_sin_datos()
         
-        valores = [d.get('ndmi', 0) for d in datos_ndmi if d.get('ndmi') is not None]
+        # Un mes calendario por posición: los meses faltantes quedan en NaN
+        serie = SerieTemporal.como_serie(datos_ndmi).regularizar()
+        valores = serie.validos('ndmi')
         
-        if not valores:
+        if not len(valores):
             return self._resultado_sin_datos()
         
         # Estadísticas
-        promedio = statistics.mean(valores)
-        mediana = statistics.median(valores)
-        minimo = min(valores)
-        maximo = max(valores)
-        desv_std = statistics.stdev(valores) if len(valores) > 1 else 0
+        estadisticas = estadisticas_basicas(valores)
+        promedio = float(estadisticas['promedio'])
+        mediana = float(estadisticas['mediana'])
+        minimo = float(estadisticas['minimo'])
+        maximo = float(estadisticas['maximo'])
+        desv_std = float(estadisticas['desviacion_estandar'])
         
         # Análisis
-        tendencia = self._calcular_tendencia(valores)
+        tendencia = self._calcular_tendencia(serie.valores('ndmi'))
         estado = self._clasificar_estado(promedio)
         alertas = self._generar_alertas(promedio, minimo, tendencia, valores)
         
@@ -77,14 +83,15 @@ class AnalizadorNDMI:
             'riesgo_hidrico': self._evaluar_riesgo_hidrico(promedio, minimo)
         }
     
-    def _calcular_tendencia(self, valores: List[float]) -> Dict[str, Any]:
-        """Calcula tendencia temporal"""
+    def _calcular_tendencia(self, serie_ndmi: np.ndarray) -> Dict[str, Any]:
+        """Calcula tendencia temporal (serie regularizada, NaN en los huecos)"""
+        valores = serie_ndmi[~np.isnan(serie_ndmi)]
         if len(valores) < 3:
             return {'direccion': 'estable', 'magnitud': 0, 'descripcion': 'Datos insuficientes'}
         
-        n = len(valores)
-        cambio_promedio = sum(valores[i] - valores[i-1] for i in range(1, n)) / (n - 1)
-        cambio_porcentual = (valores[-1] - valores[0]) / abs(valores[0]) * 100 if valores[0] != 0 else 0
+        # Cambio por mes calendario
+        cambio_promedio = cambio_medio(serie_ndmi)
+        cambio_porcentual = float((valores[-1] - valores[0]) / abs(valores[0]) * 100) if valores[0] != 0 else 0
         
         if abs(cambio_promedio) < 0.02:
             direccion = 'estable'
@@ -192,7 +199,7 @@ del contenido de agua en la vegetación.<br><br>
         return interpretacion.strip()
     
     def _generar_alertas(self, promedio: float, minimo: float, 
-                        tendencia: Dict, valores: List[float]) -> List[Dict]:
+                        tendencia: Dict, valores: np.ndarray) -> List[Dict]:
         """Genera alertas hídricas"""
         alertas = []
         
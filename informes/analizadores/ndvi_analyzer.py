@@ -2,8 +2,11 @@
 Analizador NDVI - Normalized Difference Vegetation Index
 Interpreta salud vegetal basado en umbrales agronómicos científicos
 """
-import statistics
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
+
+import numpy as np
+
+from .serie_temporal import SerieTemporal, cambio_medio, estadisticas_basicas
 
 
 class AnalizadorNDVI:
@@ -50,38 +53,41 @@ class AnalizadorNDVI:
             self.UMBRAL_MODERADO = ajuste.get('moderado', self.UMBRAL_MODERADO)
             self.UMBRAL_BUENO = ajuste.get('bueno', self.UMBRAL_BUENO)
     
-    def analizar(self, datos_ndvi: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analizar(self, datos_ndvi: Union[SerieTemporal, List[Dict[str, Any]]]) -> Dict[str, Any]:
         """
         Analiza una serie temporal de datos NDVI
         
         Args:
-            datos_ndvi: Lista de diccionarios con datos mensuales
+            datos_ndvi: SerieTemporal o lista de diccionarios con datos mensuales
                        [{'mes': '2024-01', 'ndvi': 0.75}, ...]
         
         Returns:
             Diccionario con análisis completo
         """
-        if not datos_ndvi:
+        if datos_ndvi is None or not len(datos_ndvi):
             return self._resultado_sin_datos()
         
         # Extraer valores NDVI
-        valores = [d.get('ndvi', 0) for d in datos_ndvi if d.get('ndvi') is not None]
+        # Un mes calendario por posición: los meses faltantes quedan en NaN
+        serie = SerieTemporal.como_serie(datos_ndvi).regularizar()
+        valores = serie.validos('ndvi')
         
-        if not valores:
+        if not len(valores):
             return self._resultado_sin_datos()
         
         # Calcular estadísticas
-        promedio = statistics.mean(valores)
-        mediana = statistics.median(valores)
-        minimo = min(valores)
-        maximo = max(valores)
-        desv_std = statistics.stdev(valores) if len(valores) > 1 else 0
+        estadisticas = estadisticas_basicas(valores)
+        promedio = float(estadisticas['promedio'])
+        mediana = float(estadisticas['mediana'])
+        minimo = float(estadisticas['minimo'])
+        maximo = float(estadisticas['maximo'])
+        desv_std = float(estadisticas['desviacion_estandar'])
         
         # Analizar tendencia
-        tendencia = self._calcular_tendencia(valores)
+        tendencia = self._calcular_tendencia(serie.valores('ndvi'))
         
         # Detectar anomalías
-        anomalias = self._detectar_anomalias(datos_ndvi, promedio, desv_std)
+        anomalias = self._detectar_anomalias(serie, promedio, desv_std)
         
         # Clasificar estado
         estado = self._clasificar_estado(promedio)
@@ -120,16 +126,15 @@ class AnalizadorNDVI:
             'salud_vegetal': self._evaluar_salud(promedio)
         }
     
-    def _calcular_tendencia(self, valores: List[float]) -> Dict[str, Any]:
-        """Calcula la tendencia temporal de los datos"""
+    def _calcular_tendencia(self, serie_ndvi: np.ndarray) -> Dict[str, Any]:
+        """Calcula la tendencia temporal de los datos (serie regularizada, NaN en los huecos)"""
+        valores = serie_ndvi[~np.isnan(serie_ndvi)]
         if len(valores) < 3:
             return {'direccion': 'estable', 'magnitud': 0, 'descripcion': 'Datos insuficientes'}
         
-        # Calcular tendencia lineal simple
-        n = len(valores)
-        suma_cambios = sum(valores[i] - valores[i-1] for i in range(1, n))
-        cambio_promedio = suma_cambios / (n - 1)
-        cambio_porcentual = (valores[-1] - valores[0]) / valores[0] * 100 if valores[0] != 0 else 0
+        # Calcular tendencia lineal simple (cambio por mes calendario)
+        cambio_promedio = cambio_medio(serie_ndvi)
+        cambio_porcentual = float((valores[-1] - valores[0]) / valores[0] * 100) if valores[0] != 0 else 0
         
         # Clasificar tendencia
         if abs(cambio_promedio) < 0.02:
@@ -155,25 +160,25 @@ class AnalizadorNDVI:
             'descripcion': descripcion
         }
     
-    def _detectar_anomalias(self, datos: List[Dict], promedio: float, desv_std: float) -> List[Dict]:
+    def _detectar_anomalias(self, serie: SerieTemporal, promedio: float, desv_std: float) -> List[Dict]:
         """Detecta meses con valores anómalos"""
         anomalias = []
         
-        for dato in datos:
-            ndvi = dato.get('ndvi')
-            if ndvi is None:
-                continue
-            
-            # Anomalía: valor fuera de 2 desviaciones estándar
-            if abs(ndvi - promedio) > 2 * desv_std:
-                tipo = 'caida_brusca' if ndvi < promedio else 'pico_inusual'
-                anomalias.append({
-                    'periodo': dato.get('mes', 'Desconocido'),
-                    'valor': round(ndvi, 3),
-                    'tipo': tipo,
-                    'desviacion': round(abs(ndvi - promedio) / desv_std, 1),
-                    'descripcion': f"NDVI {'muy bajo' if tipo == 'caida_brusca' else 'muy alto'} ({ndvi:.2f})"
-                })
+        # Anomalía: valor fuera de 2 desviaciones estándar (NaN nunca cumple la condición)
+        valores = serie.valores('ndvi')
+        with np.errstate(invalid='ignore'):
+            posiciones = np.flatnonzero(np.abs(valores - promedio) > 2 * desv_std)
+        
+        for posicion in posiciones:
+            ndvi = float(valores[posicion])
+            tipo = 'caida_brusca' if ndvi < promedio else 'pico_inusual'
+            anomalias.append({
+                'periodo': serie.meses[posicion] or 'Desconocido',
+                'valor': round(ndvi, 3),
+                'tipo': tipo,
+                'desviacion': round(abs(ndvi - promedio) / desv_std, 1),
+                'descripcion': f"NDVI {'muy bajo' if tipo == 'caida_brusca' else 'muy alto'} ({ndvi:.2f})"
+            })
         
         return anomalias
     
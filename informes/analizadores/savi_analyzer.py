@@ -2,8 +2,11 @@
 Analizador SAVI - Soil-Adjusted Vegetation Index
 Interpreta vegetación corrigiendo influencia del suelo
 """
-import statistics
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
+
+import numpy as np
+
+from .serie_temporal import SerieTemporal, cambio_medio, estadisticas_basicas
 
 
 class AnalizadorSAVI:
@@ -22,25 +25,28 @@ class AnalizadorSAVI:
     def __init__(self, tipo_cultivo: str = "General"):
         self.tipo_cultivo = tipo_cultivo
     
-    def analizar(self, datos_savi: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analiza serie temporal de SAVI"""
-        if not datos_savi:
+    def analizar(self, datos_savi: Union[SerieTemporal, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Analiza serie temporal de SAVI (SerieTemporal o lista de dicts mensuales)"""
+        if datos_savi is None or not len(datos_savi):
             return self._resultado_sin_datos()
         
-        valores = [d.get('savi', 0) for d in datos_savi if d.get('savi') is not None]
+        # Un mes calendario por posición: los meses faltantes quedan en NaN
+        serie = SerieTemporal.como_serie(datos_savi).regularizar()
+        valores = serie.validos('savi')
         
-        if not valores:
+        if not len(valores):
             return self._resultado_sin_datos()
         
         # Estadísticas
-        promedio = statistics.mean(valores)
-        mediana = statistics.median(valores)
-        minimo = min(valores)
-        maximo = max(valores)
-        desv_std = statistics.stdev(valores) if len(valores) > 1 else 0
+        estadisticas = estadisticas_basicas(valores)
+        promedio = float(estadisticas['promedio'])
+        mediana = float(estadisticas['mediana'])
+        minimo = float(estadisticas['minimo'])
+        maximo = float(estadisticas['maximo'])
+        desv_std = float(estadisticas['desviacion_estandar'])
         
         # Análisis
-        tendencia = self._calcular_tendencia(valores)
+        tendencia = self._calcular_tendencia(serie.valores('savi'))
         estado = self._clasificar_estado(promedio)
         
         # Interpretaciones
@@ -73,14 +79,15 @@ class AnalizadorSAVI:
             'exposicion_suelo': self._estimar_exposicion_suelo(promedio)
         }
     
-    def _calcular_tendencia(self, valores: List[float]) -> Dict[str, Any]:
-        """Calcula tendencia temporal"""
+    def _calcular_tendencia(self, serie_savi: np.ndarray) -> Dict[str, Any]:
+        """Calcula tendencia temporal (serie regularizada, NaN en los huecos)"""
+        valores = serie_savi[~np.isnan(serie_savi)]
         if len(valores) < 3:
             return {'direccion': 'estable', 'magnitud': 0, 'descripcion': 'Datos insuficientes'}
         
-        n = len(valores)
-        cambio_promedio = sum(valores[i] - valores[i-1] for i in range(1, n)) / (n - 1)
-        cambio_porcentual = (valores[-1] - valores[0]) / valores[0] * 100 if valores[0] != 0 else 0
+        # Cambio por mes calendario
+        cambio_promedio = cambio_medio(serie_savi)
+        cambio_porcentual = float((valores[-1] - valores[0]) / valores[0] * 100) if valores[0] != 0 else 0
         
         if abs(cambio_promedio) < 0.02:
             direccion = 'estable'
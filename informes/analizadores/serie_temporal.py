@@ -0,0 +1,356 @@
+"""
+Serie Temporal Mensual en arrays NumPy
+Base común de los analizadores: los valores se extraen una sola vez de la
+lista de dicts y todos los cálculos (regresión, z-scores, estadísticas
+móviles, estacionalidad) se hacen vectorizados.
+
+SerieTemporal.regularizar() alinea la serie al calendario (un mes por posición,
+NaN explícito en los meses faltantes) y opcionalmente rellena los huecos
+(lineal o estacional); la nubosidad de cada mes da el peso de su dato.
+
+Las funciones de cálculo operan sobre el último eje y toleran NaN (dato
+faltante): sirven igual para una parcela (1D) que para una matriz
+parcelas x meses (2D).
+"""
+import warnings
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Campos de cada mes: clave en los dicts de datos mensuales
+CAMPOS = ('ndvi', 'ndmi', 'savi', 'temperatura', 'precipitacion', 'nubosidad')
+
+# Campos que se rellenan al regularizar con relleno (la nubosidad de un hueco queda NaN)
+CAMPOS_RELLENABLES = ('ndvi', 'ndmi', 'savi', 'temperatura', 'precipitacion')
+
+# Peso mínimo de un mes totalmente nublado (peso = 1 - nubosidad/100)
+PESO_MINIMO_NUBOSIDAD = 0.2
+
+METODOS_RELLENO = ('lineal', 'estacional')
+
+
+class SerieTemporal:
+    """
+    Meses alineados con un array float por campo (NaN = sin dato)
+
+    Uso:
+        serie = SerieTemporal.desde_datos([{'mes': '2024-01', 'ndvi': 0.75, ...}, ...])
+        serie.validos('ndvi')   # valores presentes, en orden
+        serie.mascara('ndmi')   # True donde hay dato
+        serie.regularizar()     # un mes calendario por posición (NaN en los huecos)
+    """
+
+    def __init__(self, meses: List[str], valores: Dict[str, np.ndarray],
+                 periodos: Optional[List[str]] = None):
+        self.meses = list(meses)
+        self.periodos = list(periodos) if periodos is not None else list(meses)
+        self._valores = valores
+
+        # Fecha de cada mes ('YYYY-MM'); NaT si no se puede interpretar
+        fechas = []
+        for mes in self.meses:
+            try:
+                fechas.append(np.datetime64(datetime.strptime(mes or '', '%Y-%m'), 'M'))
+            except (TypeError, ValueError):
+                fechas.append(np.datetime64('NaT', 'M'))
+        self.fechas = np.array(fechas, dtype='datetime64[M]')
+        self.fecha_valida = ~np.isnat(self.fechas)
+        numeros = np.where(self.fecha_valida, self.fechas.astype('int64'), 0)
+        self.años = np.where(self.fecha_valida, numeros // 12 + 1970, 0)
+        self.meses_del_año = np.where(self.fecha_valida, numeros % 12 + 1, 0)
+        # Regular: todas las fechas válidas, consecutivas y sin repetir
+        self.regular = bool(
+            len(self.meses) and self.fecha_valida.all() and np.all(np.diff(numeros) == 1)
+        )
+        # Meses con dato medido por campo (False en los valores rellenados)
+        self.observados = {campo: ~np.isnan(valores) for campo, valores in self._valores.items()}
+
+    @classmethod
+    def desde_datos(cls, datos_mensuales: List[Dict[str, Any]]) -> 'SerieTemporal':
+        """Construye la serie desde [{'mes': '2024-01', 'periodo': ..., 'ndvi': 0.75, ...}, ...]"""
+        datos_mensuales = datos_mensuales or []
+        valores = {
+            campo: np.array(
+                [np.nan if d.get(campo) is None else float(d[campo]) for d in datos_mensuales],
+                dtype=float
+            )
+            for campo in CAMPOS
+        }
+        return cls(
+            [d.get('mes', '') for d in datos_mensuales],
+            valores,
+            [d.get('periodo', d.get('mes', '')) for d in datos_mensuales],
+        )
+
+    @classmethod
+    def como_serie(cls, datos: Union['SerieTemporal', List[Dict[str, Any]]]) -> 'SerieTemporal':
+        """Acepta una serie ya construida o la lista de dicts de siempre"""
+        return datos if isinstance(datos, cls) else cls.desde_datos(datos)
+
+    def __len__(self) -> int:
+        return len(self.meses)
+
+    def valores(self, campo: str) -> np.ndarray:
+        """Array completo del campo (NaN donde falta el dato)"""
+        return self._valores[campo]
+
+    def mascara(self, campo: str) -> np.ndarray:
+        """True en los meses con dato"""
+        return ~np.isnan(self._valores[campo])
+
+    def validos(self, campo: str) -> np.ndarray:
+        """Solo los valores presentes, en orden temporal"""
+        valores = self._valores[campo]
+        return valores[~np.isnan(valores)]
+
+    def fecha_texto(self, posicion: int, formato: str = '%B %Y') -> Optional[str]:
+        """Fecha de un mes formateada, o None si su 'mes' no es válido"""
+        if not self.fecha_valida[posicion]:
+            return None
+        return datetime(int(self.años[posicion]), int(self.meses_del_año[posicion]), 1).strftime(formato)
+
+    def pesos(self) -> np.ndarray:
+        """Peso de cada mes según su nubosidad (ver pesos_nubosidad)"""
+        return pesos_nubosidad(self._valores['nubosidad'])
+
+    def regularizar(self, relleno: Optional[str] = None) -> 'SerieTemporal':
+        """
+        Serie con un mes calendario por posición, del primer al último mes con fecha.
+
+        Los meses faltantes quedan en NaN (o rellenados si se indica 'relleno');
+        los meses sin fecha válida se descartan y, si un mes se repite, vale el último.
+        Sin ninguna fecha válida se devuelve la serie tal cual.
+
+        Args:
+            relleno: None, 'lineal' (interpolación entre meses vecinos) o
+                'estacional' (promedio del mismo mes en otros años; lineal si no hay)
+        """
+        if relleno is not None and relleno not in METODOS_RELLENO:
+            raise ValueError(f"Método de relleno desconocido: {relleno}")
+
+        serie = self
+        if not self.regular:
+            validas = np.flatnonzero(self.fecha_valida)
+            if not len(validas):
+                return self
+            numeros = self.fechas[validas].astype('int64')
+            inicio = int(numeros.min())
+            posiciones = numeros - inicio
+            n_meses = int(numeros.max()) - inicio + 1
+
+            valores = {}
+            for campo, originales in self._valores.items():
+                alineados = np.full(n_meses, np.nan)
+                alineados[posiciones] = originales[validas]
+                valores[campo] = alineados
+            meses = [f'{(inicio + i) // 12 + 1970}-{(inicio + i) % 12 + 1:02d}' for i in range(n_meses)]
+            serie = SerieTemporal(meses, valores, meses)
+            for posicion, original in zip(posiciones, validas):
+                serie.periodos[posicion] = self.periodos[original]
+
+        if relleno is None:
+            return serie
+
+        valores = dict(serie._valores)
+        for campo in CAMPOS_RELLENABLES:
+            if relleno == 'estacional':
+                valores[campo] = rellenar_estacional(valores[campo], serie.meses_del_año)
+            else:
+                valores[campo] = rellenar_lineal(valores[campo])
+        rellenada = SerieTemporal(serie.meses, valores, serie.periodos)
+        rellenada.observados = serie.observados
+        return rellenada
+
+
+# ---------------------------------------------------------------------------
+# Cálculos vectorizados (último eje, NaN = sin dato)
+# ---------------------------------------------------------------------------
+
+def estadisticas_basicas(valores: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Promedio, mediana, mínimo, máximo y desviación estándar muestral
+    (ddof=1, como statistics.stdev; 0 si hay un solo dato). Requiere al menos un mes.
+    """
+    valores = np.asarray(valores, dtype=float)
+    n = np.sum(~np.isnan(valores), axis=-1)
+    # Filas sin datos quedan en NaN (sin la advertencia 'Mean of empty slice')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        desv_std = np.where(n > 1, np.nanstd(valores, axis=-1, ddof=1), 0.0)
+        return {
+            'n': n,
+            'promedio': np.nanmean(valores, axis=-1),
+            'mediana': np.nanmedian(valores, axis=-1),
+            'minimo': np.nanmin(valores, axis=-1),
+            'maximo': np.nanmax(valores, axis=-1),
+            'desviacion_estandar': desv_std,
+        }
+
+
+def regresion_lineal(valores: np.ndarray, x: Optional[np.ndarray] = None,
+                     pesos: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Mínimos cuadrados (ponderados) y = pendiente * x + intercepto sobre los puntos con dato.
+
+    Args:
+        valores: Serie (n,) o matriz (parcelas, n)
+        x: Abscisas (n,); por defecto 0..n-1 (en una serie regularizada, meses calendario)
+        pesos: Peso de cada punto, misma forma que valores o (n,); por defecto 1
+
+    Returns:
+        (pendiente, intercepto, r_cuadrado); pendiente 0 si x no varía y R² 0 si y no varía
+    """
+    valores = np.asarray(valores, dtype=float)
+    if x is None:
+        x = np.arange(valores.shape[-1], dtype=float)
+    presentes = ~np.isnan(valores)
+    if pesos is None:
+        w = presentes.astype(float)
+    else:
+        w = np.where(presentes, np.broadcast_to(np.asarray(pesos, dtype=float), valores.shape), 0.0)
+    suma_w = w.sum(axis=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_medio = (w * x).sum(axis=-1) / suma_w
+        y_medio = np.where(presentes, w * valores, 0.0).sum(axis=-1) / suma_w
+        dx = np.where(presentes, x - np.expand_dims(x_medio, -1), 0.0)
+        dy = np.where(presentes, valores - np.expand_dims(y_medio, -1), 0.0)
+
+        sxx = (w * dx * dx).sum(axis=-1)
+        sxy = (w * dx * dy).sum(axis=-1)
+        syy = (w * dy * dy).sum(axis=-1)
+
+        pendiente = np.where(sxx != 0, sxy / np.where(sxx != 0, sxx, 1.0), 0.0)
+        intercepto = y_medio - pendiente * x_medio
+        # Residuo: y - (p*x + b) = dy - p*dx
+        ss_res = (w * (dy - np.expand_dims(pendiente, -1) * dx) ** 2).sum(axis=-1)
+        r_cuadrado = np.where(syy != 0, 1 - ss_res / np.where(syy != 0, syy, 1.0), 0.0)
+    return pendiente, intercepto, r_cuadrado
+
+
+def cambio_medio(valores: np.ndarray) -> float:
+    """
+    Cambio promedio por posición entre el primer y el último valor presentes de una serie 1D
+    (= promedio de los cambios mes a mes; en una serie regularizada, por mes calendario)
+    """
+    valores = np.asarray(valores, dtype=float)
+    posiciones = np.flatnonzero(~np.isnan(valores))
+    if len(posiciones) < 2:
+        return 0.0
+    return float((valores[posiciones[-1]] - valores[posiciones[0]]) / (posiciones[-1] - posiciones[0]))
+
+
+def z_scores(valores: np.ndarray) -> np.ndarray:
+    """Desviación de cada valor respecto al promedio en desviaciones estándar (0 si no hay dispersión)"""
+    valores = np.asarray(valores, dtype=float)
+    estadisticas = estadisticas_basicas(valores)
+    promedio = np.expand_dims(estadisticas['promedio'], -1)
+    desv_std = np.expand_dims(estadisticas['desviacion_estandar'], -1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(desv_std > 0, (valores - promedio) / np.where(desv_std > 0, desv_std, 1.0), 0.0)
+
+
+def cambios_relativos(valores: np.ndarray) -> np.ndarray:
+    """
+    |v[i] - v[i-1]| / v[i-1] para cada mes (0 en el primero o si el anterior es 0)
+    """
+    valores = np.asarray(valores, dtype=float)
+    relativos = np.zeros_like(valores)
+    anteriores = valores[..., :-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        relativos[..., 1:] = np.where(
+            anteriores != 0, np.abs(np.diff(valores, axis=-1)) / np.where(anteriores != 0, anteriores, 1.0), 0.0
+        )
+    return relativos
+
+
+def estadisticas_moviles(valores: np.ndarray, ventana: int = 3) -> Dict[str, np.ndarray]:
+    """
+    Promedio y desviación estándar en ventanas móviles de 'ventana' meses
+    (una fila por ventana completa; NaN si la ventana no tiene datos)
+    """
+    valores = np.asarray(valores, dtype=float)
+    if valores.shape[-1] < ventana:
+        vacio = np.empty(valores.shape[:-1] + (0,))
+        return {'promedio': vacio, 'desviacion_estandar': vacio}
+    ventanas = sliding_window_view(valores, ventana, axis=-1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return {
+            'promedio': np.nanmean(ventanas, axis=-1),
+            'desviacion_estandar': np.nanstd(ventanas, axis=-1),
+        }
+
+
+def promedios_por_grupo(valores: np.ndarray, grupos: np.ndarray, n_grupos: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Promedio de los valores presentes por grupo (p.ej. mes del año 1..12 o año).
+
+    Args:
+        valores: Serie (n,) o matriz (parcelas, n)
+        grupos: Grupo de cada columna (n,), enteros en 0..n_grupos-1
+
+    Returns:
+        (promedios, cantidades) con último eje de largo n_grupos; NaN donde el grupo no tiene datos
+    """
+    valores = np.asarray(valores, dtype=float)
+    filas = valores.reshape(-1, valores.shape[-1])
+    # Un bincount para todas las filas: cada fila usa su propio rango de grupos
+    grupos = np.asarray(grupos) + n_grupos * np.arange(len(filas))[:, None]
+    presentes = ~np.isnan(filas)
+    total = n_grupos * len(filas)
+    cantidades = np.bincount(grupos[presentes], minlength=total)
+    sumas = np.bincount(grupos[presentes], weights=filas[presentes], minlength=total)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        promedios = np.where(cantidades > 0, sumas / np.where(cantidades > 0, cantidades, 1), np.nan)
+    forma = valores.shape[:-1] + (n_grupos,)
+    return promedios.reshape(forma), cantidades.reshape(forma)
+
+
+def pesos_nubosidad(nubosidad: np.ndarray) -> np.ndarray:
+    """
+    Peso de calidad de cada mes: 1 - nubosidad/100, acotado a [PESO_MINIMO_NUBOSIDAD, 1].
+    Sin dato de nubosidad el peso es 1.
+    """
+    nubosidad = np.asarray(nubosidad, dtype=float)
+    return np.where(np.isnan(nubosidad), 1.0, np.clip(1 - nubosidad / 100, PESO_MINIMO_NUBOSIDAD, 1.0))
+
+
+def rellenar_lineal(valores: np.ndarray) -> np.ndarray:
+    """
+    Interpola linealmente los NaN entre dos valores presentes (último eje).
+    Los huecos antes del primer y después del último valor quedan en NaN.
+    """
+    valores = np.asarray(valores, dtype=float)
+    n = valores.shape[-1]
+    presentes = ~np.isnan(valores)
+    posiciones = np.arange(n)
+
+    # Posición del valor presente anterior y siguiente de cada mes
+    anterior = np.maximum.accumulate(np.where(presentes, posiciones, -1), axis=-1)
+    siguiente = np.flip(np.minimum.accumulate(
+        np.flip(np.where(presentes, posiciones, n), axis=-1), axis=-1
+    ), axis=-1)
+    interior = ~presentes & (anterior >= 0) & (siguiente < n)
+
+    v_anterior = np.take_along_axis(valores, np.clip(anterior, 0, n - 1), axis=-1)
+    v_siguiente = np.take_along_axis(valores, np.clip(siguiente, 0, n - 1), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraccion = (posiciones - anterior) / (siguiente - anterior)
+        interpolados = v_anterior + (v_siguiente - v_anterior) * fraccion
+    return np.where(interior, interpolados, valores)
+
+
+def rellenar_estacional(valores: np.ndarray, meses_del_año: np.ndarray) -> np.ndarray:
+    """
+    Rellena cada NaN con el promedio del mismo mes del año en la serie (último eje);
+    los meses del año sin ningún dato se interpolan linealmente.
+    """
+    valores = np.asarray(valores, dtype=float)
+    promedios, _ = promedios_por_grupo(valores, meses_del_año, 13)
+    estacionales = np.take_along_axis(
+        promedios, np.broadcast_to(np.asarray(meses_del_año), valores.shape), axis=-1
+    )
+    return rellenar_lineal(np.where(np.isnan(valores), estacionales, valores))
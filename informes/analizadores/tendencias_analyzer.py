@@ -2,11 +2,16 @@
 Detector de Tendencias Temporales
 Analiza patrones, estacionalidad y anomalías en series temporales
 """
-import statistics
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Union
 import math
 
+import numpy as np
+
+from .serie_temporal import (
+    SerieTemporal, cambios_relativos, estadisticas_basicas, estadisticas_moviles,
+    promedios_por_grupo, regresion_lineal, z_scores
+)
+
 
 class DetectorTendencias:
     """
@@ -18,59 +23,59 @@ class DetectorTendencias:
     - Comparaciones interanuales
     """
     
+    # Meses de la ventana móvil de variabilidad reciente
+    VENTANA_MOVIL = 3
+    
     def __init__(self):
         pass
     
-    def analizar_temporal(self, datos_mensuales: List[Dict[str, Any]], 
+    def analizar_temporal(self, datos_mensuales: Union[SerieTemporal, List[Dict[str, Any]]], 
                          indice: str = 'ndvi') -> Dict[str, Any]:
         """
         Analiza tendencias temporales de un índice
         
         Args:
-            datos_mensuales: Lista de datos con formato
+            datos_mensuales: SerieTemporal o lista de datos con formato
                             [{'mes': '2024-01', 'ndvi': 0.75, ...}, ...]
             indice: Nombre del índice a analizar (ndvi, ndmi, savi)
         
         Returns:
             Diccionario con análisis completo de tendencias
         """
-        if not datos_mensuales or len(datos_mensuales) < 3:
+        if datos_mensuales is None or len(datos_mensuales) < 3:
             return self._resultado_insuficiente()
         
-        # Extraer valores y fechas
-        valores = []
-        fechas = []
-        for dato in datos_mensuales:
-            valor = dato.get(indice)
-            if valor is not None:
-                valores.append(valor)
-                mes_str = dato.get('mes', '')
-                try:
-                    fecha = datetime.strptime(mes_str, '%Y-%m')
-                    fechas.append(fecha)
-                except:
-                    fechas.append(None)
+        # Serie alineada al calendario (meses sin dato = NaN): las posiciones son meses reales
+        serie = SerieTemporal.como_serie(datos_mensuales).regularizar()
+        presentes = serie.mascara(indice)
+        valores = serie.valores(indice)[presentes]
         
         if len(valores) < 3:
             return self._resultado_insuficiente()
         
-        # Análisis de tendencia lineal
-        tendencia_lineal = self._calcular_tendencia_lineal(valores)
+        posiciones = np.flatnonzero(presentes)
+        fechas = [serie.fecha_texto(posicion) for posicion in posiciones]
+        fecha_valida = serie.fecha_valida[presentes]
+        
+        # Análisis de tendencia lineal (x = mes calendario, peso según nubosidad)
+        tendencia_lineal = self._calcular_tendencia_lineal(valores, posiciones, serie.pesos()[presentes])
         
         # Detectar estacionalidad
-        estacionalidad = self._detectar_estacionalidad(valores, fechas)
+        estacionalidad = self._detectar_estacionalidad(
+            valores, serie.meses_del_año[presentes], fecha_valida, len(serie)
+        )
         
         # Detectar anomalías
-        anomalias = self._detectar_anomalias_avanzadas(valores, fechas, datos_mensuales)
+        anomalias = self._detectar_anomalias_avanzadas(valores, fechas)
         
         # Identificar ciclos del cultivo
-        ciclos = self._identificar_ciclos(valores, fechas)
+        ciclos = self._identificar_ciclos(serie.regularizar('lineal').valores(indice), posiciones, serie)
         
         # Análisis de variabilidad
         variabilidad = self._analizar_variabilidad(valores)
         
         # Comparaciones (si hay más de un año)
-        comparaciones = self._comparar_periodos(valores, fechas)
+        comparaciones = self._comparar_periodos(valores, serie.años[presentes], fecha_valida)
         
         # Proyección simple
         proyeccion = self._proyectar_proximo_periodo(valores, tendencia_lineal)
@@ -86,33 +91,13 @@ class DetectorTendencias:
             'resumen': self._generar_resumen(tendencia_lineal, estacionalidad, anomalias)
         }
     
-    def _calcular_tendencia_lineal(self, valores: List[float]) -> Dict[str, Any]:
-        """Calcula tendencia lineal por mínimos cuadrados"""
-        n = len(valores)
-        x = list(range(n))
-        
-        # Mínimos cuadrados
-        x_mean = sum(x) / n
-        y_mean = sum(valores) / n
-        
-        numerator = sum((x[i] - x_mean) * (valores[i] - y_mean) for i in range(n))
-        denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
-        
-        if denominator == 0:
-            pendiente = 0
-        else:
-            pendiente = numerator / denominator
-        
-        intercepto = y_mean - pendiente * x_mean
-        
-        # Calcular R² (bondad de ajuste)
-        y_pred = [pendiente * xi + intercepto for xi in x]
-        ss_res = sum((valores[i] - y_pred[i]) ** 2 for i in range(n))
-        ss_tot = sum((valores[i] - y_mean) ** 2 for i in range(n))
-        r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
+    def _calcular_tendencia_lineal(self, valores: np.ndarray, posiciones: np.ndarray = None,
+                                   pesos: np.ndarray = None) -> Dict[str, Any]:
+        """Calcula tendencia lineal por mínimos cuadrados ponderados (posiciones = mes calendario)"""
+        pendiente, intercepto, r_squared = (float(v) for v in regresion_lineal(valores, posiciones, pesos))
         
         # Cambio total
-        cambio_total = valores[-1] - valores[0]
+        cambio_total = float(valores[-1] - valores[0])
         cambio_porcentual = (cambio_total / valores[0] * 100) if valores[0] != 0 else 0
         
         # Clasificar tendencia
@@ -139,40 +124,26 @@ class DetectorTendencias:
             'intercepto': round(intercepto, 4),
             'r_cuadrado': round(r_squared, 3),
             'cambio_total': round(cambio_total, 3),
-            'cambio_porcentual': round(cambio_porcentual, 1),
+            'cambio_porcentual': round(float(cambio_porcentual), 1),
             'confianza': 'alta' if r_squared > 0.7 else 'media' if r_squared > 0.4 else 'baja'
         }
     
-    def _detectar_estacionalidad(self, valores: List[float], 
-                                fechas: List[Optional[datetime]]) -> Dict[str, Any]:
-        """Detecta patrones estacionales"""
-        if len(valores) < 12:
+    def _detectar_estacionalidad(self, valores: np.ndarray, meses_del_año: np.ndarray,
+                                fecha_valida: np.ndarray, meses_cubiertos: int = None) -> Dict[str, Any]:
+        """Detecta patrones estacionales (meses_cubiertos: meses calendario de la serie, con huecos)"""
+        if (meses_cubiertos or len(valores)) < 12:
             return {'detectada': False, 'motivo': 'Datos insuficientes (< 12 meses)'}
         
-        # Agrupar por mes del año
-        meses_datos = {}
-        for i, fecha in enumerate(fechas):
-            if fecha:
-                mes = fecha.month
-                if mes not in meses_datos:
-                    meses_datos[mes] = []
-                meses_datos[mes].append(valores[i])
-        
-        # Calcular promedios por mes
-        if len(meses_datos) < 6:
-            return {'detectada': False, 'motivo': 'Datos insuficientes por mes'}
-        
-        promedios_mensuales = {mes: statistics.mean(vals) for mes, vals in meses_datos.items()}
+        # Promedio por mes del año (1..12) de los meses con fecha
+        promedios, cantidades = promedios_por_grupo(valores[fecha_valida], meses_del_año[fecha_valida], 13)
+        meses_ordenados = np.flatnonzero(cantidades)
         
-        # Detectar picos y valles
-        meses_ordenados = sorted(promedios_mensuales.keys())
-        valores_ordenados = [promedios_mensuales[m] for m in meses_ordenados]
-        
-        if len(valores_ordenados) < 6:
-            return {'detectada': False}
+        if len(meses_ordenados) < 6:
+            return {'detectada': False, 'motivo': 'Datos insuficientes por mes'}
         
-        max_val = max(valores_ordenados)
-        min_val = min(valores_ordenados)
+        valores_ordenados = promedios[meses_ordenados]
+        max_val = float(valores_ordenados.max())
+        min_val = float(valores_ordenados.min())
         rango = max_val - min_val
         
         # Considerar estacional si hay variación > 20%
@@ -181,8 +152,8 @@ class DetectorTendencias:
         meses_nombres = ['', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
                         'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
         
-        mes_pico = meses_ordenados[valores_ordenados.index(max_val)]
-        mes_valle = meses_ordenados[valores_ordenados.index(min_val)]
+        mes_pico = int(meses_ordenados[np.argmax(valores_ordenados)])
+        mes_valle = int(meses_ordenados[np.argmin(valores_ordenados)])
         
         return {
             'detectada': variacion_porcentual > 15,
@@ -194,77 +165,76 @@ class DetectorTendencias:
             'patron': self._describir_patron_estacional(mes_pico, mes_valle)
         }
     
-    def _detectar_anomalias_avanzadas(self, valores: List[float], 
-                                     fechas: List[Optional[datetime]],
-                                     datos_completos: List[Dict]) -> List[Dict]:
+    def _detectar_anomalias_avanzadas(self, valores: np.ndarray, 
+                                     fechas: List[Any]) -> List[Dict]:
         """Detecta anomalías usando múltiples criterios"""
         if len(valores) < 5:
             return []
         
         anomalias = []
-        promedio = statistics.mean(valores)
-        desv_std = statistics.stdev(valores)
-        
-        for i, valor in enumerate(valores):
-            # Criterio 1: Desviación estándar (Z-score)
-            z_score = (valor - promedio) / desv_std if desv_std > 0 else 0
+        promedio = float(valores.mean())
+        
+        # Criterio 1: Desviación estándar (Z-score)
+        z = z_scores(valores)
+        # Criterio 2: Cambio brusco respecto al anterior (> 25%)
+        cambio_brusco = cambios_relativos(valores) > 0.25
+        
+        for i in np.flatnonzero((np.abs(z) > 2) | cambio_brusco):
+            valor = float(valores[i])
+            z_score = float(z[i])
+            tipo = 'caida_brusca' if valor < promedio else 'pico_inusual'
+            severidad = 'severa' if abs(z_score) > 3 else 'moderada'
             
-            # Criterio 2: Cambio brusco respecto al anterior
-            cambio_brusco = False
-            if i > 0:
-                cambio = abs(valor - valores[i-1])
-                cambio_relativo = cambio / valores[i-1] if valores[i-1] != 0 else 0
-                if cambio_relativo > 0.25:  # Cambio > 25%
-                    cambio_brusco = True
+            fecha_str = fechas[i] if i < len(fechas) and fechas[i] else 'Desconocido'
             
-            # Detectar anomalía
-            if abs(z_score) > 2 or cambio_brusco:
-                tipo = 'caida_brusca' if valor < promedio else 'pico_inusual'
-                severidad = 'severa' if abs(z_score) > 3 else 'moderada'
-                
-                fecha_str = fechas[i].strftime('%B %Y') if i < len(fechas) and fechas[i] else 'Desconocido'
-                
-                anomalias.append({
-                    'indice': i,
-                    'fecha': fecha_str,
-                    'valor': round(valor, 3),
-                    'tipo': tipo,
-                    'severidad': severidad,
-                    'z_score': round(z_score, 2),
-                    'descripcion': f"Valor {'muy bajo' if tipo == 'caida_brusca' else 'muy alto'} en {fecha_str}"
-                })
+            anomalias.append({
+                'indice': int(i),
+                'fecha': fecha_str,
+                'valor': round(valor, 3),
+                'tipo': tipo,
+                'severidad': severidad,
+                'z_score': round(z_score, 2),
+                'descripcion': f"Valor {'muy bajo' if tipo == 'caida_brusca' else 'muy alto'} en {fecha_str}"
+            })
         
         return anomalias
     
-    def _identificar_ciclos(self, valores: List[float], 
-                          fechas: List[Optional[datetime]]) -> Dict[str, Any]:
-        """Identifica ciclos del cultivo"""
-        if len(valores) < 6:
+    def _identificar_ciclos(self, rellena: np.ndarray, posiciones: np.ndarray,
+                            serie: SerieTemporal) -> Dict[str, Any]:
+        """
+        Identifica ciclos del cultivo.
+        
+        Los vecinos se comparan en la serie calendario rellenada linealmente (un hueco
+        no convierte en pico al mes anterior), pero solo se reportan meses observados.
+        """
+        if len(posiciones) < 6:
             return {'identificados': False}
         
-        # Buscar picos (fases de máximo desarrollo)
-        picos = []
-        for i in range(1, len(valores) - 1):
-            if valores[i] > valores[i-1] and valores[i] > valores[i+1]:
-                if valores[i] > statistics.mean(valores):
-                    fecha_str = fechas[i].strftime('%B %Y') if i < len(fechas) and fechas[i] else f"Mes {i+1}"
-                    picos.append({
-                        'indice': i,
-                        'fecha': fecha_str,
-                        'valor': round(valores[i], 3)
-                    })
-        
-        # Buscar valles (fases de menor desarrollo)
-        valles = []
-        for i in range(1, len(valores) - 1):
-            if valores[i] < valores[i-1] and valores[i] < valores[i+1]:
-                if valores[i] < statistics.mean(valores):
-                    fecha_str = fechas[i].strftime('%B %Y') if i < len(fechas) and fechas[i] else f"Mes {i+1}"
-                    valles.append({
-                        'indice': i,
-                        'fecha': fecha_str,
-                        'valor': round(valores[i], 3)
-                    })
+        observados = np.zeros(len(rellena), dtype=bool)
+        observados[posiciones] = True
+        promedio = rellena[observados].mean()
+        centro = rellena[1:-1]
+        
+        # Picos (fases de máximo desarrollo) y valles (fases de menor desarrollo)
+        with np.errstate(invalid='ignore'):
+            es_pico = (centro > rellena[:-2]) & (centro > rellena[2:]) & (centro > promedio)
+            es_valle = (centro < rellena[:-2]) & (centro < rellena[2:]) & (centro < promedio)
+        posiciones_picos = np.flatnonzero(es_pico & observados[1:-1]) + 1
+        posiciones_valles = np.flatnonzero(es_valle & observados[1:-1]) + 1
+        
+        def describir(calendario: np.ndarray) -> List[Dict]:
+            # 'indice' = posición entre los meses con dato (como en las anomalías)
+            return [
+                {
+                    'indice': int(np.searchsorted(posiciones, i)),
+                    'fecha': serie.fecha_texto(i) or f"Mes {i+1}",
+                    'valor': round(float(rellena[i]), 3)
+                }
+                for i in calendario
+            ]
+        
+        picos = describir(posiciones_picos)
+        valles = describir(posiciones_valles)
         
         return {
             'identificados': len(picos) > 0 or len(valles) > 0,
@@ -274,10 +244,11 @@ class DetectorTendencias:
             'descripcion': f"Detectados {len(picos)} pico(s) y {len(valles)} valle(s) en el período"
         }
     
-    def _analizar_variabilidad(self, valores: List[float]) -> Dict[str, Any]:
+    def _analizar_variabilidad(self, valores: np.ndarray) -> Dict[str, Any]:
         """Analiza variabilidad de los datos"""
-        promedio = statistics.mean(valores)
-        desv_std = statistics.stdev(valores) if len(valores) > 1 else 0
+        estadisticas = estadisticas_basicas(valores)
+        promedio = float(estadisticas['promedio'])
+        desv_std = float(estadisticas['desviacion_estandar'])
         coef_variacion = (desv_std / promedio * 100) if promedio != 0 else 0
         
         if coef_variacion < 10:
@@ -289,77 +260,69 @@ class DetectorTendencias:
         else:
             clasificacion = 'Alta - Datos muy variables'
         
+        # Dispersión en ventanas móviles: la última ventana frente a la más estable
+        moviles = estadisticas_moviles(valores, self.VENTANA_MOVIL)['desviacion_estandar']
+        
         return {
             'desviacion_estandar': round(desv_std, 3),
             'coeficiente_variacion': round(coef_variacion, 1),
             'clasificacion': clasificacion,
-            'rango': round(max(valores) - min(valores), 3)
+            'rango': round(float(estadisticas['maximo'] - estadisticas['minimo']), 3),
+            'desviacion_reciente': round(float(moviles[-1]), 3) if len(moviles) else None,
+            'desviacion_movil_minima': round(float(moviles.min()), 3) if len(moviles) else None,
         }
     
-    def _comparar_periodos(self, valores: List[float], 
-                          fechas: List[Optional[datetime]]) -> Dict[str, Any]:
+    def _comparar_periodos(self, valores: np.ndarray, años: np.ndarray,
+                          fecha_valida: np.ndarray) -> Dict[str, Any]:
         """Compara períodos anuales si hay datos suficientes"""
         if len(valores) < 12:
             return {'disponible': False, 'motivo': 'Datos insuficientes'}
         
-        # Agrupar por año
-        años_datos = {}
-        for i, fecha in enumerate(fechas):
-            if fecha:
-                año = fecha.year
-                if año not in años_datos:
-                    años_datos[año] = []
-                años_datos[año].append(valores[i])
-        
-        if len(años_datos) < 2:
+        # Promedios por año (años de los meses con fecha)
+        años_presentes, grupos = np.unique(años[fecha_valida], return_inverse=True)
+        if len(años_presentes) < 2:
             return {'disponible': False, 'motivo': 'Solo un año de datos'}
-        
-        # Calcular promedios por año
-        promedios_anuales = {año: statistics.mean(vals) for año, vals in años_datos.items()}
-        años_ordenados = sorted(promedios_anuales.keys())
+        promedios, _ = promedios_por_grupo(valores[fecha_valida], grupos, len(años_presentes))
         
         # Comparar último año vs anterior
-        if len(años_ordenados) >= 2:
-            año_actual = años_ordenados[-1]
-            año_anterior = años_ordenados[-2]
-            
-            promedio_actual = promedios_anuales[año_actual]
-            promedio_anterior = promedios_anuales[año_anterior]
-            
-            diferencia = promedio_actual - promedio_anterior
-            porcentaje_cambio = (diferencia / promedio_anterior * 100) if promedio_anterior != 0 else 0
-            
-            if porcentaje_cambio > 5:
-                conclusion = f"mejor que {año_anterior}"
-            elif porcentaje_cambio < -5:
-                conclusion = f"peor que {año_anterior}"
-            else:
-                conclusion = f"similar a {año_anterior}"
-            
-            return {
-                'disponible': True,
-                'año_actual': año_actual,
-                'año_anterior': año_anterior,
-                'promedio_actual': round(promedio_actual, 3),
-                'promedio_anterior': round(promedio_anterior, 3),
-                'diferencia': round(diferencia, 3),
-                'porcentaje_cambio': round(porcentaje_cambio, 1),
-                'conclusion': conclusion
-            }
-        
-        return {'disponible': False}
+        año_actual = int(años_presentes[-1])
+        año_anterior = int(años_presentes[-2])
+        
+        promedio_actual = float(promedios[-1])
+        promedio_anterior = float(promedios[-2])
+        
+        diferencia = promedio_actual - promedio_anterior
+        porcentaje_cambio = (diferencia / promedio_anterior * 100) if promedio_anterior != 0 else 0
+        
+        if porcentaje_cambio > 5:
+            conclusion = f"mejor que {año_anterior}"
+        elif porcentaje_cambio < -5:
+            conclusion = f"peor que {año_anterior}"
+        else:
+            conclusion = f"similar a {año_anterior}"
+        
+        return {
+            'disponible': True,
+            'año_actual': año_actual,
+            'año_anterior': año_anterior,
+            'promedio_actual': round(promedio_actual, 3),
+            'promedio_anterior': round(promedio_anterior, 3),
+            'diferencia': round(diferencia, 3),
+            'porcentaje_cambio': round(porcentaje_cambio, 1),
+            'conclusion': conclusion
+        }
     
-    def _proyectar_proximo_periodo(self, valores: List[float], 
+    def _proyectar_proximo_periodo(self, valores: np.ndarray, 
                                   tendencia: Dict) -> Dict[str, Any]:
         """Proyecta valor del próximo período basado en tendencia"""
-        ultimo_valor = valores[-1]
+        ultimo_valor = float(valores[-1])
         pendiente = tendencia['pendiente']
         
         # Proyección simple: último valor + pendiente
         valor_proyectado = ultimo_valor + pendiente
         
         # Calcular intervalo de confianza simple
-        desv_std = statistics.stdev(valores)
+        desv_std = float(estadisticas_basicas(valores)['desviacion_estandar'])
         margen_error = 1.96 * desv_std / math.sqrt(len(valores))  # 95% confianza
         
         return {
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InformesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "informes"
+
+    def ready(self):
+        # Invalidación de las instantáneas de análisis al cambiar IndiceMensual
+        from . import signals
@@ -4,8 +4,10 @@ Sistema completo de generación de reportes satelitales con logos AgroTech
 """
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, date
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from io import BytesIO
 
 # ReportLab imports
@@ -20,33 +22,42 @@ from reportlab.platypus import (
 )
 from reportlab.pdfgen import canvas
 
-# Matplotlib para gráficos (usar backend no-GUI para evitar problemas con threads)
-import matplotlib
-matplotlib.use('Agg')  # ✅ Backend no-GUI, seguro para threads y servidores web
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.figure import Figure
-import seaborn as sns
-
 # Django imports
 from django.conf import settings
+from django.db import connection
 
 # Modelos locales
 from informes.models import Parcela, IndiceMensual
 
-# Analizadores
-from informes.analizadores.ndvi_analyzer import AnalizadorNDVI
-from informes.analizadores.ndmi_analyzer import AnalizadorNDMI
-from informes.analizadores.savi_analyzer import AnalizadorSAVI
-from informes.analizadores.tendencias_analyzer import DetectorTendencias
-from informes.analizadores.recomendaciones_engine import GeneradorRecomendaciones
-
 # Servicio de Gemini AI para análisis inteligente
-from informes.services.gemini_service import gemini_service
+from informes.services.gemini_service import VERSION_PROMPT_ANALISIS_IMAGEN, gemini_service
+from informes.services import cache_analisis_imagenes
+
+# Gráficos matplotlib (backend Agg, caché en disco y pool de procesos)
+from informes.services.graficos import VERSION_ESTILO_GRAFICOS, cache_graficos
+from informes.services.fragmentos_pdf import SeccionPDF, cache_fragmentos, fragmentos_disponibles
+from informes.services.imagenes_pdf import VERSION_PREPARACION, PreparadorImagenesPDF
+from informes.services.instantaneas_analisis import (
+    analizar_datos, datos_analisis, instantaneas_analisis, periodo_analisis
+)
+from informes.services.pipeline_informes import Etapa, PipelineInforme
+from informes.services.salida_pdf import SalidaPDF
+from informes.services.serie_indices import SerieIndicesMensuales
 
 import logging
 logger = logging.getLogger(__name__)
 
+# Imágenes de la galería: (tipo de índice, campo de IndiceMensual, descripción)
+IMAGENES_GALERIA = (
+    ('NDVI', 'imagen_ndvi', "Índice de Vegetación de Diferencia Normalizada - Mide la salud y vigor vegetal"),
+    ('NDMI', 'imagen_ndmi', "Índice de Humedad de Diferencia Normalizada - Mide el contenido de agua en la vegetación"),
+    ('SAVI', 'imagen_savi', "Índice de Vegetación Ajustado al Suelo - Mide la cobertura vegetal minimizando el efecto del suelo"),
+)
+
+
+class SinDatosInforme(ValueError):
+    """La parcela no existe, está inactiva o no tiene meses en el período: reintentar no cambia nada"""
+
 
 def limpiar_html_para_reportlab(texto: str) -> str:
     """
@@ -103,6 +114,30 @@ class GeneradorPDFProfesional:
         
         # Estilos
         self.estilos = self._crear_estilos()
+        
+        # Callback (etapa, porcentaje, mensaje) de la generación en curso
+        self._reportar_progreso = None
+        self._serie: Optional[SerieIndicesMensuales] = None
+        self._parcela_serie_id: Optional[int] = None
+        self.ultima_salida: Optional[SalidaPDF] = None
+        # Segundos por etapa del último informe (ver PipelineInforme)
+        self.ultimos_tiempos: Dict[str, float] = {}
+        # Variantes reducidas de las imágenes de la galería (contadores por informe)
+        self.preparador_imagenes = PreparadorImagenesPDF()
+        # False si la galería usó análisis de respaldo (su fragmento no se reutiliza)
+        self._galeria_completa = True
+    
+    def _serie_de(self, parcela_id: int) -> SerieIndicesMensuales:
+        """Serie mensual de la parcela (cargada una vez por informe)"""
+        if self._serie is None or self._parcela_serie_id != parcela_id:
+            self._serie = SerieIndicesMensuales.cargar(Parcela.objects.get(pk=parcela_id))
+            self._parcela_serie_id = parcela_id
+        return self._serie
+    
+    def _progreso(self, etapa: str, porcentaje: int, mensaje: str):
+        """Informa el avance si quien genera el informe lo pidió (trabajo en segundo plano)"""
+        if self._reportar_progreso:
+            self._reportar_progreso(etapa, porcentaje, mensaje)
     
     def _crear_estilos(self):
         """Crea estilos personalizados para el documento"""
@@ -180,7 +215,9 @@ class GeneradorPDFProfesional:
     
     def generar_informe_completo(self, parcela_id: int, 
                                 meses_atras: int = 12,
-                                output_path: str = None) -> str:
+                                output_path: str = None,
+                                reportar_progreso: Optional[Callable[[str, int, str], None]] = None,
+                                salida: Optional[SalidaPDF] = None) -> str:
         """
         Genera informe completo en PDF
         
@@ -188,173 +225,279 @@ class GeneradorPDFProfesional:
             parcela_id: ID de la parcela
             meses_atras: Período de análisis (meses)
             output_path: Ruta de salida del PDF (opcional)
+            reportar_progreso: Callback (etapa, porcentaje, mensaje) con etapa
+                'analizando' o 'renderizando'
+            salida: Destino ya abierto (p.ej. para subirlo luego al storage); si se
+                indica, output_path se ignora y el PDF queda en salida.ruta
         
         Returns:
             Ruta del archivo PDF generado
         """
-        # Obtener parcela
+        self._reportar_progreso = reportar_progreso
+        self.preparador_imagenes.reiniciar_contadores()
+        contexto = self._pipeline(reportar_progreso).ejecutar(
+            parcela_id=parcela_id, meses_atras=meses_atras, output_path=output_path, salida=salida
+        )
+        self.ultimos_tiempos = contexto['tiempos']
+        return contexto['ruta_pdf']
+    
+    def _pipeline(self, reportar_progreso: Optional[Callable[[str, int, str], None]] = None) -> PipelineInforme:
+        """Etapas del informe: análisis, gráficos y Gemini corren en paralelo tras cargar la serie"""
+        return PipelineInforme('profesional', [
+            Etapa('cargar', self._etapa_cargar,
+                  progreso=('analizando', 5, 'Recopilando datos satelitales')),
+            Etapa('analizar', self._etapa_analizar, depende_de=('cargar',),
+                  progreso=('analizando', 10, 'Analizando índices')),
+            Etapa('graficos', self._etapa_graficos, depende_de=('cargar',)),
+            Etapa('ia', self._etapa_ia, depende_de=('cargar',),
+                  progreso=('analizando', 15, 'Analizando índices con Gemini AI')),
+            Etapa('renderizar', self._etapa_renderizar, depende_de=('analizar', 'graficos', 'ia'),
+                  progreso=('renderizando', 50, 'Componiendo secciones del informe')),
+        ], reportar_progreso=reportar_progreso)
+    
+    def _etapa_cargar(self, contexto: Dict) -> Dict:
+        """Parcela, período y serie mensual (una consulta; el período se filtra en memoria)"""
         try:
-            parcela = Parcela.objects.get(id=parcela_id, activa=True)
+            parcela = Parcela.objects.get(id=contexto['parcela_id'], activa=True)
         except Parcela.DoesNotExist:
-            raise ValueError(f"Parcela {parcela_id} no encontrada")
-        
-        # Obtener datos históricos
-        fecha_fin = date.today()
-        fecha_inicio = date(fecha_fin.year, fecha_fin.month, 1)
-        
-        # Retroceder meses_atras
-        for _ in range(meses_atras):
-            if fecha_inicio.month == 1:
-                fecha_inicio = date(fecha_inicio.year - 1, 12, 1)
-            else:
-                fecha_inicio = date(fecha_inicio.year, fecha_inicio.month - 1, 1)
-        
-        # Obtener índices mensuales
-        indices = IndiceMensual.objects.filter(
-            parcela=parcela,
-            año__gte=fecha_inicio.year,
-            mes__gte=fecha_inicio.month if fecha_inicio.year == fecha_fin.year else 1
-        ).order_by('año', 'mes')
-        
-        if not indices.exists():
-            raise ValueError(f"No hay datos disponibles para la parcela {parcela.nombre}")
-        
-        # Preparar datos para análisis
-        datos_analisis = self._preparar_datos_analisis(indices)
-        
-        # Ejecutar análisis (pasando los índices originales para caché)
-        analisis_completo = self._ejecutar_analisis(datos_analisis, parcela, indices)
-        
-        # Generar gráficos
-        graficos = self._generar_graficos(datos_analisis)
-        
-        # Crear PDF
-        if not output_path:
-            nombre_archivo = f"informe_{parcela.nombre.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            output_path = os.path.join(settings.MEDIA_ROOT, 'informes', nombre_archivo)
-        
-        # Asegurar que existe el directorio
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        # Construir documento
-        doc = SimpleDocTemplate(
-            output_path,
-            pagesize=self.pagesize,
-            rightMargin=self.margen,
-            leftMargin=self.margen,
-            topMargin=self.margen + 1*cm,  # Espacio para header
-            bottomMargin=self.margen + 0.5*cm  # Espacio para footer
-        )
+            raise SinDatosInforme(f"Parcela {contexto['parcela_id']} no encontrada")
         
-        # Contenido del documento
-        story = []
+        # Obtener datos históricos (desde el primer día de hace meses_atras meses)
+        fecha_inicio, fecha_fin = periodo_analisis(contexto['meses_atras'])
         
-        # Portada
-        story.extend(self._crear_portada(parcela, fecha_inicio, fecha_fin))
-        story.append(PageBreak())
+        self._serie = SerieIndicesMensuales.cargar(parcela)
+        self._parcela_serie_id = parcela.id
+        indices = self._serie.desde(fecha_inicio, fecha_fin)
         
-        # Resumen ejecutivo
-        story.extend(self._crear_resumen_ejecutivo(analisis_completo))
-        story.append(Spacer(1, 0.5*cm))
+        if not indices:
+            raise SinDatosInforme(f"No hay datos disponibles para la parcela {parcela.nombre}")
         
-        # 🤖 Análisis detallado de Gemini AI (si está disponible)
-        if analisis_completo.get('gemini') and not analisis_completo['gemini'].get('error'):
-            story.extend(self._crear_seccion_analisis_gemini(analisis_completo['gemini']))
-        
-        story.append(PageBreak())
-        
-        # 📸 Galería de Imágenes Satelitales (si hay imágenes disponibles)
-        story.extend(self._crear_galeria_imagenes_satelitales(
-            parcela, indices, analisis_completo.get('gemini')
-        ))
-        story.append(PageBreak())
-        
-        # Información de la parcela
-        story.extend(self._crear_info_parcela(parcela))
-        story.append(Spacer(1, 1*cm))
-        
-        # Análisis de índices
-        story.extend(self._crear_seccion_ndvi(analisis_completo['ndvi'], graficos))
-        story.append(PageBreak())
-        
-        story.extend(self._crear_seccion_ndmi(analisis_completo['ndmi'], graficos))
-        story.append(PageBreak())
-        
-        if 'savi' in analisis_completo and analisis_completo['savi']:
-            story.extend(self._crear_seccion_savi(analisis_completo['savi'], graficos))
-            story.append(PageBreak())
-        
-        # Análisis de tendencias
-        story.extend(self._crear_seccion_tendencias(analisis_completo['tendencias'], graficos))
-        story.append(PageBreak())
+        return {
+            'parcela': parcela,
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin,
+            'indices': indices,
+            'datos': self._preparar_datos_analisis(indices),
+        }
+    
+    def _etapa_analizar(self, contexto: Dict) -> Dict:
+        """Instantánea materializada del análisis si los datos del período no cambiaron"""
+        return {'analisis': instantaneas_analisis.obtener(
+            contexto['parcela'], contexto['meses_atras'], contexto['indices'], contexto['datos']
+        )}
+    
+    def _etapa_graficos(self, contexto: Dict) -> Dict:
+        return {'graficos': self._generar_graficos(contexto['datos'])}
+    
+    def _etapa_ia(self, contexto: Dict) -> Dict:
+        return {'analisis_gemini': self._analisis_gemini(contexto['parcela'], contexto['indices'])}
+    
+    def _etapa_renderizar(self, contexto: Dict) -> Dict:
+        """Compone las secciones y escribe el PDF (fragmentos cacheados o documento completo)"""
+        parcela = contexto['parcela']
+        analisis = {**contexto['analisis'], 'gemini': contexto['analisis_gemini']}
+        secciones = self._secciones_informe(
+            parcela, contexto['indices'], contexto['fecha_inicio'], contexto['fecha_fin'],
+            contexto['datos'], analisis, contexto['graficos']
+        )
         
-        # Recomendaciones
-        story.extend(self._crear_seccion_recomendaciones(analisis_completo['recomendaciones']))
-        story.append(PageBreak())
+        # Crear PDF: se escribe a un temporal (hash y tamaño al vuelo) y se mueve al terminar
+        salida = contexto.get('salida')
+        if salida is None:
+            output_path = contexto.get('output_path')
+            if not output_path:
+                nombre_archivo = f"informe_{parcela.nombre.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+                output_path = os.path.join(settings.MEDIA_ROOT, 'informes', nombre_archivo)
+            destino = SalidaPDF(ruta_final=output_path)
+        else:
+            destino = salida
+        self.ultima_salida = destino
+        
+        plantilla = {
+            'pagesize': self.pagesize,
+            'rightMargin': self.margen,
+            'leftMargin': self.margen,
+            'topMargin': self.margen + 1*cm,  # Espacio para header
+            'bottomMargin': self.margen + 0.5*cm,  # Espacio para footer
+        }
         
-        # Tabla de datos
-        story.extend(self._crear_tabla_datos(datos_analisis))
+        try:
+            if fragmentos_disponibles():
+                self._construir_por_fragmentos(secciones, plantilla, destino)
+            else:
+                # Documento completo de una vez, con headers y footers
+                story = []
+                for numero, (_, _, construir) in enumerate(secciones):
+                    if numero:
+                        story.append(PageBreak())
+                    story.extend(construir())
+                self._progreso('renderizando', 90, 'Construyendo PDF')
+                SimpleDocTemplate(destino, **plantilla).build(
+                    story, onFirstPage=self._crear_header_footer, onLaterPages=self._crear_header_footer
+                )
+        except Exception:
+            destino.descartar()
+            raise
+        
+        imagenes = self.preparador_imagenes.resumen()
+        if imagenes['imagenes']:
+            logger.info(
+                f"🗜️ Imágenes del informe: {imagenes['imagenes']}, "
+                f"{imagenes['bytes_originales'] / 1024:.0f} KB → {imagenes['bytes_preparados'] / 1024:.0f} KB "
+                f"(ahorro {imagenes['bytes_ahorrados'] / 1024:.0f} KB); PDF final {destino.tamaño / 1024:.0f} KB"
+            )
         
-        # Construir PDF con headers y footers
-        doc.build(story, onFirstPage=self._crear_header_footer, 
-                 onLaterPages=self._crear_header_footer)
+        if salida is not None:
+            destino.cerrar()
+            return {'ruta_pdf': destino.ruta}
+        return {'ruta_pdf': destino.mover_a()}
+    
+    def _secciones_informe(self, parcela: Parcela, indices: List[IndiceMensual], fecha_inicio: date,
+                           fecha_fin: date, datos: List[Dict], analisis: Dict,
+                           graficos: Dict[str, BytesIO]) -> List[SeccionPDF]:
+        """
+        Secciones del informe en orden con las entradas que determinan su contenido
+        (clave del fragmento cacheado). Cada sección empieza en página nueva.
+        """
+        info_parcela = {
+            'nombre': parcela.nombre,
+            'propietario': str(parcela.propietario),
+            'tipo_cultivo': parcela.tipo_cultivo,
+            'area_hectareas': parcela.area_hectareas,
+            'centroide': parcela.centroide.wkt if parcela.centroide else None,
+            'fecha_inicio_monitoreo': parcela.fecha_inicio_monitoreo,
+        }
         
-        return output_path
+        def resumen() -> List:
+            elementos = self._crear_resumen_ejecutivo(analisis)
+            elementos.append(Spacer(1, 0.5*cm))
+            # 🤖 Análisis detallado de Gemini AI (si está disponible)
+            if analisis.get('gemini') and not analisis['gemini'].get('error'):
+                elementos.extend(self._crear_seccion_analisis_gemini(analisis['gemini']))
+            return elementos
+        
+        def info_y_ndvi() -> List:
+            elementos = self._crear_info_parcela(parcela)
+            elementos.append(Spacer(1, 1*cm))
+            elementos.extend(self._crear_seccion_ndvi(analisis['ndvi'], graficos))
+            return elementos
+        
+        secciones = [
+            ('portada',
+             {'parcela': info_parcela, 'periodo': [fecha_inicio, fecha_fin],
+              'generado': datetime.now().strftime('%d/%m/%Y %H:%M')},
+             lambda: self._crear_portada(parcela, fecha_inicio, fecha_fin)),
+            ('resumen', {'analisis': analisis}, resumen),
+            # 📸 Galería de Imágenes Satelitales (las llamadas a Gemini solo si cambió algo)
+            ('galeria', self._entradas_galeria(parcela, indices),
+             lambda: self._crear_galeria_imagenes_satelitales(parcela, indices, analisis.get('gemini'))),
+            ('ndvi', {'parcela': info_parcela, 'ndvi': analisis['ndvi']}, info_y_ndvi),
+            ('ndmi', {'ndmi': analisis['ndmi']},
+             lambda: self._crear_seccion_ndmi(analisis['ndmi'], graficos)),
+        ]
+        if analisis.get('savi'):
+            secciones.append(('savi', {'savi': analisis['savi']},
+                              lambda: self._crear_seccion_savi(analisis['savi'], graficos)))
+        secciones.extend([
+            # Los gráficos van incrustados: el estilo también invalida el fragmento
+            ('tendencias', {'tendencias': analisis['tendencias'], 'graficos': self._serie_graficos(datos),
+                            'version_estilo_graficos': VERSION_ESTILO_GRAFICOS},
+             lambda: self._crear_seccion_tendencias(analisis['tendencias'], graficos)),
+            ('recomendaciones', {'recomendaciones': analisis['recomendaciones']},
+             lambda: self._crear_seccion_recomendaciones(analisis['recomendaciones'])),
+            ('tabla_datos', {'datos': datos}, lambda: self._crear_tabla_datos(datos)),
+        ])
+        return secciones
+    
+    def _entradas_galeria(self, parcela: Parcela, indices: List[IndiceMensual]) -> Dict:
+        """Lo que cambia la galería: metadatos, valores y hash de cada imagen, y el mes anterior"""
+        serie = self._serie_de(parcela.id)
+        meses = []
+        for idx in indices:
+            anterior = serie.anterior(idx)
+            imagenes = {}
+            for tipo_indice, ruta in serie.imagenes(idx).items():
+                try:
+                    sha256 = cache_analisis_imagenes.sha256_imagen(ruta)
+                except OSError:
+                    sha256 = None
+                imagenes[tipo_indice] = {
+                    'sha256': sha256,
+                    'valores': self._valores_indice(idx, tipo_indice),
+                    'anterior': self._valores_indice(anterior, tipo_indice)[0] if anterior else None,
+                }
+            meses.append({
+                'periodo': [idx.año, idx.mes],
+                'fecha_imagen': idx.fecha_imagen,
+                'satelite': idx.satelite_imagen,
+                'resolucion': idx.resolucion_imagen,
+                'nubosidad': idx.nubosidad_imagen,
+                'ndvi_rango': [idx.ndvi_minimo, idx.ndvi_maximo],
+                'imagenes': imagenes,
+            })
+        return {
+            'parcela': [parcela.nombre, parcela.area_hectareas,
+                        getattr(parcela, 'latitud', None), getattr(parcela, 'longitud', None)],
+            'meses': meses,
+            'version_prompt': VERSION_PROMPT_ANALISIS_IMAGEN,
+            'imagenes_pdf': [self.preparador_imagenes.dpi, VERSION_PREPARACION],
+        }
+    
+    def _construir_por_fragmentos(self, secciones: List[SeccionPDF], plantilla: Dict, destino: SalidaPDF):
+        """
+        Renderiza solo las secciones cuyas entradas cambiaron y ensambla el informe
+        concatenando páginas; encabezado y pie se estampan con la numeración final
+        """
+        fragmentos = []
+        degradados = []
+        renderizadas = 0
+        for seccion in secciones:
+            self._galeria_completa = True
+            ruta, renderizada = cache_fragmentos.obtener(seccion, plantilla)
+            renderizadas += renderizada
+            if ruta is None:
+                continue
+            fragmentos.append(ruta)
+            if renderizada and not self._galeria_completa:
+                # Con análisis de respaldo: el próximo informe vuelve a intentar con Gemini
+                degradados.append(ruta)
+        
+        self._progreso('renderizando', 90, 'Ensamblando PDF')
+        try:
+            paginas = cache_fragmentos.ensamblar(fragmentos, destino, self.pagesize, self._crear_header_footer)
+        finally:
+            for ruta in degradados:
+                cache_fragmentos.descartar(ruta)
+        logger.info(f"🧩 Informe ensamblado: {paginas} páginas, "
+                    f"{len(secciones) - renderizadas}/{len(secciones)} secciones reutilizadas")
     
     def _preparar_datos_analisis(self, indices: List[IndiceMensual]) -> List[Dict]:
         """Prepara datos en formato para análisis"""
-        datos = []
-        for indice in indices:
-            datos.append({
-                'mes': f"{indice.año}-{indice.mes:02d}",
-                'periodo': indice.periodo_texto,
-                'ndvi': indice.ndvi_promedio,
-                'ndmi': indice.ndmi_promedio,
-                'savi': indice.savi_promedio,
-                'temperatura': indice.temperatura_promedio,
-                'precipitacion': indice.precipitacion_total
-            })
-        return datos
+        return datos_analisis(indices)
     
-    def _ejecutar_analisis(self, datos: List[Dict], parcela: Parcela, indices: List) -> Dict:
-        """Ejecuta todos los análisis, incluyendo Gemini AI"""
-        # Inicializar analizadores tradicionales
-        analizador_ndvi = AnalizadorNDVI(tipo_cultivo=parcela.tipo_cultivo)
-        analizador_ndmi = AnalizadorNDMI(tipo_cultivo=parcela.tipo_cultivo)
-        analizador_savi = AnalizadorSAVI(tipo_cultivo=parcela.tipo_cultivo)
-        detector_tendencias = DetectorTendencias()
-        generador_recomendaciones = GeneradorRecomendaciones(tipo_cultivo=parcela.tipo_cultivo)
-        
-        # Ejecutar análisis tradicionales
-        analisis_ndvi = analizador_ndvi.analizar(datos)
-        analisis_ndmi = analizador_ndmi.analizar(datos)
-        analisis_savi = analizador_savi.analizar(datos) if any(d.get('savi') for d in datos) else None
-        
-        # Tendencias
-        tendencias = detector_tendencias.analizar_temporal(datos, 'ndvi')
-        
-        # Recomendaciones tradicionales
-        recomendaciones = generador_recomendaciones.generar_recomendaciones(
-            analisis_ndvi, analisis_ndmi, analisis_savi, tendencias
-        )
-        
-        # 🤖 ANÁLISIS CON GEMINI AI (caché optimizado y control de tokens)
+    def _analisis_indices(self, datos: List[Dict], parcela: Parcela) -> Dict:
+        """Análisis tradicionales: índices, tendencias y recomendaciones"""
+        return analizar_datos(datos, parcela.tipo_cultivo)
+    
+    def _analisis_gemini(self, parcela: Parcela, indices: List[IndiceMensual]) -> Optional[Dict]:
+        """Análisis con Gemini AI (caché en el último IndiceMensual y control de tokens)"""
         analisis_gemini = None
         motivo_regeneracion = None
         if gemini_service:
             try:
                 # VERIFICAR SI EXISTE ANÁLISIS EN CACHÉ
-                ultimo_indice = indices.order_by('-año', '-mes').first()
+                ultimo_indice = indices[-1] if indices else None
+                # Datos NDVI/clima con los que se comparará el análisis guardado
+                datos_actuales = {
+                    'ndvi': ultimo_indice.ndvi_promedio,
+                    'clima': getattr(ultimo_indice, 'clima', None),
+                } if ultimo_indice else {}
                 if ultimo_indice and ultimo_indice.analisis_gemini and ultimo_indice.fecha_analisis_gemini:
                     from datetime import timedelta
                     edad_cache = datetime.now() - ultimo_indice.fecha_analisis_gemini.replace(tzinfo=None)
                     # Verificar si el caché tiene menos de 30 días
                     if edad_cache < timedelta(days=30):
                         # Verificar si los datos NDVI/clima han cambiado desde el análisis
-                        datos_actuales = {
-                            'ndvi': ultimo_indice.ndvi_promedio,
-                            'clima': getattr(ultimo_indice, 'clima', None),
-                        }
                         datos_analizados = ultimo_indice.analisis_gemini.get('datos_usados', {})
                         if datos_actuales == datos_analizados:
                             logger.info(f"✅ Usando análisis de Gemini desde caché (edad: {edad_cache.days} días)")
@@ -394,7 +537,7 @@ class GeneradorPDFProfesional:
                         tipo_analisis='completo'
                     )
                     # Guardar los datos usados para comparación futura
-                    if analisis_gemini is not None:
+                    if analisis_gemini is not None and ultimo_indice:
                         ultimo_indice.analisis_gemini = {**analisis_gemini, 'datos_usados': datos_actuales}
                         ultimo_indice.fecha_analisis_gemini = datetime.now()
                         ultimo_indice.save(update_fields=['analisis_gemini', 'fecha_analisis_gemini'])
@@ -406,107 +549,31 @@ class GeneradorPDFProfesional:
         else:
             logger.warning("⚠️ Servicio de Gemini no disponible")
         
-        return {
-            'ndvi': analisis_ndvi,
-            'ndmi': analisis_ndmi,
-            'savi': analisis_savi,
-            'tendencias': tendencias,
-            'recomendaciones': recomendaciones,
-            'gemini': analisis_gemini  # ✨ Nuevo: análisis de Gemini
-        }
+        return analisis_gemini
     
     def _generar_graficos(self, datos: List[Dict]) -> Dict[str, BytesIO]:
-        """Genera todos los gráficos necesarios"""
-        graficos = {}
-        
-        # Gráfico de evolución temporal
-        graficos['evolucion_temporal'] = self._grafico_evolucion_temporal(datos)
-        
-        # Gráfico comparativo
-        graficos['comparativo'] = self._grafico_comparativo(datos)
-        
-        return graficos
+        """Genera todos los gráficos necesarios (caché en disco + pool de procesos)"""
+        serie = self._serie_graficos(datos)
+        pngs = cache_graficos.renderizar({
+            'evolucion_temporal': ('evolucion_temporal', serie),
+            'comparativo': ('comparativo', serie),
+        })
+        return {nombre: BytesIO(contenido) for nombre, contenido in pngs.items()}
+    
+    def _serie_graficos(self, datos: List[Dict]) -> Dict:
+        """Entrada serializable de los gráficos: solo lo que se dibuja"""
+        return {'serie': [
+            {'periodo': d['periodo'], 'ndvi': d.get('ndvi'), 'ndmi': d.get('ndmi'), 'savi': d.get('savi')}
+            for d in datos
+        ]}
     
     def _grafico_evolucion_temporal(self, datos: List[Dict]) -> BytesIO:
         """Genera gráfico de evolución temporal"""
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
-        # Configurar estilo
-        sns.set_style("whitegrid")
-        
-        # Extraer datos
-        meses = [d['periodo'] for d in datos]
-        ndvi = [d.get('ndvi', 0) for d in datos]
-        ndmi = [d.get('ndmi', 0) for d in datos]
-        savi = [d.get('savi', 0) for d in datos]
-        
-        # Graficar
-        ax.plot(meses, ndvi, marker='o', linewidth=2.5, color='#2E8B57', label='NDVI (Salud)', markersize=6)
-        ax.plot(meses, ndmi, marker='s', linewidth=2.5, color='#17a2b8', label='NDMI (Humedad)', markersize=6)
-        if any(savi):
-            ax.plot(meses, savi, marker='^', linewidth=2.5, color='#FF7A00', label='SAVI (Cobertura)', markersize=6)
-        
-        # Configurar
-        ax.set_xlabel('Período', fontsize=12, fontweight='bold')
-        ax.set_ylabel('Valor del Índice', fontsize=12, fontweight='bold')
-        ax.set_title('Evolución Temporal de Índices de Vegetación', 
-                     fontsize=14, fontweight='bold', color='#2c3e50')
-        ax.legend(loc='best', fontsize=10, framealpha=0.9)
-        ax.grid(True, alpha=0.3, linestyle='--')
-        
-        # Rotar etiquetas
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        
-        # Guardar en buffer
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        plt.close()
-        
-        return buffer
+        return BytesIO(cache_graficos.renderizar_uno('evolucion_temporal', self._serie_graficos(datos)))
     
     def _grafico_comparativo(self, datos: List[Dict]) -> BytesIO:
         """Genera gráfico de barras comparativo"""
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        # Calcular promedios (filtrar None)
-        ndvi_valores = [d.get('ndvi') for d in datos if d.get('ndvi') is not None]
-        ndmi_valores = [d.get('ndmi') for d in datos if d.get('ndmi') is not None]
-        savi_valores = [d.get('savi') for d in datos if d.get('savi') is not None]
-        
-        ndvi_prom = sum(ndvi_valores) / len(ndvi_valores) if ndvi_valores else 0
-        ndmi_prom = sum(ndmi_valores) / len(ndmi_valores) if ndmi_valores else 0
-        savi_prom = sum(savi_valores) / len(savi_valores) if savi_valores else 0
-        
-        indices = ['NDVI\n(Salud)', 'NDMI\n(Humedad)', 'SAVI\n(Cobertura)']
-        valores = [ndvi_prom, ndmi_prom, savi_prom]
-        colores_barra = ['#2E8B57', '#17a2b8', '#FF7A00']
-        
-        # Crear barras
-        bars = ax.bar(indices, valores, color=colores_barra, alpha=0.8, edgecolor='black', linewidth=1.5)
-        
-        # Añadir valores encima de las barras
-        for bar, valor in zip(bars, valores):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'{valor:.3f}',
-                   ha='center', va='bottom', fontsize=12, fontweight='bold')
-        
-        ax.set_ylabel('Valor Promedio', fontsize=12, fontweight='bold')
-        ax.set_title('Comparación de Índices - Promedio del Período', 
-                    fontsize=14, fontweight='bold', color='#2c3e50')
-        ax.set_ylim(0, max(valores) * 1.2)
-        ax.grid(axis='y', alpha=0.3)
-        
-        plt.tight_layout()
-        
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        plt.close()
-        
-        return buffer
+        return BytesIO(cache_graficos.renderizar_uno('comparativo', self._serie_graficos(datos)))
     
     def _crear_portada(self, parcela: Parcela, fecha_inicio: date, fecha_fin: date) -> List:
         """Crea la portada del informe"""
@@ -1151,100 +1218,90 @@ Fuerza {tl.get('fuerza', '').title()}<br/>
         elements.append(tabla_intro)
         elements.append(Spacer(1, 0.7*cm))
         
-        # Procesar cada índice mensual
+        # Imágenes disponibles por mes (en orden cronológico)
+        serie = self._serie_de(parcela.id)
+        meses_con_imagenes = []
+        for idx in indices:
+            rutas = serie.imagenes(idx)
+            imagenes = [
+                (tipo_indice, rutas[tipo_indice], descripcion)
+                for tipo_indice, _, descripcion in IMAGENES_GALERIA
+                if tipo_indice in rutas
+            ]
+            if imagenes:
+                meses_con_imagenes.append((idx, imagenes))
+        
+        # Todas las llamadas a Gemini Vision en paralelo antes de maquetar
+        analisis_por_imagen = self._analizar_imagenes_en_paralelo(meses_con_imagenes)
+        con_valor = sum(
+            1 for idx, imagenes in meses_con_imagenes for tipo_indice, _, _ in imagenes
+            if self._valores_indice(idx, tipo_indice)[0] is not None
+        )
+        if len(analisis_por_imagen) < con_valor:
+            self._galeria_completa = False
+        
         imagenes_encontradas = 0
         meses_procesados = 0
         
-        for idx in indices:
-            tiene_imagenes = False
+        for idx, imagenes in meses_con_imagenes:
+            meses_procesados += 1
             
-            # Verificar si hay imágenes para este mes
-            if (idx.imagen_ndvi and os.path.exists(idx.imagen_ndvi.path)) or \
-               (idx.imagen_ndmi and os.path.exists(idx.imagen_ndmi.path)) or \
-               (idx.imagen_savi and os.path.exists(idx.imagen_savi.path)):
-                tiene_imagenes = True
+            # === SEPARADOR VISUAL ENTRE MESES ===
+            if meses_procesados > 1:
+                from reportlab.platypus import HRFlowable
+                elements.append(Spacer(1, 0.3*cm))
+                elements.append(HRFlowable(
+                    width="100%", 
+                    thickness=2, 
+                    color=self.colores['verde_principal'],
+                    spaceAfter=0.5*cm,
+                    spaceBefore=0.3*cm
+                ))
             
-            # Si hay imágenes para este mes, procesarlas
-            if tiene_imagenes:
-                meses_procesados += 1
-                
-                # === SEPARADOR VISUAL ENTRE MESES ===
-                if meses_procesados > 1:
-                    from reportlab.platypus import HRFlowable
-                    elements.append(Spacer(1, 0.3*cm))
-                    elements.append(HRFlowable(
-                        width="100%", 
-                        thickness=2, 
-                        color=self.colores['verde_principal'],
-                        spaceAfter=0.5*cm,
-                        spaceBefore=0.3*cm
-                    ))
-                
-                # === TÍTULO DEL MES CON DISEÑO DESTACADO ===
-                titulo_mes = Paragraph(
-                    f'<font size="13" color="#2E8B57"><strong>📅 {idx.periodo_texto}</strong></font>',
-                    self.estilos['SubtituloSeccion']
-                )
-                elements.append(titulo_mes)
-                elements.append(Spacer(1, 0.2*cm))
-                
-                # === METADATOS DE LA CAPTURA EN FORMATO MEJORADO ===
-                metadatos_data = [
-                    ['📅 Fecha de captura:', idx.fecha_imagen.strftime('%d/%m/%Y') if idx.fecha_imagen else 'N/A'],
-                    ['🛰️ Satélite:', idx.satelite_imagen or 'Sentinel-2'],
-                    ['📏 Resolución espacial:', f"{idx.resolucion_imagen or 10} metros/píxel"],
-                    ['☁️ Nubosidad:', f"{idx.nubosidad_imagen or 0:.1f}%"],
-                    ['🌍 Coordenadas:', f"({parcela.latitud:.6f}, {parcela.longitud:.6f})" if hasattr(parcela, 'latitud') else 'N/A']
-                ]
-                
-                tabla_metadatos = Table(metadatos_data, colWidths=[4*cm, 11*cm])
-                tabla_metadatos.setStyle(TableStyle([
-                    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('TEXTCOLOR', (0, 1), (-1, -1), self.colores['gris_oscuro']),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, self.colores['gris_claro']]),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                    ('TOPPADDING', (0, 0), (-1, -1), 5),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 8),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-                ]))
-                
-                elements.append(tabla_metadatos)
-                elements.append(Spacer(1, 0.5*cm))
-                
-                # === PROCESAR CADA IMAGEN DISPONIBLE ===
-                
-                # NDVI
-                if idx.imagen_ndvi and os.path.exists(idx.imagen_ndvi.path):
-                    imagenes_encontradas += 1
-                    elements.extend(self._agregar_imagen_con_analisis(
-                        idx, 'NDVI', idx.imagen_ndvi.path, 
-                        "Índice de Vegetación de Diferencia Normalizada - Mide la salud y vigor vegetal",
-                        usar_gemini=True
-                    ))
-                
-                # NDMI
-                if idx.imagen_ndmi and os.path.exists(idx.imagen_ndmi.path):
-                    imagenes_encontradas += 1
-                    elements.extend(self._agregar_imagen_con_analisis(
-                        idx, 'NDMI', idx.imagen_ndmi.path,
-                        "Índice de Humedad de Diferencia Normalizada - Mide el contenido de agua en la vegetación",
-                        usar_gemini=True
-                    ))
-                
-                # SAVI
-                if idx.imagen_savi and os.path.exists(idx.imagen_savi.path):
-                    imagenes_encontradas += 1
-                    elements.extend(self._agregar_imagen_con_analisis(
-                        idx, 'SAVI', idx.imagen_savi.path,
-                        "Índice de Vegetación Ajustado al Suelo - Mide la cobertura vegetal minimizando el efecto del suelo",
-                        usar_gemini=True
-                    ))
+            # === TÍTULO DEL MES CON DISEÑO DESTACADO ===
+            titulo_mes = Paragraph(
+                f'<font size="13" color="#2E8B57"><strong>📅 {idx.periodo_texto}</strong></font>',
+                self.estilos['SubtituloSeccion']
+            )
+            elements.append(titulo_mes)
+            elements.append(Spacer(1, 0.2*cm))
+            
+            # === METADATOS DE LA CAPTURA EN FORMATO MEJORADO ===
+            metadatos_data = [
+                ['📅 Fecha de captura:', idx.fecha_imagen.strftime('%d/%m/%Y') if idx.fecha_imagen else 'N/A'],
+                ['🛰️ Satélite:', idx.satelite_imagen or 'Sentinel-2'],
+                ['📏 Resolución espacial:', f"{idx.resolucion_imagen or 10} metros/píxel"],
+                ['☁️ Nubosidad:', f"{idx.nubosidad_imagen or 0:.1f}%"],
+                ['🌍 Coordenadas:', f"({parcela.latitud:.6f}, {parcela.longitud:.6f})" if hasattr(parcela, 'latitud') else 'N/A']
+            ]
+            
+            tabla_metadatos = Table(metadatos_data, colWidths=[4*cm, 11*cm])
+            tabla_metadatos.setStyle(TableStyle([
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('TEXTCOLOR', (0, 1), (-1, -1), self.colores['gris_oscuro']),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, self.colores['gris_claro']]),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                ('TOPPADDING', (0, 0), (-1, -1), 5),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+                ('LEFTPADDING', (0, 0), (-1, -1), 8),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ]))
+            
+            elements.append(tabla_metadatos)
+            elements.append(Spacer(1, 0.5*cm))
+            
+            # === PROCESAR CADA IMAGEN DISPONIBLE (NDVI, NDMI, SAVI) ===
+            for tipo_indice, imagen_path, descripcion in imagenes:
+                imagenes_encontradas += 1
+                elements.extend(self._agregar_imagen_con_analisis(
+                    idx, tipo_indice, imagen_path, descripcion,
+                    analisis_gemini=analisis_por_imagen.get((idx.pk, tipo_indice))
+                ))
         
         # Si no se encontraron imágenes
         if imagenes_encontradas == 0:
@@ -1320,39 +1377,22 @@ Fuerza {tl.get('fuerza', '').title()}<br/>
         elements.append(subtitulo)
         elements.append(Spacer(1, 0.5*cm))
         
-        # Preparar datos para Gemini
+        # Preparar datos para Gemini (NDVI, NDMI, SAVI de cada mes con imagen y valor)
+        serie = self._serie_de(parcela.id)
         imagenes_datos = []
         
         for idx in indices:
-            # NDVI
-            if idx.imagen_ndvi and os.path.exists(idx.imagen_ndvi.path) and idx.ndvi_promedio:
-                imagenes_datos.append({
-                    'imagen_path': idx.imagen_ndvi.path,
-                    'tipo_indice': 'NDVI',
-                    'valor_promedio': idx.ndvi_promedio,
-                    'mes': idx.periodo_texto,
-                    'fecha': idx.fecha_imagen.strftime('%d/%m/%Y') if idx.fecha_imagen else 'N/A'
-                })
-            
-            # NDMI
-            if idx.imagen_ndmi and os.path.exists(idx.imagen_ndmi.path) and idx.ndmi_promedio:
-                imagenes_datos.append({
-                    'imagen_path': idx.imagen_ndmi.path,
-                    'tipo_indice': 'NDMI',
-                    'valor_promedio': idx.ndmi_promedio,
-                    'mes': idx.periodo_texto,
-                    'fecha': idx.fecha_imagen.strftime('%d/%m/%Y') if idx.fecha_imagen else 'N/A'
-                })
-            
-            # SAVI
-            if idx.imagen_savi and os.path.exists(idx.imagen_savi.path) and idx.savi_promedio:
-                imagenes_datos.append({
-                    'imagen_path': idx.imagen_savi.path,
-                    'tipo_indice': 'SAVI',
-                    'valor_promedio': idx.savi_promedio,
-                    'mes': idx.periodo_texto,
-                    'fecha': idx.fecha_imagen.strftime('%d/%m/%Y') if idx.fecha_imagen else 'N/A'
-                })
+            rutas = serie.imagenes(idx)
+            for tipo_indice, _, _ in IMAGENES_GALERIA:
+                valor_promedio = self._valores_indice(idx, tipo_indice)[0]
+                if tipo_indice in rutas and valor_promedio:
+                    imagenes_datos.append({
+                        'imagen_path': rutas[tipo_indice],
+                        'tipo_indice': tipo_indice,
+                        'valor_promedio': valor_promedio,
+                        'mes': idx.periodo_texto,
+                        'fecha': idx.fecha_imagen.strftime('%d/%m/%Y') if idx.fecha_imagen else 'N/A'
+                    })
         
         # Generar análisis global con Gemini
         if imagenes_datos:
@@ -1395,6 +1435,7 @@ Fuerza {tl.get('fuerza', '').title()}<br/>
                 
             except Exception as e:
                 logger.error(f"❌ Error generando análisis global: {str(e)}")
+                self._galeria_completa = False
                 # Mensaje de error discreto
                 error_msg = Paragraph(
                     '<font size="9" color="#999999"><i>Análisis global no disponible en este momento.</i></font>',
@@ -1404,8 +1445,114 @@ Fuerza {tl.get('fuerza', '').title()}<br/>
         
         return elements
     
+    def _analizar_imagenes_en_paralelo(self, meses_con_imagenes: List[Tuple[IndiceMensual, List]]) -> Dict[Tuple[int, str], str]:
+        """
+        Ejecuta el análisis Gemini Vision de todas las imágenes de la galería en un
+        pool acotado por GEMINI_MAX_CONCURRENCIA (la cuota por minuto la aplica
+        bucket_gemini dentro del servicio). Las imágenes con análisis vigente en
+        caché (AnalisisImagen) no llaman a Gemini.
+        
+        Args:
+            meses_con_imagenes: [(indice, [(tipo_indice, imagen_path, descripcion), ...]), ...]
+        
+        Returns:
+            Dict (indice.pk, tipo_indice) -> análisis HTML; faltan las que fallaron
+        """
+        # Contexto y mes anterior se consultan aquí: los hilos no tocan la BD del informe
+        solicitudes = {}
+        indices_por_pk = {}
+        for indice, imagenes in meses_con_imagenes:
+            for tipo_indice, imagen_path, _ in imagenes:
+                valor_promedio = self._valores_indice(indice, tipo_indice)[0]
+                if valor_promedio is not None:
+                    solicitudes[(indice.pk, tipo_indice)] = self._preparar_analisis_gemini(
+                        indice, tipo_indice, imagen_path, valor_promedio
+                    )
+                    indices_por_pk[indice.pk] = indice
+        if not solicitudes:
+            return {}
+        
+        # Caché persistente (AnalisisImagen): solo van a Gemini las imágenes sin análisis vigente
+        claves_cache = {}
+        for clave, parametros in solicitudes.items():
+            try:
+                claves_cache[clave] = cache_analisis_imagenes.clave_para_solicitud(parametros)
+            except OSError as e:
+                logger.debug(f"No se pudo calcular la clave de caché de {parametros['imagen_path']}: {str(e)}")
+        en_cache = cache_analisis_imagenes.buscar_vigentes(claves_cache.values())
+        resultados = {
+            clave: en_cache[claves_cache[clave]]
+            for clave in solicitudes if claves_cache.get(clave) in en_cache
+        }
+        pendientes = {clave: parametros for clave, parametros in solicitudes.items() if clave not in resultados}
+        
+        if resultados:
+            logger.info(f"💾 {len(resultados)}/{len(solicitudes)} análisis de imágenes desde caché")
+        if not pendientes or not gemini_service:
+            return resultados
+        
+        def analizar(parametros: Dict) -> str:
+            try:
+                return gemini_service.analizar_imagen_satelital(**parametros, con_fallback=False)
+            finally:
+                connection.close()  # El circuito de Gemini consulta la BD desde este hilo
+        
+        total = len(pendientes)
+        max_workers = min(getattr(settings, 'GEMINI_MAX_CONCURRENCIA', 4), total)
+        logger.info(f"🤖 Analizando {total} imágenes con Gemini ({max_workers} en paralelo)")
+        inicio = time.time()
+        
+        analizadas = 0
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gemini-galeria') as executor:
+            futuros = {executor.submit(analizar, parametros): clave for clave, parametros in pendientes.items()}
+            for completadas, futuro in enumerate(as_completed(futuros), start=1):
+                clave = futuros[futuro]
+                indice_pk, tipo_indice = clave
+                try:
+                    resultados[clave] = futuro.result()
+                    analizadas += 1
+                    if clave in claves_cache:
+                        cache_analisis_imagenes.guardar(
+                            claves_cache[clave], indices_por_pk[indice_pk], pendientes[clave], resultados[clave]
+                        )
+                except Exception as e:
+                    logger.warning(f"⚠️ Gemini falló para {tipo_indice} (índice {indice_pk}), usando análisis básico: {str(e)}")
+                self._progreso('renderizando', 55 + 30 * completadas // total,
+                               f'Imágenes analizadas: {completadas}/{total}')
+        
+        logger.info(f"✅ {analizadas}/{total} análisis de imágenes en {time.time() - inicio:.1f}s")
+        return resultados
+    
+    def _valores_indice(self, indice: IndiceMensual, tipo_indice: str) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """(promedio, mínimo, máximo) del índice indicado para el mes"""
+        campo = tipo_indice.lower()
+        return (
+            getattr(indice, f'{campo}_promedio', None),
+            getattr(indice, f'{campo}_minimo', None),
+            getattr(indice, f'{campo}_maximo', None),
+        )
+    
+    def _preparar_analisis_gemini(self, indice: IndiceMensual, tipo_indice: str,
+                                  imagen_path: str, valor_promedio: float) -> Dict:
+        """Argumentos de gemini_service.analizar_imagen_satelital para una imagen"""
+        return {
+            'imagen_path': imagen_path,
+            'tipo_indice': tipo_indice,
+            'valor_promedio': valor_promedio,
+            'datos_contexto': {
+                'fecha': indice.fecha_imagen.strftime('%d/%m/%Y') if indice.fecha_imagen else 'N/A',
+                'satelite': indice.satelite_imagen or 'Sentinel-2',
+                'resolucion': indice.resolucion_imagen or 10,
+                'nubosidad': indice.nubosidad_imagen or 0,
+                'coordenadas': f"({indice.parcela.latitud:.6f}, {indice.parcela.longitud:.6f})" if hasattr(indice.parcela, 'latitud') else 'N/A'
+            },
+            # Buscar mes anterior para comparación
+            'mes_anterior_data': self._obtener_datos_mes_anterior(indice, tipo_indice),
+        }
+    
     def _agregar_imagen_con_analisis(self, indice: IndiceMensual, tipo_indice: str, 
-                                      imagen_path: str, descripcion: str, usar_gemini: bool = False) -> List:
+                                      imagen_path: str, descripcion: str, usar_gemini: bool = False,
+                                      analisis_gemini: Optional[str] = None) -> List:
         """
         Agrega una imagen satelital con su análisis visual específico usando Gemini AI
         
@@ -1415,13 +1562,16 @@ Fuerza {tl.get('fuerza', '').title()}<br/>
             imagen_path: Ruta a la imagen
             descripcion: Descripción del índice
             usar_gemini: Si usar Gemini AI para análisis visual (default: False para ahorrar tokens)
+            analisis_gemini: Análisis ya generado (ver _analizar_imagenes_en_paralelo);
+                evita la llamada síncrona a Gemini
         """
         elements = []
         
         try:
             # === IMAGEN ===
             # Cargar y mostrar la imagen más grande para mejor visualización
-            img = Image(imagen_path, width=14*cm, height=10*cm)
+            # (variante reducida a la resolución de impresión; el análisis usa la original)
+            img = Image(self.preparador_imagenes.preparar(imagen_path, 14*cm, 10*cm), width=14*cm, height=10*cm)
             img.hAlign = 'CENTER'
             elements.append(img)
             elements.append(Spacer(1, 0.2*cm))
@@ -1435,22 +1585,7 @@ Fuerza {tl.get('fuerza', '').title()}<br/>
             elements.append(Spacer(1, 0.3*cm))
             
             # === VALORES NUMÉRICOS ===
-            valor_promedio = None
-            valor_minimo = None
-            valor_maximo = None
-            
-            if tipo_indice == 'NDVI':
-                valor_promedio = indice.ndvi_promedio
-                valor_minimo = indice.ndvi_minimo
-                valor_maximo = indice.ndvi_maximo
-            elif tipo_indice == 'NDMI':
-                valor_promedio = indice.ndmi_promedio
-                valor_minimo = indice.ndmi_minimo
-                valor_maximo = indice.ndmi_maximo
-            elif tipo_indice == 'SAVI':
-                valor_promedio = indice.savi_promedio
-                valor_minimo = indice.savi_minimo
-                valor_maximo = indice.savi_maximo
+            valor_promedio, valor_minimo, valor_maximo = self._valores_indice(indice, tipo_indice)
             
             if valor_promedio is not None:
                 min_texto = f"{valor_minimo:.3f}" if valor_minimo is not None else "N/A"
@@ -1468,40 +1603,22 @@ Fuerza {tl.get('fuerza', '').title()}<br/>
                 elements.append(Spacer(1, 0.3*cm))
             
             # === ANÁLISIS VISUAL ESPECÍFICO CON GEMINI AI ===
-            if usar_gemini and valor_promedio is not None:
-                # Preparar contexto para Gemini
-                datos_contexto = {
-                    'fecha': indice.fecha_imagen.strftime('%d/%m/%Y') if indice.fecha_imagen else 'N/A',
-                    'satelite': indice.satelite_imagen or 'Sentinel-2',
-                    'resolucion': indice.resolucion_imagen or 10,
-                    'nubosidad': indice.nubosidad_imagen or 0,
-                    'coordenadas': f"({indice.parcela.latitud:.6f}, {indice.parcela.longitud:.6f})" if hasattr(indice.parcela, 'latitud') else 'N/A'
-                }
-                
-                # Buscar mes anterior para comparación
-                mes_anterior_data = self._obtener_datos_mes_anterior(indice, tipo_indice)
+            if analisis_gemini is None and usar_gemini and valor_promedio is not None:
+                # Generar análisis con Gemini (o desde la caché)
+                analisis_gemini = self._analizar_imagenes_en_paralelo(
+                    [(indice, [(tipo_indice, imagen_path, descripcion)])]
+                ).get((indice.pk, tipo_indice))
+            
+            if analisis_gemini:
+                analisis_texto = analisis_gemini
                 
-                # Generar análisis con Gemini
-                try:
-                    analisis_texto = gemini_service.analizar_imagen_satelital(
-                        imagen_path=imagen_path,
-                        tipo_indice=tipo_indice,
-                        valor_promedio=valor_promedio,
-                        datos_contexto=datos_contexto,
-                        mes_anterior_data=mes_anterior_data
-                    )
-                    
-                    # Agregar badge indicando que es análisis AI
-                    badge_ai = Paragraph(
-                        '<font size="7" color="#666666"><strong>🤖 Análisis generado por Gemini AI</strong></font>',
-                        self.estilos['TextoNormal']
-                    )
-                    elements.append(badge_ai)
-                    elements.append(Spacer(1, 0.1*cm))
-                    
-                except Exception as e:
-                    logger.warning(f"⚠️ Gemini falló para {tipo_indice}, usando análisis básico: {str(e)}")
-                    analisis_texto = self._generar_analisis_visual_imagen(indice, tipo_indice, valor_promedio)
+                # Agregar badge indicando que es análisis AI
+                badge_ai = Paragraph(
+                    '<font size="7" color="#666666"><strong>🤖 Análisis generado por Gemini AI</strong></font>',
+                    self.estilos['TextoNormal']
+                )
+                elements.append(badge_ai)
+                elements.append(Spacer(1, 0.1*cm))
             else:
                 # Usar análisis basado en reglas como fallback
                 analisis_texto = self._generar_analisis_visual_imagen(indice, tipo_indice, valor_promedio)
@@ -1539,23 +1656,10 @@ Fuerza {tl.get('fuerza', '').title()}<br/>
         Obtiene datos del mes anterior para comparación temporal
         """
         try:
-            if indice.mes == 1:
-                mes_anterior = indice.parcela.indices_mensuales.filter(
-                    año=indice.año - 1, mes=12
-                ).first()
-            else:
-                mes_anterior = indice.parcela.indices_mensuales.filter(
-                    año=indice.año, mes=indice.mes - 1
-                ).first()
+            mes_anterior = self._serie_de(indice.parcela_id).anterior(indice)
             
             if mes_anterior:
-                valor_anterior = None
-                if tipo_indice == 'NDVI':
-                    valor_anterior = mes_anterior.ndvi_promedio
-                elif tipo_indice == 'NDMI':
-                    valor_anterior = mes_anterior.ndmi_promedio
-                elif tipo_indice == 'SAVI':
-                    valor_anterior = mes_anterior.savi_promedio
+                valor_anterior = self._valores_indice(mes_anterior, tipo_indice)[0]
                 
                 if valor_anterior:
                     return {
@@ -1638,24 +1742,11 @@ Fuerza {tl.get('fuerza', '').title()}<br/>
         
         # === COMPARACIÓN TEMPORAL (buscar mes anterior) ===
         try:
-            # Buscar el mes anterior
-            if indice.mes == 1:
-                mes_anterior = indice.parcela.indices_mensuales.filter(
-                    año=indice.año - 1, mes=12
-                ).first()
-            else:
-                mes_anterior = indice.parcela.indices_mensuales.filter(
-                    año=indice.año, mes=indice.mes - 1
-                ).first()
+            # Mes anterior desde la serie en memoria
+            mes_anterior = self._serie_de(indice.parcela_id).anterior(indice)
             
             if mes_anterior:
-                valor_anterior = None
-                if tipo_indice == 'NDVI':
-                    valor_anterior = mes_anterior.ndvi_promedio
-                elif tipo_indice == 'NDMI':
-                    valor_anterior = mes_anterior.ndmi_promedio
-                elif tipo_indice == 'SAVI':
-                    valor_anterior = mes_anterior.savi_promedio
+                valor_anterior = self._valores_indice(mes_anterior, tipo_indice)[0]
                 
                 if valor_anterior:
                     cambio = valor_promedio - valor_anterior
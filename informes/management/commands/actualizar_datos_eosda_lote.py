@@ -0,0 +1,123 @@
+"""
+Management Command para refrescar datos satelitales de EOSDA en lote
+Envía todas las tareas de Statistics API y las consulta concurrentemente
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from datetime import date, timedelta
+from informes.models import Parcela
+from informes.services.eosda_api import eosda_service
+import time
+
+
+class Command(BaseCommand):
+    help = 'Obtiene datos de Statistics API de EOSDA para muchas parcelas en paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--parcela-id',
+            type=int,
+            action='append',
+            help='ID de parcela a procesar (se puede repetir)'
+        )
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Procesar todas las parcelas activas'
+        )
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=12,
+            help='Número de meses hacia atrás a consultar (default: 12)'
+        )
+        parser.add_argument(
+            '--usuario',
+            type=str,
+            help='Username al que se atribuyen las estadísticas de uso (default: primer superusuario)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Hilos de polling (default: EOSDA_LOTE_MAX_WORKERS)'
+        )
+        parser.add_argument(
+            '--max-nubosidad',
+            type=int,
+            default=50,
+            help='Porcentaje máximo de nubes (default: 50)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n' + '='*80))
+        self.stdout.write(self.style.SUCCESS('🛰️  ACTUALIZACIÓN EN LOTE DE DATOS EOSDA'))
+        self.stdout.write(self.style.SUCCESS('='*80 + '\n'))
+
+        if not eosda_service.validar_configuracion():
+            raise CommandError('❌ API de EOSDA no configurada')
+
+        # Obtener parcelas
+        if options['parcela_id']:
+            parcelas = Parcela.objects.filter(id__in=options['parcela_id'], activa=True)
+        elif options['todas']:
+            parcelas = Parcela.objects.filter(activa=True)
+        else:
+            raise CommandError('❌ Debe especificar --parcela-id o --todas')
+
+        parcelas = list(parcelas)
+        if not parcelas:
+            raise CommandError('❌ No hay parcelas para procesar')
+
+        # Usuario para el registro de uso
+        if options['usuario']:
+            usuario = User.objects.filter(username=options['usuario']).first()
+            if not usuario:
+                raise CommandError(f'❌ Usuario {options["usuario"]} no encontrado')
+        else:
+            usuario = User.objects.filter(is_superuser=True).order_by('id').first()
+            if not usuario:
+                raise CommandError('❌ No hay superusuario; use --usuario')
+
+        fecha_fin = date.today()
+        fecha_inicio = fecha_fin - timedelta(days=options['meses'] * 30)
+
+        self.stdout.write(f'📊 Parcelas a procesar: {len(parcelas)}')
+        self.stdout.write(f'📅 Periodo: {fecha_inicio} → {fecha_fin}\n')
+
+        inicio = time.time()
+        resultados = eosda_service.obtener_datos_optimizado_lote(
+            parcelas=parcelas,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            indices=['NDVI', 'NDMI', 'SAVI'],
+            usuario=usuario,
+            max_nubosidad=options['max_nubosidad'],
+            max_workers=options['workers']
+        )
+        duracion = time.time() - inicio
+
+        exitosas = 0
+        errores = 0
+        for parcela in parcelas:
+            datos = resultados.get(parcela.id, {})
+            if 'error' in datos or not datos:
+                errores += 1
+                self.stdout.write(self.style.ERROR(
+                    f'   ❌ {parcela.nombre}: {datos.get("error", "Sin respuesta")}'
+                ))
+            else:
+                exitosas += 1
+                self.stdout.write(self.style.SUCCESS(
+                    f'   ✅ {parcela.nombre}: {datos.get("num_escenas", 0)} escenas'
+                ))
+
+        # Resumen final
+        self.stdout.write('\n' + '='*80)
+        self.stdout.write(self.style.SUCCESS('📊 RESUMEN'))
+        self.stdout.write('='*80)
+        self.stdout.write(f'✅ Con datos: {exitosas}/{len(parcelas)}')
+        self.stdout.write(f'❌ Errores: {errores}')
+        self.stdout.write(f'⏱️  Tiempo total: {duracion:.1f}s')
+        self.stdout.write('\n' + '='*80 + '\n')
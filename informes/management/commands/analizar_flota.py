@@ -0,0 +1,60 @@
+"""
+Management Command de analítica de flota
+Analiza todas las parcelas activas en una pasada vectorizada y actualiza
+ResumenAnalisisParcela (tablero de parcelas que requieren atención)
+"""
+
+from django.core.management.base import BaseCommand
+from informes.models_analisis import ResumenAnalisisParcela
+from informes.services.analisis_flota import analizar_flota
+
+
+class Command(BaseCommand):
+    help = 'Recalcula tendencia, anomalías y salud de todas las parcelas activas (tablero de atención)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=None,
+            help='Meses de la ventana analizada (default: ANALISIS_FLOTA_MESES)'
+        )
+        parser.add_argument(
+            '--parcela-id',
+            type=int,
+            action='append',
+            help='ID de parcela a analizar (se puede repetir; default: todas las activas)'
+        )
+        parser.add_argument(
+            '--mostrar',
+            type=int,
+            default=10,
+            help='Parcelas que requieren atención a listar al final (default: 10)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n' + '='*80))
+        self.stdout.write(self.style.SUCCESS('📊 ANALÍTICA DE FLOTA'))
+        self.stdout.write(self.style.SUCCESS('='*80 + '\n'))
+
+        resumen = analizar_flota(meses=options['meses'], parcela_ids=options['parcela_id'])
+        segundos = resumen['segundos']
+
+        self.stdout.write(f'📍 Parcelas analizadas: {resumen["parcelas"]} ({resumen["meses"]} meses)')
+        self.stdout.write(f'⏱️  Carga {segundos["carga"]}s | Cálculo {segundos["calculo"]}s | '
+                          f'Guardado {segundos["guardado"]}s')
+        self.stdout.write(self.style.WARNING(f'⚠️  Requieren atención: {resumen["requieren_atencion"]}\n'))
+
+        atencion = ResumenAnalisisParcela.objects.filter(requiere_atencion=True).select_related('parcela') \
+            .order_by('puntuacion_salud')
+        if options['parcela_id']:
+            atencion = atencion.filter(parcela_id__in=options['parcela_id'])
+        for resumen_parcela in atencion[:options['mostrar']]:
+            puntuacion = resumen_parcela.puntuacion_salud
+            self.stdout.write(
+                f'  • {resumen_parcela.parcela.nombre} '
+                f'({puntuacion if puntuacion is not None else "-"}/10): '
+                + '; '.join(resumen_parcela.motivos)
+            )
+
+        self.stdout.write('\n' + '='*80 + '\n')
@@ -0,0 +1,41 @@
+"""
+Management Command para poblar la serie a nivel de escena
+Copia a EscenaIndiceParcela las escenas ya guardadas en el caché de la
+Statistics API (EscenaCacheEOSDA), sin consultar EOSDA
+"""
+
+from django.core.management.base import BaseCommand
+from informes.models import Parcela
+from informes.services.escenas_parcela import cargar_desde_cache
+
+
+class Command(BaseCommand):
+    help = 'Carga EscenaIndiceParcela desde el caché de escenas de EOSDA (sin consumir requests)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--parcela-id',
+            type=int,
+            action='append',
+            help='ID de parcela a cargar (se puede repetir; default: todas las activas sincronizadas)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n' + '='*80))
+        self.stdout.write(self.style.SUCCESS('🛰️ CARGA DE ESCENAS POR PARCELA'))
+        self.stdout.write(self.style.SUCCESS('='*80 + '\n'))
+
+        parcelas = Parcela.objects.filter(activa=True).exclude(eosda_field_id__isnull=True) \
+            .exclude(eosda_field_id='')
+        if options['parcela_id']:
+            parcelas = parcelas.filter(id__in=options['parcela_id'])
+
+        total = 0
+        for parcela in parcelas:
+            filas = cargar_desde_cache(parcela)
+            total += filas
+            if filas:
+                self.stdout.write(f'  • {parcela.nombre}: {filas} escena(s)-índice')
+
+        self.stdout.write(self.style.SUCCESS(f'\n✅ {total} fila(s) guardadas'))
+        self.stdout.write('\n' + '='*80 + '\n')
@@ -0,0 +1,163 @@
+"""
+Management Command para generar los informes PDF de muchas parcelas (cierre de mes)
+Reparte las parcelas en un pool de procesos y deja un resumen JSON reanudable
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from informes.models import Parcela
+from informes.models_configuracion import PlanReporte
+from informes.services.informes_lote import (
+    EjecucionLote, generar_informe_parcela, inicializar_worker
+)
+
+
+class Command(BaseCommand):
+    help = 'Genera en lote los informes PDF de las parcelas activas (reanudable, con resumen JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--parcela-id',
+            type=int,
+            action='append',
+            help='ID de parcela a procesar (se puede repetir)'
+        )
+        parser.add_argument(
+            '--plan',
+            type=str,
+            choices=PlanReporte.values,
+            help='Solo parcelas cuya configuración de reporte más reciente tiene este plan'
+        )
+        parser.add_argument(
+            '--propietario',
+            type=str,
+            help='Solo parcelas cuyo propietario contiene este texto'
+        )
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=12,
+            help='Meses de historial de cada informe (default: 12)'
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=None,
+            help='Procesos en paralelo; 0 = en este proceso (default: INFORMES_LOTE_PROCESOS)'
+        )
+        parser.add_argument(
+            '--reanudar',
+            type=str,
+            metavar='ID_EJECUCION',
+            help='Continuar una ejecución anterior (mismos filtros; salta las parcelas ya terminadas)'
+        )
+        parser.add_argument(
+            '--directorio',
+            type=str,
+            default=None,
+            help='Directorio base de las ejecuciones (default: INFORMES_LOTE_DIRECTORIO)'
+        )
+
+    def _parcelas(self, parametros):
+        # GeneradorPDFProfesional solo genera informes de parcelas activas
+        parcelas = Parcela.objects.filter(activa=True)
+        if parametros.get('parcela_id'):
+            parcelas = parcelas.filter(id__in=parametros['parcela_id'])
+        if parametros.get('propietario'):
+            parcelas = parcelas.filter(propietario__icontains=parametros['propietario'])
+        ids = list(parcelas.order_by('id').values_list('id', flat=True))
+
+        if parametros.get('plan'):
+            from informes.models_configuracion import ConfiguracionReporte
+            # Plan de la configuración más reciente de cada parcela
+            planes = {}
+            for parcela_id, plan in ConfiguracionReporte.objects.filter(parcela_id__in=ids) \
+                    .order_by('parcela_id', 'creado_en').values_list('parcela_id', 'plan'):
+                planes[parcela_id] = plan
+            ids = [parcela_id for parcela_id in ids if planes.get(parcela_id) == parametros['plan']]
+        return ids
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n' + '='*80))
+        self.stdout.write(self.style.SUCCESS('🗂️  GENERACIÓN DE INFORMES EN LOTE'))
+        self.stdout.write(self.style.SUCCESS('='*80 + '\n'))
+
+        if options['reanudar']:
+            try:
+                ejecucion = EjecucionLote.reanudar(options['reanudar'], base=options['directorio'])
+            except FileNotFoundError:
+                raise CommandError(f'❌ No existe la ejecución {options["reanudar"]}')
+            parametros = ejecucion.datos['parametros']
+            self.stdout.write(f'♻️ Reanudando ejecución {ejecucion.id}')
+        else:
+            parametros = {
+                'parcela_id': options['parcela_id'],
+                'plan': options['plan'],
+                'propietario': options['propietario'],
+                'meses': options['meses'],
+            }
+            ejecucion = EjecucionLote.crear(parametros, base=options['directorio'])
+            self.stdout.write(f'🆕 Ejecución {ejecucion.id}')
+
+        ids = self._parcelas(parametros)
+        terminadas = ejecucion.terminadas()
+        pendientes = [parcela_id for parcela_id in ids if parcela_id not in terminadas]
+        procesos = options['procesos']
+        if procesos is None:
+            procesos = getattr(settings, 'INFORMES_LOTE_PROCESOS', 2)
+        procesos = min(procesos, len(pendientes))
+
+        self.stdout.write(f'📍 Parcelas: {len(ids)} ({len(ids) - len(pendientes)} ya terminadas, '
+                          f'{len(pendientes)} pendientes)')
+        self.stdout.write(f'⚙️  Procesos: {procesos or 1} | Meses por informe: {parametros["meses"]}')
+        self.stdout.write(f'📁 Salida: {ejecucion.directorio}\n')
+
+        total = len(pendientes)
+        interrumpida = False
+        try:
+            if procesos <= 1:
+                for numero, parcela_id in enumerate(pendientes, start=1):
+                    self._registrar(ejecucion, numero, total,
+                                    generar_informe_parcela(parcela_id, parametros['meses'], ejecucion.directorio))
+            else:
+                # spawn: los procesos no heredan conexiones a BD ni locks de otros hilos
+                with ProcessPoolExecutor(max_workers=procesos, mp_context=get_context('spawn'),
+                                         initializer=inicializar_worker, initargs=(procesos,)) as executor:
+                    futuros = [
+                        executor.submit(generar_informe_parcela, parcela_id, parametros['meses'], ejecucion.directorio)
+                        for parcela_id in pendientes
+                    ]
+                    for numero, futuro in enumerate(as_completed(futuros), start=1):
+                        self._registrar(ejecucion, numero, total, futuro.result())
+        except KeyboardInterrupt:
+            interrumpida = True
+            self.stdout.write(self.style.WARNING('\n⏸️  Interrumpido: se puede continuar con '
+                                                 f'--reanudar {ejecucion.id}'))
+        finally:
+            ejecucion.finalizar(interrumpida=interrumpida)
+
+        totales = ejecucion.datos['totales']
+        self.stdout.write('\n' + '='*80)
+        self.stdout.write(f'✅ Generados: {totales["ok"]}')
+        self.stdout.write(f'📭 Sin datos: {totales["sin_datos"]}')
+        self.stdout.write(f'❌ Errores (se reintentan con --reanudar {ejecucion.id}): {totales["errores"]}')
+        if totales['segundos_promedio'] is not None:
+            self.stdout.write(f'⏱️  Promedio por informe: {totales["segundos_promedio"]}s '
+                              f'(máx {totales["segundos_max"]}s)')
+        self.stdout.write(f'📄 Resumen: {ejecucion.ruta_resumen}')
+        self.stdout.write('='*80 + '\n')
+
+    def _registrar(self, ejecucion, numero, total, resultado):
+        ejecucion.registrar(resultado)
+        prefijo = f'[{numero}/{total}] Parcela {resultado["parcela_id"]}'
+        if resultado['estado'] == 'ok':
+            self.stdout.write(self.style.SUCCESS(
+                f'{prefijo}: {resultado["tamaño_bytes"] / 1024:.0f} KB en {resultado["segundos"]}s'
+            ))
+        elif resultado['estado'] == 'sin_datos':
+            self.stdout.write(self.style.WARNING(f'{prefijo}: {resultado["error"]}'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{prefijo}: {resultado["error"]}'))
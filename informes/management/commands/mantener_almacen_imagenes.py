@@ -0,0 +1,78 @@
+"""
+Management Command de mantenimiento del almacén de imágenes satelitales
+Recuenta referencias y desaloja (LRU) las imágenes sin uso que excedan el presupuesto
+También purga los gráficos cacheados que no se han usado recientemente
+"""
+
+from django.core.management.base import BaseCommand
+from informes.services.almacen_imagenes import almacen_imagenes
+from informes.services.fragmentos_pdf import cache_fragmentos
+from informes.services.graficos import cache_graficos
+from informes.services.imagenes_pdf import PreparadorImagenesPDF
+
+
+class Command(BaseCommand):
+    help = 'Recalcula referencias y libera espacio en el almacén de imágenes satelitales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--presupuesto-mb',
+            type=int,
+            default=None,
+            help='Presupuesto de disco en MB (default: IMAGENES_SATELITALES_PRESUPUESTO_MB)'
+        )
+        parser.add_argument(
+            '--sin-recalcular',
+            action='store_true',
+            help='No recontar referencias desde IndiceMensual antes de desalojar'
+        )
+        parser.add_argument(
+            '--dias-graficos',
+            type=int,
+            default=30,
+            help='Eliminar gráficos cacheados sin usar en estos días (default: 30)'
+        )
+        parser.add_argument(
+            '--dias-imagenes-pdf',
+            type=int,
+            default=30,
+            help='Eliminar imágenes reducidas para PDF sin usar en estos días (default: 30)'
+        )
+        parser.add_argument(
+            '--dias-fragmentos',
+            type=int,
+            default=30,
+            help='Eliminar fragmentos de secciones de PDF sin usar en estos días (default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n' + '='*80))
+        self.stdout.write(self.style.SUCCESS('🗄️  MANTENIMIENTO DEL ALMACÉN DE IMÁGENES SATELITALES'))
+        self.stdout.write(self.style.SUCCESS('='*80 + '\n'))
+
+        if not options['sin_recalcular']:
+            cambiadas = almacen_imagenes.recalcular_referencias()
+            self.stdout.write(f'🔢 Referencias corregidas: {cambiadas}')
+
+        presupuesto = options['presupuesto_mb']
+        resumen = almacen_imagenes.liberar_espacio(
+            presupuesto_bytes=presupuesto * 1024 * 1024 if presupuesto is not None else None
+        )
+
+        self.stdout.write('\n' + '='*80)
+        self.stdout.write(f'🧹 Imágenes desalojadas: {resumen["eliminadas"]}')
+        self.stdout.write(f'💾 Espacio liberado: {resumen["bytes_liberados"] / 1024 / 1024:.1f} MB')
+        self.stdout.write(f'📦 Tamaño actual: {resumen["total_bytes"] / 1024 / 1024:.1f} MB')
+        
+        graficos = cache_graficos.purgar(dias=options['dias_graficos'])
+        self.stdout.write(f'📊 Gráficos cacheados eliminados: {graficos["eliminados"]} '
+                          f'({graficos["bytes_liberados"] / 1024 / 1024:.1f} MB)')
+        
+        imagenes_pdf = PreparadorImagenesPDF().purgar(dias=options['dias_imagenes_pdf'])
+        self.stdout.write(f'🗜️ Imágenes reducidas para PDF eliminadas: {imagenes_pdf["eliminados"]} '
+                          f'({imagenes_pdf["bytes_liberados"] / 1024 / 1024:.1f} MB)')
+        
+        fragmentos = cache_fragmentos.purgar(dias=options['dias_fragmentos'])
+        self.stdout.write(f'🧩 Fragmentos de PDF eliminados: {fragmentos["eliminados"]} '
+                          f'({fragmentos["bytes_liberados"] / 1024 / 1024:.1f} MB)')
+        self.stdout.write('='*80 + '\n')
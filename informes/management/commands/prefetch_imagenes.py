@@ -0,0 +1,106 @@
+"""
+Management Command para descargar anticipadamente las imágenes satelitales
+Genera NDVI/NDMI/SAVI de todos los meses con view_id que aún no tienen imagen
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from informes.models import Parcela
+from informes.services.eosda_api import eosda_service
+from informes.services.prefetch_imagenes import prefetch_imagenes_parcela, INDICES_PREFETCH
+from informes.services.trabajos import encolar_prefetch_imagenes
+
+
+class Command(BaseCommand):
+    help = 'Descarga (o encola) las imágenes de Field Imagery API que faltan por parcela'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--parcela-id',
+            type=int,
+            action='append',
+            help='ID de parcela a procesar (se puede repetir)'
+        )
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Procesar todas las parcelas activas sincronizadas con EOSDA'
+        )
+        parser.add_argument(
+            '--indices',
+            type=str,
+            default=','.join(INDICES_PREFETCH),
+            help='Índices separados por coma (default: NDVI,NDMI,SAVI)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Hilos de envío/polling (default: EOSDA_LOTE_MAX_WORKERS)'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=900,
+            help='Segundos máximos de polling por parcela (default: 900)'
+        )
+        parser.add_argument(
+            '--encolar',
+            action='store_true',
+            help='Encolar un trabajo por parcela en lugar de descargar ahora'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n' + '='*80))
+        self.stdout.write(self.style.SUCCESS('🖼️  DESCARGA ANTICIPADA DE IMÁGENES SATELITALES'))
+        self.stdout.write(self.style.SUCCESS('='*80 + '\n'))
+
+        if not eosda_service.validar_configuracion():
+            raise CommandError('❌ API de EOSDA no configurada')
+
+        if options['parcela_id']:
+            parcelas = Parcela.objects.filter(id__in=options['parcela_id'], activa=True)
+        elif options['todas']:
+            parcelas = Parcela.objects.filter(activa=True, eosda_field_id__isnull=False)
+        else:
+            raise CommandError('❌ Debe especificar --parcela-id o --todas')
+
+        indices = [indice.strip().upper() for indice in options['indices'].split(',') if indice.strip()]
+        invalidos = set(indices) - set(INDICES_PREFETCH)
+        if invalidos:
+            raise CommandError(f'❌ Índices no soportados: {", ".join(sorted(invalidos))}')
+
+        descargadas = 0
+        pendientes = 0
+        fallidas = 0
+
+        for parcela in parcelas:
+            if options['encolar']:
+                trabajo, creado = encolar_prefetch_imagenes(parcela)
+                estado = 'encolado' if creado else 'ya estaba en cola'
+                self.stdout.write(f'📥 {parcela.nombre}: trabajo #{trabajo.pk} {estado}')
+                continue
+
+            self.stdout.write(f'\n📍 {parcela.nombre} (ID: {parcela.id})')
+            resumen = prefetch_imagenes_parcela(
+                parcela,
+                indices=indices,
+                max_workers=options['workers'],
+                timeout_total=options['timeout'],
+            )
+
+            if resumen.get('error'):
+                self.stdout.write(self.style.ERROR(f'   ❌ {resumen["error"]}'))
+                continue
+
+            descargadas += resumen['descargadas']
+            pendientes += resumen['pendientes']
+            fallidas += resumen['fallidas']
+            estilo = self.style.SUCCESS if not resumen['fallidas'] else self.style.WARNING
+            self.stdout.write(estilo(f'   {resumen["mensaje"]}'))
+
+        if not options['encolar']:
+            self.stdout.write('\n' + '='*80)
+            self.stdout.write(f'✅ Descargadas: {descargadas}')
+            self.stdout.write(f'⏳ Pendientes (se reanudan en la próxima ejecución): {pendientes}')
+            self.stdout.write(f'❌ Fallidas: {fallidas}')
+            self.stdout.write('='*80 + '\n')
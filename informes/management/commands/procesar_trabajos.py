@@ -0,0 +1,87 @@
+"""
+Management Command que ejecuta la cola de trabajos en segundo plano
+Uso típico (systemd/supervisor): python manage.py procesar_trabajos
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from informes.models import TrabajoSegundoPlano
+from informes.services.trabajos import ejecutar_trabajo
+import os
+import socket
+import time
+
+
+class Command(BaseCommand):
+    help = 'Worker de la cola de trabajos en base de datos (sin broker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesar los trabajos disponibles y terminar'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=3.0,
+            help='Segundos de espera cuando la cola está vacía (default: 3)'
+        )
+        parser.add_argument(
+            '--max-trabajos',
+            type=int,
+            default=0,
+            help='Terminar tras N trabajos (0 = sin límite)'
+        )
+        parser.add_argument(
+            '--minutos-huerfano',
+            type=int,
+            default=30,
+            help='Reencolar trabajos en proceso sin actividad tras N minutos (default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(self.style.SUCCESS('\n' + '='*80))
+        self.stdout.write(self.style.SUCCESS(f'⚙️  WORKER DE TRABAJOS EN SEGUNDO PLANO ({worker})'))
+        self.stdout.write(self.style.SUCCESS('='*80 + '\n'))
+
+        reencolados, fallidos = TrabajoSegundoPlano.recuperar_huerfanos(options['minutos_huerfano'])
+        if reencolados:
+            self.stdout.write(self.style.WARNING(f'♻️  {reencolados} trabajo(s) huérfano(s) reencolado(s)'))
+        if fallidos:
+            self.stdout.write(self.style.ERROR(f'❌ {fallidos} trabajo(s) huérfano(s) sin intentos restantes'))
+
+        procesados = 0
+        exitosos = 0
+
+        try:
+            while True:
+                close_old_connections()
+                trabajo = TrabajoSegundoPlano.tomar_siguiente(worker=worker)
+
+                if not trabajo:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                self.stdout.write(f'▶️  #{trabajo.pk} {trabajo.get_tipo_display()} '
+                                  f'(parcela {trabajo.parcela_id}, intento {trabajo.intentos})')
+
+                if ejecutar_trabajo(trabajo):
+                    exitosos += 1
+                    self.stdout.write(self.style.SUCCESS('   ✅ Completado'))
+                else:
+                    self.stdout.write(self.style.ERROR(f'   ❌ {trabajo.get_estado_display()}: {trabajo.mensaje_error[:200]}'))
+
+                procesados += 1
+                if options['max_trabajos'] and procesados >= options['max_trabajos']:
+                    break
+
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\n⏹️  Worker detenido'))
+
+        self.stdout.write('\n' + '='*80)
+        self.stdout.write(f'✅ Trabajos exitosos: {exitosos}/{procesados}')
+        self.stdout.write('='*80 + '\n')
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('informes', '0021_remove_informe_informes_in_estado__cad232_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoSegundoPlano',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('ingesta_historica', 'Ingesta de datos históricos EOSDA')], max_length=50, verbose_name='Tipo de trabajo')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('fallido', 'Fallido'), ('cancelado', 'Cancelado')], db_index=True, default='pendiente', max_length=20)),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('clave_dedup', models.CharField(db_index=True, help_text='Solo puede haber un trabajo activo (pendiente/en proceso) por clave', max_length=200)),
+                ('progreso', models.PositiveSmallIntegerField(default=0, verbose_name='Progreso (%)')),
+                ('mensaje_progreso', models.CharField(blank=True, max_length=255)),
+                ('resultado', models.JSONField(blank=True, null=True, verbose_name='Resultado')),
+                ('mensaje_error', models.TextField(blank=True)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('max_intentos', models.PositiveSmallIntegerField(default=3)),
+                ('disponible_desde', models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='No se ejecuta antes de esta fecha (backoff de reintentos)')),
+                ('worker', models.CharField(blank=True, help_text='Worker que tomó el trabajo', max_length=100)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_en', models.DateTimeField(blank=True, null=True)),
+                ('finalizado_en', models.DateTimeField(blank=True, null=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('parcela', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='trabajos', to='informes.parcela', verbose_name='Parcela')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_segundo_plano', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Trabajo en Segundo Plano',
+                'verbose_name_plural': 'Trabajos en Segundo Plano',
+                'ordering': ['-creado_en'],
+                'indexes': [models.Index(fields=['estado', 'disponible_desde'], name='informes_tr_estado_550c9b_idx'), models.Index(fields=['parcela', 'tipo', '-creado_en'], name='informes_tr_parcela_a7437c_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trabajosegundoplano',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ['pendiente', 'en_proceso'])), fields=('clave_dedup',), name='trabajo_activo_unico_por_clave'),
+        ),
+    ]
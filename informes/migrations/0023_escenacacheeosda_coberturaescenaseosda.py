@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informes', '0022_trabajosegundoplano'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EscenaCacheEOSDA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_id', models.CharField(max_length=100, verbose_name='Field ID EOSDA')),
+                ('fecha_escena', models.DateField(verbose_name='Fecha de la Escena')),
+                ('indice', models.CharField(max_length=10, verbose_name='Índice')),
+                ('view_id', models.CharField(blank=True, default='', max_length=100, verbose_name='View ID')),
+                ('nubosidad', models.FloatField(blank=True, null=True, verbose_name='Nubosidad (%)')),
+                ('estadisticas', models.JSONField(help_text='Diccionario tal como lo devuelve EOSDA (average, max, min, ...)', verbose_name='Estadísticas del Índice')),
+                ('datos_escena', models.JSONField(blank=True, default=dict, help_text='Resto de campos de la escena (scene_id, notes, ...)', verbose_name='Metadatos de la Escena')),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Escena en Caché EOSDA',
+                'verbose_name_plural': 'Escenas en Caché EOSDA',
+                'ordering': ['field_id', 'fecha_escena'],
+                'indexes': [models.Index(fields=['field_id', 'indice', 'fecha_escena'], name='informes_es_field_i_c08aa2_idx')],
+                'unique_together': {('field_id', 'fecha_escena', 'indice', 'view_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CoberturaEscenasEOSDA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_id', models.CharField(max_length=100, verbose_name='Field ID EOSDA')),
+                ('indice', models.CharField(max_length=10, verbose_name='Índice')),
+                ('fecha_inicio', models.DateField(verbose_name='Fecha Inicio')),
+                ('fecha_fin', models.DateField(verbose_name='Fecha Fin')),
+                ('max_nubosidad', models.FloatField(help_text='Solo sirve para consultas con un filtro de nubes igual o más estricto', verbose_name='Nubosidad Máxima Consultada')),
+                ('task_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Cobertura de Escenas EOSDA',
+                'verbose_name_plural': 'Coberturas de Escenas EOSDA',
+                'ordering': ['field_id', 'indice', 'fecha_inicio'],
+                'indexes': [models.Index(fields=['field_id', 'indice', 'fecha_inicio', 'fecha_fin'], name='informes_co_field_i_d37b32_idx')],
+            },
+        ),
+    ]
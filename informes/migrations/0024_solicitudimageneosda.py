@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informes', '0023_escenacacheeosda_coberturaescenaseosda'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajosegundoplano',
+            name='tipo',
+            field=models.CharField(choices=[('ingesta_historica', 'Ingesta de datos históricos EOSDA'), ('prefetch_imagenes', 'Descarga anticipada de imágenes satelitales')], max_length=50, verbose_name='Tipo de trabajo'),
+        ),
+        migrations.CreateModel(
+            name='SolicitudImagenEOSDA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('indice', models.CharField(max_length=10, verbose_name='Índice')),
+                ('view_id', models.CharField(max_length=100, verbose_name='View ID')),
+                ('field_id', models.CharField(max_length=100, verbose_name='Field ID EOSDA')),
+                ('request_id', models.CharField(blank=True, default='', max_length=100, verbose_name='Request ID EOSDA')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente de enviar'), ('enviada', 'Enviada (esperando imagen)'), ('descargada', 'Descargada'), ('fallida', 'Fallida')], db_index=True, default='pendiente', max_length=20)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('bytes_descargados', models.PositiveIntegerField(blank=True, null=True)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('indice_mensual', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_imagen', to='informes.indicemensual', verbose_name='Registro mensual')),
+            ],
+            options={
+                'verbose_name': 'Solicitud de Imagen EOSDA',
+                'verbose_name_plural': 'Solicitudes de Imágenes EOSDA',
+                'ordering': ['-creado_en'],
+                'unique_together': {('indice_mensual', 'indice', 'view_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('informes', '0024_solicitudimageneosda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImagenSatelitalAlmacenada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('ruta', models.CharField(max_length=255, verbose_name='Ruta en storage')),
+                ('tamaño_bytes', models.PositiveIntegerField(verbose_name='Tamaño (bytes)')),
+                ('content_type', models.CharField(default='image/png', max_length=50)),
+                ('referencias', models.PositiveIntegerField(default=0, verbose_name='Referencias')),
+                ('ultimo_acceso', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Imagen Satelital Almacenada',
+                'verbose_name_plural': 'Imágenes Satelitales Almacenadas',
+                'ordering': ['-ultimo_acceso'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InformeGenerado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_generacion', models.DateTimeField(auto_now_add=True)),
+                ('tipo_analisis', models.CharField(choices=[('rapido', 'Análisis Rápido (10 imágenes)'), ('completo', 'Análisis Completo (30 imágenes)')], default='rapido', max_length=20)),
+                ('num_imagenes_analizadas', models.IntegerField(default=0)),
+                ('tokens_consumidos', models.IntegerField(default=0)),
+                ('peticiones_api', models.IntegerField(default=0)),
+                ('ruta_archivo', models.CharField(blank=True, max_length=500, null=True)),
+                ('parcela', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='informes_generados', to='informes.parcela')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Informe Generado',
+                'verbose_name_plural': 'Informes Generados',
+                'ordering': ['-fecha_generacion'],
+                'indexes': [models.Index(fields=['fecha_generacion', 'usuario'], name='informes_in_fecha_g_287e2a_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ClaveImagenSatelital',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_id', models.CharField(max_length=100, verbose_name='Field ID EOSDA')),
+                ('view_id', models.CharField(max_length=100, verbose_name='View ID')),
+                ('indice', models.CharField(max_length=10, verbose_name='Índice')),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('imagen', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='claves', to='informes.imagensatelitalalmacenada', verbose_name='Imagen')),
+            ],
+            options={
+                'verbose_name': 'Clave de Imagen Satelital',
+                'verbose_name_plural': 'Claves de Imágenes Satelitales',
+                'unique_together': {('field_id', 'view_id', 'indice')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalisisImagen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_imagen', models.DateField()),
+                ('indice', models.CharField(choices=[('ndvi', 'NDVI'), ('ndmi', 'NDMI'), ('savi', 'SAVI')], max_length=10)),
+                ('url_imagen', models.URLField(max_length=500)),
+                ('resultado_gemini', models.JSONField()),
+                ('fecha_analisis', models.DateTimeField(auto_now_add=True)),
+                ('hash_imagen', models.CharField(blank=True, db_index=True, help_text='SHA-256 del PNG analizado (misma clave que ImagenSatelitalAlmacenada.sha256)', max_length=64, null=True)),
+                ('parcela', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analisis_imagenes', to='informes.parcela')),
+            ],
+            options={
+                'verbose_name': 'Análisis de Imagen Satelital (Gemini)',
+                'verbose_name_plural': 'Análisis de Imágenes Satelitales (Gemini)',
+                'unique_together': {('parcela', 'fecha_imagen', 'indice', 'url_imagen')},
+            },
+        ),
+    ]
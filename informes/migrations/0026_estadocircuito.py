@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informes', '0025_almacen_imagenes_satelitales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadoCircuito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('servicio', models.CharField(max_length=50, unique=True, verbose_name='Servicio')),
+                ('estado', models.CharField(choices=[('cerrado', 'Cerrado'), ('abierto', 'Abierto'), ('semiabierto', 'Semiabierto (probando)')], default='cerrado', max_length=20)),
+                ('fallos_consecutivos', models.PositiveIntegerField(default=0)),
+                ('abierto_hasta', models.DateTimeField(blank=True, null=True, verbose_name='Abierto hasta')),
+                ('sondeo_hasta', models.DateTimeField(blank=True, help_text='Mientras no venza, ningún otro worker lanza otra llamada de prueba', null=True, verbose_name='Sondeo reservado hasta')),
+                ('aperturas', models.PositiveIntegerField(default=0, verbose_name='Veces abierto')),
+                ('ultimo_error', models.TextField(blank=True, default='')),
+                ('ultimo_fallo', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_exito', models.DateTimeField(blank=True, null=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estado de Circuito',
+                'verbose_name_plural': 'Estados de Circuitos',
+                'ordering': ['servicio'],
+            },
+        ),
+    ]
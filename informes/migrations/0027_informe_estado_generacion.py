@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informes', '0026_estadocircuito'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='informe',
+            name='error_generacion',
+            field=models.TextField(blank=True, verbose_name='Error de Generación'),
+        ),
+        migrations.AddField(
+            model_name='informe',
+            name='estado_generacion',
+            field=models.CharField(choices=[('en_cola', '⏳ En cola'), ('analizando', '🔍 Analizando'), ('renderizando', '📄 Generando PDF'), ('listo', '✅ Listo'), ('fallido', '❌ Fallido')], db_index=True, default='listo', max_length=20, verbose_name='Estado Generación'),
+        ),
+        migrations.AddField(
+            model_name='informe',
+            name='mensaje_generacion',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Etapa Actual'),
+        ),
+        migrations.AddField(
+            model_name='informe',
+            name='progreso_generacion',
+            field=models.PositiveSmallIntegerField(default=100, verbose_name='Progreso Generación (%)'),
+        ),
+        migrations.AlterField(
+            model_name='trabajosegundoplano',
+            name='tipo',
+            field=models.CharField(choices=[('ingesta_historica', 'Ingesta de datos históricos EOSDA'), ('prefetch_imagenes', 'Descarga anticipada de imágenes satelitales'), ('informe_pdf', 'Generación de informe PDF')], max_length=50, verbose_name='Tipo de trabajo'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informes', '0027_informe_estado_generacion'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='analisisimagen',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='analisisimagen',
+            name='clave_cache',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='analisisimagen',
+            name='expira_en',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Expira'),
+        ),
+        migrations.AddField(
+            model_name='analisisimagen',
+            name='ultimo_uso',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='analisisimagen',
+            name='usos',
+            field=models.PositiveIntegerField(default=0, help_text='Veces que el análisis se reutilizó desde caché'),
+        ),
+        migrations.AddField(
+            model_name='analisisimagen',
+            name='valor_mes_anterior',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='analisisimagen',
+            name='valor_promedio',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='analisisimagen',
+            name='version_prompt',
+            field=models.PositiveSmallIntegerField(default=1, verbose_name='Versión del prompt'),
+        ),
+        migrations.AlterField(
+            model_name='analisisimagen',
+            name='url_imagen',
+            field=models.CharField(blank=True, default='', help_text='Ruta de la imagen analizada', max_length=500),
+        ),
+        migrations.AddIndex(
+            model_name='analisisimagen',
+            index=models.Index(fields=['parcela', 'fecha_imagen', 'indice'], name='informes_an_parcela_47b380_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informes', '0028_cache_analisis_imagen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='informe',
+            name='sha256_pdf',
+            field=models.CharField(blank=True, help_text='Calculado al escribir el PDF; se usa como ETag de la descarga', max_length=64, verbose_name='SHA-256 del PDF'),
+        ),
+        migrations.AddField(
+            model_name='informe',
+            name='tamaño_pdf_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Tamaño del PDF (bytes)'),
+        ),
+    ]
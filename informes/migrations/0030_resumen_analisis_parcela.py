@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informes', '0029_informe_hash_pdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenAnalisisParcela',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calculado_en', models.DateTimeField(verbose_name='Calculado en')),
+                ('mes_inicio', models.DateField(verbose_name='Primer mes de la ventana')),
+                ('mes_fin', models.DateField(verbose_name='Último mes de la ventana')),
+                ('meses_con_datos', models.PositiveSmallIntegerField(default=0, verbose_name='Meses con NDVI')),
+                ('ultimo_mes_con_datos', models.DateField(blank=True, null=True, verbose_name='Último mes con NDVI')),
+                ('ndvi_actual', models.FloatField(blank=True, null=True, verbose_name='NDVI actual')),
+                ('ndvi_promedio', models.FloatField(blank=True, null=True, verbose_name='NDVI promedio')),
+                ('ndvi_pendiente', models.FloatField(blank=True, null=True, verbose_name='Pendiente NDVI (por mes)')),
+                ('ndvi_r2', models.FloatField(blank=True, null=True, verbose_name='R² NDVI')),
+                ('ndmi_actual', models.FloatField(blank=True, null=True, verbose_name='NDMI actual')),
+                ('ndmi_pendiente', models.FloatField(blank=True, null=True, verbose_name='Pendiente NDMI (por mes)')),
+                ('ndmi_r2', models.FloatField(blank=True, null=True, verbose_name='R² NDMI')),
+                ('savi_actual', models.FloatField(blank=True, null=True, verbose_name='SAVI actual')),
+                ('savi_pendiente', models.FloatField(blank=True, null=True, verbose_name='Pendiente SAVI (por mes)')),
+                ('anomalias', models.PositiveSmallIntegerField(default=0, verbose_name='Anomalías NDVI')),
+                ('ultima_anomalia', models.DateField(blank=True, null=True, verbose_name='Mes de la última anomalía')),
+                ('mes_pico', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Mes pico')),
+                ('mes_valle', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Mes valle')),
+                ('puntuacion_salud', models.FloatField(blank=True, null=True, verbose_name='Puntuación de salud')),
+                ('requiere_atencion', models.BooleanField(default=False, verbose_name='Requiere atención')),
+                ('motivos', models.JSONField(blank=True, default=list, verbose_name='Motivos de atención')),
+                ('parcela', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumen_analisis', to='informes.parcela', verbose_name='Parcela')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Análisis de Parcela',
+                'verbose_name_plural': 'Resúmenes de Análisis de Parcelas',
+                'ordering': ['puntuacion_salud'],
+                'indexes': [models.Index(fields=['requiere_atencion', 'puntuacion_salud'], name='informes_re_requier_d20aa8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:13
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informes', '0030_resumen_analisis_parcela'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajosegundoplano',
+            name='tipo',
+            field=models.CharField(choices=[('ingesta_historica', 'Ingesta de datos históricos EOSDA'), ('prefetch_imagenes', 'Descarga anticipada de imágenes satelitales'), ('informe_pdf', 'Generación de informe PDF'), ('analisis_parcela', 'Recálculo del análisis materializado de una parcela')], max_length=50, verbose_name='Tipo de trabajo'),
+        ),
+        migrations.CreateModel(
+            name='InstantaneaAnalisisParcela',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meses', models.PositiveSmallIntegerField(verbose_name='Meses analizados')),
+                ('mes_inicio', models.DateField(verbose_name='Inicio del período')),
+                ('filas', models.PositiveIntegerField(default=0, verbose_name='Meses con datos')),
+                ('ultima_consulta_api', models.DateTimeField(blank=True, null=True, verbose_name='Última consulta API')),
+                ('hash_valores', models.CharField(max_length=64, verbose_name='Hash de los valores')),
+                ('huella', models.CharField(help_text='SHA-256 de filas, última consulta, valores, cultivo, período y versión del análisis', max_length=64)),
+                ('resultado', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Resultado del análisis')),
+                ('desactualizada', models.BooleanField(db_index=True, default=False, verbose_name='Desactualizada')),
+                ('calculada_en', models.DateTimeField(verbose_name='Calculada en')),
+                ('segundos_calculo', models.FloatField(default=0, verbose_name='Segundos de cálculo')),
+                ('lecturas', models.PositiveIntegerField(default=0, help_text='Veces que se reutilizó sin recalcular')),
+                ('parcela', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='instantaneas_analisis', to='informes.parcela', verbose_name='Parcela')),
+            ],
+            options={
+                'verbose_name': 'Instantánea de Análisis de Parcela',
+                'verbose_name_plural': 'Instantáneas de Análisis de Parcelas',
+                'ordering': ['-calculada_en'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='instantaneaanalisisparcela',
+            constraint=models.UniqueConstraint(fields=('parcela', 'meses'), name='instantanea_unica_por_parcela_y_ventana'),
+        ),
+    ]
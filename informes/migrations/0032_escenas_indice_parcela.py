@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:18
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informes', '0031_instantanea_analisis_parcela'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EscenaIndiceParcela',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha de la escena')),
+                ('indice', models.CharField(max_length=10, verbose_name='Índice')),
+                ('view_id', models.CharField(blank=True, default='', max_length=100, verbose_name='View ID')),
+                ('promedio', models.FloatField(blank=True, null=True, verbose_name='Promedio')),
+                ('minimo', models.FloatField(blank=True, null=True, verbose_name='Mínimo')),
+                ('maximo', models.FloatField(blank=True, null=True, verbose_name='Máximo')),
+                ('desviacion', models.FloatField(blank=True, null=True, verbose_name='Desviación estándar')),
+                ('nubosidad', models.FloatField(blank=True, null=True, verbose_name='Nubosidad (%)')),
+                ('parcela', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='escenas_indices', to='informes.parcela', verbose_name='Parcela')),
+            ],
+            options={
+                'verbose_name': 'Escena de Índice por Parcela',
+                'verbose_name_plural': 'Escenas de Índices por Parcela',
+                'ordering': ['parcela', 'fecha'],
+                'indexes': [django.contrib.postgres.indexes.BrinIndex(fields=['fecha'], name='escena_fecha_brin')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='escenaindiceparcela',
+            constraint=models.UniqueConstraint(fields=('parcela', 'indice', 'fecha', 'view_id'), name='escena_unica_por_parcela_indice_fecha_vista'),
+        ),
+    ]
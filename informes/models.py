@@ -17,9 +17,33 @@ from .models_clientes import ClienteInvitacion, RegistroEconomico
 from .models_configuracion import (
     ConfiguracionReporte, 
     CacheDatosEOSDA, 
+    EscenaCacheEOSDA,
+    CoberturaEscenasEOSDA,
     EstadisticaUsoEOSDA
 )
 
+# Importar cola de trabajos en segundo plano
+from .models_trabajos import TrabajoSegundoPlano
+
+# Importar solicitudes de imágenes satelitales
+from .models_imagenes import (
+    SolicitudImagenEOSDA,
+    ImagenSatelitalAlmacenada,
+    ClaveImagenSatelital
+)
+
+# Importar estado compartido de circuit breakers (EOSDA, Gemini)
+from .models_circuitos import EstadoCircuito
+
+# Importar caché de análisis Gemini (AnalisisImagen.hash_imagen -> ImagenSatelitalAlmacenada.sha256)
+from .models_gemini import AnalisisImagen, InformeGenerado
+
+# Importar resúmenes de analítica de flota (tablero de parcelas que requieren atención)
+from .models_analisis import ResumenAnalisisParcela
+
+# Importar serie a nivel de escena (estadísticas por escena Sentinel-2, parcela e índice)
+from .models_escenas import EscenaIndiceParcela
+
 from django.contrib.gis.db import models as gis_models
 from django.db import models
 from django.contrib.auth.models import User
@@ -444,6 +468,15 @@ class IndiceMensual(models.Model):
             return "Pobre"
 
 
+class InformeQuerySet(models.QuerySet):
+    def facturables(self):
+        """
+        Informes con PDF generado. El registro se crea al encolar la generación:
+        los que siguen en cola o fallaron no son cuentas por cobrar.
+        """
+        return self.exclude(archivo_pdf__isnull=True).exclude(archivo_pdf='')
+
+
 class Informe(models.Model):
     """
     Informes generados automáticamente con análisis de datos satelitales
@@ -491,6 +524,16 @@ class Informe(models.Model):
         null=True, blank=True,
         verbose_name="Archivo PDF"
     )
+    sha256_pdf = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name="SHA-256 del PDF",
+        help_text="Calculado al escribir el PDF; se usa como ETag de la descarga"
+    )
+    tamaño_pdf_bytes = models.PositiveBigIntegerField(
+        null=True, blank=True,
+        verbose_name="Tamaño del PDF (bytes)"
+    )
     mapa_ndvi_imagen = models.ImageField(
         upload_to='informes/mapas/%Y/%m/',
         max_length=500,
@@ -543,6 +586,33 @@ class Informe(models.Model):
     notas_pago = models.TextField(blank=True, verbose_name="Notas")
     cliente = models.ForeignKey('ClienteInvitacion', on_delete=models.SET_NULL, null=True, blank=True, related_name='informes_generados', verbose_name="Cliente")
     
+    # === GENERACIÓN EN SEGUNDO PLANO ===
+    # en_cola -> analizando -> renderizando -> listo (o fallido desde cualquier etapa)
+    ESTADO_GENERACION_CHOICES = [
+        ('en_cola', '⏳ En cola'),
+        ('analizando', '🔍 Analizando'),
+        ('renderizando', '📄 Generando PDF'),
+        ('listo', '✅ Listo'),
+        ('fallido', '❌ Fallido'),
+    ]
+    ESTADOS_GENERACION_ACTIVOS = ('en_cola', 'analizando', 'renderizando')
+    TRANSICIONES_GENERACION = {
+        'en_cola': ('analizando', 'fallido'),
+        'analizando': ('renderizando', 'en_cola', 'fallido'),
+        'renderizando': ('listo', 'en_cola', 'fallido'),
+        'listo': ('en_cola',),
+        'fallido': ('en_cola',),
+    }
+    estado_generacion = models.CharField(
+        max_length=20, choices=ESTADO_GENERACION_CHOICES, default='listo',
+        verbose_name="Estado Generación", db_index=True
+    )
+    progreso_generacion = models.PositiveSmallIntegerField(default=100, verbose_name="Progreso Generación (%)")
+    mensaje_generacion = models.CharField(max_length=255, blank=True, verbose_name="Etapa Actual")
+    error_generacion = models.TextField(blank=True, verbose_name="Error de Generación")
+    
+    objects = InformeQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Informe"
         verbose_name_plural = "Informes"
@@ -622,6 +692,46 @@ class Informe(models.Model):
             self.notas_pago = f"{self.notas_pago}\n{notas}" if self.notas_pago else notas
         self.save()
     
+    @property
+    def generacion_activa(self):
+        return self.estado_generacion in self.ESTADOS_GENERACION_ACTIVOS
+    
+    def actualizar_generacion(self, estado: str, progreso: int = None, mensaje: str = '', error: str = ''):
+        """
+        Avanza la máquina de estados de generación sin tocar el resto de columnas
+        (el informe puede estar editándose a la vez, p.ej. registrando un pago).
+        """
+        if estado != self.estado_generacion and estado not in self.TRANSICIONES_GENERACION[self.estado_generacion]:
+            raise ValueError(f"Transición inválida de generación: {self.estado_generacion} -> {estado}")
+        
+        self.estado_generacion = estado
+        if progreso is not None:
+            self.progreso_generacion = max(0, min(100, int(progreso)))
+        self.mensaje_generacion = mensaje[:255]
+        self.error_generacion = error[:2000]
+        type(self).objects.filter(pk=self.pk).update(
+            estado_generacion=self.estado_generacion,
+            progreso_generacion=self.progreso_generacion,
+            mensaje_generacion=self.mensaje_generacion,
+            error_generacion=self.error_generacion,
+        )
+    
+    def estado_generacion_dict(self) -> dict:
+        """
+        Representación JSON para el endpoint de estado del informe
+        """
+        return {
+            'id': self.pk,
+            'estado': self.estado_generacion,
+            'estado_display': self.get_estado_generacion_display(),
+            'progreso': self.progreso_generacion,
+            'mensaje': self.mensaje_generacion,
+            'error': self.error_generacion or None,
+            'listo': self.estado_generacion == 'listo' and bool(self.archivo_pdf),
+            'tamaño_bytes': self.tamaño_pdf_bytes,
+            'tiempo_procesamiento': self.tiempo_procesamiento.total_seconds() if self.tiempo_procesamiento else None,
+        }
+    
     @property
     def esta_vencido(self):
         return bool(self.fecha_vencimiento and timezone.now().date() > self.fecha_vencimiento)
@@ -0,0 +1,114 @@
+"""
+Análisis materializados por parcela
+- ResumenAnalisisParcela: analítica de flota, calculada en bloque por services/analisis_flota.py;
+  el tablero de parcelas que requieren atención solo lee esta tabla
+- InstantaneaAnalisisParcela: resultado completo de los analizadores (NDVI, NDMI, SAVI,
+  tendencias, recomendaciones) con la huella de los datos de los que salió
+  (ver services/instantaneas_analisis.py)
+"""
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class ResumenAnalisisParcela(models.Model):
+    """
+    Tendencia, anomalías, estacionalidad y puntuación de salud de una parcela,
+    calculadas para todas las parcelas activas en una sola pasada vectorizada.
+    """
+
+    parcela = models.OneToOneField(
+        'Parcela', on_delete=models.CASCADE,
+        related_name='resumen_analisis',
+        verbose_name="Parcela"
+    )
+    calculado_en = models.DateTimeField(verbose_name="Calculado en")
+
+    # Ventana analizada
+    mes_inicio = models.DateField(verbose_name="Primer mes de la ventana")
+    mes_fin = models.DateField(verbose_name="Último mes de la ventana")
+    meses_con_datos = models.PositiveSmallIntegerField(default=0, verbose_name="Meses con NDVI")
+    ultimo_mes_con_datos = models.DateField(null=True, blank=True, verbose_name="Último mes con NDVI")
+
+    # NDVI: último valor, promedio y tendencia lineal (por mes calendario)
+    ndvi_actual = models.FloatField(null=True, blank=True, verbose_name="NDVI actual")
+    ndvi_promedio = models.FloatField(null=True, blank=True, verbose_name="NDVI promedio")
+    ndvi_pendiente = models.FloatField(null=True, blank=True, verbose_name="Pendiente NDVI (por mes)")
+    ndvi_r2 = models.FloatField(null=True, blank=True, verbose_name="R² NDVI")
+
+    # NDMI y SAVI
+    ndmi_actual = models.FloatField(null=True, blank=True, verbose_name="NDMI actual")
+    ndmi_pendiente = models.FloatField(null=True, blank=True, verbose_name="Pendiente NDMI (por mes)")
+    ndmi_r2 = models.FloatField(null=True, blank=True, verbose_name="R² NDMI")
+    savi_actual = models.FloatField(null=True, blank=True, verbose_name="SAVI actual")
+    savi_pendiente = models.FloatField(null=True, blank=True, verbose_name="Pendiente SAVI (por mes)")
+
+    # Anomalías NDVI (|z| > 2 respecto a la propia serie)
+    anomalias = models.PositiveSmallIntegerField(default=0, verbose_name="Anomalías NDVI")
+    ultima_anomalia = models.DateField(null=True, blank=True, verbose_name="Mes de la última anomalía")
+
+    # Estacionalidad NDVI (mes del año 1-12; vacío con menos de 12 meses de datos)
+    mes_pico = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Mes pico")
+    mes_valle = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Mes valle")
+
+    # Misma escala 0-10 que AnalizadorNDVI (promedio + ajuste por tendencia)
+    puntuacion_salud = models.FloatField(null=True, blank=True, verbose_name="Puntuación de salud")
+    requiere_atencion = models.BooleanField(default=False, verbose_name="Requiere atención")
+    motivos = models.JSONField(default=list, blank=True, verbose_name="Motivos de atención")
+
+    class Meta:
+        verbose_name = "Resumen de Análisis de Parcela"
+        verbose_name_plural = "Resúmenes de Análisis de Parcelas"
+        ordering = ['puntuacion_salud']
+        indexes = [
+            # Tablero: parcelas que requieren atención, peor puntuación primero
+            models.Index(fields=['requiere_atencion', 'puntuacion_salud']),
+        ]
+
+    def __str__(self):
+        return f"{self.parcela.nombre}: {self.puntuacion_salud} ({'atención' if self.requiere_atencion else 'ok'})"
+
+
+class InstantaneaAnalisisParcela(models.Model):
+    """
+    Análisis de una parcela para una ventana de N meses, reutilizable mientras
+    su huella coincida con la de los datos actuales.
+
+    Guardar o ingestar IndiceMensual la marca como desactualizada y encola su
+    recálculo (trabajo 'analisis_parcela'); informes, timeline y tablero la leen
+    en lugar de volver a ejecutar los analizadores.
+    """
+
+    parcela = models.ForeignKey(
+        'Parcela', on_delete=models.CASCADE,
+        related_name='instantaneas_analisis',
+        verbose_name="Parcela"
+    )
+    meses = models.PositiveSmallIntegerField(verbose_name="Meses analizados")
+    mes_inicio = models.DateField(verbose_name="Inicio del período")
+
+    # Huella de los datos: filas, última consulta a la API y hash de los valores
+    filas = models.PositiveIntegerField(default=0, verbose_name="Meses con datos")
+    ultima_consulta_api = models.DateTimeField(null=True, blank=True, verbose_name="Última consulta API")
+    hash_valores = models.CharField(max_length=64, verbose_name="Hash de los valores")
+    huella = models.CharField(
+        max_length=64,
+        help_text="SHA-256 de filas, última consulta, valores, cultivo, período y versión del análisis"
+    )
+
+    resultado = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="Resultado del análisis")
+    desactualizada = models.BooleanField(default=False, db_index=True, verbose_name="Desactualizada")
+    calculada_en = models.DateTimeField(verbose_name="Calculada en")
+    segundos_calculo = models.FloatField(default=0, verbose_name="Segundos de cálculo")
+    lecturas = models.PositiveIntegerField(default=0, help_text="Veces que se reutilizó sin recalcular")
+
+    class Meta:
+        verbose_name = "Instantánea de Análisis de Parcela"
+        verbose_name_plural = "Instantáneas de Análisis de Parcelas"
+        ordering = ['-calculada_en']
+        constraints = [
+            models.UniqueConstraint(fields=['parcela', 'meses'], name='instantanea_unica_por_parcela_y_ventana'),
+        ]
+
+    def __str__(self):
+        return f"{self.parcela.nombre} | {self.meses} meses | {'desactualizada' if self.desactualizada else 'vigente'}"
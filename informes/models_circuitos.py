@@ -0,0 +1,62 @@
+"""
+Estado compartido de los circuit breakers de servicios externos (EOSDA, Gemini)
+Vive en la base de datos para que todos los workers de gunicorn vean el mismo estado
+"""
+
+from django.db import models
+from django.utils import timezone
+
+
+class EstadoCircuito(models.Model):
+    """
+    Estado de un circuit breaker por servicio externo.
+
+    cerrado     -> las llamadas pasan; se cuentan los fallos consecutivos
+    abierto     -> las llamadas fallan al instante hasta 'abierto_hasta'
+    semiabierto -> una sola llamada de prueba decide si se cierra o se reabre
+    """
+
+    ESTADOS = [
+        ('cerrado', 'Cerrado'),
+        ('abierto', 'Abierto'),
+        ('semiabierto', 'Semiabierto (probando)'),
+    ]
+
+    servicio = models.CharField(max_length=50, unique=True, verbose_name="Servicio")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='cerrado')
+    fallos_consecutivos = models.PositiveIntegerField(default=0)
+    abierto_hasta = models.DateTimeField(null=True, blank=True, verbose_name="Abierto hasta")
+    sondeo_hasta = models.DateTimeField(
+        null=True, blank=True,
+        verbose_name="Sondeo reservado hasta",
+        help_text="Mientras no venza, ningún otro worker lanza otra llamada de prueba"
+    )
+    aperturas = models.PositiveIntegerField(default=0, verbose_name="Veces abierto")
+    ultimo_error = models.TextField(blank=True, default='')
+    ultimo_fallo = models.DateTimeField(null=True, blank=True)
+    ultimo_exito = models.DateTimeField(null=True, blank=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Estado de Circuito"
+        verbose_name_plural = "Estados de Circuitos"
+        ordering = ['servicio']
+
+    def __str__(self):
+        return f"{self.servicio}: {self.get_estado_display()} ({self.fallos_consecutivos} fallos)"
+
+    def a_dict(self) -> dict:
+        return {
+            'servicio': self.servicio,
+            'estado': self.estado,
+            'fallos_consecutivos': self.fallos_consecutivos,
+            'abierto_hasta': self.abierto_hasta.isoformat() if self.abierto_hasta else None,
+            'segundos_para_sondeo': (
+                max(0, int((self.abierto_hasta - timezone.now()).total_seconds()))
+                if self.estado == 'abierto' and self.abierto_hasta else 0
+            ),
+            'aperturas': self.aperturas,
+            'ultimo_error': self.ultimo_error[:300],
+            'ultimo_fallo': self.ultimo_fallo.isoformat() if self.ultimo_fallo else None,
+            'ultimo_exito': self.ultimo_exito.isoformat() if self.ultimo_exito else None,
+        }
@@ -410,6 +410,70 @@ class CacheDatosEOSDA(models.Model):
         return count
 
 
+class EscenaCacheEOSDA(models.Model):
+    """
+    Caché a nivel de escena de la Statistics API: una fila por
+    field_id + fecha de escena + índice (+ view_id, por si hay varias
+    teselas el mismo día). Permite reutilizar escenas entre rangos solapados.
+    """
+    field_id = models.CharField(max_length=100, verbose_name='Field ID EOSDA')
+    fecha_escena = models.DateField(verbose_name='Fecha de la Escena')
+    indice = models.CharField(max_length=10, verbose_name='Índice')  # NDVI, NDMI, SAVI
+    view_id = models.CharField(max_length=100, blank=True, default='', verbose_name='View ID')
+    nubosidad = models.FloatField(null=True, blank=True, verbose_name='Nubosidad (%)')
+    estadisticas = models.JSONField(
+        verbose_name='Estadísticas del Índice',
+        help_text='Diccionario tal como lo devuelve EOSDA (average, max, min, ...)'
+    )
+    datos_escena = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Metadatos de la Escena',
+        help_text='Resto de campos de la escena (scene_id, notes, ...)'
+    )
+    creado_en = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Escena en Caché EOSDA'
+        verbose_name_plural = 'Escenas en Caché EOSDA'
+        ordering = ['field_id', 'fecha_escena']
+        unique_together = ['field_id', 'fecha_escena', 'indice', 'view_id']
+        indexes = [
+            models.Index(fields=['field_id', 'indice', 'fecha_escena']),
+        ]
+    
+    def __str__(self):
+        return f"{self.field_id} {self.fecha_escena} {self.indice}"
+
+
+class CoberturaEscenasEOSDA(models.Model):
+    """
+    Intervalos de fechas ya consultados a la Statistics API por field_id e índice.
+    Un intervalo consultado sin escenas también cuenta como cubierto.
+    """
+    field_id = models.CharField(max_length=100, verbose_name='Field ID EOSDA')
+    indice = models.CharField(max_length=10, verbose_name='Índice')
+    fecha_inicio = models.DateField(verbose_name='Fecha Inicio')
+    fecha_fin = models.DateField(verbose_name='Fecha Fin')
+    max_nubosidad = models.FloatField(
+        verbose_name='Nubosidad Máxima Consultada',
+        help_text='Solo sirve para consultas con un filtro de nubes igual o más estricto'
+    )
+    task_id = models.CharField(max_length=100, blank=True, null=True)
+    creado_en = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Cobertura de Escenas EOSDA'
+        verbose_name_plural = 'Coberturas de Escenas EOSDA'
+        ordering = ['field_id', 'indice', 'fecha_inicio']
+        indexes = [
+            models.Index(fields=['field_id', 'indice', 'fecha_inicio', 'fecha_fin']),
+        ]
+    
+    def __str__(self):
+        return f"{self.field_id} {self.indice} ({self.fecha_inicio} - {self.fecha_fin})"
+
+
 class EstadisticaUsoEOSDA(models.Model):
     """
     Registro de uso de la API de EOSDA para monitoreo de costos
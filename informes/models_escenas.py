@@ -0,0 +1,54 @@
+"""
+Serie a nivel de escena por parcela
+- EscenaIndiceParcela: una fila compacta por escena Sentinel-2 e índice (promedio,
+  mínimo, máximo, desviación, nubosidad y view_id), sin caducidad
+- IndiceMensual sigue siendo el agregado mensual; con estas filas la analítica puede
+  reagregar a otra granularidad (semanal, decadal, mensual) sin volver a pedir
+  datos a EOSDA (ver services/escenas_parcela.py)
+"""
+
+from django.contrib.postgres.indexes import BrinIndex
+from django.db import models
+
+
+class EscenaIndiceParcela(models.Model):
+    """
+    Estadísticas de un índice en una escena de la Statistics API para una parcela.
+
+    Se carga en bloque desde los resultados de EOSDA (ingesta de datos históricos)
+    o desde el caché de escenas (EscenaCacheEOSDA, comando cargar_escenas).
+    """
+
+    parcela = models.ForeignKey(
+        'Parcela', on_delete=models.CASCADE,
+        related_name='escenas_indices',
+        verbose_name="Parcela"
+    )
+    fecha = models.DateField(verbose_name="Fecha de la escena")
+    indice = models.CharField(max_length=10, verbose_name="Índice")  # NDVI, NDMI, SAVI
+    view_id = models.CharField(max_length=100, blank=True, default='', verbose_name="View ID")
+
+    promedio = models.FloatField(null=True, blank=True, verbose_name="Promedio")
+    minimo = models.FloatField(null=True, blank=True, verbose_name="Mínimo")
+    maximo = models.FloatField(null=True, blank=True, verbose_name="Máximo")
+    desviacion = models.FloatField(null=True, blank=True, verbose_name="Desviación estándar")
+    nubosidad = models.FloatField(null=True, blank=True, verbose_name="Nubosidad (%)")
+
+    class Meta:
+        verbose_name = "Escena de Índice por Parcela"
+        verbose_name_plural = "Escenas de Índices por Parcela"
+        ordering = ['parcela', 'fecha']
+        constraints = [
+            # También sirve de índice para las consultas por parcela + índice + rango de fechas
+            models.UniqueConstraint(
+                fields=['parcela', 'indice', 'fecha', 'view_id'],
+                name='escena_unica_por_parcela_indice_fecha_vista'
+            ),
+        ]
+        indexes = [
+            # Filas insertadas aproximadamente en orden de fecha: BRIN es diminuto frente a un B-tree
+            BrinIndex(fields=['fecha'], name='escena_fecha_brin'),
+        ]
+
+    def __str__(self):
+        return f"{self.parcela.nombre} {self.fecha} {self.indice}: {self.promedio}"
@@ -10,23 +10,54 @@ class AnalisisImagen(models.Model):
     """
     Cachea análisis de imágenes satelitales generados por Gemini AI
     para evitar peticiones duplicadas y reducir consumo de API
+
+    La clave de caché combina el SHA-256 de la imagen, el índice, el valor
+    promedio y el del mes anterior (redondeados) y la versión del prompt
+    (ver services/cache_analisis_imagenes.py).
     """
     parcela = models.ForeignKey('Parcela', on_delete=models.CASCADE, related_name='analisis_imagenes')
     fecha_imagen = models.DateField()
     indice = models.CharField(max_length=10, choices=[('ndvi', 'NDVI'), ('ndmi', 'NDMI'), ('savi', 'SAVI')])
-    url_imagen = models.URLField(max_length=500)
+    url_imagen = models.CharField(max_length=500, blank=True, default='', help_text="Ruta de la imagen analizada")
     resultado_gemini = models.JSONField()
     fecha_analisis = models.DateTimeField(auto_now_add=True)
-    hash_imagen = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    hash_imagen = models.CharField(
+        max_length=64, blank=True, null=True, db_index=True,
+        help_text="SHA-256 del PNG analizado (misma clave que ImagenSatelitalAlmacenada.sha256)"
+    )
+
+    # Caché
+    clave_cache = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    version_prompt = models.PositiveSmallIntegerField(default=1, verbose_name="Versión del prompt")
+    valor_promedio = models.FloatField(null=True, blank=True)
+    valor_mes_anterior = models.FloatField(null=True, blank=True)
+    expira_en = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="Expira")
+    usos = models.PositiveIntegerField(default=0, help_text="Veces que el análisis se reutilizó desde caché")
+    ultimo_uso = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        unique_together = ('parcela', 'fecha_imagen', 'indice', 'url_imagen')
         verbose_name = 'Análisis de Imagen Satelital (Gemini)'
         verbose_name_plural = 'Análisis de Imágenes Satelitales (Gemini)'
+        indexes = [
+            models.Index(fields=['parcela', 'fecha_imagen', 'indice']),
+        ]
 
     def __str__(self):
         return f"{self.parcela.nombre} | {self.fecha_imagen} | {self.indice}"
 
+    @property
+    def vigente(self) -> bool:
+        return bool(self.expira_en and self.expira_en > timezone.now())
+
+    @property
+    def imagen_almacenada(self):
+        """Imagen del almacén direccionado por contenido que se analizó (o None)"""
+        from .models_imagenes import ImagenSatelitalAlmacenada
+
+        if not self.hash_imagen:
+            return None
+        return ImagenSatelitalAlmacenada.objects.filter(sha256=self.hash_imagen).first()
+
 
 class InformeGenerado(models.Model):
     """
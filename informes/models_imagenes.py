@@ -0,0 +1,105 @@
+"""
+Modelos para la descarga de imágenes satelitales (Field Imagery API de EOSDA)
+- Estado de cada solicitud para que la descarga sea reanudable
+- Almacén direccionado por contenido (SHA-256) con índice por field_id + view_id + índice
+"""
+
+from django.db import models
+from django.utils import timezone
+
+
+class SolicitudImagenEOSDA(models.Model):
+    """
+    Solicitud de una imagen (índice + view_id) para un registro mensual.
+    Guarda el request_id de EOSDA: si el proceso se interrumpe, la siguiente
+    ejecución consulta la misma solicitud en lugar de generar otra.
+    """
+
+    ESTADOS = [
+        ('pendiente', 'Pendiente de enviar'),
+        ('enviada', 'Enviada (esperando imagen)'),
+        ('descargada', 'Descargada'),
+        ('fallida', 'Fallida'),
+    ]
+
+    indice_mensual = models.ForeignKey(
+        'IndiceMensual',
+        on_delete=models.CASCADE,
+        related_name='solicitudes_imagen',
+        verbose_name="Registro mensual"
+    )
+    indice = models.CharField(max_length=10, verbose_name="Índice")
+    view_id = models.CharField(max_length=100, verbose_name="View ID")
+    field_id = models.CharField(max_length=100, verbose_name="Field ID EOSDA")
+    request_id = models.CharField(max_length=100, blank=True, default='', verbose_name="Request ID EOSDA")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente', db_index=True)
+    intentos = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    bytes_descargados = models.PositiveIntegerField(null=True, blank=True)
+
+    creado_en = models.DateTimeField(auto_now_add=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Solicitud de Imagen EOSDA"
+        verbose_name_plural = "Solicitudes de Imágenes EOSDA"
+        unique_together = ['indice_mensual', 'indice', 'view_id']
+        ordering = ['-creado_en']
+
+    def __str__(self):
+        return f"{self.indice} {self.view_id} ({self.get_estado_display()})"
+
+    @property
+    def campo_imagen(self) -> str:
+        """Nombre del ImageField de IndiceMensual que recibe la imagen"""
+        return f'imagen_{self.indice.lower()}'
+
+
+class ImagenSatelitalAlmacenada(models.Model):
+    """
+    PNG guardado una sola vez en disco, con el SHA-256 de su contenido como nombre.
+    'referencias' cuenta los ImageField de IndiceMensual que apuntan al archivo:
+    solo las imágenes sin referencias pueden desalojarse (LRU) al superar el presupuesto.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="SHA-256")
+    ruta = models.CharField(max_length=255, verbose_name="Ruta en storage")
+    tamaño_bytes = models.PositiveIntegerField(verbose_name="Tamaño (bytes)")
+    content_type = models.CharField(max_length=50, default='image/png')
+    referencias = models.PositiveIntegerField(default=0, verbose_name="Referencias")
+    ultimo_acceso = models.DateTimeField(default=timezone.now, db_index=True)
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Imagen Satelital Almacenada"
+        verbose_name_plural = "Imágenes Satelitales Almacenadas"
+        ordering = ['-ultimo_acceso']
+
+    def __str__(self):
+        return f"{self.sha256[:12]}… ({self.tamaño_bytes / 1024:.0f} KB, {self.referencias} ref.)"
+
+
+class ClaveImagenSatelital(models.Model):
+    """
+    Índice de búsqueda: qué imagen almacenada corresponde a (field_id, view_id, índice).
+    Varias claves pueden apuntar al mismo archivo si EOSDA devuelve bytes idénticos.
+    """
+
+    field_id = models.CharField(max_length=100, verbose_name="Field ID EOSDA")
+    view_id = models.CharField(max_length=100, verbose_name="View ID")
+    indice = models.CharField(max_length=10, verbose_name="Índice")
+    imagen = models.ForeignKey(
+        ImagenSatelitalAlmacenada,
+        on_delete=models.CASCADE,
+        related_name='claves',
+        verbose_name="Imagen"
+    )
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Clave de Imagen Satelital"
+        verbose_name_plural = "Claves de Imágenes Satelitales"
+        unique_together = ['field_id', 'view_id', 'indice']
+
+    def __str__(self):
+        return f"{self.field_id} | {self.view_id} | {self.indice}"
@@ -0,0 +1,253 @@
+"""
+Cola de trabajos en segundo plano respaldada por la base de datos
+Permite sacar procesos largos (ingesta EOSDA, etc.) del hilo de la petición
+sin depender de un broker externo. Los ejecuta: python manage.py procesar_trabajos
+"""
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import Q, F
+from django.contrib.auth.models import User
+from django.utils import timezone
+from datetime import timedelta
+
+
+class TrabajoSegundoPlano(models.Model):
+    """
+    Trabajo encolado para ejecutarse fuera del ciclo petición/respuesta
+    """
+
+    TIPOS_TRABAJO = [
+        ('ingesta_historica', 'Ingesta de datos históricos EOSDA'),
+        ('prefetch_imagenes', 'Descarga anticipada de imágenes satelitales'),
+        ('informe_pdf', 'Generación de informe PDF'),
+        ('analisis_parcela', 'Recálculo del análisis materializado de una parcela'),
+    ]
+
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('completado', 'Completado'),
+        ('fallido', 'Fallido'),
+        ('cancelado', 'Cancelado'),
+    ]
+
+    ESTADOS_ACTIVOS = ('pendiente', 'en_proceso')
+
+    tipo = models.CharField(max_length=50, choices=TIPOS_TRABAJO, verbose_name="Tipo de trabajo")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente', db_index=True)
+
+    # Contexto
+    parcela = models.ForeignKey(
+        'Parcela',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='trabajos',
+        verbose_name="Parcela"
+    )
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='trabajos_segundo_plano',
+        verbose_name="Usuario"
+    )
+    parametros = models.JSONField(default=dict, blank=True, verbose_name="Parámetros")
+    clave_dedup = models.CharField(
+        max_length=200,
+        db_index=True,
+        help_text="Solo puede haber un trabajo activo (pendiente/en proceso) por clave"
+    )
+
+    # Progreso y resultado
+    progreso = models.PositiveSmallIntegerField(default=0, verbose_name="Progreso (%)")
+    mensaje_progreso = models.CharField(max_length=255, blank=True)
+    resultado = models.JSONField(null=True, blank=True, verbose_name="Resultado")
+    mensaje_error = models.TextField(blank=True)
+
+    # Reintentos
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=3)
+    disponible_desde = models.DateTimeField(default=timezone.now, db_index=True,
+                                            help_text="No se ejecuta antes de esta fecha (backoff de reintentos)")
+
+    # Seguimiento
+    worker = models.CharField(max_length=100, blank=True, help_text="Worker que tomó el trabajo")
+    creado_en = models.DateTimeField(auto_now_add=True)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    finalizado_en = models.DateTimeField(null=True, blank=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Trabajo en Segundo Plano"
+        verbose_name_plural = "Trabajos en Segundo Plano"
+        ordering = ['-creado_en']
+        indexes = [
+            models.Index(fields=['estado', 'disponible_desde']),
+            models.Index(fields=['parcela', 'tipo', '-creado_en']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['clave_dedup'],
+                condition=Q(estado__in=['pendiente', 'en_proceso']),
+                name='trabajo_activo_unico_por_clave',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} - {self.get_estado_display()} ({self.progreso}%)"
+
+    @property
+    def activo(self) -> bool:
+        return self.estado in self.ESTADOS_ACTIVOS
+
+    @classmethod
+    def encolar(cls, tipo: str, clave_dedup: str, parametros: dict = None,
+                parcela=None, usuario=None, max_intentos: int = 3):
+        """
+        Encola un trabajo salvo que ya exista uno activo con la misma clave.
+
+        Returns:
+            Tupla (trabajo, creado)
+        """
+        existente = cls.objects.filter(clave_dedup=clave_dedup, estado__in=cls.ESTADOS_ACTIVOS).first()
+        if existente:
+            return existente, False
+
+        try:
+            with transaction.atomic():
+                trabajo = cls.objects.create(
+                    tipo=tipo,
+                    clave_dedup=clave_dedup,
+                    parametros=parametros or {},
+                    parcela=parcela,
+                    usuario=usuario,
+                    max_intentos=max_intentos,
+                )
+            return trabajo, True
+        except IntegrityError:
+            # Otra petición encoló el mismo trabajo entre la consulta y el insert
+            return cls.objects.get(clave_dedup=clave_dedup, estado__in=cls.ESTADOS_ACTIVOS), False
+
+    @classmethod
+    def tomar_siguiente(cls, worker: str = ''):
+        """
+        Reserva el siguiente trabajo pendiente de forma atómica.
+        SKIP LOCKED permite varios workers concurrentes sin tomar el mismo trabajo.
+        """
+        with transaction.atomic():
+            trabajo = (
+                cls.objects
+                .select_for_update(skip_locked=True)
+                .filter(estado='pendiente', disponible_desde__lte=timezone.now())
+                .order_by('disponible_desde', 'creado_en')
+                .first()
+            )
+            if not trabajo:
+                return None
+
+            trabajo.estado = 'en_proceso'
+            trabajo.intentos = F('intentos') + 1
+            trabajo.worker = worker
+            trabajo.iniciado_en = timezone.now()
+            trabajo.mensaje_error = ''
+            trabajo.save(update_fields=['estado', 'intentos', 'worker', 'iniciado_en',
+                                        'mensaje_error', 'actualizado_en'])
+            trabajo.refresh_from_db(fields=['intentos'])
+            return trabajo
+
+    @classmethod
+    def recuperar_huerfanos(cls, minutos: int = 30) -> tuple:
+        """
+        Devuelve a la cola trabajos 'en_proceso' abandonados (worker caído).
+        Los que ya agotaron sus intentos quedan 'fallido': un trabajo que tumba
+        al worker siempre no se reencola indefinidamente.
+
+        Returns:
+            Tupla (reencolados, fallidos)
+        """
+        from .models import Informe
+
+        ahora = timezone.now()
+        huerfanos = cls.objects.filter(estado='en_proceso', actualizado_en__lt=ahora - timedelta(minutes=minutos))
+        agotados = huerfanos.filter(intentos__gte=F('max_intentos'))
+        error = 'El worker se interrumpió en todos los intentos'
+        with transaction.atomic():
+            # El informe de un trabajo agotado no debe quedar a medias en la interfaz
+            informes = [
+                parametros.get('informe_id')
+                for parametros in agotados.filter(tipo='informe_pdf').values_list('parametros', flat=True)
+            ]
+            Informe.objects.filter(
+                pk__in=informes, estado_generacion__in=Informe.ESTADOS_GENERACION_ACTIVOS
+            ).update(estado_generacion='fallido', mensaje_generacion='Generación fallida', error_generacion=error)
+            fallidos = agotados.update(
+                estado='fallido',
+                worker='',
+                mensaje_error=error,
+                finalizado_en=ahora,
+                actualizado_en=ahora,
+            )
+            reencolados = huerfanos.update(
+                estado='pendiente',
+                worker='',
+                mensaje_progreso='Reencolado tras interrupción del worker',
+                actualizado_en=ahora,
+            )
+        return reencolados, fallidos
+
+    def actualizar_progreso(self, porcentaje: int, mensaje: str = ''):
+        """
+        Actualiza el progreso sin tocar el resto de columnas
+        """
+        self.progreso = max(0, min(100, int(porcentaje)))
+        self.mensaje_progreso = mensaje[:255]
+        type(self).objects.filter(pk=self.pk).update(
+            progreso=self.progreso,
+            mensaje_progreso=self.mensaje_progreso,
+            actualizado_en=timezone.now(),
+        )
+
+    def marcar_completado(self, resultado: dict = None):
+        self.estado = 'completado'
+        self.progreso = 100
+        self.resultado = resultado
+        self.finalizado_en = timezone.now()
+        self.save(update_fields=['estado', 'progreso', 'resultado', 'finalizado_en', 'actualizado_en'])
+
+    def marcar_fallido(self, error: str):
+        """
+        Registra un fallo. Si quedan intentos, reencola con backoff exponencial.
+        """
+        self.mensaje_error = error[:2000]
+        if self.intentos < self.max_intentos:
+            self.estado = 'pendiente'
+            self.disponible_desde = timezone.now() + timedelta(minutes=2 ** self.intentos)
+            self.mensaje_progreso = f'Reintento {self.intentos + 1}/{self.max_intentos} programado'
+        else:
+            self.estado = 'fallido'
+            self.finalizado_en = timezone.now()
+        self.save(update_fields=['estado', 'mensaje_error', 'disponible_desde', 'mensaje_progreso',
+                                 'finalizado_en', 'actualizado_en'])
+
+    def a_dict(self) -> dict:
+        """
+        Representación JSON para el endpoint de estado
+        """
+        return {
+            'id': self.pk,
+            'tipo': self.tipo,
+            'estado': self.estado,
+            'estado_display': self.get_estado_display(),
+            'progreso': self.progreso,
+            'mensaje': self.mensaje_progreso,
+            'resultado': self.resultado,
+            'error': self.mensaje_error or None,
+            'intentos': self.intentos,
+            'max_intentos': self.max_intentos,
+            'parcela_id': self.parcela_id,
+            'creado_en': self.creado_en.isoformat() if self.creado_en else None,
+            'iniciado_en': self.iniciado_en.isoformat() if self.iniciado_en else None,
+            'finalizado_en': self.finalizado_en.isoformat() if self.finalizado_en else None,
+        }
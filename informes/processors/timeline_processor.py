@@ -303,6 +303,42 @@ class TimelineProcessor:
         
         return " • ".join(resumen_partes) if resumen_partes else "Datos en análisis"
     
+    @staticmethod
+    def _resumen_analisis(parcela: Parcela) -> Optional[Dict[str, Any]]:
+        """
+        Resumen del análisis de la parcela desde su instantánea materializada.
+        Solo lee: nunca ejecuta los analizadores dentro de la petición. Si la instantánea
+        está desactualizada ya hay un trabajo 'analisis_parcela' encolado que la recalcula;
+        si no existe se encola uno y se devuelve el resumen marcado como pendiente.
+        """
+        from django.conf import settings
+        from ..services.instantaneas_analisis import instantaneas_analisis
+        from ..services.trabajos import encolar_analisis_parcela
+        
+        meses = getattr(settings, 'ANALISIS_INSTANTANEA_MESES', 12)
+        try:
+            instantanea = instantaneas_analisis.leer(parcela, meses)
+            if instantanea is None:
+                encolar_analisis_parcela(parcela)
+                return {'meses': meses, 'pendiente': True, 'desactualizado': False}
+        except Exception as e:
+            logger.warning(f"⚠️ Análisis de la parcela {parcela.id} no disponible para el timeline: {str(e)}")
+            return None
+        
+        analisis = instantanea.resultado or {}
+        ndvi = analisis.get('ndvi') or {}
+        return {
+            'meses': meses,
+            'pendiente': False,
+            'desactualizado': instantanea.desactualizada,
+            'calculado_en': instantanea.calculada_en.isoformat(),
+            'puntuacion_ndvi': ndvi.get('puntuacion'),
+            'estado_ndvi': ndvi.get('estado'),
+            'tendencia': (analisis.get('tendencias') or {}).get('tendencia_lineal'),
+            'resumen_tendencias': (analisis.get('tendencias') or {}).get('resumen'),
+            'recomendaciones': (analisis.get('recomendaciones') or [])[:3],
+        }
+    
     @staticmethod
     def generar_timeline_completo(parcela: Parcela, fecha_inicio: Optional[datetime] = None, 
                                   fecha_fin: Optional[datetime] = None) -> Dict[str, Any]:
@@ -372,6 +408,7 @@ class TimelineProcessor:
                 'fecha_inicio': f"{indices[0].año}-{indices[0].mes:02d}",
                 'fecha_fin': f"{indices[-1].año}-{indices[-1].mes:02d}",
                 'frames': frames,
+                'analisis': TimelineProcessor._resumen_analisis(parcela),
                 'estadisticas': {
                     'ndvi_promedio': sum(f['ndvi']['promedio'] for f in frames if f.get('ndvi', {}).get('promedio')) / len([f for f in frames if f.get('ndvi', {}).get('promedio')]) if any(f.get('ndvi', {}).get('promedio') for f in frames) else None,
                     'ndmi_promedio': sum(f['ndmi']['promedio'] for f in frames if f.get('ndmi', {}).get('promedio')) / len([f for f in frames if f.get('ndmi', {}).get('promedio')]) if any(f.get('ndmi', {}).get('promedio') for f in frames) else None,
@@ -0,0 +1,250 @@
+"""
+Almacén de imágenes satelitales direccionado por contenido
+- Cada PNG se guarda una vez, con su SHA-256 como nombre de archivo
+- Índice de búsqueda por (field_id, view_id, índice) para no volver a pedirlo a EOSDA
+- Conteo de referencias desde los ImageField de IndiceMensual
+- Desalojo LRU de imágenes sin referencias cuando se supera el presupuesto de disco
+"""
+
+import hashlib
+import io
+import logging
+from collections import Counter
+from typing import Dict, Iterable, Union
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TAMAÑO_BLOQUE = 64 * 1024
+CAMPOS_IMAGEN = ('imagen_ndvi', 'imagen_ndmi', 'imagen_savi')
+
+
+class AlmacenImagenesSatelitales:
+    """
+    Almacén de PNGs de Field Imagery API sobre el storage de Django (MEDIA_ROOT)
+    """
+
+    def __init__(self, directorio: str = None, presupuesto_mb: int = None):
+        self.directorio = (directorio or getattr(
+            settings, 'IMAGENES_SATELITALES_DIRECTORIO', 'imagenes_satelitales/sha256'
+        )).strip('/')
+        self.presupuesto_bytes = (presupuesto_mb or getattr(
+            settings, 'IMAGENES_SATELITALES_PRESUPUESTO_MB', 2048
+        )) * 1024 * 1024
+
+    def ruta_para(self, sha256: str) -> str:
+        """Ruta relativa al storage (dos niveles para no saturar un directorio)"""
+        return f"{self.directorio}/{sha256[:2]}/{sha256}.png"
+
+    def es_ruta_almacen(self, ruta: str) -> bool:
+        return bool(ruta) and ruta.startswith(self.directorio + '/')
+
+    @staticmethod
+    def calcular_sha256(archivo) -> tuple:
+        """
+        SHA-256 y tamaño de un archivo leyéndolo por bloques. Deja el archivo al inicio.
+        """
+        sha = hashlib.sha256()
+        tamaño = 0
+        archivo.seek(0)
+        for bloque in iter(lambda: archivo.read(TAMAÑO_BLOQUE), b''):
+            sha.update(bloque)
+            tamaño += len(bloque)
+        archivo.seek(0)
+        return sha.hexdigest(), tamaño
+
+    def buscar(self, field_id: str, view_id: str, indice: str):
+        """
+        Imagen almacenada para (field_id, view_id, índice) o None.
+        Actualiza el último acceso (LRU).
+        """
+        from ..models import ClaveImagenSatelital
+
+        if not field_id or not view_id:
+            return None
+
+        clave = ClaveImagenSatelital.objects.select_related('imagen').filter(
+            field_id=field_id, view_id=view_id, indice=indice.upper()
+        ).first()
+        if not clave:
+            return None
+
+        imagen = clave.imagen
+        if not default_storage.exists(imagen.ruta):
+            logger.warning(f"⚠️ Imagen {imagen.sha256[:12]} indexada pero sin archivo, se descarta")
+            imagen.delete()
+            return None
+
+        self._tocar(imagen)
+        logger.info(f"   💾 Imagen {indice.upper()} (view_id: {view_id}) desde almacén local")
+        return imagen
+
+    def leer(self, imagen) -> bytes:
+        """Contenido completo de una imagen almacenada"""
+        with default_storage.open(imagen.ruta, 'rb') as archivo:
+            return archivo.read()
+
+    def guardar(self, contenido: Union[bytes, File, io.IOBase], field_id: str,
+                view_id: str, indice: str):
+        """
+        Guarda una imagen (si su contenido no existía ya) y la indexa por
+        (field_id, view_id, índice).
+
+        Args:
+            contenido: bytes o archivo binario (se lee por bloques, no se carga entero)
+
+        Returns:
+            ImagenSatelitalAlmacenada
+        """
+        from ..models import ImagenSatelitalAlmacenada, ClaveImagenSatelital
+
+        archivo = io.BytesIO(contenido) if isinstance(contenido, bytes) else contenido
+        sha256, tamaño = self.calcular_sha256(archivo)
+        ruta = self.ruta_para(sha256)
+
+        nueva = False
+        if not default_storage.exists(ruta):
+            ruta_guardada = default_storage.save(ruta, File(archivo))
+            if ruta_guardada != ruta:
+                # Otro proceso escribió el mismo contenido a la vez: conservar una sola copia
+                default_storage.delete(ruta_guardada)
+            nueva = True
+
+        try:
+            with transaction.atomic():
+                imagen, creada = ImagenSatelitalAlmacenada.objects.get_or_create(
+                    sha256=sha256,
+                    defaults={'ruta': ruta, 'tamaño_bytes': tamaño},
+                )
+        except IntegrityError:
+            imagen = ImagenSatelitalAlmacenada.objects.get(sha256=sha256)
+            creada = False
+
+        if not creada:
+            self._tocar(imagen)
+
+        ClaveImagenSatelital.objects.update_or_create(
+            field_id=field_id,
+            view_id=view_id,
+            indice=indice.upper(),
+            defaults={'imagen': imagen},
+        )
+
+        if creada:
+            logger.info(f"   💾 Imagen {indice.upper()} almacenada como {sha256[:12]}… ({tamaño / 1024:.0f} KB)")
+        else:
+            logger.info(f"   ♻️ Imagen {indice.upper()} idéntica a {sha256[:12]}…, sin duplicar en disco")
+
+        if nueva:
+            # Aún sin referencias hasta asignar_a_registro: no desalojar la recién guardada
+            self.liberar_espacio(excluir=[sha256])
+        return imagen
+
+    def asignar_a_registro(self, registro, indice: str, imagen) -> bool:
+        """
+        Apunta el ImageField del registro mensual a la imagen almacenada
+        (sin copiar el archivo) y ajusta las referencias.
+
+        Returns:
+            True si el campo cambió
+        """
+        from ..models import ImagenSatelitalAlmacenada
+
+        campo = f'imagen_{indice.lower()}'
+        anterior = getattr(registro, campo).name or ''
+        if anterior == imagen.ruta:
+            return False
+
+        setattr(registro, campo, imagen.ruta)
+        registro.save(update_fields=[campo])
+
+        ImagenSatelitalAlmacenada.objects.filter(pk=imagen.pk).update(
+            referencias=F('referencias') + 1, ultimo_acceso=timezone.now()
+        )
+        if self.es_ruta_almacen(anterior):
+            ImagenSatelitalAlmacenada.objects.filter(ruta=anterior, referencias__gt=0).update(
+                referencias=F('referencias') - 1
+            )
+        return True
+
+    def recalcular_referencias(self) -> int:
+        """
+        Recuenta las referencias desde IndiceMensual (corrige desvíos por
+        registros borrados o campos limpiados fuera del almacén).
+
+        Returns:
+            Número de imágenes cuyo contador cambió
+        """
+        from ..models import IndiceMensual, ImagenSatelitalAlmacenada
+
+        conteo = Counter()
+        for campo in CAMPOS_IMAGEN:
+            conteo.update(
+                IndiceMensual.objects.filter(**{f'{campo}__startswith': self.directorio + '/'})
+                .values_list(campo, flat=True)
+            )
+
+        cambiadas = []
+        for imagen in ImagenSatelitalAlmacenada.objects.only('id', 'ruta', 'referencias'):
+            referencias = conteo.get(imagen.ruta, 0)
+            if imagen.referencias != referencias:
+                imagen.referencias = referencias
+                cambiadas.append(imagen)
+
+        ImagenSatelitalAlmacenada.objects.bulk_update(cambiadas, ['referencias'], batch_size=500)
+        return len(cambiadas)
+
+    def liberar_espacio(self, presupuesto_bytes: int = None, excluir: Iterable[str] = ()) -> Dict:
+        """
+        Desaloja las imágenes sin referencias menos usadas hasta quedar
+        por debajo del presupuesto de disco.
+
+        Args:
+            excluir: sha256 que no se deben desalojar (p.ej. la imagen recién guardada)
+
+        Returns:
+            Dict con 'total_bytes', 'eliminadas', 'bytes_liberados'
+        """
+        from ..models import ImagenSatelitalAlmacenada
+
+        presupuesto = self.presupuesto_bytes if presupuesto_bytes is None else presupuesto_bytes
+        total = ImagenSatelitalAlmacenada.objects.aggregate(total=Sum('tamaño_bytes'))['total'] or 0
+        resumen = {'total_bytes': total, 'eliminadas': 0, 'bytes_liberados': 0}
+
+        if total <= presupuesto:
+            return resumen
+
+        candidatas = ImagenSatelitalAlmacenada.objects.filter(referencias=0) \
+            .exclude(sha256__in=list(excluir)).order_by('ultimo_acceso')
+        for imagen in candidatas.iterator():
+            if total <= presupuesto:
+                break
+            default_storage.delete(imagen.ruta)
+            imagen.delete()
+            total -= imagen.tamaño_bytes
+            resumen['eliminadas'] += 1
+            resumen['bytes_liberados'] += imagen.tamaño_bytes
+
+        resumen['total_bytes'] = total
+        logger.info(f"🧹 Almacén de imágenes: {resumen['eliminadas']} desalojadas, "
+                    f"{resumen['bytes_liberados'] / 1024 / 1024:.1f} MB liberados")
+        if total > presupuesto:
+            logger.warning(f"⚠️ Almacén de imágenes sobre el presupuesto "
+                           f"({total / 1024 / 1024:.0f} MB): el resto está referenciado")
+        return resumen
+
+    def _tocar(self, imagen):
+        from ..models import ImagenSatelitalAlmacenada
+
+        imagen.ultimo_acceso = timezone.now()
+        ImagenSatelitalAlmacenada.objects.filter(pk=imagen.pk).update(ultimo_acceso=imagen.ultimo_acceso)
+
+
+# Instancia global del almacén
+almacen_imagenes = AlmacenImagenesSatelitales()
@@ -0,0 +1,322 @@
+"""
+Analítica de flota: todas las parcelas activas en una sola pasada vectorizada
+- Una consulta a IndiceMensual arma una matriz (parcelas x meses calendario) por índice,
+  más la de nubosidad, que pondera cada mes en los ajustes de tendencia
+- Tendencia, R², anomalías, estacionalidad y puntuación de salud se calculan para
+  todas las filas a la vez con las funciones de analizadores/serie_temporal.py
+- El resultado se guarda en ResumenAnalisisParcela con un upsert en bloque;
+  el tablero de parcelas que requieren atención solo lee esa tabla
+"""
+
+import logging
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from ..analizadores.ndmi_analyzer import AnalizadorNDMI
+from ..analizadores.serie_temporal import (
+    estadisticas_basicas, pesos_nubosidad, promedios_por_grupo, regresion_lineal, z_scores
+)
+
+logger = logging.getLogger(__name__)
+
+# Columnas de IndiceMensual cargadas en las matrices
+CAMPOS_INDICES = {
+    'ndvi': 'ndvi_promedio',
+    'ndmi': 'ndmi_promedio',
+    'savi': 'savi_promedio',
+}
+
+# Además de los índices: nubosidad del mes (peso de calidad, ver pesos_nubosidad)
+CAMPOS_MATRICES = {**CAMPOS_INDICES, 'nubosidad': 'nubosidad_promedio'}
+
+# Criterios de "requiere atención"
+PUNTUACION_MINIMA = 4.0           # NDVI promedio < 0.40 (salud "Deficiente")
+PENDIENTE_DESCENSO = -0.02        # NDVI por mes...
+R2_DESCENSO = 0.4                 # ...con un ajuste lineal al menos moderado
+Z_CAIDA_RECIENTE = -2.0           # Último mes con NDVI anómalamente bajo
+MESES_SIN_DATOS = 3               # Sin NDVI en los últimos N meses de la ventana
+
+# Mínimos de datos (los mismos que usan los analizadores por parcela)
+MIN_MESES_TENDENCIA = 3
+MIN_MESES_ANOMALIAS = 5
+MIN_MESES_ESTACIONALIDAD = 12
+MIN_MESES_DEL_AÑO = 6
+
+
+def _config(nombre: str, defecto):
+    from django.conf import settings
+    return getattr(settings, nombre, defecto)
+
+
+def _numero_mes(fecha: date) -> int:
+    return fecha.year * 12 + fecha.month - 1
+
+
+def _fecha_mes(numero: int) -> date:
+    return date(numero // 12, numero % 12 + 1, 1)
+
+
+class MatricesFlota:
+    """
+    Matrices alineadas (parcelas x meses calendario) por índice y de nubosidad; NaN = mes sin dato
+    """
+
+    def __init__(self, parcela_ids: np.ndarray, inicio: int, n_meses: int, valores: Dict[str, np.ndarray]):
+        self.parcela_ids = parcela_ids
+        self.inicio = inicio            # Número de mes (año*12 + mes-1) de la primera columna
+        self.n_meses = n_meses
+        self.valores = valores
+        self.meses_del_año = (inicio + np.arange(n_meses)) % 12 + 1
+
+    def fecha_columna(self, columna: int) -> date:
+        return _fecha_mes(self.inicio + int(columna))
+
+    @classmethod
+    def cargar(cls, meses: int = None, parcela_ids: Optional[Iterable[int]] = None,
+               hasta: date = None) -> 'MatricesFlota':
+        """
+        Carga los índices de las parcelas activas en una sola consulta.
+
+        Args:
+            meses: Largo de la ventana en meses (default: ANALISIS_FLOTA_MESES)
+            parcela_ids: Limitar a estas parcelas
+            hasta: Último mes de la ventana (default: mes actual)
+        """
+        from ..models import IndiceMensual, Parcela
+
+        meses = meses or _config('ANALISIS_FLOTA_MESES', 24)
+        fin = _numero_mes(hasta or date.today())
+        inicio = fin - meses + 1
+
+        parcelas = Parcela.objects.filter(activa=True)
+        if parcela_ids is not None:
+            parcelas = parcelas.filter(id__in=list(parcela_ids))
+        ids = np.array(sorted(parcelas.values_list('id', flat=True)), dtype=np.int64)
+
+        valores = {campo: np.full((len(ids), meses), np.nan) for campo in CAMPOS_MATRICES}
+        if not len(ids):
+            return cls(ids, inicio, meses, valores)
+
+        registros = IndiceMensual.objects.filter(
+            parcela_id__in=ids.tolist(),
+            año__gte=inicio // 12, año__lte=fin // 12,
+        ).values_list('parcela_id', 'año', 'mes', *CAMPOS_MATRICES.values())
+        # None -> NaN al convertir a float
+        tabla = np.array(list(registros), dtype=float).reshape(-1, 3 + len(CAMPOS_MATRICES))
+
+        columnas = (tabla[:, 1] * 12 + tabla[:, 2] - 1).astype(np.int64) - inicio
+        en_ventana = (columnas >= 0) & (columnas < meses)
+        tabla, columnas = tabla[en_ventana], columnas[en_ventana]
+        filas = np.searchsorted(ids, tabla[:, 0].astype(np.int64))
+
+        for posicion, campo in enumerate(CAMPOS_MATRICES, start=3):
+            valores[campo][filas, columnas] = tabla[:, posicion]
+        return cls(ids, inicio, meses, valores)
+
+
+def _ultima_columna(presentes: np.ndarray) -> np.ndarray:
+    """Columna del último valor presente de cada fila (-1 si la fila no tiene datos)"""
+    n_meses = presentes.shape[1]
+    ultima = n_meses - 1 - np.argmax(presentes[:, ::-1], axis=1)
+    return np.where(presentes.any(axis=1), ultima, -1)
+
+
+def _en_columna(matriz: np.ndarray, columnas: np.ndarray) -> np.ndarray:
+    """matriz[fila, columnas[fila]] por fila; NaN donde la columna es -1"""
+    if not len(matriz):
+        return np.empty(0)
+    valores = matriz[np.arange(len(matriz)), np.maximum(columnas, 0)]
+    return np.where(columnas >= 0, valores, np.nan)
+
+
+def _puntuacion_salud(promedio: np.ndarray, cambio_medio: np.ndarray) -> np.ndarray:
+    """Vectorización de AnalizadorNDVI._calcular_puntuacion (promedio*10 + ajuste por tendencia)"""
+    ajuste = np.select(
+        [np.abs(cambio_medio) < 0.02, cambio_medio > 0.05, cambio_medio > 0, cambio_medio < -0.05],
+        [0.0, 1.0, 0.5, -1.0],
+        default=-0.5
+    )
+    return np.round(np.clip(promedio * 10 + ajuste, 0, 10), 1)
+
+
+def analizar_matrices(matrices: MatricesFlota) -> Dict[str, np.ndarray]:
+    """
+    Indicadores por parcela (un array por indicador, alineado con matrices.parcela_ids)
+    """
+    x = np.arange(matrices.n_meses, dtype=float)
+    # Mínimos cuadrados ponderados: los meses nublados pesan menos en la tendencia
+    pesos = pesos_nubosidad(matrices.valores['nubosidad'])
+    resultado = {}
+
+    for indice in CAMPOS_INDICES:
+        matriz = matrices.valores[indice]
+        presentes = ~np.isnan(matriz)
+        n = presentes.sum(axis=1)
+        pendiente, _, r2 = regresion_lineal(matriz, x, pesos)
+        con_tendencia = n >= MIN_MESES_TENDENCIA
+        resultado[f'{indice}_n'] = n
+        resultado[f'{indice}_ultima'] = _ultima_columna(presentes)
+        resultado[f'{indice}_actual'] = _en_columna(matriz, resultado[f'{indice}_ultima'])
+        resultado[f'{indice}_pendiente'] = np.where(con_tendencia, pendiente, np.nan)
+        resultado[f'{indice}_r2'] = np.where(con_tendencia, r2, np.nan)
+
+    ndvi = matrices.valores['ndvi']
+    presentes = ~np.isnan(ndvi)
+    n = resultado['ndvi_n']
+    con_datos = n > 0
+
+    # Promedio y cambio medio por mes calendario (primer y último valor presentes), como AnalizadorNDVI
+    promedio = np.full(len(ndvi), np.nan)
+    if con_datos.any():
+        promedio[con_datos] = estadisticas_basicas(ndvi[con_datos])['promedio']
+    primera = np.argmax(presentes, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cambio_medio = np.where(
+            n >= MIN_MESES_TENDENCIA,
+            (resultado['ndvi_actual'] - _en_columna(ndvi, primera))
+            / np.maximum(resultado['ndvi_ultima'] - primera, 1),
+            0.0
+        )
+    resultado['ndvi_promedio'] = promedio
+    resultado['puntuacion_salud'] = np.where(con_datos, _puntuacion_salud(promedio, cambio_medio), np.nan)
+
+    # Anomalías: |z| > 2 respecto a la serie de la propia parcela
+    z = z_scores(ndvi)
+    anomalas = (np.abs(z) > 2) & presentes & (n >= MIN_MESES_ANOMALIAS)[:, None]
+    resultado['anomalias'] = anomalas.sum(axis=1)
+    resultado['ultima_anomalia'] = _ultima_columna(anomalas)
+    resultado['z_actual'] = _en_columna(z, resultado['ndvi_ultima'])
+
+    # Estacionalidad: promedio por mes del año, pico y valle
+    promedios_mes, cantidades_mes = promedios_por_grupo(ndvi, matrices.meses_del_año, 13)
+    promedios_mes, cantidades_mes = promedios_mes[:, 1:], cantidades_mes[:, 1:]
+    estacional = (n >= MIN_MESES_ESTACIONALIDAD) & ((cantidades_mes > 0).sum(axis=1) >= MIN_MESES_DEL_AÑO)
+    resultado['mes_pico'] = np.where(
+        estacional, np.argmax(np.where(np.isnan(promedios_mes), -np.inf, promedios_mes), axis=1) + 1, 0
+    )
+    resultado['mes_valle'] = np.where(
+        estacional, np.argmin(np.where(np.isnan(promedios_mes), np.inf, promedios_mes), axis=1) + 1, 0
+    )
+    return resultado
+
+
+def _motivos_atencion(resultado: Dict[str, np.ndarray], fila: int, n_meses: int) -> List[str]:
+    """Motivos por los que una parcela entra al tablero de atención"""
+    if resultado['ndvi_n'][fila] == 0:
+        return ['Sin datos NDVI en la ventana analizada']
+
+    motivos = []
+    if resultado['puntuacion_salud'][fila] < PUNTUACION_MINIMA:
+        motivos.append(f"Salud deficiente (puntuación {resultado['puntuacion_salud'][fila]:.1f}/10)")
+    if resultado['ndvi_pendiente'][fila] < PENDIENTE_DESCENSO and resultado['ndvi_r2'][fila] >= R2_DESCENSO:
+        motivos.append(f"NDVI en descenso sostenido ({resultado['ndvi_pendiente'][fila]:+.3f}/mes)")
+    if resultado['z_actual'][fila] < Z_CAIDA_RECIENTE and resultado['anomalias'][fila]:
+        motivos.append(f"Caída anómala en el último mes con datos (z={resultado['z_actual'][fila]:.1f})")
+    if resultado['ndmi_actual'][fila] < AnalizadorNDMI.UMBRAL_ESTRES_SEVERO:
+        motivos.append(f"Estrés hídrico (NDMI {resultado['ndmi_actual'][fila]:.2f})")
+    if resultado['ndvi_ultima'][fila] < n_meses - MESES_SIN_DATOS:
+        motivos.append(f"Sin NDVI en los últimos {MESES_SIN_DATOS} meses")
+    return motivos
+
+
+def _opcional(valor) -> Optional[float]:
+    return None if np.isnan(valor) else round(float(valor), 4)
+
+
+def guardar_resumenes(matrices: MatricesFlota, resultado: Dict[str, np.ndarray],
+                      eliminar_otros: bool = False) -> int:
+    """
+    Upsert en bloque de ResumenAnalisisParcela.
+
+    Args:
+        eliminar_otros: Borrar los resúmenes de parcelas fuera de este cálculo
+            (parcelas desactivadas; solo cuando se analizó toda la flota)
+
+    Returns:
+        Cantidad de parcelas que requieren atención
+    """
+    from ..models_analisis import ResumenAnalisisParcela
+
+    ahora = timezone.now()
+    mes_inicio = matrices.fecha_columna(0)
+    mes_fin = matrices.fecha_columna(matrices.n_meses - 1)
+    resumenes = []
+    for fila, parcela_id in enumerate(matrices.parcela_ids.tolist()):
+        motivos = _motivos_atencion(resultado, fila, matrices.n_meses)
+        ultima = resultado['ndvi_ultima'][fila]
+        ultima_anomalia = resultado['ultima_anomalia'][fila]
+        resumenes.append(ResumenAnalisisParcela(
+            parcela_id=parcela_id,
+            calculado_en=ahora,
+            mes_inicio=mes_inicio,
+            mes_fin=mes_fin,
+            meses_con_datos=int(resultado['ndvi_n'][fila]),
+            ultimo_mes_con_datos=matrices.fecha_columna(ultima) if ultima >= 0 else None,
+            ndvi_actual=_opcional(resultado['ndvi_actual'][fila]),
+            ndvi_promedio=_opcional(resultado['ndvi_promedio'][fila]),
+            ndvi_pendiente=_opcional(resultado['ndvi_pendiente'][fila]),
+            ndvi_r2=_opcional(resultado['ndvi_r2'][fila]),
+            ndmi_actual=_opcional(resultado['ndmi_actual'][fila]),
+            ndmi_pendiente=_opcional(resultado['ndmi_pendiente'][fila]),
+            ndmi_r2=_opcional(resultado['ndmi_r2'][fila]),
+            savi_actual=_opcional(resultado['savi_actual'][fila]),
+            savi_pendiente=_opcional(resultado['savi_pendiente'][fila]),
+            anomalias=int(resultado['anomalias'][fila]),
+            ultima_anomalia=matrices.fecha_columna(ultima_anomalia) if ultima_anomalia >= 0 else None,
+            mes_pico=int(resultado['mes_pico'][fila]) or None,
+            mes_valle=int(resultado['mes_valle'][fila]) or None,
+            puntuacion_salud=_opcional(resultado['puntuacion_salud'][fila]),
+            requiere_atencion=bool(motivos),
+            motivos=motivos,
+        ))
+
+    campos = [campo.name for campo in ResumenAnalisisParcela._meta.concrete_fields
+              if campo.name not in ('id', 'parcela')]
+    with transaction.atomic():
+        ResumenAnalisisParcela.objects.bulk_create(
+            resumenes,
+            update_conflicts=True,
+            unique_fields=['parcela'],
+            update_fields=campos,
+            batch_size=1000,
+        )
+        if eliminar_otros:
+            ResumenAnalisisParcela.objects.exclude(parcela_id__in=matrices.parcela_ids.tolist()).delete()
+    return sum(1 for resumen in resumenes if resumen.requiere_atencion)
+
+
+def analizar_flota(meses: int = None, parcela_ids: Optional[Iterable[int]] = None) -> Dict:
+    """
+    Recalcula los resúmenes de análisis de las parcelas activas.
+
+    Returns:
+        Dict con 'parcelas', 'requieren_atencion', 'meses' y 'segundos' (carga / cálculo / guardado)
+    """
+    inicio = time.monotonic()
+    matrices = MatricesFlota.cargar(meses=meses, parcela_ids=parcela_ids)
+    cargado = time.monotonic()
+    resultado = analizar_matrices(matrices)
+    calculado = time.monotonic()
+    atencion = guardar_resumenes(matrices, resultado, eliminar_otros=parcela_ids is None)
+    fin = time.monotonic()
+
+    resumen = {
+        'parcelas': len(matrices.parcela_ids),
+        'requieren_atencion': atencion,
+        'meses': matrices.n_meses,
+        'segundos': {
+            'carga': round(cargado - inicio, 3),
+            'calculo': round(calculado - cargado, 3),
+            'guardado': round(fin - calculado, 3),
+        },
+    }
+    logger.info(
+        f"📊 Analítica de flota: {resumen['parcelas']} parcelas x {resumen['meses']} meses, "
+        f"{atencion} requieren atención ({fin - inicio:.2f}s)"
+    )
+    return resumen
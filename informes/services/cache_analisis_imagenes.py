@@ -0,0 +1,149 @@
+"""
+Caché persistente de análisis Gemini Vision por imagen (AnalisisImagen)
+- Clave: SHA-256 de la imagen, índice, valor promedio y del mes anterior
+  (redondeados) y versión del prompt
+- Con la misma imagen y los mismos valores, regenerar un informe no llama a Gemini
+- Caduca a los GEMINI_CACHE_ANALISIS_DIAS; se invalida a mano desde el admin
+"""
+
+import hashlib
+import logging
+import os
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F
+from django.utils import timezone
+
+from .almacen_imagenes import AlmacenImagenesSatelitales, almacen_imagenes
+
+logger = logging.getLogger(__name__)
+
+# Decimales con los que un valor del índice cambia el análisis (igual que en el prompt)
+DECIMALES_VALOR = 3
+
+PATRON_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _version_prompt() -> int:
+    from .gemini_service import VERSION_PROMPT_ANALISIS_IMAGEN
+    return VERSION_PROMPT_ANALISIS_IMAGEN
+
+
+def _redondear(valor: Optional[float]) -> str:
+    return 'none' if valor is None else f'{valor:.{DECIMALES_VALOR}f}'
+
+
+@lru_cache(maxsize=1024)
+def _sha256_archivo(imagen_path: str, modificado: float, tamaño: int) -> str:
+    with open(imagen_path, 'rb') as archivo:
+        return AlmacenImagenesSatelitales.calcular_sha256(archivo)[0]
+
+
+def sha256_imagen(imagen_path: str) -> str:
+    """
+    SHA-256 del PNG. Las imágenes del almacén ya lo llevan en el nombre de archivo;
+    el resto se hashea una vez por versión del archivo (mtime, tamaño).
+    """
+    nombre = os.path.splitext(os.path.basename(imagen_path))[0]
+    if PATRON_SHA256.match(nombre) and f'/{almacen_imagenes.directorio}/' in imagen_path.replace(os.sep, '/'):
+        return nombre
+    estado = os.stat(imagen_path)
+    return _sha256_archivo(imagen_path, estado.st_mtime, estado.st_size)
+
+
+def calcular_clave(sha256: str, tipo_indice: str, valor_promedio: Optional[float],
+                   valor_anterior: Optional[float], version_prompt: int = None) -> str:
+    partes = [
+        sha256,
+        tipo_indice.lower(),
+        _redondear(valor_promedio),
+        _redondear(valor_anterior),
+        str(version_prompt or _version_prompt()),
+    ]
+    return hashlib.sha256('|'.join(partes).encode()).hexdigest()
+
+
+def clave_para_solicitud(parametros: Dict) -> str:
+    """
+    Clave de caché a partir de los argumentos de GeminiService.analizar_imagen_satelital
+    """
+    mes_anterior = parametros.get('mes_anterior_data') or {}
+    return calcular_clave(
+        sha256_imagen(parametros['imagen_path']),
+        parametros['tipo_indice'],
+        parametros['valor_promedio'],
+        mes_anterior.get('valor'),
+    )
+
+
+def buscar_vigentes(claves: Iterable[str]) -> Dict[str, str]:
+    """
+    Análisis vigentes para las claves dadas (una sola consulta) y registra su uso.
+
+    Returns:
+        Dict clave -> análisis HTML
+    """
+    from ..models import AnalisisImagen
+
+    claves = list(claves)
+    if not claves:
+        return {}
+
+    ahora = timezone.now()
+    try:
+        vigentes = AnalisisImagen.objects.filter(clave_cache__in=claves, expira_en__gt=ahora)
+        encontrados = {
+            clave: resultado.get('analisis')
+            for clave, resultado in vigentes.values_list('clave_cache', 'resultado_gemini')
+            if resultado and resultado.get('analisis')
+        }
+        if encontrados:
+            AnalisisImagen.objects.filter(clave_cache__in=list(encontrados)).update(
+                usos=F('usos') + 1, ultimo_uso=ahora
+            )
+    except DatabaseError as e:
+        logger.warning(f"⚠️ Caché de análisis de imágenes no disponible: {str(e)}")
+        return {}
+    return encontrados
+
+
+def guardar(clave: str, indice, parametros: Dict, analisis: str):
+    """
+    Guarda (o renueva) el análisis de una imagen de un IndiceMensual
+    """
+    from ..models import AnalisisImagen
+
+    imagen_path = parametros['imagen_path']
+    mes_anterior = parametros.get('mes_anterior_data') or {}
+    dias = getattr(settings, 'GEMINI_CACHE_ANALISIS_DIAS', 90)
+
+    try:
+        AnalisisImagen.objects.update_or_create(
+            clave_cache=clave,
+            defaults={
+                'parcela_id': indice.parcela_id,
+                'fecha_imagen': indice.fecha_imagen or date(indice.año, indice.mes, 1),
+                'indice': parametros['tipo_indice'].lower(),
+                'url_imagen': os.path.relpath(imagen_path, settings.MEDIA_ROOT)[:500],
+                'hash_imagen': sha256_imagen(imagen_path),
+                'resultado_gemini': {'analisis': analisis},
+                'version_prompt': _version_prompt(),
+                'valor_promedio': parametros['valor_promedio'],
+                'valor_mes_anterior': mes_anterior.get('valor'),
+                'expira_en': timezone.now() + timedelta(days=dias),
+            }
+        )
+    except DatabaseError as e:
+        logger.warning(f"⚠️ No se pudo cachear el análisis {parametros['tipo_indice']}: {str(e)}")
+
+
+def invalidar(queryset) -> int:
+    """
+    Marca como caducados los análisis del queryset (el próximo informe los regenera)
+    """
+    return queryset.update(expira_en=timezone.now())
@@ -0,0 +1,125 @@
+"""
+Caché en disco direccionada por contenido
+- Archivos en <directorio>/<clave[:2]>/<clave>.<extensión> (clave = SHA-256 de las entradas)
+- Escritura atómica (temporal en el mismo directorio + os.replace): otro worker
+  nunca lee un archivo a medias
+- Cada acierto actualiza el mtime y purgar() elimina lo que no se usó en N días
+
+La usan los gráficos (graficos.py), las imágenes reducidas para PDF (imagenes_pdf.py)
+y los fragmentos de secciones de PDF (fragmentos_pdf.py).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def configuracion(nombre: str, defecto):
+    from django.conf import settings
+    return getattr(settings, nombre, defecto)
+
+
+def calcular_clave(partes: Dict) -> str:
+    """SHA-256 del JSON canónico de las entradas"""
+    return hashlib.sha256(json.dumps(partes, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class CacheDisco:
+    """
+    Directorio de archivos direccionados por clave
+    """
+
+    def __init__(self, setting: str, carpeta: str, directorio: str = None):
+        """
+        Args:
+            setting: Setting con el directorio (p.ej. INFORMES_GRAFICOS_CACHE)
+            carpeta: Carpeta bajo MEDIA_ROOT/informes si el setting no existe
+            directorio: Directorio explícito (ignora el setting)
+        """
+        self.setting = setting
+        self.carpeta = carpeta
+        self._directorio = directorio
+
+    @property
+    def directorio(self) -> str:
+        if self._directorio is None:
+            from django.conf import settings
+            self._directorio = str(configuracion(
+                self.setting, os.path.join(settings.MEDIA_ROOT, 'informes', self.carpeta)
+            ))
+        return self._directorio
+
+    def ruta_para(self, clave: str, extension: str) -> str:
+        return os.path.join(self.directorio, clave[:2], f'{clave}.{extension}')
+
+    @staticmethod
+    def tocar(ruta: str):
+        """Marca de uso para purgar()"""
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+
+    def buscar(self, clave: str, extensiones: Iterable[str]) -> Optional[str]:
+        """Ruta del archivo guardado con alguna de las extensiones (None si no existe)"""
+        for extension in extensiones:
+            ruta = self.ruta_para(clave, extension)
+            if os.path.exists(ruta):
+                self.tocar(ruta)
+                return ruta
+        return None
+
+    def leer(self, clave: str, extension: str) -> Optional[bytes]:
+        ruta = self.ruta_para(clave, extension)
+        try:
+            with open(ruta, 'rb') as archivo:
+                contenido = archivo.read()
+        except OSError:
+            return None
+        self.tocar(ruta)
+        return contenido
+
+    def escribir(self, clave: str, contenido: bytes, extension: str) -> str:
+        """Escritura atómica; lanza OSError si no se pudo guardar"""
+        ruta = self.ruta_para(clave, extension)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(ruta), suffix='.tmp', delete=False) as temporal:
+            temporal.write(contenido)
+        try:
+            os.replace(temporal.name, ruta)
+        except OSError:
+            os.remove(temporal.name)
+            raise
+        return ruta
+
+    @staticmethod
+    def descartar(ruta: str):
+        """Quita un archivo que no debe reutilizarse"""
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+    def purgar(self, dias: int = 30) -> Dict:
+        """Elimina los archivos sin usar en los últimos 'dias'"""
+        limite = time.time() - dias * 86400
+        eliminados = 0
+        bytes_liberados = 0
+        for raiz, _, archivos in os.walk(self.directorio):
+            for nombre in archivos:
+                ruta = os.path.join(raiz, nombre)
+                try:
+                    estado = os.stat(ruta)
+                    if estado.st_mtime < limite:
+                        os.remove(ruta)
+                        eliminados += 1
+                        bytes_liberados += estado.st_size
+                except OSError:
+                    continue
+        return {'eliminados': eliminados, 'bytes_liberados': bytes_liberados}
@@ -0,0 +1,214 @@
+"""
+Caché de escenas de la Statistics API y planificador de rangos
+- Calcula qué sub-intervalos de un rango aún no se han consultado a EOSDA
+- Guarda cada escena por field_id + fecha + índice
+- Reconstruye la respuesta completa de un rango a partir de las escenas guardadas
+
+Así, pedir Ene–Dic después de tener Ene–Nov solo consulta diciembre.
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+Intervalo = Tuple[date, date]
+
+# Los últimos días nunca se marcan como cubiertos: EOSDA publica escenas con retraso
+DIAS_MARGEN_ESCENAS_RECIENTES = 5
+
+# Huecos menores a esto se consultan junto a sus vecinos (menos tareas, pocas escenas extra)
+DIAS_TOLERANCIA_FUSION = 7
+
+# Límite de escenas por tarea mt_stats (ver _construir_payload_estadisticas)
+LIMITE_ESCENAS_TAREA = 50
+
+# Sub-intervalo máximo por tarea: Sentinel-2 revisita cada 2-5 días, así que 60 días
+# quedan por debajo de LIMITE_ESCENAS_TAREA y la tarea no se trunca (ni pierde cobertura)
+DIAS_MAX_SUBINTERVALO = 60
+
+
+def fusionar_intervalos(intervalos: List[Intervalo], tolerancia_dias: int = 0) -> List[Intervalo]:
+    """
+    Une intervalos solapados, contiguos o separados por <= tolerancia_dias
+    """
+    if not intervalos:
+        return []
+
+    ordenados = sorted(intervalos)
+    fusionados = [ordenados[0]]
+    for inicio, fin in ordenados[1:]:
+        ultimo_inicio, ultimo_fin = fusionados[-1]
+        if inicio <= ultimo_fin + timedelta(days=tolerancia_dias + 1):
+            fusionados[-1] = (ultimo_inicio, max(ultimo_fin, fin))
+        else:
+            fusionados.append((inicio, fin))
+    return fusionados
+
+
+def dividir_intervalos(intervalos: List[Intervalo], dias_max: int) -> List[Intervalo]:
+    """
+    Parte cada intervalo en tramos consecutivos de como máximo dias_max días
+    """
+    tramos = []
+    for inicio, fin in intervalos:
+        cursor = inicio
+        while cursor <= fin:
+            fin_tramo = min(fin, cursor + timedelta(days=dias_max - 1))
+            tramos.append((cursor, fin_tramo))
+            cursor = fin_tramo + timedelta(days=1)
+    return tramos
+
+
+def restar_intervalos(inicio: date, fin: date, cubiertos: List[Intervalo]) -> List[Intervalo]:
+    """
+    Partes de [inicio, fin] (fechas inclusivas) que no están en ningún intervalo cubierto
+    """
+    faltantes = []
+    cursor = inicio
+    for cub_inicio, cub_fin in fusionar_intervalos(cubiertos):
+        if cub_fin < cursor:
+            continue
+        if cub_inicio > fin:
+            break
+        if cub_inicio > cursor:
+            faltantes.append((cursor, cub_inicio - timedelta(days=1)))
+        cursor = max(cursor, cub_fin + timedelta(days=1))
+        if cursor > fin:
+            break
+    if cursor <= fin:
+        faltantes.append((cursor, fin))
+    return faltantes
+
+
+def planificar_intervalos_faltantes(field_id: str, fecha_inicio: date, fecha_fin: date,
+                                    indices: List[str], max_nubosidad: float) -> List[Intervalo]:
+    """
+    Sub-intervalos de [fecha_inicio, fecha_fin] que hay que pedir a EOSDA.
+
+    Se calcula por índice y se unen los faltantes: cada sub-intervalo se pide
+    con todos los índices (una tarea mt_stats ya trae varios índices). Los huecos
+    largos se parten en tramos de DIAS_MAX_SUBINTERVALO para no llegar al límite
+    de escenas por tarea, que dejaría el intervalo sin registrar como cubierto.
+    """
+    from ..models import CoberturaEscenasEOSDA
+
+    faltantes = []
+    for indice in {idx.upper() for idx in indices}:
+        cubiertos = list(
+            CoberturaEscenasEOSDA.objects.filter(
+                field_id=field_id,
+                indice=indice,
+                fecha_inicio__lte=fecha_fin,
+                fecha_fin__gte=fecha_inicio,
+                max_nubosidad__gte=max_nubosidad,
+            ).values_list('fecha_inicio', 'fecha_fin')
+        )
+        faltantes.extend(restar_intervalos(fecha_inicio, fecha_fin, cubiertos))
+
+    plan = dividir_intervalos([
+        (max(inicio, fecha_inicio), min(fin, fecha_fin))
+        for inicio, fin in fusionar_intervalos(faltantes, DIAS_TOLERANCIA_FUSION)
+    ], DIAS_MAX_SUBINTERVALO)
+    dias_rango = (fecha_fin - fecha_inicio).days + 1
+    dias_plan = sum((fin - inicio).days + 1 for inicio, fin in plan)
+    logger.info(f"🗓️ Plan de rangos {field_id}: {len(plan)} sub-intervalo(s), "
+                f"{dias_plan}/{dias_rango} días por consultar")
+    return plan
+
+
+def registrar_escenas_consultadas(field_id: str, resultados: List[Dict], indices: List[str],
+                                  fecha_inicio: date, fecha_fin: date, max_nubosidad: float,
+                                  task_id: str = None) -> int:
+    """
+    Guarda las escenas de una tarea mt_stats y marca el intervalo como cubierto.
+
+    Returns:
+        Número de filas de escena guardadas
+    """
+    from ..models import EscenaCacheEOSDA, CoberturaEscenasEOSDA
+
+    filas = {}
+    for escena in resultados:
+        try:
+            fecha_escena = date.fromisoformat(str(escena.get('date'))[:10])
+        except (TypeError, ValueError):
+            continue
+
+        view_id = escena.get('view_id') or ''
+        metadatos = {k: v for k, v in escena.items() if k not in ('indexes', 'date', 'cloud', 'view_id')}
+        for indice, estadisticas in (escena.get('indexes') or {}).items():
+            filas[(fecha_escena, indice.upper(), view_id)] = EscenaCacheEOSDA(
+                field_id=field_id,
+                fecha_escena=fecha_escena,
+                indice=indice.upper(),
+                view_id=view_id,
+                nubosidad=escena.get('cloud'),
+                estadisticas=estadisticas,
+                datos_escena=metadatos,
+            )
+
+    # No marcar como cubiertos los días recientes ni tareas truncadas por el límite
+    # (con tramos de DIAS_MAX_SUBINTERVALO solo pasa con órbitas muy solapadas)
+    fin_cubierto = min(fecha_fin, date.today() - timedelta(days=DIAS_MARGEN_ESCENAS_RECIENTES))
+    registrar_cobertura = len(resultados) < LIMITE_ESCENAS_TAREA and fin_cubierto >= fecha_inicio
+
+    with transaction.atomic():
+        if filas:
+            EscenaCacheEOSDA.objects.bulk_create(
+                list(filas.values()),
+                update_conflicts=True,
+                unique_fields=['field_id', 'fecha_escena', 'indice', 'view_id'],
+                update_fields=['nubosidad', 'estadisticas', 'datos_escena'],
+            )
+        if registrar_cobertura:
+            CoberturaEscenasEOSDA.objects.bulk_create([
+                CoberturaEscenasEOSDA(
+                    field_id=field_id,
+                    indice=indice,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fin_cubierto,
+                    max_nubosidad=max_nubosidad,
+                    task_id=task_id,
+                )
+                for indice in {idx.upper() for idx in indices}
+            ])
+
+    return len(filas)
+
+
+def ensamblar_resultados(field_id: str, fecha_inicio: date, fecha_fin: date,
+                         indices: List[str], max_nubosidad: float) -> List[Dict]:
+    """
+    Reconstruye la lista de escenas (formato de la Statistics API) para un rango
+    a partir del caché de escenas, aplicando el filtro de nubosidad.
+    """
+    from django.db.models import Q
+    from ..models import EscenaCacheEOSDA
+
+    filas = EscenaCacheEOSDA.objects.filter(
+        field_id=field_id,
+        indice__in=[idx.upper() for idx in indices],
+        fecha_escena__gte=fecha_inicio,
+        fecha_escena__lte=fecha_fin,
+    ).filter(
+        Q(nubosidad__isnull=True) | Q(nubosidad__lte=max_nubosidad)
+    ).order_by('fecha_escena', 'view_id')
+
+    escenas = {}
+    for fila in filas:
+        clave = (fila.fecha_escena, fila.view_id)
+        if clave not in escenas:
+            escenas[clave] = {
+                **fila.datos_escena,
+                'view_id': fila.view_id or None,
+                'date': fila.fecha_escena.isoformat(),
+                'cloud': fila.nubosidad,
+                'indexes': {},
+            }
+        escenas[clave]['indexes'][fila.indice] = fila.estadisticas
+
+    return list(escenas.values())
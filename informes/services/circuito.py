@@ -0,0 +1,238 @@
+"""
+Circuit breaker para servicios externos (EOSDA, Gemini)
+- Tras N fallos consecutivos el circuito se abre y las llamadas fallan al instante
+- Pasado el tiempo de apertura, un solo worker hace una llamada de prueba (semiabierto)
+- El estado vive en la tabla EstadoCircuito: todos los workers comparten la decisión
+
+Si la base de datos no responde, el interruptor deja pasar las llamadas (falla abierto).
+"""
+
+import logging
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Tuple, Type
+
+import requests
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+try:
+    from google.api_core.exceptions import InvalidArgument as PeticionGeminiInvalida
+    ERRORES_GEMINI_IGNORADOS = (PeticionGeminiInvalida,)
+except ImportError:
+    ERRORES_GEMINI_IGNORADOS = ()
+
+# Errores del propio cliente (argumentos o validación local): la petición no llegó al servicio
+ERRORES_LOCALES = (TypeError, ValueError)
+
+# Mientras el circuito se sabe cerrado, no se vuelve a leer la BD en cada llamada
+SEGUNDOS_CACHE_CERRADO = 2.0
+
+
+class CircuitoAbierto(requests.exceptions.ConnectionError):
+    """
+    Llamada rechazada sin contactar al servicio. Hereda de ConnectionError para
+    que los manejadores existentes de errores de red la traten igual.
+    """
+
+    def __init__(self, servicio: str):
+        self.servicio = servicio
+        super().__init__(f'{servicio.upper()} no disponible temporalmente (circuito abierto)')
+
+
+class InterruptorCircuito:
+    """
+    Circuit breaker de un servicio externo respaldado por EstadoCircuito
+    """
+
+    def __init__(self, servicio: str, umbral_fallos: int = None, segundos_abierto: int = None,
+                 segundos_sondeo: int = None, errores_ignorados: Tuple[Type[BaseException], ...] = (),
+                 errores_locales: Tuple[Type[BaseException], ...] = ()):
+        """
+        Args:
+            servicio: Nombre del servicio ('eosda', 'gemini')
+            umbral_fallos: Fallos consecutivos para abrir (default: CIRCUITO_UMBRAL_FALLOS)
+            segundos_abierto: Espera antes de la llamada de prueba (default: CIRCUITO_SEGUNDOS_ABIERTO)
+            segundos_sondeo: Tiempo reservado a la llamada de prueba (default: CIRCUITO_SEGUNDOS_SONDEO)
+            errores_ignorados: Excepciones que no indican caída del servicio (p.ej. petición inválida)
+            errores_locales: Excepciones lanzadas antes de contactar al servicio; no cuentan
+                ni como éxito ni como fallo
+        """
+        self.servicio = servicio
+        self._umbral_fallos = umbral_fallos
+        self._segundos_abierto = segundos_abierto
+        self._segundos_sondeo = segundos_sondeo
+        self.errores_ignorados = errores_ignorados
+        self.errores_locales = errores_locales
+        self._cerrado_hasta = 0.0
+
+    @property
+    def umbral_fallos(self) -> int:
+        return self._umbral_fallos or getattr(settings, 'CIRCUITO_UMBRAL_FALLOS', 5)
+
+    @property
+    def segundos_abierto(self) -> int:
+        return self._segundos_abierto or getattr(settings, 'CIRCUITO_SEGUNDOS_ABIERTO', 60)
+
+    @property
+    def segundos_sondeo(self) -> int:
+        return self._segundos_sondeo or getattr(settings, 'CIRCUITO_SEGUNDOS_SONDEO', 120)
+
+    def _obtener(self):
+        from ..models import EstadoCircuito
+
+        fila, _ = EstadoCircuito.objects.get_or_create(servicio=self.servicio)
+        return fila
+
+    def _cerrado_reciente(self) -> bool:
+        return time.monotonic() < self._cerrado_hasta
+
+    def disponible(self) -> bool:
+        """
+        True si una llamada tendría permiso ahora (no reserva la llamada de prueba).
+        Útil para decidir un fallback antes de preparar una petición costosa.
+        """
+        if self._cerrado_reciente():
+            return True
+        try:
+            fila = self._obtener()
+        except DatabaseError:
+            return True
+
+        ahora = timezone.now()
+        if fila.estado == 'cerrado':
+            self._cerrado_hasta = time.monotonic() + SEGUNDOS_CACHE_CERRADO
+            return True
+        if fila.estado == 'abierto':
+            return not fila.abierto_hasta or fila.abierto_hasta <= ahora
+        return not fila.sondeo_hasta or fila.sondeo_hasta <= ahora
+
+    def permitir(self) -> bool:
+        """
+        True si la llamada puede hacerse. Con el circuito abierto y el tiempo
+        cumplido, solo el primer worker que lo pide obtiene la llamada de prueba.
+        """
+        from ..models import EstadoCircuito
+
+        if self._cerrado_reciente():
+            return True
+        try:
+            fila = self._obtener()
+            if fila.estado == 'cerrado':
+                self._cerrado_hasta = time.monotonic() + SEGUNDOS_CACHE_CERRADO
+                return True
+
+            ahora = timezone.now()
+            reservado = EstadoCircuito.objects.filter(servicio=self.servicio).filter(
+                Q(estado='abierto', abierto_hasta__lte=ahora)
+                | Q(estado='semiabierto', sondeo_hasta__isnull=True)
+                | Q(estado='semiabierto', sondeo_hasta__lte=ahora)
+            ).update(estado='semiabierto', sondeo_hasta=ahora + timedelta(seconds=self.segundos_sondeo))
+        except DatabaseError:
+            return True
+
+        if reservado:
+            logger.info(f"🔌 Circuito {self.servicio}: semiabierto, enviando llamada de prueba")
+        return bool(reservado)
+
+    def registrar_exito(self):
+        from ..models import EstadoCircuito
+
+        if self._cerrado_reciente():
+            return
+        try:
+            cerrados = EstadoCircuito.objects.filter(servicio=self.servicio).exclude(
+                estado='cerrado', fallos_consecutivos=0
+            ).update(
+                estado='cerrado', fallos_consecutivos=0, abierto_hasta=None,
+                sondeo_hasta=None, ultimo_exito=timezone.now()
+            )
+        except DatabaseError:
+            return
+        if cerrados:
+            logger.info(f"✅ Circuito {self.servicio}: cerrado, el servicio respondió")
+        self._cerrado_hasta = time.monotonic() + SEGUNDOS_CACHE_CERRADO
+
+    def registrar_fallo(self, error: str = ''):
+        from ..models import EstadoCircuito
+
+        self._cerrado_hasta = 0.0
+        ahora = timezone.now()
+        try:
+            self._obtener()
+            with transaction.atomic():
+                fila = EstadoCircuito.objects.select_for_update().get(servicio=self.servicio)
+                fila.fallos_consecutivos += 1
+                fila.ultimo_error = str(error)[:1000]
+                fila.ultimo_fallo = ahora
+
+                abrir = (fila.estado == 'semiabierto'
+                         or (fila.estado == 'cerrado' and fila.fallos_consecutivos >= self.umbral_fallos))
+                if abrir:
+                    fila.estado = 'abierto'
+                    fila.abierto_hasta = ahora + timedelta(seconds=self.segundos_abierto)
+                    fila.sondeo_hasta = None
+                    fila.aperturas += 1
+                fila.save()
+        except DatabaseError:
+            return
+
+        if abrir:
+            logger.warning(f"⚡ Circuito {self.servicio}: ABIERTO por {self.segundos_abierto}s "
+                           f"(último error: {str(error)[:150]})")
+
+    def llamar(self, funcion: Callable, *args, **kwargs):
+        """
+        Ejecuta funcion(*args, **kwargs) bajo el circuito.
+        Lanza CircuitoAbierto sin llamar si el circuito no lo permite.
+        """
+        if not self.permitir():
+            raise CircuitoAbierto(self.servicio)
+        try:
+            resultado = funcion(*args, **kwargs)
+        except self.errores_locales:
+            raise
+        except self.errores_ignorados:
+            self.registrar_exito()  # El servicio respondió; la petición era el problema
+            raise
+        except Exception as e:
+            self.registrar_fallo(f'{type(e).__name__}: {e}')
+            raise
+        self.registrar_exito()
+        return resultado
+
+    def estado(self) -> Dict:
+        try:
+            return self._obtener().a_dict()
+        except DatabaseError as e:
+            return {'servicio': self.servicio, 'estado': 'desconocido', 'error': str(e)}
+
+    def reiniciar(self):
+        """Cierra el circuito manualmente (p.ej. tras confirmar que el servicio volvió)"""
+        from ..models import EstadoCircuito
+
+        self._obtener()
+        EstadoCircuito.objects.filter(servicio=self.servicio).update(
+            estado='cerrado', fallos_consecutivos=0, abierto_hasta=None, sondeo_hasta=None
+        )
+
+
+def estado_circuitos() -> Dict[str, Dict]:
+    """Estado de todos los circuitos registrados (para verificar_conectividad y admin)"""
+    from ..models import EstadoCircuito
+
+    try:
+        return {fila.servicio: fila.a_dict() for fila in EstadoCircuito.objects.all()}
+    except DatabaseError as e:
+        return {'error': str(e)}
+
+
+# Interruptores globales por servicio externo
+interruptor_eosda = InterruptorCircuito('eosda')
+interruptor_gemini = InterruptorCircuito(
+    'gemini', errores_ignorados=ERRORES_GEMINI_IGNORADOS, errores_locales=ERRORES_LOCALES
+)
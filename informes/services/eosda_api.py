@@ -9,9 +9,23 @@ import json
 import logging
 from datetime import datetime, date, timedelta
 from django.conf import settings
+from django.db import connection
 from django.utils import timezone
 from typing import Dict, List, Optional, Tuple
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .planificador_polling import bucket_eosda, metricas_eosda, crear_planificador_eosda
+from .almacen_imagenes import almacen_imagenes
+from .http_cliente import crear_sesion, metricas_http
+from .circuito import CircuitoAbierto, interruptor_eosda, estado_circuitos
+from .vuelo_unico import vuelo_unico, intentar_adquirir, liberar
+from .cache_escenas import (
+    planificar_intervalos_faltantes,
+    registrar_escenas_consultadas,
+    ensamblar_resultados,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,13 +39,16 @@ class EosdaAPIService:
     def __init__(self):
         self.api_key = settings.EOSDA_API_KEY
         self.base_url = settings.EOSDA_BASE_URL
-        self.session = requests.Session()
+        # Sesión con pool keep-alive, reintentos idempotentes, métricas y circuit breaker (http_cliente)
+        # El pool se dimensiona para los hilos de polling en lote
         # EOSDA API Connect NO usa headers para autenticación
         # El API key va como parámetro en la URL: ?api_key=xxx
         # Documentación: https://doc.eos.com/docs/field-management-api/
-        self.session.headers.update({
-            'Content-Type': 'application/json'
-        })
+        self.session = crear_sesion(
+            headers={'Content-Type': 'application/json'},
+            pool_maxsize=max(10, getattr(settings, 'EOSDA_LOTE_MAX_WORKERS', 4) * 2),
+            circuito=interruptor_eosda
+        )
         
         # Mapeo de nombres de cultivos en español a nombres válidos de EOSDA
         # ✅ VERIFICADO CONTRA LISTA OFICIAL DE EOSDA
@@ -706,29 +723,28 @@ class EosdaAPIService:
             logger.error(f"Error procesando estadísticas para {indice}: {str(e)}")
             return []
     
-    def _obtener_resultados_tarea_lento(self, task_id: str, max_intentos: int = 15) -> List[Dict]:
+    def _obtener_resultados_tarea_lento(self, task_id: str, max_intentos: int = 30) -> Optional[List[Dict]]:
         """
-        Obtiene resultados de tarea con delays más largos para evitar rate limits.
-        Usa 10 segundos entre intentos (6 requests/minuto vs 10/minuto del API)
+        Obtiene resultados de tarea usando el planificador de polling compartido:
+        backoff exponencial con jitter (tareas rápidas vuelven en segundos),
+        Retry-After en 429 y token bucket común con el resto del proceso.
+        
+        Returns:
+            Escenas de la tarea ([] si terminó sin escenas) o None si hubo error o timeout
         """
         try:
             url = f"{self.base_url}/api/gdw/api/{task_id}"
+            planificador = crear_planificador_eosda(max_intentos=max_intentos)
             
-            for intento in range(max_intentos):
-                # Delay ANTES de cada petición (excepto la primera)
-                if intento > 0:
-                    logger.debug(f"⏳ Esperando 10s antes de intento {intento+1}...")
-                    time.sleep(10)  # 10 segundos entre peticiones
-                
-                response = self.session.get(url, timeout=30)
+            for intento in planificador.intentos():
+                response = planificador.peticion(self.session.get, url, timeout=30)
                 
                 if response.status_code != 200:
-                    if response.status_code == 429:
-                        logger.warning(f"⚠️ Rate limit en intento {intento+1}/{max_intentos}, esperando 15s...")
-                        time.sleep(15)
+                    if response.status_code in [429, 503]:
+                        logger.warning(f"⚠️ Rate limit en intento {intento+1}/{max_intentos}")
                         continue
                     logger.error(f"❌ Error {response.status_code} consultando tarea")
-                    return []
+                    return None
                 
                 data = response.json()
                 status = data.get('status', 'unknown')
@@ -739,9 +755,15 @@ class EosdaAPIService:
                 
                 # Verificar si hay resultados
                 if 'result' in data and data['result']:
-                    logger.info(f"✅ Resultados obtenidos: {len(data['result'])} escenas")
+                    logger.info(f"✅ Resultados obtenidos: {len(data['result'])} escenas "
+                                f"({planificador.transcurrido():.1f}s)")
                     return data['result']
                 
+                # Tarea terminada sin escenas (p. ej. sub-intervalo corto o muy nublado)
+                if status in ['finished', 'completed', 'done', 'success'] and 'result' in data:
+                    logger.info(f"ℹ️ Tarea {task_id} terminada sin escenas")
+                    return []
+                
                 # Verificar si está procesando
                 if status in ['pending', 'processing', 'running', 'unknown']:
                     if status == 'unknown':
@@ -753,17 +775,17 @@ class EosdaAPIService:
                 # Verificar errores
                 if 'errors' in data and data['errors']:
                     logger.error(f"❌ Errores en tarea: {data['errors'][:300]}")
-                    return []
+                    return None
                 
                 # Si no hay result ni está procesando, seguir intentando
                 logger.debug(f"   Status: {status}, sin resultados aún")
             
-            logger.warning(f"⏱️ Timeout después de {max_intentos} intentos ({max_intentos * 10}s)")
-            return []
+            logger.warning(f"⏱️ Timeout esperando tarea {task_id} ({planificador.transcurrido():.0f}s)")
+            return None
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo resultados: {str(e)}")
-            return []
+            return None
     
     def _obtener_datos_climaticos(self, geojson: Dict, 
                                  fecha_inicio: date, fecha_fin: date) -> List[Dict]:
@@ -979,6 +1001,7 @@ class EosdaAPIService:
         resultado = {
             'configuracion_valida': self.validar_configuracion(),
             'conexion_exitosa': False,
+            'circuito_abierto': False,
             'tiempo_respuesta': None,
             'task_id': None,
             'status': None,
@@ -1029,15 +1052,120 @@ class EosdaAPIService:
                 resultado['mensaje'] = f'Error: {response.status_code} - {response.text[:100]}'
                 logger.warning(f"Verificación EOSDA fallida: Status {response.status_code}")
             
+        except CircuitoAbierto as e:
+            # No se contacta a EOSDA hasta que toque la llamada de prueba
+            resultado['circuito_abierto'] = True
+            resultado['mensaje'] = str(e)
+            
         except Exception as e:
             logger.error(f"Error verificando conectividad EOSDA: {str(e)}")
             resultado['conexion_exitosa'] = False
             resultado['mensaje'] = f'Error de conexión: {str(e)}'
         
+        # Tiempo esperando cuota/backoff vs. tiempo en peticiones de este proceso
+        resultado['metricas_polling'] = metricas_eosda.resumen()
+        # Latencia y volumen por host de todas las APIs externas
+        resultado['metricas_http'] = metricas_http.resumen()
+        # Estado compartido de los circuit breakers (EOSDA, Gemini)
+        resultado['circuitos'] = estado_circuitos()
         return resultado
     
     # ========= MÉTODOS OPTIMIZADOS CON CACHÉ Y TRACKING =========
     
+    def _construir_payload_estadisticas(self, field_id: str, geometria: Dict,
+                                        fecha_inicio: date, fecha_fin: date,
+                                        indices: List[str], max_nubosidad: int) -> Dict:
+        """
+        Construye el payload de una tarea mt_stats de la Statistics API.
+        Compartido por la consulta individual y la consulta en lote.
+        """
+        return {
+            'type': 'mt_stats',
+            'params': {
+                'bm_type': [idx.upper() for idx in indices],  # NDVI, NDMI, SAVI en mayúsculas
+                'date_start': fecha_inicio.isoformat(),
+                'date_end': fecha_fin.isoformat(),
+                'geometry': geometria,  # Usar geometría
+                'sensors': ['S2L2A'],  # Sentinel-2 Level 2A
+                'reference': f'stats_{field_id}_{datetime.now().strftime("%Y%m%d_%H%M")}',
+                'limit': 50,
+                'max_cloud_cover_in_aoi': max_nubosidad,
+                'exclude_cover_pixels': True,
+                'cloud_masking_level': 3
+            }
+        }
+    
+    def _formatear_datos_estadisticas(self, resultados: List[Dict], field_id: str,
+                                      indices: List[str]) -> Dict:
+        """
+        Estructura estándar guardada en CacheDatosEOSDA para resultados de Statistics API
+        """
+        return {
+            'resultados': resultados,
+            'datos_clima': [],  # Siempre vacío - Open-Meteo se usa en views.py
+            'field_id': field_id,
+            'indices': indices,
+            'fecha_consulta': datetime.now().isoformat(),
+            'num_escenas': len(resultados),
+            'metodo': 'statistics_api'
+        }
+    
+    def _respuesta_circuito_abierto(self, field_id: str, fecha_inicio: date, fecha_fin: date,
+                                    indices: List[str], max_nubosidad: int) -> Dict:
+        """
+        Respuesta inmediata mientras el circuito de EOSDA está abierto: las escenas
+        ya guardadas del rango (marcadas como parciales) o un error sin esperar timeouts.
+        """
+        resultados = ensamblar_resultados(field_id, fecha_inicio, fecha_fin, indices, max_nubosidad)
+        logger.warning(f"⚡ EOSDA con circuito abierto - {len(resultados)} escenas desde caché para {field_id}")
+        
+        if not resultados:
+            return {'error': 'EOSDA no disponible temporalmente', 'resultados': [], 'circuito_abierto': True}
+        
+        datos = self._formatear_datos_estadisticas(resultados, field_id, indices)
+        datos['parcial'] = True
+        datos['circuito_abierto'] = True
+        return datos
+    
+    def _consultar_estado_tarea(self, task_id: str, planificador) -> Dict:
+        """
+        Hace UNA consulta del estado de una tarea de Statistics API.
+        Solo espera el turno del token bucket compartido, nunca el backoff.
+        
+        Returns:
+            Dict con 'estado' ('completada', 'vacia', 'pendiente', 'rate_limit', 'error'),
+            'resultados' y 'mensaje'. 'vacia' = terminada sin escenas (el intervalo
+            cuenta como consultado), a diferencia de un error o un timeout
+        """
+        url = f"{self.base_url}/api/gdw/api/{task_id}"
+        
+        try:
+            response = planificador.peticion(self.session.get, url, timeout=30)
+            
+            if response.status_code in [429, 503]:
+                return {'estado': 'rate_limit', 'resultados': [], 'mensaje': 'HTTP 429'}
+            if response.status_code != 200:
+                return {'estado': 'error', 'resultados': [],
+                        'mensaje': f'Error HTTP {response.status_code}'}
+            
+            data = response.json()
+            
+            if 'result' in data and data['result']:
+                return {'estado': 'completada', 'resultados': data['result'], 'mensaje': ''}
+            
+            status = data.get('status', 'unknown')
+            if status in ['finished', 'completed', 'done', 'success'] and 'result' in data:
+                return {'estado': 'vacia', 'resultados': [], 'mensaje': 'Sin escenas'}
+            if status not in ['pending', 'processing', 'running', 'unknown'] and data.get('errors'):
+                return {'estado': 'error', 'resultados': [], 'mensaje': str(data['errors'])[:300]}
+            
+            return {'estado': 'pendiente', 'resultados': [], 'mensaje': status}
+            
+        except requests.exceptions.Timeout:
+            return {'estado': 'pendiente', 'resultados': [], 'mensaje': 'Timeout'}
+        except Exception as e:
+            return {'estado': 'error', 'resultados': [], 'mensaje': str(e)}
+    
     def obtener_datos_optimizado(self, parcela, fecha_inicio: date, fecha_fin: date,
                                 indices: List[str], usuario,
                                 max_nubosidad: int = 50) -> Dict:
@@ -1106,74 +1234,131 @@ class EosdaAPIService:
             logger.info(f"✅ Datos obtenidos desde CACHÉ para field {field_id} - 0 requests consumidos")
             return datos_cache
         
-        # 2. NO HAY CACHÉ - USAR STATISTICS API CON GEOMETRÍA
-        logger.info(f"🔍 No hay caché, usando Statistics API - {len(indices)} índices en 1 petición")
+        # 2. SINGLE-FLIGHT: una sola consulta a EOSDA por clave de caché entre todos los workers
+        cache_key = CacheDatosEOSDA.generar_cache_key(field_id, fecha_inicio, fecha_fin, indices)
+        with vuelo_unico(cache_key) as espero:
+            if espero:
+                # Otra petición idéntica acaba de terminar: normalmente ya dejó el rango en caché
+                datos_cache = CacheDatosEOSDA.obtener_o_none(
+                    field_id=field_id,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin,
+                    indices=indices
+                )
+                if datos_cache:
+                    EstadisticaUsoEOSDA.registrar_uso(
+                        usuario=usuario,
+                        parcela=parcela,
+                        tipo_operacion='statistics',
+                        endpoint='/api/gdw/api (COALESCIDA)',
+                        exitoso=True,
+                        tiempo_respuesta=time.time() - tiempo_inicio,
+                        requests_consumidos=0,
+                        desde_cache=True,
+                        cache_key=cache_key
+                    )
+                    logger.info(f"✅ Datos de consulta coalescida para field {field_id} - 0 requests consumidos")
+                    return datos_cache
+            
+            return self._consultar_rango_statistics(
+                parcela, field_id, geometria, fecha_inicio, fecha_fin,
+                indices, usuario, max_nubosidad, tiempo_inicio
+            )
+    
+    def _consultar_rango_statistics(self, parcela, field_id: str, geometria: Dict,
+                                    fecha_inicio: date, fecha_fin: date, indices: List[str],
+                                    usuario, max_nubosidad: int, tiempo_inicio: float) -> Dict:
+        """
+        Parte de obtener_datos_optimizado que consulta EOSDA tras un fallo de caché del
+        rango: pide solo los sub-intervalos faltantes, guarda escenas y caché.
+        Se ejecuta dentro del vuelo único de la clave de caché.
+        """
+        from informes.models import CacheDatosEOSDA, EstadisticaUsoEOSDA
+        
+        # NO HAY CACHÉ DEL RANGO - PEDIR SOLO LOS SUB-INTERVALOS FALTANTES
+        intervalos = planificar_intervalos_faltantes(
+            field_id, fecha_inicio, fecha_fin, indices, max_nubosidad
+        )
+        
+        # EOSDA caído (circuito abierto): responder ya con lo que haya en caché de escenas
+        if intervalos and not interruptor_eosda.disponible():
+            return self._respuesta_circuito_abierto(field_id, fecha_inicio, fecha_fin, indices, max_nubosidad)
+        logger.info(f"🔍 No hay caché del rango, {len(intervalos)} sub-intervalo(s) por consultar - "
+                    f"{len(indices)} índices por petición")
         
         try:
-            # UNA petición con TODOS los índices usando geometría
+            # UNA petición por sub-intervalo con TODOS los índices usando geometría
             url = f"{self.base_url}/api/gdw/api"
             
             # Convertir índices a mayúsculas (requerido por EOSDA)
             indices_mayusculas = [idx.upper() for idx in indices]
-            
-            payload = {
-                'type': 'mt_stats',
-                'params': {
-                    'bm_type': indices_mayusculas,  # NDVI, NDMI, SAVI en mayúsculas
-                    'date_start': fecha_inicio.isoformat(),
-                    'date_end': fecha_fin.isoformat(),
-                    'geometry': geometria,  # Usar geometría
-                    'sensors': ['S2L2A'],  # Sentinel-2 Level 2A
-                    'reference': f'stats_{field_id}_{datetime.now().strftime("%Y%m%d_%H%M")}',
-                    'limit': 50,
-                    'max_cloud_cover_in_aoi': max_nubosidad,
-                    'exclude_cover_pixels': True,
-                    'cloud_masking_level': 3
-                }
-            }
-            
-            logger.info(f"📡 Enviando petición Statistics API: {len(indices)} índices")
-            logger.info(f"   Índices: {', '.join(indices_mayusculas)}")
-            logger.info(f"   Geometría: {geometria['type']} con {len(geometria.get('coordinates', [[]])[0])} puntos")
-            
-            response = self.session.post(url, json=payload, timeout=60)
-            tiempo_respuesta = time.time() - tiempo_inicio
-            
-            if response.status_code not in [200, 201, 202]:
-                logger.error(f"❌ Error EOSDA: {response.status_code}")
-                logger.error(f"   Respuesta: {response.text[:500]}")
-                
-                # Registrar fallo
-                EstadisticaUsoEOSDA.registrar_uso(
-                    usuario=usuario,
-                    parcela=parcela,
-                    tipo_operacion='statistics',
-                    endpoint=url,
-                    exitoso=False,
-                    tiempo_respuesta=tiempo_respuesta,
-                    requests_consumidos=1,
-                    codigo_respuesta=response.status_code,
-                    mensaje_error=response.text[:500]
+            task_id = None
+            tareas_enviadas = 0
+            codigo_respuesta = None
+            rango_completo = True
+            
+            for inicio_sub, fin_sub in intervalos:
+                payload = self._construir_payload_estadisticas(
+                    field_id, geometria, inicio_sub, fin_sub, indices, max_nubosidad
                 )
                 
-                return {'error': f'Error HTTP {response.status_code}', 'resultados': []}
-            
-            # Obtener task_id
-            task_data = response.json()
-            task_id = task_data.get('task_id')
-            
-            if not task_id:
-                logger.error("❌ No se obtuvo task_id de EOSDA")
-                return {'error': 'No task_id', 'resultados': []}
-            
-            logger.info(f"✅ Tarea creada: {task_id}")
+                logger.info(f"📡 Enviando petición Statistics API: {inicio_sub} → {fin_sub}")
+                logger.info(f"   Índices: {', '.join(indices_mayusculas)}")
+                logger.info(f"   Geometría: {geometria['type']} con {len(geometria.get('coordinates', [[]])[0])} puntos")
+                
+                bucket_eosda.adquirir()
+                response = self.session.post(url, json=payload, timeout=60)
+                tiempo_respuesta = time.time() - tiempo_inicio
+                tareas_enviadas += 1
+                codigo_respuesta = response.status_code
+                
+                if response.status_code not in [200, 201, 202]:
+                    logger.error(f"❌ Error EOSDA: {response.status_code}")
+                    logger.error(f"   Respuesta: {response.text[:500]}")
+                    
+                    # Registrar fallo
+                    EstadisticaUsoEOSDA.registrar_uso(
+                        usuario=usuario,
+                        parcela=parcela,
+                        tipo_operacion='statistics',
+                        endpoint=url,
+                        exitoso=False,
+                        tiempo_respuesta=tiempo_respuesta,
+                        requests_consumidos=tareas_enviadas,
+                        codigo_respuesta=response.status_code,
+                        mensaje_error=response.text[:500]
+                    )
+                    
+                    return {'error': f'Error HTTP {response.status_code}', 'resultados': []}
+                
+                # Obtener task_id
+                task_data = response.json()
+                task_id = task_data.get('task_id')
+                
+                if not task_id:
+                    logger.error("❌ No se obtuvo task_id de EOSDA")
+                    return {'error': 'No task_id', 'resultados': []}
+                
+                logger.info(f"✅ Tarea creada: {task_id}")
+                
+                # 3. ESPERAR RESULTADOS (backoff con jitter, cuota compartida)
+                resultados_sub = self._obtener_resultados_tarea_lento(task_id)
+                
+                if resultados_sub is None:
+                    rango_completo = False
+                    logger.warning(f"⚠️ No se obtuvieron resultados para tarea {task_id}")
+                else:
+                    # Terminada sin escenas también cubre el intervalo (no se vuelve a pagar)
+                    registrar_escenas_consultadas(
+                        field_id, resultados_sub, indices, inicio_sub, fin_sub,
+                        max_nubosidad, task_id=task_id
+                    )
             
-            # 3. ESPERAR RESULTADOS CON DELAYS MÁS LARGOS
-            logger.info(f"⏳ Esperando resultados (delays de 10s para evitar rate limits)...")
-            resultados = self._obtener_resultados_tarea_lento(task_id)
+            # Unir escenas nuevas con las ya guardadas de los tramos cubiertos
+            resultados = ensamblar_resultados(field_id, fecha_inicio, fecha_fin, indices, max_nubosidad)
             
             if not resultados:
-                logger.warning(f"⚠️ No se obtuvieron resultados para tarea {task_id}")
+                logger.warning(f"⚠️ Sin escenas para {field_id} entre {fecha_inicio} y {fecha_fin}")
                 return {'error': 'Sin resultados', 'resultados': []}
             
             # 4. DATOS CLIMÁTICOS - DESHABILITADO
@@ -1182,25 +1367,18 @@ class EosdaAPIService:
             logger.info(f"ℹ️ Datos climáticos: usando Open-Meteo (EOSDA Weather deshabilitado)")
             datos_clima = []
             
-            # 5. GUARDAR EN CACHÉ
-            datos_formateados = {
-                'resultados': resultados,
-                'datos_clima': datos_clima,  # Siempre vacío - Open-Meteo se usa en views.py
-                'field_id': field_id,
-                'indices': indices,
-                'fecha_consulta': datetime.now().isoformat(),
-                'num_escenas': len(resultados),
-                'metodo': 'statistics_api'
-            }
-            
-            CacheDatosEOSDA.guardar_datos(
-                field_id=field_id,
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin,
-                indices=indices,
-                datos=datos_formateados,
-                task_id=task_id
-            )
+            # 5. GUARDAR EN CACHÉ (solo si ningún sub-intervalo quedó sin respuesta)
+            datos_formateados = self._formatear_datos_estadisticas(resultados, field_id, indices)
+            
+            if rango_completo:
+                CacheDatosEOSDA.guardar_datos(
+                    field_id=field_id,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin,
+                    indices=indices,
+                    datos=datos_formateados,
+                    task_id=task_id
+                )
             
             # 6. REGISTRAR ESTADÍSTICAS
             tiempo_total = time.time() - tiempo_inicio
@@ -1208,16 +1386,20 @@ class EosdaAPIService:
                 usuario=usuario,
                 parcela=parcela,
                 tipo_operacion='statistics',
-                endpoint=url,
+                endpoint=url if tareas_enviadas else '/api/gdw/api (CACHE ESCENAS)',
                 exitoso=True,
                 tiempo_respuesta=tiempo_total,
-                requests_consumidos=1,  # 1 request inicial + polling
-                codigo_respuesta=response.status_code
+                requests_consumidos=tareas_enviadas,  # 1 por sub-intervalo + polling
+                desde_cache=tareas_enviadas == 0,
+                codigo_respuesta=codigo_respuesta
             )
             
-            logger.info(f"✅ Datos obtenidos - 1 petición, {len(resultados)} escenas, {len(datos_clima)} clima, {tiempo_total:.1f}s")
+            logger.info(f"✅ Datos obtenidos - {tareas_enviadas} petición(es), {len(resultados)} escenas, {len(datos_clima)} clima, {tiempo_total:.1f}s")
             return datos_formateados
             
+        except CircuitoAbierto:
+            return self._respuesta_circuito_abierto(field_id, fecha_inicio, fecha_fin, indices, max_nubosidad)
+            
         except requests.exceptions.Timeout:
             tiempo_respuesta = time.time() - tiempo_inicio
             EstadisticaUsoEOSDA.registrar_uso(
@@ -1246,6 +1428,380 @@ class EosdaAPIService:
             logger.error(f"❌ Error obteniendo datos: {str(e)}", exc_info=True)
             return {'error': str(e), 'resultados': []}
     
+    def obtener_datos_optimizado_lote(self, parcelas, fecha_inicio: date, fecha_fin: date,
+                                      indices: List[str], usuario,
+                                      max_nubosidad: int = 50,
+                                      max_workers: int = None,
+                                      timeout_total: int = 900) -> Dict[int, Dict]:
+        """
+        Versión en lote de obtener_datos_optimizado para muchas parcelas:
+        1. Consulta caché por parcela (0 requests si existe)
+        2. Envía TODAS las tareas mt_stats pendientes (solo sub-intervalos sin
+           escenas en caché, ver cache_escenas)
+        3. Consulta todos los task_id en rondas concurrentes (ThreadPoolExecutor)
+           con backoff entre rondas y el token bucket compartido de EOSDA
+        4. Guarda cada resultado en caché y registra estadísticas igual que
+           la consulta individual
+        
+        Las parcelas que otro proceso ya está consultando con la misma clave de
+        caché (vuelo_unico) no envían tareas: al final esperan ese resultado.
+        
+        El tiempo total queda acotado por el límite de peticiones y no por
+        la suma de esperas de cada parcela.
+        
+        Args:
+            parcelas: Iterable de Parcela
+            fecha_inicio: Fecha de inicio del análisis
+            fecha_fin: Fecha de fin del análisis
+            indices: Lista de índices a obtener ['ndvi', 'ndmi', 'savi']
+            usuario: Usuario que hace la petición
+            max_nubosidad: Porcentaje máximo de nubes (30-50)
+            max_workers: Hilos de polling (default EOSDA_LOTE_MAX_WORKERS)
+            timeout_total: Segundos máximos esperando tareas pendientes
+            
+        Returns:
+            Dict {parcela.id: datos} con el mismo formato que obtener_datos_optimizado
+        """
+        from informes.models import CacheDatosEOSDA, EstadisticaUsoEOSDA
+        
+        if max_workers is None:
+            max_workers = getattr(settings, 'EOSDA_LOTE_MAX_WORKERS', 4)
+        
+        url = f"{self.base_url}/api/gdw/api"
+        resultados_lote = {}
+        contextos = {}   # parcela.id -> estado de la parcela en el lote
+        pendientes = {}  # task_id -> (parcela.id, inicio_sub, fin_sub)
+        diferidas = []   # parcelas con una consulta idéntica en curso en otro proceso
+        adquiridas = set()  # claves de vuelo único tomadas por este lote y aún sin liberar
+        tiempo_inicio = time.time()
+        
+        def finalizar_parcela(contexto):
+            """Cierra la parcela y libera su vuelo único aunque algo falle"""
+            try:
+                cerrar_parcela(contexto)
+            finally:
+                liberar(contexto['cache_key'])
+                adquiridas.discard(contexto['cache_key'])
+        
+        def cerrar_parcela(contexto):
+            """Ensambla las escenas de la parcela, guarda caché y registra uso"""
+            parcela = contexto['parcela']
+            field_id = contexto['field_id']
+            tiempo_total = time.time() - contexto['tiempo_inicio']
+            
+            if contexto['error']:
+                EstadisticaUsoEOSDA.registrar_uso(
+                    usuario=usuario,
+                    parcela=parcela,
+                    tipo_operacion='statistics',
+                    endpoint=url,
+                    exitoso=False,
+                    tiempo_respuesta=tiempo_total,
+                    requests_consumidos=contexto['tareas_enviadas'],
+                    codigo_respuesta=contexto['codigo_respuesta'],
+                    mensaje_error=contexto['error'][:500]
+                )
+                logger.error(f"❌ {parcela.nombre}: {contexto['error']}")
+                resultados_lote[parcela.id] = {'error': contexto['error'], 'resultados': []}
+                return
+            
+            resultados = ensamblar_resultados(field_id, fecha_inicio, fecha_fin, indices, max_nubosidad)
+            if not resultados:
+                resultados_lote[parcela.id] = {'error': 'Sin resultados', 'resultados': []}
+                return
+            
+            datos_formateados = self._formatear_datos_estadisticas(resultados, field_id, indices)
+            # Con errores o timeouts ya se salió arriba: todos los sub-intervalos respondieron
+            CacheDatosEOSDA.guardar_datos(
+                field_id=field_id,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                indices=indices,
+                datos=datos_formateados,
+                task_id=contexto['ultimo_task_id']
+            )
+            EstadisticaUsoEOSDA.registrar_uso(
+                usuario=usuario,
+                parcela=parcela,
+                tipo_operacion='statistics',
+                endpoint=url if contexto['tareas_enviadas'] else '/api/gdw/api (CACHE ESCENAS)',
+                exitoso=True,
+                tiempo_respuesta=tiempo_total,
+                requests_consumidos=contexto['tareas_enviadas'],
+                desde_cache=contexto['tareas_enviadas'] == 0,
+                codigo_respuesta=contexto['codigo_respuesta']
+            )
+            resultados_lote[parcela.id] = datos_formateados
+            logger.info(f"✅ {parcela.nombre}: {len(resultados)} escenas, "
+                        f"{contexto['tareas_enviadas']} tarea(s) ({tiempo_total:.1f}s)")
+        
+        try:
+            # 1. CACHÉ Y ENVÍO DE TAREAS (solo sub-intervalos faltantes)
+            for parcela in parcelas:
+                field_id = parcela.eosda_field_id or f"parcela_{parcela.id}"
+                tiempo_parcela = time.time()
+            
+                try:
+                    geometria = json.loads(parcela.poligono_geojson) if parcela.poligono_geojson else None
+                except Exception as e:
+                    logger.error(f"❌ Error parseando geometría de {parcela.nombre}: {e}")
+                    resultados_lote[parcela.id] = {'error': f'Error geometría: {str(e)}', 'resultados': []}
+                    continue
+            
+                if not geometria:
+                    logger.error(f"❌ Parcela {parcela.nombre} no tiene geometría GeoJSON")
+                    resultados_lote[parcela.id] = {'error': 'Sin geometría', 'resultados': []}
+                    continue
+            
+                datos_cache = CacheDatosEOSDA.obtener_o_none(
+                    field_id=field_id,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin,
+                    indices=indices
+                )
+            
+                if datos_cache:
+                    EstadisticaUsoEOSDA.registrar_uso(
+                        usuario=usuario,
+                        parcela=parcela,
+                        tipo_operacion='statistics',
+                        endpoint='/api/gdw/api (CACHE)',
+                        exitoso=True,
+                        tiempo_respuesta=time.time() - tiempo_parcela,
+                        requests_consumidos=0,
+                        desde_cache=True,
+                        cache_key=CacheDatosEOSDA.generar_cache_key(
+                            field_id, fecha_inicio, fecha_fin, indices
+                        )
+                    )
+                    resultados_lote[parcela.id] = datos_cache
+                    continue
+            
+                intervalos = planificar_intervalos_faltantes(
+                    field_id, fecha_inicio, fecha_fin, indices, max_nubosidad
+                )
+            
+                # EOSDA caído (circuito abierto): no enviar tareas, usar caché de escenas
+                if intervalos and not interruptor_eosda.disponible():
+                    resultados_lote[parcela.id] = self._respuesta_circuito_abierto(
+                        field_id, fecha_inicio, fecha_fin, indices, max_nubosidad
+                    )
+                    continue
+            
+                # Otro proceso consulta ya esta misma clave: no duplicar el gasto en EOSDA
+                cache_key = CacheDatosEOSDA.generar_cache_key(field_id, fecha_inicio, fecha_fin, indices)
+                if not intentar_adquirir(cache_key):
+                    diferidas.append(parcela)
+                    continue
+                adquiridas.add(cache_key)
+            
+                contexto = {
+                    'parcela': parcela,
+                    'field_id': field_id,
+                    'cache_key': cache_key,
+                    'tiempo_inicio': tiempo_parcela,
+                    'tareas_enviadas': 0,
+                    'tareas_pendientes': 0,
+                    'codigo_respuesta': None,
+                    'ultimo_task_id': None,
+                    'error': None,
+                }
+                contextos[parcela.id] = contexto
+            
+                for inicio_sub, fin_sub in intervalos:
+                    payload = self._construir_payload_estadisticas(
+                        field_id, geometria, inicio_sub, fin_sub, indices, max_nubosidad
+                    )
+                
+                    try:
+                        bucket_eosda.adquirir()
+                        response = self.session.post(url, json=payload, timeout=60)
+                    except Exception as e:
+                        logger.error(f"❌ Error enviando tarea de {parcela.nombre}: {str(e)}")
+                        contexto['error'] = str(e)
+                        break
+                
+                    contexto['tareas_enviadas'] += 1
+                    contexto['codigo_respuesta'] = response.status_code
+                
+                    task_id = None
+                    if response.status_code in [200, 201, 202]:
+                        task_id = response.json().get('task_id')
+                
+                    if not task_id:
+                        contexto['error'] = (f'Error HTTP {response.status_code}'
+                                             if response.status_code not in [200, 201, 202] else 'No task_id')
+                        break
+                
+                    contexto['tareas_pendientes'] += 1
+                    contexto['ultimo_task_id'] = task_id
+                    pendientes[task_id] = (parcela.id, inicio_sub, fin_sub)
+            
+                # Sin tareas en vuelo: todo venía del caché de escenas o falló el envío
+                if contexto['tareas_pendientes'] == 0:
+                    finalizar_parcela(contexto)
+        
+            logger.info(f"📡 Lote EOSDA: {len(resultados_lote)} resueltas sin polling, "
+                        f"{len(pendientes)} tareas enviadas")
+        
+            # 2. POLLING CONCURRENTE DE TODAS LAS TAREAS
+            # Un solo planificador para el lote: backoff entre rondas, cuota compartida por petición
+            planificador = crear_planificador_eosda(timeout_total=timeout_total)
+            
+            def consultar(task_id: str) -> Dict:
+                try:
+                    return self._consultar_estado_tarea(task_id, planificador)
+                finally:
+                    connection.close()  # El circuito de EOSDA consulta la BD desde este hilo
+            
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                for ronda in planificador.intentos():
+                    futuros = {
+                        executor.submit(consultar, task_id): task_id
+                        for task_id in pendientes
+                    }
+                
+                    for futuro in as_completed(futuros):
+                        task_id = futuros[futuro]
+                        estado = futuro.result()
+                    
+                        if estado['estado'] in ['pendiente', 'rate_limit']:
+                            continue
+                    
+                        parcela_id, inicio_sub, fin_sub = pendientes.pop(task_id)
+                        contexto = contextos[parcela_id]
+                        contexto['tareas_pendientes'] -= 1
+                    
+                        if estado['estado'] == 'error':
+                            logger.error(f"❌ Tarea {task_id} ({contexto['parcela'].nombre}) falló: {estado['mensaje']}")
+                            contexto['error'] = contexto['error'] or estado['mensaje']
+                        else:
+                            # 'completada' o 'vacia': el intervalo queda cubierto aunque no haya escenas
+                            registrar_escenas_consultadas(
+                                contexto['field_id'], estado['resultados'], indices,
+                                inicio_sub, fin_sub, max_nubosidad, task_id=task_id
+                            )
+                    
+                        if contexto['tareas_pendientes'] == 0:
+                            finalizar_parcela(contexto)
+                
+                    if not pendientes:
+                        break
+                    logger.info(f"   Ronda {ronda + 1}: {len(pendientes)} tareas siguen procesando")
+        
+            # 3. TAREAS QUE NO TERMINARON A TIEMPO
+            for task_id, (parcela_id, _, _) in pendientes.items():
+                contexto = contextos[parcela_id]
+                logger.warning(f"⏱️ Tarea {task_id} ({contexto['parcela'].nombre}) sin resultados tras {timeout_total}s")
+                contexto['error'] = contexto['error'] or 'Timeout'
+                contexto['tareas_pendientes'] -= 1
+                if contexto['tareas_pendientes'] == 0:
+                    finalizar_parcela(contexto)
+        finally:
+            # Una excepción al enviar o consultar no debe dejar el vuelo único tomado: el
+            # advisory lock duraría lo que la conexión y bloquearía a los demás procesos
+            for cache_key in adquiridas:
+                liberar(cache_key)
+        
+        # 4. PARCELAS COALESCIDAS: esperar la consulta del otro proceso y leer su caché
+        for parcela in diferidas:
+            logger.info(f"⏳ {parcela.nombre}: esperando consulta idéntica en curso")
+            resultados_lote[parcela.id] = self.obtener_datos_optimizado(
+                parcela, fecha_inicio, fecha_fin, indices, usuario, max_nubosidad
+            )
+        
+        exitosas = sum(1 for datos in resultados_lote.values() if 'error' not in datos)
+        logger.info(f"✅ Lote EOSDA completado: {exitosas}/{len(resultados_lote)} parcelas con datos "
+                    f"en {time.time() - tiempo_inicio:.1f}s")
+        logger.info(f"📈 Métricas polling EOSDA: {metricas_eosda.resumen()}")
+        return resultados_lote
+    
+    def solicitar_imagen_satelital(self, field_id: str, indice: str, view_id: str) -> Optional[str]:
+        """
+        Paso 1 de Field Imagery API: pide a EOSDA que genere la imagen PNG.
+        
+        Returns:
+            request_id para consultar la imagen o None si falla
+        """
+        url_imagery = f"{self.base_url}/field-imagery/indicies/{field_id}"
+        
+        payload_imagen = {
+            'params': {
+                'view_id': view_id,
+                'index': indice,  # ✅ Usar el índice en MAYÚSCULAS (NDVI, NDMI, SAVI)
+                'format': 'png'
+            }
+        }
+        
+        logger.info(f"   🎨 Generando imagen {indice} (view_id: {view_id})...")
+        bucket_eosda.adquirir()
+        response = self.session.post(url_imagery, json=payload_imagen, timeout=60)
+        
+        if response.status_code not in [200, 201, 202]:
+            logger.error(f"   ❌ Error creando request de imagen: {response.status_code}")
+            logger.debug(f"   Response: {response.text[:300]}")
+            return None
+        
+        request_id = response.json().get('request_id')
+        if not request_id:
+            logger.error(f"   ❌ No se obtuvo request_id para imagen")
+            return None
+        
+        return request_id
+    
+    def consultar_imagen_satelital(self, field_id: str, request_id: str, planificador) -> Dict:
+        """
+        Paso 2 de Field Imagery API: UNA consulta del estado de la imagen.
+        Si ya está lista, la descarga en streaming a un archivo temporal.
+        
+        Returns:
+            Dict con 'estado' ('lista', 'pendiente', 'error'), 'archivo'
+            (archivo temporal posicionado al inicio, solo si está lista) y 'mensaje'
+        """
+        url_download = f"{self.base_url}/field-imagery/{field_id}/{request_id}"
+        response = planificador.peticion(self.session.get, url_download, timeout=60, stream=True)
+        
+        try:
+            logger.debug(f"   Status: {response.status_code}, Content-Type: {response.headers.get('Content-Type', 'N/A')}")
+            
+            if response.status_code in [404, 429, 503]:
+                return {'estado': 'pendiente', 'archivo': None, 'mensaje': f'HTTP {response.status_code}'}
+            
+            if response.status_code != 200:
+                logger.error(f"   ❌ Error descargando imagen: {response.status_code}")
+                return {'estado': 'error', 'archivo': None, 'mensaje': f'HTTP {response.status_code}'}
+            
+            content_type = response.headers.get('Content-Type', '')
+            content_length = int(response.headers.get('Content-Length', 0))
+            
+            # ✅ Verificar si es imagen por Content-Type O por tamaño > 1KB
+            if 'image' in content_type or 'octet-stream' in content_type or content_length > 1000:
+                archivo = tempfile.SpooledTemporaryFile(max_size=2 * 1024 * 1024)
+                for bloque in response.iter_content(chunk_size=64 * 1024):
+                    archivo.write(bloque)
+                tamaño = archivo.tell()
+                archivo.seek(0)
+                
+                # Verificar que sea PNG válido
+                if archivo.read(4) == b'\x89PNG' or tamaño > 1000:
+                    archivo.seek(0)
+                    return {'estado': 'lista', 'archivo': archivo, 'mensaje': f'{tamaño} bytes'}
+                archivo.close()
+                return {'estado': 'pendiente', 'archivo': None, 'mensaje': 'Respuesta sin imagen'}
+            
+            # Si no es imagen, revisar si es JSON con estado
+            try:
+                data = response.json()
+                status = data.get('status', 'unknown')
+                if status in ['failed', 'error']:
+                    logger.error(f"   ❌ Error en generación: {data.get('error', 'Unknown')}")
+                    return {'estado': 'error', 'archivo': None, 'mensaje': str(data.get('error', status))}
+            except ValueError:
+                pass
+            return {'estado': 'pendiente', 'archivo': None, 'mensaje': 'Imagen aún en proceso'}
+        finally:
+            response.close()
+    
     def descargar_imagen_satelital(self, field_id: str, indice: str, 
                                    view_id: str = None,
                                    fecha_escena: str = None,
@@ -1254,7 +1810,8 @@ class EosdaAPIService:
         Descarga imagen satelital usando Field Imagery API de EOSDA.
         
         OPTIMIZADO para reducir consumo de requests:
-        - Si se proporciona view_id directamente, solo hace ~7 requests (1 POST + 6 GET polling)
+        - Primero consulta el almacén local por (field_id, view_id, índice): 0 requests
+        - Si se proporciona view_id directamente, solo hace 1 POST + polling con backoff
         - Si no hay view_id, retorna None para evitar búsquedas costosas
         
         Args:
@@ -1265,21 +1822,14 @@ class EosdaAPIService:
             max_nubosidad: Máximo porcentaje de nubosidad (default 50%)
         
         Returns:
-            Dict con 'imagen' (bytes), 'fecha', 'nubosidad', 'view_id' o None si falla
+            Dict con 'imagen' (bytes), 'fecha', 'nubosidad', 'view_id', 'sha256'
+            (clave en el almacén de imágenes) y 'desde_cache', o None si falla
         """
         try:
-            # Mapeo de índices
-            index_mapping = {
-                'NDVI': 'ndvi',
-                'NDMI': 'ndmi',
-                'SAVI': 'savi'
-            }
-            
-            if indice not in index_mapping:
+            if indice not in ['NDVI', 'NDMI', 'SAVI']:
                 logger.error(f"   ❌ Índice '{indice}' no soportado. Usar: NDVI, NDMI, SAVI")
                 return None
             
-            eosda_index = index_mapping[indice]
             logger.info(f"   📷 Descargando imagen {indice} para field {field_id}")
             
             # ✅ OPTIMIZACIÓN: Requerir view_id para evitar búsquedas costosas
@@ -1288,81 +1838,48 @@ class EosdaAPIService:
                 logger.warning(f"   💡 Recomendación: Obtener datos de Statistics API primero para obtener view_ids")
                 return None
             
-            fecha_imagen = fecha_escena
-            nubosidad = None  # Se calculará del registro si está disponible
-            
-            # Paso 1: Crear request para generar imagen
-            url_imagery = f"{self.base_url}/field-imagery/indicies/{field_id}"
-            
-            payload_imagen = {
-                'params': {
+            # Paso 0: Almacén local direccionado por contenido
+            imagen_almacenada = almacen_imagenes.buscar(field_id, view_id, indice)
+            if imagen_almacenada:
+                return {
+                    'imagen': almacen_imagenes.leer(imagen_almacenada),
+                    'fecha': fecha_escena,
+                    'nubosidad': None,
                     'view_id': view_id,
-                    'index': indice,  # ✅ Usar el índice en MAYÚSCULAS (NDVI, NDMI, SAVI)
-                    'format': 'png'
+                    'content_type': imagen_almacenada.content_type,
+                    'sha256': imagen_almacenada.sha256,
+                    'desde_cache': True
                 }
-            }
             
-            logger.info(f"   🎨 Generando imagen {indice} (view_id: {view_id})...")
-            response = self.session.post(url_imagery, json=payload_imagen, timeout=60)
-            
-            if response.status_code not in [200, 201, 202]:
-                logger.error(f"   ❌ Error creando request de imagen: {response.status_code}")
-                logger.debug(f"   Response: {response.text[:300]}")
-                return None
-            
-            request_id = response.json().get('request_id')
+            # Paso 1: Crear request para generar imagen
+            request_id = self.solicitar_imagen_satelital(field_id, indice, view_id)
             if not request_id:
-                logger.error(f"   ❌ No se obtuvo request_id para imagen")
                 return None
             
-            # Paso 2: Polling para descargar imagen (máximo 120 segundos, 12 intentos)
-            url_download = f"{self.base_url}/field-imagery/{field_id}/{request_id}"
-            max_intentos = 12  # 12 intentos x 10 segundos = 2 minutos máximo
-            intervalo = 10  # 10 segundos entre intentos
+            # Paso 2: Polling con backoff compartido (planificador_polling)
+            planificador = crear_planificador_eosda()
             
-            for intento in range(max_intentos):
-                time.sleep(intervalo)
+            for intento in planificador.intentos():
+                logger.info(f"   ⏳ Esperando imagen... intento {intento + 1} ({planificador.transcurrido():.0f}s)")
+                estado = self.consultar_imagen_satelital(field_id, request_id, planificador)
                 
-                logger.info(f"   ⏳ Esperando imagen... intento {intento + 1}/{max_intentos}")
-                response = self.session.get(url_download, timeout=60)
-                
-                logger.debug(f"   Status: {response.status_code}, Content-Type: {response.headers.get('Content-Type', 'N/A')}")
+                if estado['estado'] == 'lista':
+                    with estado['archivo'] as archivo:
+                        imagen_almacenada = almacen_imagenes.guardar(archivo, field_id, view_id, indice)
+                        archivo.seek(0)
+                        contenido = archivo.read()
+                    logger.info(f"   ✅ Imagen {indice} descargada ({len(contenido)} bytes)")
+                    return {
+                        'imagen': contenido,
+                        'fecha': fecha_escena,
+                        'nubosidad': None,  # Se toma del registro mensual si está disponible
+                        'view_id': view_id,
+                        'content_type': 'image/png',
+                        'sha256': imagen_almacenada.sha256,
+                        'desde_cache': False
+                    }
                 
-                if response.status_code == 200:
-                    content_type = response.headers.get('Content-Type', '')
-                    content_length = int(response.headers.get('Content-Length', 0))
-                    
-                    # ✅ Verificar si es imagen por Content-Type O por tamaño > 1KB
-                    if 'image' in content_type or 'octet-stream' in content_type or content_length > 1000:
-                        # Verificar que sea PNG válido
-                        if response.content[:4] == b'\x89PNG' or len(response.content) > 1000:
-                            logger.info(f"   ✅ Imagen {indice} descargada ({len(response.content)} bytes)")
-                            return {
-                                'imagen': response.content,
-                                'fecha': fecha_imagen,
-                                'nubosidad': nubosidad,
-                                'view_id': view_id,
-                                'content_type': 'image/png'
-                            }
-                    
-                    # Si no es imagen, revisar si es JSON con estado
-                    try:
-                        data = response.json()
-                        status = data.get('status', 'unknown')
-                        logger.debug(f"   ⏳ Estado: {status}")
-                        if status in ['failed', 'error']:
-                            logger.error(f"   ❌ Error en generación: {data.get('error', 'Unknown')}")
-                            return None
-                    except:
-                        pass
-                    logger.debug(f"   ⏳ Imagen aún en proceso...")
-                    continue
-                elif response.status_code == 404:
-                    logger.debug(f"   ⏳ Imagen no lista aún...")
-                    continue
-                else:
-                    logger.error(f"   ❌ Error descargando imagen: {response.status_code}")
-                    logger.debug(f"   Response: {response.text[:200]}")
+                if estado['estado'] == 'error':
                     return None
             
             logger.warning(f"   ⏱️ Timeout esperando generación de imagen {indice}")
@@ -0,0 +1,265 @@
+"""
+Serie a nivel de escena por parcela (EscenaIndiceParcela)
+- Carga en bloque las escenas de la Statistics API (formato 'date', 'cloud',
+  'view_id', 'indexes': {'NDVI': {'average', 'min', 'max', 'std'}, ...})
+- Las devuelve como arrays columnares (una consulta, sin instanciar modelos)
+- Las reagrega por parcela a semanas ISO, décadas (1-10, 11-20, 21-fin de mes) o
+  meses, promediando escenas (opcionalmente ponderadas por nubosidad)
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.db import transaction
+
+from ..analizadores.serie_temporal import pesos_nubosidad
+
+logger = logging.getLogger(__name__)
+
+INDICES_ESCENA = ('NDVI', 'NDMI', 'SAVI')
+
+# Estadística de EOSDA -> columna de EscenaIndiceParcela
+CAMPOS_ESTADISTICAS = {
+    'average': 'promedio',
+    'min': 'minimo',
+    'max': 'maximo',
+    'std': 'desviacion',
+}
+
+GRANULARIDADES = ('semanal', 'decadal', 'mensual')
+
+
+def _numero(valor) -> Optional[float]:
+    try:
+        return None if valor is None else float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def filas_escenas(parcela_id: int, resultados: List[Dict]) -> List:
+    """
+    Escenas de la Statistics API -> EscenaIndiceParcela sin guardar
+    (una por fecha + índice + view_id; si se repiten, vale la última)
+    """
+    from ..models_escenas import EscenaIndiceParcela
+
+    filas = {}
+    for escena in resultados:
+        try:
+            fecha = date.fromisoformat(str(escena.get('date'))[:10])
+        except (TypeError, ValueError):
+            logger.error(f"Fecha de escena inválida: {escena.get('date')}")
+            continue
+
+        view_id = escena.get('view_id') or ''
+        for indice, estadisticas in (escena.get('indexes') or {}).items():
+            indice = indice.upper()
+            if indice not in INDICES_ESCENA or not estadisticas:
+                continue
+            filas[(fecha, indice, view_id)] = EscenaIndiceParcela(
+                parcela_id=parcela_id,
+                fecha=fecha,
+                indice=indice,
+                view_id=view_id,
+                nubosidad=_numero(escena.get('cloud')),
+                **{campo: _numero(estadisticas.get(clave)) for clave, campo in CAMPOS_ESTADISTICAS.items()}
+            )
+    return list(filas.values())
+
+
+def guardar_escenas(parcela, resultados: List[Dict]) -> int:
+    """
+    Upsert en bloque de las escenas de una consulta a la Statistics API.
+
+    Returns:
+        Filas (escena x índice) guardadas
+    """
+    from ..models_escenas import EscenaIndiceParcela
+
+    filas = filas_escenas(parcela.id, resultados)
+    if not filas:
+        return 0
+
+    with transaction.atomic():
+        EscenaIndiceParcela.objects.bulk_create(
+            filas,
+            update_conflicts=True,
+            unique_fields=['parcela', 'indice', 'fecha', 'view_id'],
+            update_fields=['nubosidad', *CAMPOS_ESTADISTICAS.values()],
+            batch_size=1000,
+        )
+    logger.info(f"🛰️ {len(filas)} escena(s)-índice guardadas para {parcela.nombre}")
+    return len(filas)
+
+
+def arrays_escenas(indice: str = 'NDVI', parcela_ids: Optional[Iterable[int]] = None,
+                   desde: date = None, hasta: date = None) -> Dict[str, np.ndarray]:
+    """
+    Escenas de un índice como arrays columnares, ordenadas por parcela y fecha.
+
+    Returns:
+        Dict con 'parcela_id' (int64), 'fecha' (datetime64[D]) y 'promedio', 'minimo',
+        'maximo', 'desviacion', 'nubosidad' (float, NaN = sin dato)
+    """
+    from ..models_escenas import EscenaIndiceParcela
+
+    escenas = EscenaIndiceParcela.objects.filter(indice=indice.upper())
+    if parcela_ids is not None:
+        escenas = escenas.filter(parcela_id__in=list(parcela_ids))
+    if desde:
+        escenas = escenas.filter(fecha__gte=desde)
+    if hasta:
+        escenas = escenas.filter(fecha__lte=hasta)
+
+    columnas_valor = [*CAMPOS_ESTADISTICAS.values(), 'nubosidad']
+    registros = list(
+        escenas.order_by('parcela_id', 'fecha', 'view_id')
+        .values_list('parcela_id', 'fecha', *columnas_valor)
+    )
+
+    arrays = {
+        'parcela_id': np.fromiter((r[0] for r in registros), dtype=np.int64, count=len(registros)),
+        'fecha': np.array([r[1] for r in registros], dtype='datetime64[D]'),
+    }
+    # None -> NaN al convertir a float
+    valores = np.array([r[2:] for r in registros], dtype=float).reshape(-1, len(columnas_valor))
+    for posicion, columna in enumerate(columnas_valor):
+        arrays[columna] = valores[:, posicion]
+    return arrays
+
+
+def inicio_periodo(fechas: np.ndarray, granularidad: str) -> np.ndarray:
+    """
+    Primer día del período de cada fecha (datetime64[D]):
+    lunes de la semana ISO, día 1/11/21 de la década o día 1 del mes
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad desconocida: {granularidad}")
+
+    dias = np.asarray(fechas, dtype='datetime64[D]')
+    if granularidad == 'semanal':
+        numeros = dias.astype(np.int64)
+        # 1970-01-01 fue jueves (día 3 contando desde el lunes)
+        return (numeros - (numeros + 3) % 7).astype('datetime64[D]')
+
+    inicio_mes = dias.astype('datetime64[M]').astype('datetime64[D]')
+    if granularidad == 'mensual':
+        return inicio_mes
+    # Décadas agronómicas: la tercera llega hasta fin de mes (8 a 11 días)
+    decada = np.minimum((dias - inicio_mes).astype(np.int64) // 10, 2)
+    return inicio_mes + decada * 10
+
+
+def reagregar(arrays: Dict[str, np.ndarray], granularidad: str = 'mensual',
+              ponderar_nubosidad: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Agrega las escenas de arrays_escenas por parcela y período.
+
+    Args:
+        granularidad: 'semanal', 'decadal' o 'mensual'
+        ponderar_nubosidad: Promediar con los pesos de pesos_nubosidad (las escenas
+            nubladas pesan menos); si no, promedio simple como IndiceMensual
+
+    Returns:
+        Dict columnar ordenado por parcela y período: 'parcela_id', 'inicio'
+        (datetime64[D]), 'promedio', 'minimo', 'maximo', 'nubosidad' y 'escenas'
+    """
+    # Solo escenas con promedio del índice
+    con_valor = ~np.isnan(arrays['promedio'])
+    parcela_ids = arrays['parcela_id'][con_valor]
+    inicios = inicio_periodo(arrays['fecha'][con_valor], granularidad)
+    promedio = arrays['promedio'][con_valor]
+    nubosidad = arrays['nubosidad'][con_valor]
+
+    if not len(promedio):
+        vacio = np.empty(0)
+        return {
+            'parcela_id': np.empty(0, dtype=np.int64), 'inicio': np.empty(0, dtype='datetime64[D]'),
+            'promedio': vacio, 'minimo': vacio, 'maximo': vacio, 'nubosidad': vacio,
+            'escenas': np.empty(0, dtype=np.int64),
+        }
+
+    # Grupos contiguos (parcela, período): ordenar y cortar donde cambia la clave
+    orden = np.lexsort((inicios, parcela_ids))
+    parcela_ids, inicios = parcela_ids[orden], inicios[orden]
+    cambios = (np.diff(parcela_ids) != 0) | (np.diff(inicios) != np.timedelta64(0, 'D'))
+    cortes = np.concatenate(([0], np.flatnonzero(cambios) + 1))
+
+    pesos = pesos_nubosidad(nubosidad[orden]) if ponderar_nubosidad else np.ones(len(orden))
+    nubosidad = nubosidad[orden]
+    hay_nubosidad = ~np.isnan(nubosidad)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        nubosidad_periodo = (
+            np.add.reduceat(np.where(hay_nubosidad, nubosidad, 0.0), cortes)
+            / np.add.reduceat(hay_nubosidad.astype(float), cortes)
+        )
+
+    return {
+        'parcela_id': parcela_ids[cortes],
+        'inicio': inicios[cortes],
+        'promedio': np.add.reduceat(pesos * promedio[orden], cortes) / np.add.reduceat(pesos, cortes),
+        # fmin/fmax ignoran los NaN (escenas sin mínimo o máximo)
+        'minimo': np.fmin.reduceat(arrays['minimo'][con_valor][orden], cortes),
+        'maximo': np.fmax.reduceat(arrays['maximo'][con_valor][orden], cortes),
+        'nubosidad': nubosidad_periodo,
+        'escenas': np.diff(np.append(cortes, len(orden))),
+    }
+
+
+def serie_reagregada(parcela, indice: str = 'NDVI', granularidad: str = 'mensual',
+                     desde: date = None, hasta: date = None,
+                     ponderar_nubosidad: bool = False) -> List[Dict]:
+    """
+    Serie de una parcela reagregada desde sus escenas, como lista de dicts
+    [{'inicio': date, 'promedio', 'minimo', 'maximo', 'nubosidad', 'escenas'}, ...]
+    """
+    agregado = reagregar(
+        arrays_escenas(indice, parcela_ids=[parcela.id], desde=desde, hasta=hasta),
+        granularidad, ponderar_nubosidad
+    )
+
+    def opcional(valor) -> Optional[float]:
+        return None if np.isnan(valor) else round(float(valor), 4)
+
+    return [
+        {
+            'inicio': agregado['inicio'][i].item(),
+            'promedio': opcional(agregado['promedio'][i]),
+            'minimo': opcional(agregado['minimo'][i]),
+            'maximo': opcional(agregado['maximo'][i]),
+            'nubosidad': opcional(agregado['nubosidad'][i]),
+            'escenas': int(agregado['escenas'][i]),
+        }
+        for i in range(len(agregado['inicio']))
+    ]
+
+
+def cargar_desde_cache(parcela) -> int:
+    """
+    Copia a EscenaIndiceParcela las escenas de la parcela guardadas en el caché
+    de la Statistics API (EscenaCacheEOSDA, por field_id)
+
+    Returns:
+        Filas guardadas
+    """
+    from ..models import EscenaCacheEOSDA
+
+    if not parcela.eosda_field_id:
+        return 0
+
+    escenas = {}
+    for fila in EscenaCacheEOSDA.objects.filter(
+        field_id=parcela.eosda_field_id, indice__in=INDICES_ESCENA
+    ).order_by('fecha_escena', 'view_id'):
+        clave = (fila.fecha_escena, fila.view_id)
+        if clave not in escenas:
+            escenas[clave] = {
+                'date': fila.fecha_escena.isoformat(),
+                'view_id': fila.view_id,
+                'cloud': fila.nubosidad,
+                'indexes': {},
+            }
+        escenas[clave]['indexes'][fila.indice] = fila.estadisticas
+    return guardar_escenas(parcela, list(escenas.values()))
@@ -0,0 +1,127 @@
+"""
+Reconstrucción incremental de informes PDF por secciones
+- Cada sección declara sus entradas (dict serializable) y un constructor de flowables
+- La sección se renderiza sola como fragmento PDF, cacheado por hash(nombre, entradas)
+- El informe se ensambla concatenando páginas (pypdf) y estampando encima el
+  encabezado/pie con la numeración final
+- Al regenerar tras un mes nuevo solo se renderizan las secciones cuyas entradas cambiaron
+
+Sin pypdf (o con INFORMES_PDF_FRAGMENTOS = False) el llamador construye el documento
+completo como siempre: ver fragmentos_disponibles().
+"""
+
+import logging
+from io import BytesIO
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+from reportlab.pdfgen import canvas as canvas_reportlab
+from reportlab.platypus import SimpleDocTemplate
+
+from .cache_disco import CacheDisco, calcular_clave, configuracion
+from .salida_pdf import SalidaPDF
+
+try:
+    from pypdf import PdfReader, PdfWriter
+    PYPDF_DISPONIBLE = True
+except ImportError:
+    PYPDF_DISPONIBLE = False
+
+logger = logging.getLogger(__name__)
+
+# Subir al cambiar estilos o maquetación de cualquier sección: invalida los fragmentos
+VERSION_FRAGMENTOS = 1
+
+# (nombre, entradas declaradas, constructor de flowables)
+SeccionPDF = Tuple[str, Dict, Callable[[], List]]
+
+
+def fragmentos_disponibles() -> bool:
+    return PYPDF_DISPONIBLE and configuracion('INFORMES_PDF_FRAGMENTOS', True)
+
+
+class CacheFragmentosPDF:
+    """
+    Fragmentos PDF de secciones de informe en disco, direccionados por sus entradas
+    """
+
+    def __init__(self, directorio: str = None):
+        self.disco = CacheDisco('INFORMES_FRAGMENTOS_CACHE', 'fragmentos_cache', directorio)
+
+    @staticmethod
+    def calcular_clave(nombre: str, entradas: Dict, plantilla: Dict) -> str:
+        return calcular_clave(
+            {'seccion': nombre, 'version': VERSION_FRAGMENTOS, 'plantilla': plantilla, 'entradas': entradas}
+        )
+
+    def _renderizar(self, ruta: str, flowables: List, plantilla: Dict):
+        """Escritura atómica vía SalidaPDF: otro worker nunca lee un fragmento a medias"""
+        with SalidaPDF(ruta_final=ruta) as salida:
+            SimpleDocTemplate(salida, **plantilla).build(flowables)
+            salida.mover_a()
+
+    def obtener(self, seccion: SeccionPDF, plantilla: Dict) -> Tuple[Optional[str], bool]:
+        """
+        Fragmento de la sección; solo llama al constructor si las entradas cambiaron.
+
+        Returns:
+            (ruta del fragmento o None si la sección no tiene contenido, True si se renderizó)
+        """
+        nombre, entradas, construir = seccion
+        clave = self.calcular_clave(nombre, entradas, plantilla)
+        ruta = self.disco.buscar(clave, ('pdf',))
+        if ruta:
+            logger.debug(f"♻️ Sección '{nombre}' reutilizada")
+            return ruta, False
+        ruta = self.disco.ruta_para(clave, 'pdf')
+
+        flowables = construir()
+        if not flowables:
+            return None, True
+        self._renderizar(ruta, flowables, plantilla)
+        logger.info(f"🧩 Sección '{nombre}' renderizada")
+        return ruta, True
+
+    def descartar(self, ruta: str):
+        """Quita un fragmento que no debe reutilizarse (p.ej. generado con fallbacks)"""
+        self.disco.descartar(ruta)
+
+    @staticmethod
+    def ensamblar(fragmentos: List[str], salida, pagesize: Tuple[float, float],
+                  estampar: Callable) -> int:
+        """
+        Concatena los fragmentos en 'salida' y estampa en cada página el
+        encabezado/pie con estampar(canvas, doc) (doc.page = número final).
+
+        Returns:
+            Número de páginas del informe
+        """
+        lectores = [PdfReader(ruta) for ruta in fragmentos]
+        total_paginas = sum(len(lector.pages) for lector in lectores)
+
+        # Encabezados y pies de todas las páginas en un único PDF (solo texto: pequeño)
+        buffer = BytesIO()
+        lienzo = canvas_reportlab.Canvas(buffer, pagesize=pagesize)
+        for numero in range(1, total_paginas + 1):
+            estampar(lienzo, SimpleNamespace(page=numero))
+            lienzo.showPage()
+        lienzo.save()
+        superposiciones = PdfReader(BytesIO(buffer.getvalue())).pages
+
+        escritor = PdfWriter()
+        numero = 0
+        for lector in lectores:
+            for pagina in lector.pages:
+                pagina.merge_page(superposiciones[numero])
+                escritor.add_page(pagina)
+                numero += 1
+        escritor.write(salida)
+        return total_paginas
+
+    def purgar(self, dias: int = 30) -> Dict:
+        """Elimina los fragmentos sin usar en los últimos 'dias'"""
+        return self.disco.purgar(dias)
+
+
+# Instancia global
+cache_fragmentos = CacheFragmentosPDF()
@@ -13,8 +13,20 @@ from pathlib import Path
 import google.generativeai as genai
 from django.conf import settings
 
+from .circuito import CircuitoAbierto, interruptor_gemini
+from .planificador_polling import TokenBucket
+
 logger = logging.getLogger(__name__)
 
+# Subir al cambiar el prompt de analizar_imagen_satelital: invalida la caché de AnalisisImagen
+VERSION_PROMPT_ANALISIS_IMAGEN = 1
+
+# Cuota por minuto compartida por todos los hilos (p.ej. la galería del PDF en paralelo)
+bucket_gemini = TokenBucket(
+    peticiones_por_minuto=getattr(settings, 'GEMINI_MAX_REQUESTS_POR_MINUTO', 15),
+    rafaga=getattr(settings, 'GEMINI_MAX_CONCURRENCIA', 4),
+)
+
 
 class GeminiService:
     """
@@ -39,9 +51,22 @@ class GeminiService:
         # Input: 1M tokens, Output: 8K tokens
         # Nota: gemini-2.5-flash solo tiene 20 req/día en free tier
         self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.timeout = getattr(settings, 'GEMINI_TIMEOUT_SEGUNDOS', 90)
         
         logger.info("✅ GeminiService inicializado correctamente")
     
+    def _generar_contenido(self, contenido):
+        """
+        generate_content con timeout, cuota por minuto y circuit breaker compartido
+        entre workers. Lanza CircuitoAbierto al instante si Gemini está marcado como caído.
+        """
+        if not interruptor_gemini.disponible():
+            raise CircuitoAbierto(interruptor_gemini.servicio)
+        bucket_gemini.adquirir()
+        return interruptor_gemini.llamar(
+            self.model.generate_content, contenido, request_options={'timeout': self.timeout}
+        )
+    
     def generar_analisis_informe(
         self, 
         parcela_data: Dict[str, Any],
@@ -61,6 +86,16 @@ class GeminiService:
         Returns:
             Dict con: resumen_ejecutivo, analisis_tendencias, recomendaciones, alertas
         """
+        if not interruptor_gemini.disponible():
+            logger.warning("⚡ Gemini con circuito abierto - análisis automático omitido")
+            return {
+                'error': str(CircuitoAbierto('gemini')),
+                'resumen_ejecutivo': 'Análisis automático no disponible temporalmente.',
+                'analisis_tendencias': '',
+                'recomendaciones': '',
+                'alertas': ''
+            }
+        
         try:
             logger.info(f"🤖 Generando análisis con Gemini para parcela {parcela_data.get('nombre')}")
             
@@ -74,7 +109,7 @@ class GeminiService:
                 contenido.extend(self._cargar_imagenes(imagenes_paths))
             
             # Generar respuesta
-            response = self.model.generate_content(contenido)
+            response = self._generar_contenido(contenido)
             
             # Procesar respuesta
             texto_completo = response.text
@@ -578,7 +613,7 @@ Estructura tu análisis en 4 secciones:
             logger.info("🧪 Probando conexión con Gemini API...")
             
             # Hacer una consulta simple
-            response = self.model.generate_content("Di 'Conexión exitosa' si puedes leer esto.")
+            response = self._generar_contenido("Di 'Conexión exitosa' si puedes leer esto.")
             
             logger.info(f"✅ Respuesta de Gemini: {response.text}")
             
@@ -601,7 +636,8 @@ Estructura tu análisis en 4 secciones:
         tipo_indice: str,
         valor_promedio: float,
         datos_contexto: Dict[str, Any],
-        mes_anterior_data: Optional[Dict[str, Any]] = None
+        mes_anterior_data: Optional[Dict[str, Any]] = None,
+        con_fallback: bool = True
     ) -> str:
         """
         Genera análisis visual específico de una imagen satelital usando Gemini Vision
@@ -612,10 +648,18 @@ Estructura tu análisis en 4 secciones:
             valor_promedio: Valor promedio del índice
             datos_contexto: Dict con fecha, satélite, coordenadas, etc.
             mes_anterior_data: Datos del mes anterior para comparación temporal
+            con_fallback: Si False, lanza la excepción en vez de devolver el análisis
+                básico (para no cachear un fallback como si fuera de Gemini)
         
         Returns:
             Análisis visual detallado en HTML
         """
+        if not interruptor_gemini.disponible():
+            if not con_fallback:
+                raise CircuitoAbierto(interruptor_gemini.servicio)
+            # Gemini caído: no cargar la imagen ni esperar timeouts
+            return self._generar_analisis_basico_fallback(tipo_indice, valor_promedio)
+        
         try:
             # Cargar imagen
             imagen = self._cargar_imagen_individual(imagen_path)
@@ -682,7 +726,7 @@ Valor de referencia del índice: {valor_promedio:.3f}
 """
             
             # Generar análisis
-            response = self.model.generate_content([prompt, imagen])
+            response = self._generar_contenido([prompt, imagen])
             
             analisis = response.text
             
@@ -695,6 +739,8 @@ Valor de referencia del índice: {valor_promedio:.3f}
             
         except Exception as e:
             logger.error(f"❌ Error analizando imagen {tipo_indice}: {str(e)}")
+            if not con_fallback:
+                raise
             # Retornar análisis básico como fallback
             return self._generar_analisis_basico_fallback(tipo_indice, valor_promedio)
     
@@ -820,6 +866,9 @@ Valor de referencia del índice: {valor_promedio:.3f}
         Returns:
             Análisis global en HTML con recomendaciones por zona
         """
+        if not interruptor_gemini.disponible():
+            return self._generar_analisis_global_fallback()
+        
         try:
             logger.info(f"🤖 Generando análisis global de {len(imagenes_datos)} imágenes")
             
@@ -891,7 +940,7 @@ Máximo 400 palabras.
             contenido = [prompt] + imagenes
             
             # Generar análisis global
-            response = self.model.generate_content(contenido)
+            response = self._generar_contenido(contenido)
             
             analisis = response.text
             
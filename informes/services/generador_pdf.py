@@ -11,12 +11,10 @@ from typing import Dict, List, Optional
 import matplotlib
 matplotlib.use('Agg')  # Usar backend sin interfaz gráfica
 import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 import pandas as pd
 import folium
 from folium import plugins
 import base64
-from io import BytesIO
 
 from django.conf import settings
 from django.core.files.base import ContentFile
@@ -30,10 +28,28 @@ from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
 from reportlab.pdfgen import canvas
 
 from ..models import Parcela, IndiceMensual, Informe
+from .graficos import cache_graficos
+from .pipeline_informes import Etapa, PipelineInforme
+from .salida_pdf import SalidaPDF
 
 logger = logging.getLogger(__name__)
 
 
+# Estilo de matplotlib para gráficos profesionales (se pasa también a los procesos de cache_graficos)
+ESTILO_GRAFICOS = {
+    'font.size': 10,
+    'axes.titlesize': 12,
+    'axes.labelsize': 10,
+    'xtick.labelsize': 9,
+    'ytick.labelsize': 9,
+    'legend.fontsize': 9,
+    'figure.titlesize': 14,
+    'figure.dpi': 300,
+    'savefig.dpi': 300,
+    'savefig.bbox': 'tight'
+}
+
+
 class GeneradorInformePDF:
     """
     Servicio para generar informes PDF con análisis satelital completo
@@ -42,18 +58,7 @@ class GeneradorInformePDF:
     def __init__(self):
         # Configurar estilo de matplotlib para gráficos profesionales
         plt.style.use('default')
-        plt.rcParams.update({
-            'font.size': 10,
-            'axes.titlesize': 12,
-            'axes.labelsize': 10,
-            'xtick.labelsize': 9,
-            'ytick.labelsize': 9,
-            'legend.fontsize': 9,
-            'figure.titlesize': 14,
-            'figure.dpi': 300,
-            'savefig.dpi': 300,
-            'savefig.bbox': 'tight'
-        })
+        plt.rcParams.update(ESTILO_GRAFICOS)
     
     def generar_informe_optimizado(self, parcela: Parcela, usuario,
                                   periodo_meses: int = 12, 
@@ -76,132 +81,231 @@ class GeneradorInformePDF:
         Returns:
             Dict con success, informe_id, archivo_pdf, analisis_ia
         """
-        from .eosda_api import eosda_service
-        from ..models import ConfiguracionReporte
-        
         try:
             logger.info(f"🚀 Generando informe OPTIMIZADO para {parcela.nombre}")
-            
-            # Verificar sincronización
-            if not parcela.puede_obtener_datos_eosda:
-                raise ValueError(f"Parcela no sincronizada con EOSDA. field_id: {parcela.eosda_field_id}")
-            
-            # Obtener configuración si existe
-            if not configuracion:
-                try:
-                    configuracion = ConfiguracionReporte.objects.get(
-                        usuario=usuario,
-                        parcela=parcela
-                    )
-                except ConfiguracionReporte.DoesNotExist:
-                    # Usar configuración por defecto
-                    logger.info("Usando configuración por defecto")
-            
-            # Calcular fechas
-            fecha_fin = date.today()
-            fecha_inicio = fecha_fin - timedelta(days=periodo_meses * 30)
-            
-            # Determinar índices a solicitar
-            indices = ['ndvi']  # NDVI siempre incluido
-            if configuracion:
-                if configuracion.incluir_ndmi:
-                    indices.append('ndmi')
-                if configuracion.incluir_savi:
-                    indices.append('savi')
-            else:
-                # Por defecto, todos los índices
-                indices = ['ndvi', 'ndmi', 'savi']
-            
-            logger.info(f"📊 Solicitando índices: {', '.join(indices)}")
-            
-            # ✨ MÉTODO OPTIMIZADO: 1 sola petición, caché inteligente
-            datos_eosda = eosda_service.obtener_datos_optimizado(
-                field_id=parcela.eosda_field_id,
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin,
-                indices=indices,
-                usuario=usuario,
+            contexto = self._pipeline('optimizado', self._etapa_cargar_eosda).ejecutar(
                 parcela=parcela,
-                max_nubosidad=50
+                usuario=usuario,
+                periodo_meses=periodo_meses,
+                configuracion=configuracion,
+                titulo=f"Análisis Satelital Optimizado - {parcela.nombre}",
             )
             
-            if 'error' in datos_eosda or not datos_eosda.get('resultados'):
-                raise ValueError(f"Error obteniendo datos de EOSDA: {datos_eosda.get('error', 'Sin datos')}")
-            
-            # Procesar resultados
-            resultados = datos_eosda['resultados']
-            logger.info(f"✅ Obtenidos {len(resultados)} escenas satelitales")
-            
-            # Convertir datos de EOSDA a formato para análisis
-            datos_procesados = self._procesar_datos_eosda(resultados, indices)
-            
-            # Crear análisis IA con los datos obtenidos
-            analisis_ia = self._generar_analisis_ia_local(datos_procesados)
+            informe = contexto['informe']
+            total_escenas = contexto['datos_analisis']['estadisticas']['total_escenas']
+            logger.info(f"✅ Informe optimizado generado: ID {informe.id}")
+            logger.info(f"📊 Total escenas procesadas: {total_escenas}")
             
-            # Generar componentes visuales
-            grafico_tendencias = self._generar_grafico_tendencias_eosda(datos_procesados)
-            mapa_ndvi = self._generar_mapa_parcela(parcela, datos_procesados.get('ultimo_dato'))
+            return {
+                'success': True,
+                'informe_id': informe.id,
+                'archivo_pdf': informe.archivo_pdf.url if informe.archivo_pdf else None,
+                'analisis_ia': contexto['analisis_ia'],
+                'num_escenas': total_escenas,
+                'indices_incluidos': contexto['indices_solicitados'],
+                'tiempos': contexto['tiempos'],
+            }
             
-            # Generar PDF
-            archivo_pdf = self._crear_pdf_informe(
+        except Exception as e:
+            logger.error(f"❌ Error generando informe optimizado: {str(e)}", exc_info=True)
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def generar_informe_completo(self, parcela: Parcela, 
+                                periodo_meses: int = 12) -> Dict:
+        """
+        Genera un informe PDF completo para una parcela específica
+        """
+        try:
+            logger.info(f"Iniciando generación de informe para {parcela.nombre}")
+            contexto = self._pipeline('local', self._etapa_cargar_local).ejecutar(
                 parcela=parcela,
                 periodo_meses=periodo_meses,
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin,
-                datos_analisis=datos_procesados,
-                grafico_tendencias=grafico_tendencias,
-                mapa_ndvi=mapa_ndvi,
-                analisis_ia=analisis_ia
-            )
-            
-            # Crear registro de informe
-            informe = Informe.objects.create(
-                parcela=parcela,
-                periodo_analisis_meses=periodo_meses,
-                fecha_inicio_analisis=fecha_inicio,
-                fecha_fin_analisis=fecha_fin,
-                titulo=f"Análisis Satelital Optimizado - {parcela.nombre}",
-                resumen_ejecutivo=analisis_ia['resumen_ejecutivo'],
-                analisis_tendencias=analisis_ia['analisis_tendencias'],
-                conclusiones_ia=analisis_ia['conclusiones'],
-                recomendaciones=analisis_ia['recomendaciones'],
-                archivo_pdf=archivo_pdf,
-                grafico_tendencias=grafico_tendencias,
-                mapa_ndvi_imagen=mapa_ndvi,
-                ndvi_promedio_periodo=datos_procesados['estadisticas'].get('ndvi_promedio'),
-                ndmi_promedio_periodo=datos_procesados['estadisticas'].get('ndmi_promedio'),
-                savi_promedio_periodo=datos_procesados['estadisticas'].get('savi_promedio'),
+                titulo=f"Análisis Satelital - {parcela.nombre} ({periodo_meses} meses)",
             )
             
-            logger.info(f"✅ Informe optimizado generado: ID {informe.id}")
-            logger.info(f"📊 Total escenas procesadas: {datos_procesados['estadisticas']['total_escenas']}")
+            informe = contexto['informe']
+            logger.info(f"Informe generado exitosamente: ID {informe.id}")
             
             return {
                 'success': True,
                 'informe_id': informe.id,
-                'archivo_pdf': archivo_pdf.url if archivo_pdf else None,
-                'analisis_ia': analisis_ia,
-                'num_escenas': datos_procesados['estadisticas']['total_escenas'],
-                'indices_incluidos': indices
+                'archivo_pdf': informe.archivo_pdf.url if informe.archivo_pdf else None,
+                'analisis_ia': contexto['analisis_ia'],
+                'tiempos': contexto['tiempos'],
             }
             
         except Exception as e:
-            logger.error(f"❌ Error generando informe optimizado: {str(e)}", exc_info=True)
+            logger.error(f"Error generando informe: {str(e)}")
             return {
                 'success': False,
                 'error': str(e)
             }
     
+    def _pipeline(self, nombre: str, cargar) -> PipelineInforme:
+        """
+        Etapas comunes a ambos informes; solo cambia de dónde salen los datos.
+        Gráficos/mapa y análisis IA corren en paralelo una vez calculadas las estadísticas.
+        """
+        return PipelineInforme(nombre, [
+            Etapa('cargar', cargar),
+            Etapa('analizar', self._etapa_analizar, depende_de=('cargar',)),
+            Etapa('graficos', self._etapa_graficos, depende_de=('analizar',)),
+            Etapa('ia', self._etapa_ia, depende_de=('analizar',)),
+            Etapa('renderizar', self._etapa_renderizar, depende_de=('graficos', 'ia')),
+        ])
+    
+    def _etapa_cargar_local(self, contexto: Dict) -> Dict:
+        """Datos desde los IndiceMensual ya guardados"""
+        fecha_fin = date.today()
+        fecha_inicio = fecha_fin - timedelta(days=contexto['periodo_meses'] * 30)
+        
+        datos_analisis = self._recopilar_datos_analisis(contexto['parcela'], fecha_inicio, fecha_fin)
+        if not datos_analisis['datos_disponibles']:
+            raise ValueError("No hay datos suficientes para generar el informe")
+        
+        return {'fecha_inicio': fecha_inicio, 'fecha_fin': fecha_fin, 'datos_analisis': datos_analisis}
+    
+    def _etapa_cargar_eosda(self, contexto: Dict) -> Dict:
+        """Datos desde EOSDA (caché de escenas primero, 1 sola petición para todos los índices)"""
+        from .eosda_api import eosda_service
+        from ..models import ConfiguracionReporte
+        
+        parcela = contexto['parcela']
+        usuario = contexto['usuario']
+        
+        # Verificar sincronización
+        if not parcela.puede_obtener_datos_eosda:
+            raise ValueError(f"Parcela no sincronizada con EOSDA. field_id: {parcela.eosda_field_id}")
+        
+        # Obtener configuración si existe (la más reciente del usuario para la parcela)
+        configuracion = contexto.get('configuracion')
+        if not configuracion:
+            configuracion = ConfiguracionReporte.objects.filter(
+                usuario=usuario,
+                parcela=parcela
+            ).order_by('-creado_en').first()
+            if not configuracion:
+                logger.info("Usando configuración por defecto")
+        
+        # Calcular fechas
+        fecha_fin = date.today()
+        fecha_inicio = fecha_fin - timedelta(days=contexto['periodo_meses'] * 30)
+        
+        # Determinar índices a solicitar
+        indices = ['ndvi']  # NDVI siempre incluido
+        if configuracion:
+            if configuracion.incluir_ndmi:
+                indices.append('ndmi')
+            if configuracion.incluir_savi:
+                indices.append('savi')
+        else:
+            # Por defecto, todos los índices
+            indices = ['ndvi', 'ndmi', 'savi']
+        
+        logger.info(f"📊 Solicitando índices: {', '.join(indices)}")
+        
+        # ✨ MÉTODO OPTIMIZADO: 1 sola petición, caché inteligente
+        datos_eosda = eosda_service.obtener_datos_optimizado(
+            parcela=parcela,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            indices=indices,
+            usuario=usuario,
+            max_nubosidad=50
+        )
+        
+        if 'error' in datos_eosda or not datos_eosda.get('resultados'):
+            raise ValueError(f"Error obteniendo datos de EOSDA: {datos_eosda.get('error', 'Sin datos')}")
+        
+        # Procesar resultados
+        resultados = datos_eosda['resultados']
+        logger.info(f"✅ Obtenidos {len(resultados)} escenas satelitales")
+        
+        # Convertir datos de EOSDA a formato para análisis
+        datos_analisis = self._procesar_datos_eosda(resultados, indices)
+        if not datos_analisis['datos_disponibles']:
+            raise ValueError("Las escenas de EOSDA no tienen datos utilizables")
+        
+        return {
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin,
+            'indices_solicitados': indices,
+            'datos_analisis': datos_analisis,
+        }
+    
+    def _etapa_analizar(self, contexto: Dict) -> Dict:
+        datos_analisis = contexto['datos_analisis']
+        return {'datos_analisis': {
+            **datos_analisis,
+            'estadisticas': self._calcular_estadisticas(datos_analisis),
+        }}
+    
+    def _etapa_graficos(self, contexto: Dict) -> Dict:
+        datos_analisis = contexto['datos_analisis']
+        return {
+            'grafico_tendencias': self._generar_grafico_tendencias(datos_analisis),
+            'mapa_ndvi': self._generar_mapa_parcela(
+                contexto['parcela'], datos_analisis['estadisticas'].get('ndvi_actual')
+            ),
+        }
+    
+    def _etapa_ia(self, contexto: Dict) -> Dict:
+        return {'analisis_ia': self._generar_analisis_ia_local(contexto['datos_analisis'])}
+    
+    def _etapa_renderizar(self, contexto: Dict) -> Dict:
+        """PDF, registro del informe y subida al storage"""
+        parcela = contexto['parcela']
+        periodo_meses = contexto['periodo_meses']
+        datos_analisis = contexto['datos_analisis']
+        analisis_ia = contexto['analisis_ia']
+        
+        # Generar PDF
+        archivo_pdf = self._crear_pdf_informe(
+            parcela=parcela,
+            periodo_meses=periodo_meses,
+            fecha_inicio=contexto['fecha_inicio'],
+            fecha_fin=contexto['fecha_fin'],
+            datos_analisis=datos_analisis,
+            grafico_tendencias=contexto['grafico_tendencias'],
+            mapa_ndvi=contexto['mapa_ndvi'],
+            analisis_ia=analisis_ia
+        )
+        
+        # Crear registro en base de datos
+        informe = Informe.objects.create(
+            parcela=parcela,
+            periodo_analisis_meses=periodo_meses,
+            fecha_inicio_analisis=contexto['fecha_inicio'],
+            fecha_fin_analisis=contexto['fecha_fin'],
+            titulo=contexto['titulo'],
+            resumen_ejecutivo=analisis_ia['resumen_ejecutivo'],
+            analisis_tendencias=analisis_ia['analisis_tendencias'],
+            conclusiones_ia=analisis_ia['conclusiones'],
+            recomendaciones=analisis_ia['recomendaciones'],
+            grafico_tendencias=contexto['grafico_tendencias'],
+            mapa_ndvi_imagen=contexto['mapa_ndvi'],
+            ndvi_promedio_periodo=datos_analisis['estadisticas'].get('ndvi_promedio'),
+            ndmi_promedio_periodo=datos_analisis['estadisticas'].get('ndmi_promedio'),
+            savi_promedio_periodo=datos_analisis['estadisticas'].get('savi_promedio'),
+        )
+        
+        self._guardar_pdf(informe, archivo_pdf)
+        return {'informe': informe}
+    
     def _procesar_datos_eosda(self, resultados: List[Dict], indices: List[str]) -> Dict:
         """
         Procesa los datos crudos de EOSDA en formato para análisis
         
         Args:
-            resultados: Lista de escenas con statistics
+            resultados: Lista de escenas de la Statistics API ('date', 'cloud',
+                'indexes': {'NDVI': {'average', 'min', 'max', 'std'}, ...})
             indices: Índices solicitados
             
         Returns:
-            Dict con datos_disponibles, series temporales, estadísticas
+            Dict con datos_disponibles, puntos por escena, series por índice y período
         """
         try:
             if not resultados:
@@ -209,7 +313,7 @@ class GeneradorInformePDF:
             
             # Inicializar series temporales
             series = {indice: [] for indice in indices}
-            fechas = []
+            puntos = []
             
             # Procesar cada escena
             for escena in resultados:
@@ -219,49 +323,42 @@ class GeneradorInformePDF:
                 
                 # Parsear fecha
                 fecha = datetime.fromisoformat(fecha_str.replace('Z', '+00:00')).date()
-                fechas.append(fecha)
+                punto = {'fecha': fecha, 'nubosidad': escena.get('cloud')}
                 
-                # Extraer estadísticas de cada índice
-                stats = escena.get('statistics', {})
+                # Extraer estadísticas de cada índice (claves en mayúsculas en la API)
+                stats = escena.get('indexes') or {}
                 for indice in indices:
-                    indice_data = stats.get(indice, {})
-                    mean_value = indice_data.get('mean')
+                    indice_data = stats.get(indice.upper()) or {}
+                    punto[indice] = indice_data.get('average')
                     
                     series[indice].append({
                         'fecha': fecha,
-                        'valor': mean_value,
+                        'valor': indice_data.get('average'),
                         'std': indice_data.get('std'),
                         'min': indice_data.get('min'),
                         'max': indice_data.get('max'),
-                        'pixels_analizados': indice_data.get('pixels_analyzed', 0)
                     })
+                puntos.append(punto)
             
-            # Calcular estadísticas globales
-            estadisticas = {}
-            for indice in indices:
-                valores = [d['valor'] for d in series[indice] if d['valor'] is not None]
-                if valores:
-                    estadisticas[f'{indice}_promedio'] = sum(valores) / len(valores)
-                    estadisticas[f'{indice}_maximo'] = max(valores)
-                    estadisticas[f'{indice}_minimo'] = min(valores)
-                else:
-                    estadisticas[f'{indice}_promedio'] = None
-                    estadisticas[f'{indice}_maximo'] = None
-                    estadisticas[f'{indice}_minimo'] = None
+            if not puntos:
+                return {'datos_disponibles': False}
             
-            estadisticas['total_escenas'] = len(resultados)
-            estadisticas['total_registros'] = len(fechas)
+            puntos.sort(key=lambda p: p['fecha'])
+            for serie in series.values():
+                serie.sort(key=lambda d: d['fecha'])
+            fechas = [p['fecha'] for p in puntos]
             
             return {
                 'datos_disponibles': True,
+                'fuente': 'eosda',
+                'puntos': puntos,
                 'series': series,
-                'fechas': fechas,
-                'ultimo_dato': series.get('ndvi', [{}])[-1] if series.get('ndvi') else None,
-                'estadisticas': estadisticas,
+                'total_escenas': len(resultados),
                 'periodo': {
-                    'inicio': min(fechas) if fechas else None,
-                    'fin': max(fechas) if fechas else None,
-                    'total_dias': (max(fechas) - min(fechas)).days if fechas else 0
+                    'inicio': fechas[0],
+                    'fin': fechas[-1],
+                    'total_dias': (fechas[-1] - fechas[0]).days,
+                    'meses': len({(f.year, f.month) for f in fechas}),
                 }
             }
             
@@ -269,187 +366,38 @@ class GeneradorInformePDF:
             logger.error(f"Error procesando datos EOSDA: {str(e)}")
             return {'datos_disponibles': False}
     
-    def _generar_grafico_tendencias_eosda(self, datos: Dict) -> Optional[ContentFile]:
-        """
-        Genera gráfico de tendencias a partir de datos procesados de EOSDA
-        """
-        try:
-            if not datos.get('datos_disponibles'):
-                return None
-            
-            series = datos['series']
-            
-            # Crear figura
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-            # Colores para cada índice
-            colores = {
-                'ndvi': '#4CAF50',
-                'ndmi': '#2196F3',
-                'savi': '#FF9800'
-            }
-            
-            # Graficar cada índice
-            for indice, datos_serie in series.items():
-                if not datos_serie:
-                    continue
-                
-                fechas = [d['fecha'] for d in datos_serie if d['valor'] is not None]
-                valores = [d['valor'] for d in datos_serie if d['valor'] is not None]
-                
-                if fechas and valores:
-                    ax.plot(fechas, valores, 
-                           marker='o', 
-                           markersize=4,
-                           linewidth=2,
-                           label=indice.upper(),
-                           color=colores.get(indice, '#333'))
-            
-            # Configurar ejes
-            ax.set_xlabel('Fecha', fontsize=12, fontweight='bold')
-            ax.set_ylabel('Valor del Índice', fontsize=12, fontweight='bold')
-            ax.set_title('Evolución de Índices Vegetativos', fontsize=14, fontweight='bold')
-            ax.legend(loc='best')
-            ax.grid(True, alpha=0.3)
-            
-            # Formato de fechas
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %Y'))
-            ax.xaxis.set_major_locator(mdates.MonthLocator(interval=2))
-            plt.xticks(rotation=45)
-            
-            # Ajustar layout
-            plt.tight_layout()
-            
-            # Guardar en memoria
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-            buffer.seek(0)
-            plt.close()
-            
-            # Guardar como ContentFile
-            filename = f"grafico_tendencias_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            return ContentFile(buffer.read(), name=filename)
-            
-        except Exception as e:
-            logger.error(f"Error generando gráfico: {str(e)}")
-            return None
-    
-    def generar_informe_completo(self, parcela: Parcela, 
-                                periodo_meses: int = 12) -> Dict:
-        """
-        Genera un informe PDF completo para una parcela específica
-        """
-        try:
-            logger.info(f"Iniciando generación de informe para {parcela.nombre}")
-            
-            # Calcular fechas del período
-            fecha_fin = date.today()
-            fecha_inicio = fecha_fin - timedelta(days=periodo_meses * 30)
-            
-            # Obtener datos para el informe
-            datos_analisis = self._recopilar_datos_analisis(
-                parcela, fecha_inicio, fecha_fin
-            )
-            
-            if not datos_analisis['datos_disponibles']:
-                raise ValueError("No hay datos suficientes para generar el informe")
-            
-            # Generar componentes del informe
-            grafico_tendencias = self._generar_grafico_tendencias(datos_analisis['indices'])
-            mapa_ndvi = self._generar_mapa_parcela(parcela, datos_analisis['ultimo_indice'])
-            
-            # Crear análisis IA
-            analisis_ia = self._generar_analisis_ia_local(datos_analisis)
-            
-            # Generar PDF
-            archivo_pdf = self._crear_pdf_informe(
-                parcela=parcela,
-                periodo_meses=periodo_meses,
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin,
-                datos_analisis=datos_analisis,
-                grafico_tendencias=grafico_tendencias,
-                mapa_ndvi=mapa_ndvi,
-                analisis_ia=analisis_ia
-            )
-            
-            # Crear registro en base de datos
-            informe = Informe.objects.create(
-                parcela=parcela,
-                periodo_analisis_meses=periodo_meses,
-                fecha_inicio_analisis=fecha_inicio,
-                fecha_fin_analisis=fecha_fin,
-                titulo=f"Análisis Satelital - {parcela.nombre} ({periodo_meses} meses)",
-                resumen_ejecutivo=analisis_ia['resumen_ejecutivo'],
-                analisis_tendencias=analisis_ia['analisis_tendencias'],
-                conclusiones_ia=analisis_ia['conclusiones'],
-                recomendaciones=analisis_ia['recomendaciones'],
-                archivo_pdf=archivo_pdf,
-                grafico_tendencias=grafico_tendencias,
-                mapa_ndvi_imagen=mapa_ndvi,
-                ndvi_promedio_periodo=datos_analisis['estadisticas']['ndvi_promedio'],
-                ndmi_promedio_periodo=datos_analisis['estadisticas']['ndmi_promedio'],
-                savi_promedio_periodo=datos_analisis['estadisticas']['savi_promedio'],
-            )
-            
-            logger.info(f"Informe generado exitosamente: ID {informe.id}")
-            
-            return {
-                'success': True,
-                'informe_id': informe.id,
-                'archivo_pdf': archivo_pdf.url if archivo_pdf else None,
-                'analisis_ia': analisis_ia
-            }
-            
-        except Exception as e:
-            logger.error(f"Error generando informe: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
-    
     def _recopilar_datos_analisis(self, parcela: Parcela, 
                                  fecha_inicio: date, fecha_fin: date) -> Dict:
         """
-        Recopila todos los datos necesarios para el análisis
+        Recopila los índices mensuales del período en el mismo formato que
+        _procesar_datos_eosda (un punto por mes)
         """
         try:
             # Obtener índices mensuales del período
-            indices = IndiceMensual.objects.filter(
+            indices_list = list(IndiceMensual.objects.filter(
                 parcela=parcela,
                 año__gte=fecha_inicio.year,
                 año__lte=fecha_fin.year
-            ).order_by('año', 'mes')
+            ).order_by('año', 'mes'))
             
-            if not indices.exists():
+            if not indices_list:
                 return {'datos_disponibles': False}
             
-            # Convertir a lista para facilitar el procesamiento
-            indices_list = list(indices)
-            
-            # Calcular estadísticas generales
-            ndvi_valores = [i.ndvi_promedio for i in indices_list if i.ndvi_promedio is not None]
-            ndmi_valores = [i.ndmi_promedio for i in indices_list if i.ndmi_promedio is not None]
-            savi_valores = [i.savi_promedio for i in indices_list if i.savi_promedio is not None]
-            temp_valores = [i.temperatura_promedio for i in indices_list if i.temperatura_promedio is not None]
-            
-            estadisticas = {
-                'ndvi_promedio': sum(ndvi_valores) / len(ndvi_valores) if ndvi_valores else None,
-                'ndvi_maximo': max(ndvi_valores) if ndvi_valores else None,
-                'ndvi_minimo': min(ndvi_valores) if ndvi_valores else None,
-                'ndmi_promedio': sum(ndmi_valores) / len(ndmi_valores) if ndmi_valores else None,
-                'ndmi_maximo': max(ndmi_valores) if ndmi_valores else None,
-                'ndmi_minimo': min(ndmi_valores) if ndmi_valores else None,
-                'savi_promedio': sum(savi_valores) / len(savi_valores) if savi_valores else None,
-                'temperatura_promedio': sum(temp_valores) / len(temp_valores) if temp_valores else None,
-                'total_registros': len(indices_list)
-            }
+            puntos = [
+                {
+                    'fecha': date(indice.año, indice.mes, 1),
+                    'ndvi': indice.ndvi_promedio,
+                    'ndmi': indice.ndmi_promedio,
+                    'savi': indice.savi_promedio,
+                    'temperatura': indice.temperatura_promedio,
+                }
+                for indice in indices_list
+            ]
             
             return {
                 'datos_disponibles': True,
-                'indices': indices_list,
-                'ultimo_indice': indices_list[-1] if indices_list else None,
-                'estadisticas': estadisticas,
+                'fuente': 'indices_mensuales',
+                'puntos': puntos,
                 'periodo': {
                     'inicio': fecha_inicio,
                     'fin': fecha_fin,
@@ -461,88 +409,64 @@ class GeneradorInformePDF:
             logger.error(f"Error recopilando datos: {str(e)}")
             return {'datos_disponibles': False, 'error': str(e)}
     
-    def _generar_grafico_tendencias(self, indices: List[IndiceMensual]) -> Optional[ContentFile]:
+    def _calcular_estadisticas(self, datos_analisis: Dict) -> Dict:
         """
-        Genera gráfico de tendencias NDVI, NDMI, SAVI
+        Estadísticas generales del período a partir de los puntos (mensuales o por escena)
+        """
+        puntos = datos_analisis['puntos']
+        estadisticas = {}
+        for campo in ('ndvi', 'ndmi', 'savi'):
+            valores = [p[campo] for p in puntos if p.get(campo) is not None]
+            estadisticas[f'{campo}_promedio'] = sum(valores) / len(valores) if valores else None
+            estadisticas[f'{campo}_maximo'] = max(valores) if valores else None
+            estadisticas[f'{campo}_minimo'] = min(valores) if valores else None
+        
+        temp_valores = [p['temperatura'] for p in puntos if p.get('temperatura') is not None]
+        ndvi_valores = [p['ndvi'] for p in puntos if p.get('ndvi') is not None]
+        estadisticas.update({
+            'temperatura_promedio': sum(temp_valores) / len(temp_valores) if temp_valores else None,
+            'ndvi_actual': ndvi_valores[-1] if ndvi_valores else None,
+            'total_registros': len(puntos),
+            'total_escenas': datos_analisis.get('total_escenas', len(puntos)),
+        })
+        return estadisticas
+    
+    def _generar_grafico_tendencias(self, datos_analisis: Dict) -> Optional[ContentFile]:
+        """
+        Genera gráfico de tendencias NDVI, NDMI, SAVI (cuadrícula mensual o serie por escena)
         """
         try:
-            # Preparar datos
-            fechas = []
-            ndvi_vals = []
-            ndmi_vals = []
-            savi_vals = []
-            
-            for indice in indices:
-                fecha = datetime(indice.año, indice.mes, 1)
-                fechas.append(fecha)
-                ndvi_vals.append(indice.ndvi_promedio)
-                ndmi_vals.append(indice.ndmi_promedio)
-                savi_vals.append(indice.savi_promedio)
-            
-            # Crear figura
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
-            fig.suptitle('Análisis de Tendencias Satelitales - AgroTech Histórico', 
-                        fontsize=16, fontweight='bold', color='#2d5a27')
-            
-            # Gráfico NDVI
-            ax1.plot(fechas, ndvi_vals, 'o-', color='#4a7c59', linewidth=2, markersize=4)
-            ax1.set_title('NDVI - Índice de Vegetación', fontweight='bold')
-            ax1.set_ylabel('NDVI')
-            ax1.grid(True, alpha=0.3)
-            ax1.xaxis.set_major_formatter(mdates.DateFormatter('%m/%Y'))
-            ax1.xaxis.set_major_locator(mdates.MonthLocator(interval=2))
-            
-            # Gráfico NDMI
-            ax2.plot(fechas, ndmi_vals, 'o-', color='#2c3e50', linewidth=2, markersize=4)
-            ax2.set_title('NDMI - Índice de Humedad', fontweight='bold')
-            ax2.set_ylabel('NDMI')
-            ax2.grid(True, alpha=0.3)
-            ax2.xaxis.set_major_formatter(mdates.DateFormatter('%m/%Y'))
-            ax2.xaxis.set_major_locator(mdates.MonthLocator(interval=2))
-            
-            # Gráfico SAVI
-            ax3.plot(fechas, savi_vals, 'o-', color='#f39c12', linewidth=2, markersize=4)
-            ax3.set_title('SAVI - Vegetación Ajustada al Suelo', fontweight='bold')
-            ax3.set_ylabel('SAVI')
-            ax3.grid(True, alpha=0.3)
-            ax3.xaxis.set_major_formatter(mdates.DateFormatter('%m/%Y'))
-            ax3.xaxis.set_major_locator(mdates.MonthLocator(interval=2))
-            
-            # Gráfico combinado
-            ax4.plot(fechas, ndvi_vals, 'o-', label='NDVI', color='#4a7c59', linewidth=2)
-            ax4.plot(fechas, ndmi_vals, 's-', label='NDMI', color='#2c3e50', linewidth=2)
-            ax4.plot(fechas, savi_vals, '^-', label='SAVI', color='#f39c12', linewidth=2)
-            ax4.set_title('Comparación de Índices', fontweight='bold')
-            ax4.set_ylabel('Valor del Índice')
-            ax4.legend()
-            ax4.grid(True, alpha=0.3)
-            ax4.xaxis.set_major_formatter(mdates.DateFormatter('%m/%Y'))
-            ax4.xaxis.set_major_locator(mdates.MonthLocator(interval=2))
-            
-            # Rotar etiquetas de fecha
-            for ax in [ax1, ax2, ax3, ax4]:
-                plt.setp(ax.xaxis.get_majorticklabels(), rotation=45)
-            
-            plt.tight_layout()
-            
-            # Guardar como archivo
-            buffer = BytesIO()
-            plt.savefig(buffer, format='PNG', bbox_inches='tight', facecolor='white')
-            buffer.seek(0)
+            puntos = datos_analisis['puntos']
+            if datos_analisis.get('fuente') == 'eosda':
+                # Puntos (fecha ISO, valor) por índice, sin valores vacíos
+                series = {
+                    indice: [(str(p['fecha']), p[indice]) for p in puntos if p.get(indice) is not None]
+                    for indice in datos_analisis['series']
+                }
+                tipo, datos = 'tendencias_eosda', {'series': series, 'estilo': ESTILO_GRAFICOS}
+            else:
+                serie = [
+                    {
+                        'fecha': datetime(p['fecha'].year, p['fecha'].month, 1).isoformat(),
+                        'ndvi': p['ndvi'],
+                        'ndmi': p['ndmi'],
+                        'savi': p['savi'],
+                    }
+                    for p in puntos
+                ]
+                tipo, datos = 'tendencias_mensuales', {'serie': serie, 'estilo': ESTILO_GRAFICOS}
+            png = cache_graficos.renderizar_uno(tipo, datos)
             
             # Crear ContentFile
             nombre_archivo = f'grafico_tendencias_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png'
-            archivo = ContentFile(buffer.getvalue(), name=nombre_archivo)
-            
-            plt.close(fig)
-            return archivo
+            return ContentFile(png, name=nombre_archivo)
             
         except Exception as e:
             logger.error(f"Error generando gráfico: {str(e)}")
             return None
     
     def _generar_mapa_parcela(self, parcela: Parcela, 
-                             ultimo_indice: IndiceMensual = None) -> Optional[ContentFile]:
+                             ndvi_actual: Optional[float] = None) -> Optional[ContentFile]:
         """
         Genera mapa de la parcela con visualización NDVI
         """
@@ -566,8 +490,8 @@ class GeneradorInformePDF:
                     coords_folium.append([coord[1], coord[0]])  # lat, lng para folium
                 
                 # Color basado en NDVI si está disponible
-                if ultimo_indice and ultimo_indice.ndvi_promedio:
-                    ndvi = ultimo_indice.ndvi_promedio
+                if ndvi_actual:
+                    ndvi = ndvi_actual
                     if ndvi >= 0.7:
                         color = '#2d5a27'  # Verde oscuro - excelente
                     elif ndvi >= 0.5:
@@ -583,7 +507,7 @@ class GeneradorInformePDF:
                     coords_folium,
                     popup=f"<b>{parcela.nombre}</b><br>"
                           f"Propietario: {parcela.propietario}<br>"
-                          f"NDVI: {ultimo_indice.ndvi_promedio if ultimo_indice else 'N/A'}",
+                          f"NDVI: {ndvi_actual if ndvi_actual is not None else 'N/A'}",
                     color=color,
                     fillColor=color,
                     fillOpacity=0.4,
@@ -623,14 +547,13 @@ class GeneradorInformePDF:
         """
         try:
             estadisticas = datos_analisis['estadisticas']
-            indices = datos_analisis['indices']
             
             # Análisis de tendencias NDVI
-            ndvi_valores = [i.ndvi_promedio for i in indices if i.ndvi_promedio]
+            ndvi_valores = [p['ndvi'] for p in datos_analisis['puntos'] if p.get('ndvi')]
             tendencia_ndvi = self._analizar_tendencia(ndvi_valores)
             
             # Análisis de salud general
-            ndvi_promedio = estadisticas.get('ndvi_promedio', 0)
+            ndvi_promedio = estadisticas.get('ndvi_promedio') or 0
             if ndvi_promedio >= 0.7:
                 salud_general = "excelente"
                 interpretacion = "La parcela muestra un estado de salud vegetal excelente con alta densidad de biomasa."
@@ -659,15 +582,15 @@ class GeneradorInformePDF:
             
             NDVI (Índice de Vegetación):
             - Promedio del período: {ndvi_promedio:.3f}
-            - Rango: {estadisticas.get('ndvi_minimo', 0):.3f} - {estadisticas.get('ndvi_maximo', 0):.3f}
+            - Rango: {(estadisticas.get('ndvi_minimo') or 0):.3f} - {(estadisticas.get('ndvi_maximo') or 0):.3f}
             - Tendencia: {tendencia_ndvi}
             
             NDMI (Índice de Humedad):
-            - Promedio: {estadisticas.get('ndmi_promedio', 0):.3f}
+            - Promedio: {(estadisticas.get('ndmi_promedio') or 0):.3f}
             - Indicador de estrés hídrico y contenido de humedad en la vegetación
             
             SAVI (Vegetación Ajustada al Suelo):
-            - Promedio: {estadisticas.get('savi_promedio', 0):.3f}
+            - Promedio: {(estadisticas.get('savi_promedio') or 0):.3f}
             - Medida corregida de densidad vegetal considerando la influencia del suelo
             """
             
@@ -728,7 +651,7 @@ class GeneradorInformePDF:
         conclusiones = []
         
         # Análisis NDVI
-        ndvi = estadisticas.get('ndvi_promedio', 0)
+        ndvi = estadisticas.get('ndvi_promedio') or 0
         if ndvi > 0.7:
             conclusiones.append("- El cultivo presenta una excelente densidad de biomasa vegetal.")
         elif ndvi > 0.5:
@@ -745,7 +668,7 @@ class GeneradorInformePDF:
             conclusiones.append("- Los índices muestran estabilidad en el período analizado.")
         
         # Análisis NDMI
-        ndmi = estadisticas.get('ndmi_promedio', 0)
+        ndmi = estadisticas.get('ndmi_promedio') or 0
         if ndmi > 0.3:
             conclusiones.append("- Los niveles de humedad en la vegetación son adecuados.")
         elif ndmi > 0:
@@ -792,17 +715,16 @@ class GeneradorInformePDF:
         
         return '\n'.join(recomendaciones)
     
-    def _crear_pdf_informe(self, **kwargs) -> ContentFile:
+    def _crear_pdf_informe(self, **kwargs) -> Optional[SalidaPDF]:
         """
-        Crea el archivo PDF final del informe
+        Crea el archivo PDF final del informe en un temporal en disco
+        (ver _guardar_pdf para subirlo al storage del informe)
         """
+        salida = SalidaPDF()
         try:
-            # Crear buffer para el PDF
-            buffer = BytesIO()
-            
             # Crear documento PDF
             doc = SimpleDocTemplate(
-                buffer,
+                salida,
                 pagesize=A4,
                 rightMargin=72,
                 leftMargin=72,
@@ -857,16 +779,25 @@ class GeneradorInformePDF:
             
             # Construir PDF
             doc.build(story)
-            
-            # Crear archivo
-            buffer.seek(0)
-            nombre_archivo = f'informe_{kwargs["parcela"].nombre.replace(" ", "_")}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-            
-            return ContentFile(buffer.getvalue(), name=nombre_archivo)
+            salida.cerrar()
+            return salida
             
         except Exception as e:
+            salida.descartar()
             logger.error(f"Error creando PDF: {str(e)}")
             return None
+    
+    def _guardar_pdf(self, informe: Informe, salida: Optional[SalidaPDF]):
+        """
+        Sube el PDF temporal al storage del informe junto con su hash y tamaño
+        """
+        if salida is None:
+            return
+        nombre_archivo = f'informe_{informe.parcela.nombre.replace(" ", "_")}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+        salida.guardar_en(informe.archivo_pdf, nombre_archivo)
+        informe.sha256_pdf = salida.sha256
+        informe.tamaño_pdf_bytes = salida.tamaño
+        informe.save(update_fields=['archivo_pdf', 'sha256_pdf', 'tamaño_pdf_bytes'])
 
 
 # Instancia global del servicio
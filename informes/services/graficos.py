@@ -0,0 +1,295 @@
+"""
+Gráficos matplotlib de los informes, renderizados una sola vez
+- Caché en disco de PNGs: clave = hash(tipo de gráfico, versión de estilo, serie de entrada)
+- Los gráficos que faltan se renderizan en paralelo en un pool de procesos (backend Agg),
+  fuera del GIL del worker que arma el PDF
+- Con GRAFICOS_PROCESOS = 0 (o si el pool falla) se renderiza en el propio proceso
+
+Las funciones _grafico_* reciben solo datos serializables (listas, dicts, fechas ISO)
+para poder ejecutarse en otro proceso; no deben tocar Django ni la base de datos.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from io import BytesIO
+from multiprocessing import get_context
+from typing import Dict, Optional, Tuple
+
+import matplotlib
+matplotlib.use('Agg')  # Backend no-GUI, también en los procesos del pool
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+import seaborn as sns
+
+from .cache_disco import CacheDisco, calcular_clave, configuracion
+
+logger = logging.getLogger(__name__)
+
+# Subir al cambiar el aspecto de cualquier gráfico: invalida los PNG cacheados
+VERSION_ESTILO_GRAFICOS = 1
+
+
+# ---------------------------------------------------------------------------
+# Renderizadores (se ejecutan en el pool de procesos)
+# ---------------------------------------------------------------------------
+
+def _png(fig, **kwargs) -> bytes:
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', **kwargs)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def _grafico_evolucion_temporal(datos: Dict) -> bytes:
+    """Evolución temporal NDVI/NDMI/SAVI (GeneradorPDFProfesional)"""
+    serie = datos['serie']
+    with sns.axes_style('whitegrid'):
+        fig, ax = plt.subplots(figsize=(12, 6))
+
+        meses = [d['periodo'] for d in serie]
+        ndvi = [d.get('ndvi', 0) for d in serie]
+        ndmi = [d.get('ndmi', 0) for d in serie]
+        savi = [d.get('savi', 0) for d in serie]
+
+        ax.plot(meses, ndvi, marker='o', linewidth=2.5, color='#2E8B57', label='NDVI (Salud)', markersize=6)
+        ax.plot(meses, ndmi, marker='s', linewidth=2.5, color='#17a2b8', label='NDMI (Humedad)', markersize=6)
+        if any(savi):
+            ax.plot(meses, savi, marker='^', linewidth=2.5, color='#FF7A00', label='SAVI (Cobertura)', markersize=6)
+
+        ax.set_xlabel('Período', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Valor del Índice', fontsize=12, fontweight='bold')
+        ax.set_title('Evolución Temporal de Índices de Vegetación',
+                     fontsize=14, fontweight='bold', color='#2c3e50')
+        ax.legend(loc='best', fontsize=10, framealpha=0.9)
+        ax.grid(True, alpha=0.3, linestyle='--')
+
+        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+        fig.tight_layout()
+        return _png(fig, dpi=150, bbox_inches='tight')
+
+
+def _grafico_comparativo(datos: Dict) -> bytes:
+    """Barras con el promedio del período por índice (GeneradorPDFProfesional)"""
+    serie = datos['serie']
+    with sns.axes_style('whitegrid'):
+        fig, ax = plt.subplots(figsize=(10, 6))
+
+        promedios = []
+        for clave in ('ndvi', 'ndmi', 'savi'):
+            valores = [d.get(clave) for d in serie if d.get(clave) is not None]
+            promedios.append(sum(valores) / len(valores) if valores else 0)
+
+        indices = ['NDVI\n(Salud)', 'NDMI\n(Humedad)', 'SAVI\n(Cobertura)']
+        colores_barra = ['#2E8B57', '#17a2b8', '#FF7A00']
+
+        bars = ax.bar(indices, promedios, color=colores_barra, alpha=0.8, edgecolor='black', linewidth=1.5)
+        for bar, valor in zip(bars, promedios):
+            ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height(),
+                    f'{valor:.3f}',
+                    ha='center', va='bottom', fontsize=12, fontweight='bold')
+
+        ax.set_ylabel('Valor Promedio', fontsize=12, fontweight='bold')
+        ax.set_title('Comparación de Índices - Promedio del Período',
+                     fontsize=14, fontweight='bold', color='#2c3e50')
+        ax.set_ylim(0, max(promedios) * 1.2)
+        ax.grid(axis='y', alpha=0.3)
+
+        fig.tight_layout()
+        return _png(fig, dpi=150, bbox_inches='tight')
+
+
+def _grafico_tendencias_eosda(datos: Dict) -> bytes:
+    """Series EOSDA por fecha de escena (GeneradorInformePDF)"""
+    colores = {'ndvi': '#4CAF50', 'ndmi': '#2196F3', 'savi': '#FF9800'}
+
+    with plt.rc_context(datos.get('estilo', {})):
+        fig, ax = plt.subplots(figsize=(12, 6))
+
+        for indice, puntos in datos['series'].items():
+            fechas = [datetime.fromisoformat(fecha) for fecha, _ in puntos]
+            valores = [valor for _, valor in puntos]
+            if fechas:
+                ax.plot(fechas, valores, marker='o', markersize=4, linewidth=2,
+                        label=indice.upper(), color=colores.get(indice, '#333'))
+
+        ax.set_xlabel('Fecha', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Valor del Índice', fontsize=12, fontweight='bold')
+        ax.set_title('Evolución de Índices Vegetativos', fontsize=14, fontweight='bold')
+        ax.legend(loc='best')
+        ax.grid(True, alpha=0.3)
+
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %Y'))
+        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=2))
+        plt.setp(ax.get_xticklabels(), rotation=45)
+
+        fig.tight_layout()
+        return _png(fig, dpi=300, bbox_inches='tight')
+
+
+def _grafico_tendencias_mensuales(datos: Dict) -> bytes:
+    """Cuadrícula 2x2 NDVI / NDMI / SAVI / combinado por mes (GeneradorInformePDF)"""
+    serie = datos['serie']
+    fechas = [datetime.fromisoformat(d['fecha']) for d in serie]
+    ndvi_vals = [d['ndvi'] for d in serie]
+    ndmi_vals = [d['ndmi'] for d in serie]
+    savi_vals = [d['savi'] for d in serie]
+
+    with plt.rc_context(datos.get('estilo', {})):
+        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
+        fig.suptitle('Análisis de Tendencias Satelitales - AgroTech Histórico',
+                     fontsize=16, fontweight='bold', color='#2d5a27')
+
+        paneles = (
+            (ax1, ndvi_vals, '#4a7c59', 'NDVI - Índice de Vegetación', 'NDVI'),
+            (ax2, ndmi_vals, '#2c3e50', 'NDMI - Índice de Humedad', 'NDMI'),
+            (ax3, savi_vals, '#f39c12', 'SAVI - Vegetación Ajustada al Suelo', 'SAVI'),
+        )
+        for ax, valores, color, titulo, etiqueta in paneles:
+            ax.plot(fechas, valores, 'o-', color=color, linewidth=2, markersize=4)
+            ax.set_title(titulo, fontweight='bold')
+            ax.set_ylabel(etiqueta)
+
+        ax4.plot(fechas, ndvi_vals, 'o-', label='NDVI', color='#4a7c59', linewidth=2)
+        ax4.plot(fechas, ndmi_vals, 's-', label='NDMI', color='#2c3e50', linewidth=2)
+        ax4.plot(fechas, savi_vals, '^-', label='SAVI', color='#f39c12', linewidth=2)
+        ax4.set_title('Comparación de Índices', fontweight='bold')
+        ax4.set_ylabel('Valor del Índice')
+        ax4.legend()
+
+        for ax in (ax1, ax2, ax3, ax4):
+            ax.grid(True, alpha=0.3)
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%m/%Y'))
+            ax.xaxis.set_major_locator(mdates.MonthLocator(interval=2))
+            plt.setp(ax.xaxis.get_majorticklabels(), rotation=45)
+
+        fig.tight_layout()
+        return _png(fig, bbox_inches='tight', facecolor='white')
+
+
+RENDERIZADORES = {
+    'evolucion_temporal': _grafico_evolucion_temporal,
+    'comparativo': _grafico_comparativo,
+    'tendencias_eosda': _grafico_tendencias_eosda,
+    'tendencias_mensuales': _grafico_tendencias_mensuales,
+}
+
+
+def _renderizar(tipo: str, datos: Dict) -> bytes:
+    return RENDERIZADORES[tipo](datos)
+
+
+# ---------------------------------------------------------------------------
+# Caché en disco y pool de procesos
+# ---------------------------------------------------------------------------
+
+class CacheGraficos:
+    """
+    PNGs de gráficos en disco direccionados por el hash de su entrada
+    """
+
+    def __init__(self, directorio: str = None, procesos: int = None):
+        self.disco = CacheDisco('INFORMES_GRAFICOS_CACHE', 'graficos_cache', directorio)
+        self._procesos = procesos
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self.aciertos = 0
+        self.renderizados = 0
+
+    @property
+    def procesos(self) -> int:
+        return configuracion('GRAFICOS_PROCESOS', 2) if self._procesos is None else self._procesos
+
+    @staticmethod
+    def calcular_clave(tipo: str, datos: Dict) -> str:
+        return calcular_clave({'tipo': tipo, 'version_estilo': VERSION_ESTILO_GRAFICOS, 'datos': datos})
+
+    def leer(self, clave: str) -> Optional[bytes]:
+        return self.disco.leer(clave, 'png')
+
+    def escribir(self, clave: str, contenido: bytes):
+        try:
+            self.disco.escribir(clave, contenido, 'png')
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo cachear el gráfico {clave[:12]}: {str(e)}")
+
+    def _obtener_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.procesos <= 0:
+            return None
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: los procesos no heredan conexiones a BD ni locks de otros hilos
+                self._pool = ProcessPoolExecutor(max_workers=self.procesos, mp_context=get_context('spawn'))
+            return self._pool
+
+    def _descartar_pool(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def renderizar(self, solicitudes: Dict[str, Tuple[str, Dict]]) -> Dict[str, bytes]:
+        """
+        Devuelve el PNG de cada gráfico, desde caché o renderizándolo.
+
+        Args:
+            solicitudes: nombre -> (tipo de gráfico, datos de entrada)
+
+        Returns:
+            Dict nombre -> bytes PNG
+        """
+        inicio = time.time()
+        resultados = {}
+        pendientes = {}
+        for nombre, (tipo, datos) in solicitudes.items():
+            clave = self.calcular_clave(tipo, datos)
+            contenido = self.leer(clave)
+            if contenido is not None:
+                resultados[nombre] = contenido
+                self.aciertos += 1
+            else:
+                pendientes[nombre] = (clave, tipo, datos)
+
+        if pendientes:
+            pool = self._obtener_pool() if len(pendientes) > 1 or self._pool else None
+            futuros = {}
+            if pool:
+                try:
+                    futuros = {nombre: pool.submit(_renderizar, tipo, datos)
+                               for nombre, (_, tipo, datos) in pendientes.items()}
+                except (BrokenProcessPool, RuntimeError, OSError) as e:
+                    logger.warning(f"⚠️ Pool de gráficos no disponible, se renderiza en el proceso: {str(e)}")
+                    self._descartar_pool()
+                    futuros = {}
+
+            for nombre, (clave, tipo, datos) in pendientes.items():
+                contenido = None
+                if nombre in futuros:
+                    try:
+                        contenido = futuros[nombre].result()
+                    except BrokenProcessPool as e:
+                        logger.warning(f"⚠️ Pool de gráficos caído, se renderiza en el proceso: {str(e)}")
+                        self._descartar_pool()
+                if contenido is None:
+                    contenido = _renderizar(tipo, datos)
+                self.escribir(clave, contenido)
+                resultados[nombre] = contenido
+                self.renderizados += 1
+
+        logger.info(f"📊 Gráficos: {len(solicitudes) - len(pendientes)} desde caché, "
+                    f"{len(pendientes)} renderizados ({time.time() - inicio:.2f}s)")
+        return resultados
+
+    def renderizar_uno(self, tipo: str, datos: Dict) -> bytes:
+        return self.renderizar({tipo: (tipo, datos)})[tipo]
+
+    def purgar(self, dias: int = 30) -> Dict:
+        """Elimina los PNG sin usar en los últimos 'dias'"""
+        return self.disco.purgar(dias)
+
+
+# Instancia global: un pool y una caché por proceso
+cache_graficos = CacheGraficos()
@@ -0,0 +1,208 @@
+"""
+Cliente HTTP compartido para todas las APIs externas (EOSDA, Open-Meteo, Nominatim)
+- Pool de conexiones keep-alive por host (evita un handshake TCP/TLS por petición)
+- Reintentos urllib3 solo en métodos idempotentes y errores transitorios de red/5xx
+- Timeout de conexión por host, sin pisar el timeout de lectura de cada llamada
+- Métricas de latencia y tamaño por host, y hooks para instrumentación externa
+- Circuit breaker opcional por sesión (ver services/circuito.py)
+
+Los 429/503 de EOSDA NO se reintentan aquí: los gestiona planificador_polling
+con la cuota compartida y Retry-After.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Timeouts (conexión, lectura) en segundos por host
+TIMEOUTS_POR_HOST_DEFECTO = {
+    'api-connect.eos.com': (5, 60),
+    'archive-api.open-meteo.com': (5, 30),
+    'nominatim.openstreetmap.org': (3, 10),
+}
+TIMEOUT_DEFECTO = (5, 30)
+
+METODOS_IDEMPOTENTES = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+# Peticiones más lentas que esto se registran como advertencia
+UMBRAL_PETICION_LENTA = 10.0
+
+HookHTTP = Callable[[str, str, Optional[int], float, int], None]
+
+
+def _config(nombre: str, defecto):
+    """Lee settings solo si Django está configurado (los scripts pueden usar el módulo sin Django)"""
+    try:
+        from django.conf import settings
+        return getattr(settings, nombre, defecto)
+    except Exception:
+        return defecto
+
+
+class MetricasHTTP:
+    """
+    Latencia, bytes y errores acumulados por host (thread-safe).
+    Permite registrar hooks (metodo, host, status, latencia, bytes) por petición.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict] = {}
+        self._hooks: List[HookHTTP] = []
+
+    def registrar_hook(self, hook: HookHTTP):
+        self._hooks.append(hook)
+
+    def registrar(self, metodo: str, host: str, status: Optional[int], latencia: float, tamaño: int):
+        with self._lock:
+            datos = self._hosts.setdefault(host, {
+                'peticiones': 0,
+                'errores': 0,
+                'bytes': 0,
+                'latencia_total': 0.0,
+                'latencia_max': 0.0,
+            })
+            datos['peticiones'] += 1
+            datos['bytes'] += tamaño
+            datos['latencia_total'] += latencia
+            datos['latencia_max'] = max(datos['latencia_max'], latencia)
+            if status is None or status >= 500:
+                datos['errores'] += 1
+
+        if latencia > UMBRAL_PETICION_LENTA:
+            logger.warning(f"🐢 {metodo} {host} tardó {latencia:.1f}s (status {status})")
+
+        for hook in self._hooks:
+            try:
+                hook(metodo, host, status, latencia, tamaño)
+            except Exception as e:
+                logger.debug(f"Hook HTTP falló: {e}")
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            return {
+                host: {
+                    'peticiones': datos['peticiones'],
+                    'errores': datos['errores'],
+                    'kb_recibidos': round(datos['bytes'] / 1024, 1),
+                    'latencia_promedio': round(datos['latencia_total'] / datos['peticiones'], 3),
+                    'latencia_max': round(datos['latencia_max'], 3),
+                }
+                for host, datos in self._hosts.items()
+            }
+
+
+# Métricas globales de todas las sesiones
+metricas_http = MetricasHTTP()
+
+
+class SesionHTTP(requests.Session):
+    """
+    requests.Session con timeouts por host e instrumentación de cada envío.
+    Con 'circuito', los errores de red y 5xx alimentan el circuit breaker y las
+    peticiones se rechazan al instante mientras está abierto.
+    """
+
+    def __init__(self, metricas: MetricasHTTP, timeouts_por_host: Dict[str, tuple], circuito=None):
+        super().__init__()
+        self.metricas = metricas
+        self.timeouts_por_host = timeouts_por_host
+        self.circuito = circuito
+
+    def request(self, method, url, **kwargs):
+        timeout_host = self.timeouts_por_host.get(urlsplit(url).hostname or '', TIMEOUT_DEFECTO)
+        timeout = kwargs.get('timeout')
+        if timeout is None:
+            kwargs['timeout'] = timeout_host
+        elif not isinstance(timeout, tuple):
+            # El llamador fija la lectura; la conexión usa el valor del host
+            kwargs['timeout'] = (min(timeout_host[0], timeout), timeout)
+        return super().request(method, url, **kwargs)
+
+    def send(self, request, **kwargs):
+        if self.circuito and not self.circuito.permitir():
+            from .circuito import CircuitoAbierto
+            raise CircuitoAbierto(self.circuito.servicio)
+
+        host = urlsplit(request.url).hostname or ''
+        inicio = time.monotonic()
+        status = None
+        tamaño = 0
+        try:
+            response = super().send(request, **kwargs)
+            status = response.status_code
+            if kwargs.get('stream'):
+                # No consumir el cuerpo de respuestas en streaming
+                tamaño = int(response.headers.get('Content-Length') or 0)
+            else:
+                tamaño = len(response.content or b'')
+            return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if self.circuito:
+                self.circuito.registrar_fallo(f'{type(e).__name__}: {e}')
+            raise
+        finally:
+            self.metricas.registrar(request.method, host, status, time.monotonic() - inicio, tamaño)
+            if self.circuito and status is not None:
+                if status >= 500:
+                    self.circuito.registrar_fallo(f'HTTP {status}')
+                else:
+                    self.circuito.registrar_exito()
+
+
+def crear_sesion(headers: Dict[str, str] = None, reintentos: int = None,
+                 pool_maxsize: int = None, circuito=None) -> SesionHTTP:
+    """
+    Crea una sesión con pool de conexiones y reintentos en métodos idempotentes.
+
+    Args:
+        headers: Headers por defecto de la sesión
+        reintentos: Reintentos ante errores de conexión/5xx (default: HTTP_REINTENTOS)
+        pool_maxsize: Conexiones keep-alive por host (default: HTTP_POOL_MAXSIZE)
+        circuito: InterruptorCircuito del servicio (opcional)
+    """
+    reintentos = _config('HTTP_REINTENTOS', 3) if reintentos is None else reintentos
+    pool_maxsize = pool_maxsize or _config('HTTP_POOL_MAXSIZE', 10)
+
+    retry = Retry(
+        total=reintentos,
+        connect=reintentos,
+        read=reintentos,
+        status=reintentos,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 504),
+        allowed_methods=METODOS_IDEMPOTENTES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    timeouts = {**TIMEOUTS_POR_HOST_DEFECTO, **_config('HTTP_TIMEOUTS_POR_HOST', {})}
+    sesion = SesionHTTP(metricas_http, timeouts, circuito=circuito)
+    sesion.mount('https://', adapter)
+    sesion.mount('http://', adapter)
+    if headers:
+        sesion.headers.update(headers)
+    return sesion
+
+
+_sesiones: Dict[str, SesionHTTP] = {}
+_sesiones_lock = threading.Lock()
+
+
+def obtener_sesion(nombre: str = 'default') -> SesionHTTP:
+    """
+    Sesión compartida del proceso para un cliente (reutiliza conexiones entre llamadas)
+    """
+    with _sesiones_lock:
+        if nombre not in _sesiones:
+            _sesiones[nombre] = crear_sesion()
+        return _sesiones[nombre]
@@ -0,0 +1,141 @@
+"""
+Preparación de las imágenes satelitales que se incrustan en los PDF
+- Redimensiona cada imagen a la resolución que necesita su tamaño impreso
+  (INFORMES_PDF_DPI_IMAGENES); nunca amplía
+- Recomprime: PNG con paleta si la imagen tiene transparencia o pocos colores
+  (mapas de color de EOSDA, sin pérdida visible), JPEG en el resto
+- Caché en disco por hash de la imagen original + tamaño destino + formato
+- Cuenta los bytes ahorrados para registrarlos por informe
+
+Si algo falla se usa la imagen original: preparar nunca debe romper un informe.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from io import BytesIO
+from typing import Dict, Tuple
+
+from PIL import Image as PILImage
+
+from .cache_analisis_imagenes import sha256_imagen
+from .cache_disco import CacheDisco, configuracion
+
+logger = logging.getLogger(__name__)
+
+# Subir al cambiar cómo se prepara una imagen: invalida las variantes cacheadas
+VERSION_PREPARACION = 1
+
+PUNTOS_POR_PULGADA = 72  # Unidades de ReportLab (cm * 28.35)
+CALIDAD_JPEG = 85
+MAX_COLORES_PALETA = 256
+
+
+def _tiene_transparencia(imagen: PILImage.Image) -> bool:
+    if imagen.mode in ('RGBA', 'LA'):
+        return imagen.getchannel('A').getextrema()[0] < 255
+    return imagen.mode == 'P' and 'transparency' in imagen.info
+
+
+def _codificar(imagen: PILImage.Image) -> Tuple[bytes, str]:
+    """
+    Devuelve (contenido, extensión). Paleta PNG si no hay pérdida apreciable,
+    JPEG para imágenes de tono continuo sin transparencia.
+    """
+    buffer = BytesIO()
+    if _tiene_transparencia(imagen):
+        imagen.convert('RGBA').quantize(colors=MAX_COLORES_PALETA, method=PILImage.Quantize.FASTOCTREE) \
+            .save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue(), 'png'
+
+    rgb = imagen.convert('RGB')
+    if rgb.getcolors(MAX_COLORES_PALETA) is not None:
+        # Pocos colores (mapa de color discreto): la paleta es exacta
+        rgb.quantize(colors=MAX_COLORES_PALETA).save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue(), 'png'
+
+    rgb.save(buffer, format='JPEG', quality=CALIDAD_JPEG, optimize=True, progressive=True)
+    return buffer.getvalue(), 'jpg'
+
+
+class PreparadorImagenesPDF:
+    """
+    Variantes reducidas de las imágenes del informe, cacheadas en disco
+    """
+
+    def __init__(self, directorio: str = None, dpi: int = None):
+        self.disco = CacheDisco('INFORMES_IMAGENES_PDF_CACHE', 'imagenes_pdf_cache', directorio)
+        self._dpi = dpi
+        self._lock = threading.Lock()
+        self.bytes_originales = 0
+        self.bytes_preparados = 0
+        self.imagenes = 0
+
+    @property
+    def dpi(self) -> int:
+        return configuracion('INFORMES_PDF_DPI_IMAGENES', 150) if self._dpi is None else self._dpi
+
+    def tamaño_objetivo(self, ancho_pt: float, alto_pt: float) -> Tuple[int, int]:
+        """Píxeles necesarios para imprimir ancho_pt x alto_pt a la resolución configurada"""
+        return (
+            max(1, round(ancho_pt / PUNTOS_POR_PULGADA * self.dpi)),
+            max(1, round(alto_pt / PUNTOS_POR_PULGADA * self.dpi)),
+        )
+
+    def _clave(self, imagen_path: str, objetivo: Tuple[int, int]) -> str:
+        partes = [sha256_imagen(imagen_path), f'{objetivo[0]}x{objetivo[1]}', str(VERSION_PREPARACION)]
+        return hashlib.sha256('|'.join(partes).encode()).hexdigest()
+
+    def _contabilizar(self, original: int, preparado: int):
+        with self._lock:
+            self.imagenes += 1
+            self.bytes_originales += original
+            self.bytes_preparados += preparado
+
+    def preparar(self, imagen_path: str, ancho_pt: float, alto_pt: float) -> str:
+        """
+        Ruta de la variante lista para incrustar a ancho_pt x alto_pt puntos.
+        Devuelve la original si ya es más pequeña o si la preparación falla.
+        """
+        try:
+            tamaño_original = os.path.getsize(imagen_path)
+            objetivo = self.tamaño_objetivo(ancho_pt, alto_pt)
+            clave = self._clave(imagen_path, objetivo)
+
+            ruta = self.disco.buscar(clave, ('png', 'jpg'))
+            if not ruta:
+                with PILImage.open(imagen_path) as imagen:
+                    imagen.load()
+                    if imagen.width > objetivo[0] or imagen.height > objetivo[1]:
+                        imagen.thumbnail(objetivo, PILImage.Resampling.LANCZOS)
+                    contenido, extension = _codificar(imagen)
+                if len(contenido) >= tamaño_original:
+                    self._contabilizar(tamaño_original, tamaño_original)
+                    return imagen_path
+                ruta = self.disco.escribir(clave, contenido, extension)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ No se pudo preparar {os.path.basename(imagen_path)} para el PDF: {str(e)}")
+            return imagen_path
+
+        self._contabilizar(tamaño_original, os.path.getsize(ruta))
+        return ruta
+
+    def reiniciar_contadores(self):
+        with self._lock:
+            self.bytes_originales = 0
+            self.bytes_preparados = 0
+            self.imagenes = 0
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            return {
+                'imagenes': self.imagenes,
+                'bytes_originales': self.bytes_originales,
+                'bytes_preparados': self.bytes_preparados,
+                'bytes_ahorrados': self.bytes_originales - self.bytes_preparados,
+            }
+
+    def purgar(self, dias: int = 30) -> Dict:
+        """Elimina las variantes sin usar en los últimos 'dias'"""
+        return self.disco.purgar(dias)
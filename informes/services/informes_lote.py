@@ -0,0 +1,176 @@
+"""
+Generación de informes PDF en lote (comando generar_informes_lote)
+- Un proceso por worker (spawn): cada uno genera informes completos con GeneradorPDFProfesional
+- Las cachés ya se comparten entre procesos: gráficos, fragmentos e imágenes reducidas
+  en disco; análisis Gemini en BD (AnalisisImagen, IndiceMensual.analisis_gemini)
+- La cuota de Gemini por minuto se reparte entre los procesos
+- El resumen JSON se reescribe tras cada parcela: una ejecución interrumpida se reanuda
+
+Este módulo no importa modelos al cargarse: los procesos spawn lo importan antes de django.setup().
+"""
+
+import json
+import logging
+import os
+import secrets
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Resultados que no se repiten al reanudar (sin_datos: la parcela no tiene meses en el período)
+ESTADOS_TERMINADOS = ('ok', 'sin_datos')
+
+
+def _config(nombre: str, defecto):
+    from django.conf import settings
+    return getattr(settings, nombre, defecto)
+
+
+def inicializar_worker(procesos: int):
+    """
+    Initializer del ProcessPoolExecutor: configura Django y reparte la cuota de Gemini
+    """
+    import django
+    django.setup()
+
+    from .gemini_service import bucket_gemini
+    from .graficos import cache_graficos
+
+    por_minuto = _config('GEMINI_MAX_REQUESTS_POR_MINUTO', 15)
+    concurrencia = _config('GEMINI_MAX_CONCURRENCIA', 4)
+    # Tasa fraccionaria: con más procesos que peticiones por minuto la suma no supera la cuota
+    bucket_gemini.ajustar(por_minuto / procesos, max(1, concurrencia // procesos))
+    # Ya estamos en un proceso del lote: los gráficos se renderizan aquí mismo
+    cache_graficos._procesos = 0
+
+
+def generar_informe_parcela(parcela_id: int, meses: int, directorio: str) -> Dict:
+    """
+    Genera el informe de una parcela dentro de un worker.
+
+    Returns:
+        Resultado serializable para el resumen de la ejecución
+    """
+    from django.db import connection
+    from ..generador_pdf import GeneradorPDFProfesional, SinDatosInforme
+
+    inicio = time.monotonic()
+    ruta = os.path.join(directorio, f'informe_parcela_{parcela_id}.pdf')
+    resultado = {'parcela_id': parcela_id}
+    try:
+        generador = GeneradorPDFProfesional()
+        generador.generar_informe_completo(parcela_id=parcela_id, meses_atras=meses, output_path=ruta)
+        salida = generador.ultima_salida
+        resultado.update({
+            'estado': 'ok',
+            'archivo': ruta,
+            'sha256': salida.sha256,
+            'tamaño_bytes': salida.tamaño,
+            'imagenes': generador.preparador_imagenes.resumen(),
+            'tiempos': generador.ultimos_tiempos,
+        })
+    except SinDatosInforme as e:
+        # Cualquier otro error (también ValueError) queda como 'error' y se reintenta al reanudar
+        resultado.update({'estado': 'sin_datos', 'error': str(e)})
+    except Exception as e:
+        logger.error(f"❌ Informe de la parcela {parcela_id} falló: {str(e)}", exc_info=True)
+        resultado.update({'estado': 'error', 'error': f'{type(e).__name__}: {e}'})
+    finally:
+        connection.close()
+
+    resultado['segundos'] = round(time.monotonic() - inicio, 2)
+    resultado['terminado'] = datetime.now().isoformat(timespec='seconds')
+    return resultado
+
+
+class EjecucionLote:
+    """
+    Estado de una ejecución en lote: directorio de salida + resumen.json
+    """
+
+    def __init__(self, directorio: str, datos: Dict):
+        self.directorio = directorio
+        self.datos = datos
+
+    @property
+    def id(self) -> str:
+        return self.datos['id']
+
+    @property
+    def ruta_resumen(self) -> str:
+        return os.path.join(self.directorio, 'resumen.json')
+
+    @classmethod
+    def _base(cls, base: Optional[str]) -> str:
+        if base:
+            return base
+        from django.conf import settings
+        return str(_config('INFORMES_LOTE_DIRECTORIO', os.path.join(settings.MEDIA_ROOT, 'informes', 'lotes')))
+
+    @classmethod
+    def crear(cls, parametros: Dict, base: str = None) -> 'EjecucionLote':
+        # Sufijo aleatorio: dos ejecuciones en el mismo segundo no comparten directorio
+        id_ejecucion = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(3)}"
+        directorio = os.path.join(cls._base(base), id_ejecucion)
+        os.makedirs(directorio)
+        ejecucion = cls(directorio, {
+            'id': id_ejecucion,
+            'parametros': parametros,
+            'estado': 'en_curso',
+            'inicio': datetime.now().isoformat(timespec='seconds'),
+            'fin': None,
+            'reanudaciones': 0,
+            'parcelas': {},
+            'totales': {},
+        })
+        ejecucion.guardar()
+        return ejecucion
+
+    @classmethod
+    def reanudar(cls, id_ejecucion: str, base: str = None) -> 'EjecucionLote':
+        directorio = os.path.join(cls._base(base), id_ejecucion)
+        with open(os.path.join(directorio, 'resumen.json'), encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+        datos['estado'] = 'en_curso'
+        datos['reanudaciones'] = datos.get('reanudaciones', 0) + 1
+        return cls(directorio, datos)
+
+    def terminadas(self) -> Set[int]:
+        return {
+            int(parcela_id) for parcela_id, resultado in self.datos['parcelas'].items()
+            if resultado.get('estado') in ESTADOS_TERMINADOS
+        }
+
+    def registrar(self, resultado: Dict):
+        self.datos['parcelas'][str(resultado['parcela_id'])] = resultado
+        self.guardar()
+
+    def _totales(self) -> Dict:
+        resultados = list(self.datos['parcelas'].values())
+        segundos = [r['segundos'] for r in resultados if r.get('estado') == 'ok']
+        return {
+            'parcelas': len(resultados),
+            'ok': sum(1 for r in resultados if r.get('estado') == 'ok'),
+            'sin_datos': sum(1 for r in resultados if r.get('estado') == 'sin_datos'),
+            'errores': sum(1 for r in resultados if r.get('estado') == 'error'),
+            'segundos_promedio': round(sum(segundos) / len(segundos), 2) if segundos else None,
+            'segundos_max': max(segundos) if segundos else None,
+            'bytes_pdf': sum(r.get('tamaño_bytes') or 0 for r in resultados),
+            'bytes_imagenes_ahorrados': sum((r.get('imagenes') or {}).get('bytes_ahorrados', 0) for r in resultados),
+        }
+
+    def finalizar(self, interrumpida: bool = False):
+        self.datos['estado'] = 'interrumpido' if interrumpida else 'terminado'
+        self.datos['fin'] = datetime.now().isoformat(timespec='seconds')
+        self.guardar()
+
+    def guardar(self):
+        """Escritura atómica: un corte a mitad de escritura no pierde el progreso"""
+        self.datos['totales'] = self._totales()
+        with tempfile.NamedTemporaryFile('w', dir=self.directorio, suffix='.tmp', delete=False,
+                                         encoding='utf-8') as temporal:
+            json.dump(self.datos, temporal, ensure_ascii=False, indent=2, default=str)
+        os.replace(temporal.name, self.ruta_resumen)
@@ -0,0 +1,343 @@
+"""
+Servicio de ingesta de datos históricos (EOSDA + Open-Meteo) hacia IndiceMensual
+Extraído de views.obtener_datos_historicos para ejecutarse desde la cola de trabajos
+"""
+
+import logging
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+
+from .eosda_api import eosda_service
+from .escenas_parcela import guardar_escenas
+from .weather_service import OpenMeteoWeatherService
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_SATELITALES = [
+    'ndvi_promedio', 'ndvi_maximo', 'ndvi_minimo',
+    'ndmi_promedio', 'ndmi_maximo', 'ndmi_minimo',
+    'savi_promedio', 'savi_maximo', 'savi_minimo',
+    'nubosidad_promedio', 'fuente_datos', 'calidad_datos',
+    'view_id_imagen', 'fecha_imagen', 'nubosidad_imagen',
+]
+
+CAMPOS_CLIMA = [
+    'temperatura_promedio', 'temperatura_maxima', 'temperatura_minima', 'precipitacion_total',
+]
+
+
+def ingestar_datos_historicos(parcela, fecha_inicio: date, fecha_fin: date, usuario,
+                              reportar_progreso: Optional[Callable[[int, str], None]] = None) -> Dict:
+    """
+    Obtiene datos satelitales y climáticos de un rango y los guarda por mes.
+
+    Args:
+        parcela: Parcela a actualizar
+        fecha_inicio: Fecha de inicio del rango
+        fecha_fin: Fecha de fin del rango
+        usuario: Usuario al que se atribuye el consumo de EOSDA
+        reportar_progreso: Callback opcional (porcentaje, mensaje)
+
+    Returns:
+        Dict con contadores ('meses_satelitales', 'indices_creados',
+        'meses_clima', ...) y 'mensaje' listo para mostrar al usuario.
+        Lanza excepción si EOSDA no está disponible para la parcela.
+    """
+    def progreso(porcentaje: int, mensaje: str):
+        if reportar_progreso:
+            reportar_progreso(porcentaje, mensaje)
+
+    logger.info(f"Obteniendo datos históricos para {parcela.nombre} desde {fecha_inicio} hasta {fecha_fin}")
+
+    # Verificar que la parcela esté sincronizada con EOSDA
+    if not parcela.eosda_sincronizada or not parcela.eosda_field_id:
+        progreso(5, 'Sincronizando parcela con EOSDA')
+        logger.warning(f"Parcela {parcela.nombre} no sincronizada, sincronizando primero...")
+        resultado_sync = eosda_service.sincronizar_parcela_con_eosda(parcela)
+        if not resultado_sync['exito']:
+            raise ValueError(f'La parcela debe estar sincronizada con EOSDA primero. {resultado_sync.get("error", "")}')
+        parcela.refresh_from_db()
+
+    # Obtener datos desde EOSDA usando método optimizado (1 request en lugar de 3)
+    progreso(10, 'Consultando Statistics API de EOSDA')
+    datos_satelitales = eosda_service.obtener_datos_optimizado(
+        parcela=parcela,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        indices=['NDVI', 'NDMI', 'SAVI'],  # ✅ MAYÚSCULAS según documentación EOSDA
+        usuario=usuario,
+        max_nubosidad=50
+    )
+
+    logger.info(f"Estructura de datos recibida: {list(datos_satelitales.keys())}")
+
+    # 🌦️ DATOS CLIMÁTICOS CON OPEN-METEO
+    # EOSDA Weather API deshabilitado (sin cobertura en Colombia)
+    progreso(60, 'Obteniendo datos climáticos (Open-Meteo)')
+    datos_diarios = []
+    try:
+        centroide = parcela.geometria.centroid
+        datos_diarios = OpenMeteoWeatherService.obtener_datos_historicos(
+            latitud=centroide.y,
+            longitud=centroide.x,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin
+        )
+        if not datos_diarios:
+            logger.warning("⚠️ Open-Meteo no retornó datos climáticos")
+    except Exception as e:
+        logger.error(f"Error obteniendo datos climáticos de Open-Meteo: {str(e)}")
+
+    # Escenas individuales: la analítica puede reagregarlas sin volver a consultar EOSDA
+    escenas_guardadas = 0
+    if not datos_satelitales.get('simulado'):
+        escenas_guardadas = guardar_escenas(parcela, datos_satelitales.get('resultados', []))
+
+    # Agregación mensual vectorizada y escritura en bloque
+    progreso(80, 'Guardando índices mensuales')
+    meses_satelitales = agregar_escenas_por_mes(datos_satelitales.get('resultados', []))
+    meses_clima = agregar_clima_por_mes(datos_diarios)
+    conteos = guardar_meses(parcela, meses_satelitales, meses_clima)
+
+    datos_procesados = conteos['meses_satelitales']
+    indices_creados = conteos['indices_creados']
+    meses_clima_actualizados = conteos['meses_clima']
+
+    logger.info(f"Datos históricos procesados para {parcela.nombre}: {indices_creados} nuevos índices, "
+                f"{datos_procesados} meses satelitales, {meses_clima_actualizados} meses climáticos")
+
+    resumen = {
+        'meses_satelitales': datos_procesados,
+        'indices_creados': indices_creados,
+        'meses_clima': meses_clima_actualizados,
+        'num_escenas': len(datos_satelitales.get('resultados', [])),
+        'escenas_guardadas': escenas_guardadas,
+        'error_eosda': datos_satelitales.get('error'),
+        'simulado': bool(datos_satelitales.get('simulado')),
+        'fecha_inicio': fecha_inicio.isoformat(),
+        'fecha_fin': fecha_fin.isoformat(),
+    }
+    resumen['mensaje'] = construir_mensaje_resumen(parcela, fecha_inicio, fecha_fin, resumen)
+    return resumen
+
+
+def agregar_escenas_por_mes(resultados: List[Dict]) -> pd.DataFrame:
+    """
+    Agrega escenas de la Statistics API a estadísticas mensuales con groupby.
+
+    Returns:
+        DataFrame indexado por (año, mes) con las columnas de CAMPOS_SATELITALES.
+        Para imágenes se toma la escena con MENOR nubosidad de cada mes.
+    """
+    filas = []
+    for escena in resultados:
+        fecha_str = escena.get('date')
+        if not fecha_str:
+            continue
+        try:
+            fecha = datetime.fromisoformat(fecha_str).date()
+        except ValueError:
+            logger.error(f"Fecha de escena inválida: {fecha_str}")
+            continue
+
+        fila = {
+            'año': fecha.year,
+            'mes': fecha.month,
+            'fecha': fecha,
+            'nubosidad': escena.get('cloud', 0),
+            'view_id': escena.get('view_id'),  # ✅ view_id de la escena (campo correcto según API)
+        }
+        indexes = escena.get('indexes', {})
+        for indice in ('NDVI', 'NDMI', 'SAVI'):
+            valores = indexes.get(indice) or {}
+            prefijo = indice.lower()
+            fila[f'{prefijo}_avg'] = valores.get('average')
+            fila[f'{prefijo}_max'] = valores.get('max')
+            fila[f'{prefijo}_min'] = valores.get('min')
+        filas.append(fila)
+
+    if not filas:
+        return pd.DataFrame(columns=CAMPOS_SATELITALES, index=pd.MultiIndex.from_tuples([], names=['año', 'mes']))
+
+    df = pd.DataFrame(filas)
+    df['nubosidad'] = pd.to_numeric(df['nubosidad'], errors='coerce').fillna(0)
+    grupos = df.groupby(['año', 'mes'])
+
+    agregaciones = {'nubosidad_promedio': ('nubosidad', 'mean')}
+    for prefijo in ('ndvi', 'ndmi', 'savi'):
+        agregaciones[f'{prefijo}_promedio'] = (f'{prefijo}_avg', 'mean')
+        agregaciones[f'{prefijo}_maximo'] = (f'{prefijo}_max', 'max')
+        agregaciones[f'{prefijo}_minimo'] = (f'{prefijo}_min', 'min')
+    mensual = grupos.agg(**agregaciones)
+
+    # ✅ Mejor escena (menor nubosidad) de cada mes para descarga de imágenes
+    mejores = df.loc[grupos['nubosidad'].idxmin()].set_index(['año', 'mes'])
+    mensual['view_id_imagen'] = mejores['view_id']
+    mensual['fecha_imagen'] = mejores['fecha']
+    mensual['nubosidad_imagen'] = mejores['nubosidad']
+
+    mensual['fuente_datos'] = 'EOSDA'
+    mensual['calidad_datos'] = np.select(
+        [mensual['nubosidad_promedio'] < 30, mensual['nubosidad_promedio'] < 50],
+        ['buena', 'regular'],
+        default='pobre'
+    )
+    return mensual[CAMPOS_SATELITALES]
+
+
+def agregar_clima_por_mes(datos_diarios: List[Dict]) -> pd.DataFrame:
+    """
+    Versión vectorizada de OpenMeteoWeatherService.agrupar_por_mes.
+
+    Returns:
+        DataFrame indexado por (año, mes) con las columnas de CAMPOS_CLIMA
+    """
+    if not datos_diarios:
+        return pd.DataFrame(columns=CAMPOS_CLIMA, index=pd.MultiIndex.from_tuples([], names=['año', 'mes']))
+
+    df = pd.DataFrame(datos_diarios)
+    fechas = pd.to_datetime(df['fecha'], errors='coerce')
+    df = df.assign(año=fechas.dt.year, mes=fechas.dt.month).dropna(subset=['año'])
+    df[['año', 'mes']] = df[['año', 'mes']].astype(int)
+    for campo in CAMPOS_CLIMA:
+        df[campo] = pd.to_numeric(df.get(campo), errors='coerce')
+
+    grupos = df.groupby(['año', 'mes'])
+    return pd.DataFrame({
+        'temperatura_promedio': grupos['temperatura_promedio'].mean(),
+        'temperatura_maxima': grupos['temperatura_maxima'].max(),
+        'temperatura_minima': grupos['temperatura_minima'].min(),
+        'precipitacion_total': grupos['precipitacion_total'].sum(min_count=1),
+    })
+
+
+def _valor_db(valor):
+    """Convierte NaN/NaT y tipos NumPy a valores que acepta el ORM"""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and np.isnan(valor):
+        return None
+    if valor is pd.NaT:
+        return None
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+def guardar_meses(parcela, meses_satelitales: pd.DataFrame, meses_clima: pd.DataFrame) -> Dict:
+    """
+    Escribe en IndiceMensual los meses satelitales y climáticos con upserts en bloque:
+    - Meses con escenas: columnas satelitales, más las de clima solo si Open-Meteo
+      devolvió ese mes (bulk_create(update_conflicts) por grupo)
+    - Meses solo con clima: otro bulk_create que solo actualiza columnas de clima,
+      para no pisar índices ni fuente_datos de registros EOSDA existentes
+
+    Returns:
+        Dict con 'meses_satelitales', 'indices_creados' y 'meses_clima'
+    """
+    from ..models import IndiceMensual
+
+    combinados = meses_satelitales.join(meses_clima, how='outer')
+    if combinados.empty:
+        return {'meses_satelitales': 0, 'indices_creados': 0, 'meses_clima': 0}
+
+    años = combinados.index.get_level_values('año')
+    existentes = set(
+        IndiceMensual.objects.filter(
+            parcela=parcela, año__gte=int(años.min()), año__lte=int(años.max())
+        ).values_list('año', 'mes')
+    )
+
+    clima_disponible = set(meses_clima.index)
+    satelite_con_clima = []
+    satelite_sin_clima = []
+    solo_clima = []
+    for (año, mes), fila in combinados.iterrows():
+        valores = {campo: _valor_db(fila.get(campo)) for campo in CAMPOS_SATELITALES + CAMPOS_CLIMA}
+        registro = IndiceMensual(parcela=parcela, año=int(año), mes=int(mes))
+
+        if (año, mes) in meses_satelitales.index:
+            for campo, valor in valores.items():
+                setattr(registro, campo, valor)
+            if (año, mes) in clima_disponible:
+                satelite_con_clima.append(registro)
+            else:
+                satelite_sin_clima.append(registro)
+        else:
+            for campo in CAMPOS_CLIMA:
+                setattr(registro, campo, valores[campo])
+            registro.fuente_datos = 'Solo Clima'  # Datos climáticos reales sin imágenes satelitales
+            registro.calidad_datos = 'buena'
+            solo_clima.append(registro)
+
+    # Cada grupo solo sobrescribe las columnas que trae: los meses que Open-Meteo no
+    # devolvió (fallo o respuesta parcial) conservan el clima ya guardado
+    grupos = [
+        (satelite_con_clima, CAMPOS_SATELITALES + CAMPOS_CLIMA),
+        (satelite_sin_clima, CAMPOS_SATELITALES),
+        (solo_clima, CAMPOS_CLIMA),
+    ]
+    with transaction.atomic():
+        for registros, campos_actualizar in grupos:
+            if registros:
+                IndiceMensual.objects.bulk_create(
+                    registros,
+                    update_conflicts=True,
+                    unique_fields=['parcela', 'año', 'mes'],
+                    update_fields=campos_actualizar,
+                )
+
+    # bulk_create no emite post_save: invalidar aquí las instantáneas de análisis
+    from .instantaneas_analisis import instantaneas_analisis
+    transaction.on_commit(lambda: instantaneas_analisis.marcar_desactualizadas([parcela.id]))
+
+    claves = {(int(año), int(mes)) for año, mes in combinados.index}
+    return {
+        'meses_satelitales': len(satelite_con_clima) + len(satelite_sin_clima),
+        'indices_creados': len(claves - existentes),
+        'meses_clima': len(clima_disponible),
+    }
+
+
+def construir_mensaje_resumen(parcela, fecha_inicio: date, fecha_fin: date, resumen: Dict) -> str:
+    """
+    Mensaje informativo para el usuario según la disponibilidad de datos
+    """
+    datos_procesados = resumen['meses_satelitales']
+    indices_creados = resumen['indices_creados']
+    meses_clima_actualizados = resumen['meses_clima']
+
+    if resumen.get('simulado'):
+        return (f'Se obtuvieron datos para {parcela.nombre}. '
+                f'Procesados: {datos_procesados} registros, Nuevos: {indices_creados}. '
+                'Nota: Algunos datos pueden ser simulados si EOSDA no tiene cobertura completa.')
+
+    # Calcular meses esperados vs obtenidos
+    meses_esperados = ((fecha_fin.year - fecha_inicio.year) * 12 + fecha_fin.month - fecha_inicio.month) + 1
+    meses_faltantes = meses_esperados - datos_procesados
+    meses_solo_clima = meses_clima_actualizados - datos_procesados  # Meses con clima pero sin satélite
+
+    mensaje_partes = []
+
+    if datos_procesados > 0:
+        msg_satelital = f'✅ {datos_procesados} mes(es) con datos satelitales completos (NDVI, NDMI, SAVI + clima)'
+        if indices_creados > 0:
+            msg_satelital += f' - {indices_creados} nuevo(s)'
+        mensaje_partes.append(msg_satelital)
+
+    if meses_solo_clima > 0:
+        mensaje_partes.append(
+            f'🌦️ {meses_solo_clima} mes(es) solo con datos climáticos reales (temperatura, precipitación). '
+            f'Sin imágenes satelitales disponibles (nubosidad alta o satélite no pasó por la zona).'
+        )
+
+    if meses_faltantes > 0 and meses_solo_clima < meses_faltantes:
+        meses_sin_nada = meses_faltantes - meses_solo_clima
+        if meses_sin_nada > 0:
+            mensaje_partes.append(f'⚠️ {meses_sin_nada} mes(es) sin ningún dato disponible.')
+
+    return ' | '.join(mensaje_partes) if mensaje_partes else '✅ Datos actualizados.'
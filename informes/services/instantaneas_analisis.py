@@ -0,0 +1,237 @@
+"""
+Instantáneas materializadas del análisis por parcela (InstantaneaAnalisisParcela)
+- El análisis completo (NDVI, NDMI, SAVI, tendencias, recomendaciones) se guarda por
+  (parcela, meses) junto con la huella de los datos: filas, última fecha_consulta_api
+  y hash de los valores, más cultivo, período y versión del análisis
+- Mientras la huella coincide se devuelve la instantánea sin ejecutar los analizadores
+- Guardar/ingestar IndiceMensual la marca desactualizada y encola el trabajo
+  'analisis_parcela', que la recalcula (y el resumen de flota de la parcela)
+"""
+
+import hashlib
+import json
+import logging
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Subir al cambiar los analizadores o el formato del resultado: invalida todas las instantáneas
+VERSION_ANALISIS = 2
+
+# Columnas de IndiceMensual que entran al análisis (otros cambios no lo invalidan)
+CAMPOS_ANALISIS = (
+    'año', 'mes', 'ndvi_promedio', 'ndmi_promedio', 'savi_promedio',
+    'temperatura_promedio', 'precipitacion_total', 'nubosidad_promedio',
+)
+
+
+def _config(nombre: str, defecto):
+    from django.conf import settings
+    return getattr(settings, nombre, defecto)
+
+
+def periodo_analisis(meses_atras: int, hoy: date = None) -> Tuple[date, date]:
+    """(fecha_inicio, fecha_fin) del período de un informe: primer día de hace N meses hasta hoy"""
+    fecha_fin = hoy or date.today()
+    numero = fecha_fin.year * 12 + fecha_fin.month - 1 - meses_atras
+    return date(numero // 12, numero % 12 + 1, 1), fecha_fin
+
+
+def datos_analisis(indices: List) -> List[Dict]:
+    """IndiceMensual -> formato de entrada de los analizadores"""
+    return [
+        {
+            'mes': f"{indice.año}-{indice.mes:02d}",
+            'periodo': indice.periodo_texto,
+            'ndvi': indice.ndvi_promedio,
+            'ndmi': indice.ndmi_promedio,
+            'savi': indice.savi_promedio,
+            'temperatura': indice.temperatura_promedio,
+            'precipitacion': indice.precipitacion_total,
+            # Peso de cada mes en los ajustes de tendencia
+            'nubosidad': indice.nubosidad_promedio
+        }
+        for indice in indices
+    ]
+
+
+def analizar_datos(datos: List[Dict], tipo_cultivo: str) -> Dict:
+    """Análisis tradicionales: índices, tendencias y recomendaciones"""
+    from ..analizadores import (
+        AnalizadorNDMI, AnalizadorNDVI, AnalizadorSAVI, DetectorTendencias,
+        GeneradorRecomendaciones, SerieTemporal
+    )
+
+    # Serie en arrays: se arma una vez y la comparten todos los analizadores
+    serie = SerieTemporal.desde_datos(datos)
+
+    analisis_ndvi = AnalizadorNDVI(tipo_cultivo=tipo_cultivo).analizar(serie)
+    analisis_ndmi = AnalizadorNDMI(tipo_cultivo=tipo_cultivo).analizar(serie)
+    analisis_savi = (
+        AnalizadorSAVI(tipo_cultivo=tipo_cultivo).analizar(serie) if (serie.validos('savi') != 0).any() else None
+    )
+    tendencias = DetectorTendencias().analizar_temporal(serie, 'ndvi')
+    recomendaciones = GeneradorRecomendaciones(tipo_cultivo=tipo_cultivo).generar_recomendaciones(
+        analisis_ndvi, analisis_ndmi, analisis_savi, tendencias
+    )
+
+    return {
+        'ndvi': analisis_ndvi,
+        'ndmi': analisis_ndmi,
+        'savi': analisis_savi,
+        'tendencias': tendencias,
+        'recomendaciones': recomendaciones,
+    }
+
+
+def calcular_huella(parcela, indices: List, datos: List[Dict], fecha_inicio: date) -> Dict:
+    """
+    Huella de los datos de un análisis.
+
+    fecha_consulta_api solo cambia con filas nuevas (auto_now_add): los upserts de la
+    ingesta se detectan por el hash de los valores.
+    """
+    consultas = [indice.fecha_consulta_api for indice in indices if indice.fecha_consulta_api]
+    ultima_consulta = max(consultas) if consultas else None
+    hash_valores = hashlib.sha256(
+        json.dumps(datos, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    huella = hashlib.sha256(json.dumps({
+        'version': VERSION_ANALISIS,
+        'filas': len(indices),
+        'ultima_consulta_api': ultima_consulta,
+        'hash_valores': hash_valores,
+        'tipo_cultivo': parcela.tipo_cultivo,
+        'mes_inicio': fecha_inicio,
+        # Las recomendaciones estacionales dependen del mes en curso
+        'mes_actual': date.today().month,
+    }, sort_keys=True, default=str).encode()).hexdigest()
+    return {
+        'filas': len(indices),
+        'ultima_consulta_api': ultima_consulta,
+        'hash_valores': hash_valores,
+        'huella': huella,
+    }
+
+
+class InstantaneasAnalisis:
+    """
+    Lectura, recálculo e invalidación de las instantáneas de análisis
+    """
+
+    def _indices_periodo(self, parcela, fecha_inicio: date, fecha_fin: date) -> List:
+        from ..models import IndiceMensual
+        from .serie_indices import filtrar_periodo
+
+        indices = list(IndiceMensual.objects.filter(parcela=parcela).order_by('año', 'mes'))
+        for indice in indices:
+            indice.parcela = parcela
+        return filtrar_periodo(indices, fecha_inicio, fecha_fin)
+
+    def obtener(self, parcela, meses: int, indices: Optional[List] = None,
+                datos: Optional[List[Dict]] = None) -> Dict:
+        """
+        Análisis de la parcela para los últimos 'meses': la instantánea si su huella
+        coincide con los datos actuales; si no, se recalcula y se guarda.
+
+        Args:
+            indices, datos: IndiceMensual del período y su formato de análisis, si el
+                llamador ya los tiene (el generador de informes); si no, se consultan
+        """
+        from ..models_analisis import InstantaneaAnalisisParcela
+
+        fecha_inicio, fecha_fin = periodo_analisis(meses)
+        if indices is None:
+            indices = self._indices_periodo(parcela, fecha_inicio, fecha_fin)
+        if datos is None:
+            datos = datos_analisis(indices)
+        huella = calcular_huella(parcela, indices, datos, fecha_inicio)
+
+        instantanea = InstantaneaAnalisisParcela.objects.filter(parcela=parcela, meses=meses).first()
+        if instantanea and instantanea.huella == huella['huella']:
+            # Marcada por un guardado que no cambió los datos del período: sigue vigente
+            InstantaneaAnalisisParcela.objects.filter(pk=instantanea.pk).update(
+                lecturas=F('lecturas') + 1, desactualizada=False
+            )
+            logger.info(f"♻️ Análisis de {parcela.nombre} ({meses} meses) desde la instantánea")
+            return instantanea.resultado
+
+        inicio = time.monotonic()
+        resultado = analizar_datos(datos, parcela.tipo_cultivo)
+        segundos = time.monotonic() - inicio
+        InstantaneaAnalisisParcela.objects.update_or_create(
+            parcela=parcela, meses=meses,
+            defaults={
+                **huella,
+                'mes_inicio': fecha_inicio,
+                'resultado': resultado,
+                'desactualizada': False,
+                'calculada_en': timezone.now(),
+                'segundos_calculo': round(segundos, 3),
+                'lecturas': 0,
+            }
+        )
+        logger.info(f"🧮 Análisis de {parcela.nombre} ({meses} meses) recalculado en {segundos:.2f}s")
+        return resultado
+
+    def leer(self, parcela, meses: int = None):
+        """
+        Instantánea guardada, sin validar ni recalcular (None si no existe).
+        meses: default ANALISIS_INSTANTANEA_MESES
+        """
+        from ..models_analisis import InstantaneaAnalisisParcela
+
+        meses = meses or _config('ANALISIS_INSTANTANEA_MESES', 12)
+        return InstantaneaAnalisisParcela.objects.filter(parcela=parcela, meses=meses).first()
+
+    def marcar_desactualizadas(self, parcela_ids: Iterable[int]) -> int:
+        """
+        Marca las instantáneas de las parcelas y encola su recálculo
+        (un trabajo activo por parcela).
+
+        Returns:
+            Instantáneas marcadas
+        """
+        from ..models import Parcela
+        from ..models_analisis import InstantaneaAnalisisParcela
+        from .trabajos import encolar_analisis_parcela
+
+        parcela_ids = list(set(parcela_ids))
+        marcadas = InstantaneaAnalisisParcela.objects.filter(
+            parcela_id__in=parcela_ids, desactualizada=False
+        ).update(desactualizada=True)
+
+        for parcela in Parcela.objects.filter(id__in=parcela_ids, activa=True):
+            encolar_analisis_parcela(parcela)
+        return marcadas
+
+    def recalcular(self, parcela) -> Dict:
+        """
+        Recalcula las instantáneas de la parcela (la ventana por defecto siempre)
+        y su fila del resumen de flota
+        """
+        from ..models_analisis import InstantaneaAnalisisParcela
+        from .analisis_flota import analizar_flota
+
+        ventanas = set(
+            InstantaneaAnalisisParcela.objects.filter(parcela=parcela).values_list('meses', flat=True)
+        )
+        ventanas.add(_config('ANALISIS_INSTANTANEA_MESES', 12))
+        for meses in sorted(ventanas):
+            self.obtener(parcela, meses)
+
+        flota = analizar_flota(parcela_ids=[parcela.id])
+        return {
+            'parcela_id': parcela.id,
+            'ventanas': sorted(ventanas),
+            'requiere_atencion': bool(flota['requieren_atencion']),
+        }
+
+
+# Instancia global
+instantaneas_analisis = InstantaneasAnalisis()
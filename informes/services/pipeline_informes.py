@@ -0,0 +1,142 @@
+"""
+Pipeline de generación de informes por etapas
+- cargar → analizar → graficos → ia → renderizar (las etapas las define cada generador)
+- Cada etapa es una función sobre el contexto compartido que devuelve las claves que agrega
+- Las etapas cuyas dependencias ya terminaron se ejecutan juntas en hilos
+  (p.ej. gráficos y Gemini después de cargar los datos)
+- Se mide cada etapa (contexto['tiempos']) y se informa el avance al callback de progreso
+
+GeneradorPDFProfesional y GeneradorInformePDF son presets: solo declaran sus etapas.
+Las etapas caras ya cachean por dentro (gráficos, análisis Gemini, fragmentos PDF).
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _config(nombre: str, defecto):
+    from django.conf import settings
+    return getattr(settings, nombre, defecto)
+
+
+class Etapa:
+    """
+    Paso del pipeline: funcion(contexto) -> dict con las claves que agrega al contexto
+    """
+
+    def __init__(self, nombre: str, funcion: Callable[[Dict], Optional[Dict]],
+                 depende_de: Sequence[str] = (),
+                 progreso: Optional[Tuple[str, int, str]] = None):
+        """
+        Args:
+            nombre: Nombre de la etapa (clave en contexto['tiempos'])
+            funcion: Recibe el contexto y devuelve un dict (o None) a fusionar en él
+            depende_de: Etapas que deben terminar antes
+            progreso: (etapa, porcentaje, mensaje) a informar al comenzar
+        """
+        self.nombre = nombre
+        self.funcion = funcion
+        self.depende_de = tuple(depende_de)
+        self.progreso = progreso
+
+
+class PipelineInforme:
+    """
+    Ejecuta etapas en orden de dependencias; las que quedan listas a la vez van en paralelo
+    """
+
+    def __init__(self, nombre: str, etapas: List[Etapa],
+                 reportar_progreso: Optional[Callable[[str, int, str], None]] = None,
+                 paralelo: Optional[bool] = None):
+        """
+        Args:
+            nombre: Nombre del preset (para los logs)
+            etapas: Etapas en orden de declaración (también el orden de fusión de resultados)
+            reportar_progreso: Callback (etapa, porcentaje, mensaje)
+            paralelo: Ejecutar en hilos las etapas independientes (default: INFORMES_PIPELINE_PARALELO)
+        """
+        nombres = [etapa.nombre for etapa in etapas]
+        if len(set(nombres)) != len(nombres):
+            raise ValueError(f"Etapas repetidas en el pipeline {nombre}: {nombres}")
+        for etapa in etapas:
+            desconocidas = [d for d in etapa.depende_de if d not in nombres]
+            if desconocidas:
+                raise ValueError(f"La etapa '{etapa.nombre}' depende de etapas inexistentes: {desconocidas}")
+
+        self.nombre = nombre
+        self.etapas = etapas
+        self.reportar_progreso = reportar_progreso
+        self.paralelo = _config('INFORMES_PIPELINE_PARALELO', True) if paralelo is None else paralelo
+
+    def _oleadas(self) -> List[List[Etapa]]:
+        """Grupos de etapas cuyas dependencias terminaron en grupos anteriores"""
+        pendientes = list(self.etapas)
+        terminadas = set()
+        oleadas = []
+        while pendientes:
+            listas = [e for e in pendientes if all(d in terminadas for d in e.depende_de)]
+            if not listas:
+                raise ValueError(f"Dependencias circulares en el pipeline {self.nombre}: "
+                                 f"{[e.nombre for e in pendientes]}")
+            oleadas.append(listas)
+            terminadas.update(e.nombre for e in listas)
+            pendientes = [e for e in pendientes if e not in listas]
+        return oleadas
+
+    def _ejecutar_etapa(self, etapa: Etapa, contexto: Dict) -> Tuple[Dict, float]:
+        """Devuelve (resultado, segundos)"""
+        inicio = time.monotonic()
+        resultado = etapa.funcion(contexto) or {}
+        return resultado, time.monotonic() - inicio
+
+    def _en_hilo(self, etapa: Etapa, contexto: Dict) -> Tuple[Dict, float]:
+        from django.db import connection
+        try:
+            return self._ejecutar_etapa(etapa, contexto)
+        finally:
+            connection.close()  # Cada hilo abre su propia conexión a la BD
+
+    def ejecutar(self, contexto: Optional[Dict] = None, **valores) -> Dict:
+        """
+        Ejecuta todas las etapas sobre el contexto (más los valores dados).
+
+        Returns:
+            El contexto con los resultados de cada etapa y 'tiempos' (segundos por etapa)
+        """
+        contexto = dict(contexto or {}, **valores)
+        contexto.setdefault('tiempos', {})
+        inicio = time.monotonic()
+
+        for oleada in self._oleadas():
+            # El avance se informa desde este hilo (el callback puede escribir en la BD)
+            for etapa in oleada:
+                if etapa.progreso and self.reportar_progreso:
+                    self.reportar_progreso(*etapa.progreso)
+
+            if len(oleada) == 1 or not self.paralelo:
+                resultados = [self._ejecutar_etapa(etapa, contexto) for etapa in oleada]
+            else:
+                # Las etapas de una oleada solo leen el contexto; sus resultados se fusionan al final
+                with ThreadPoolExecutor(max_workers=len(oleada),
+                                        thread_name_prefix=f'pipeline-{self.nombre}') as executor:
+                    futuros = [executor.submit(self._en_hilo, etapa, contexto) for etapa in oleada]
+                    errores = [futuro.exception() for futuro in futuros]
+                for error in errores:
+                    if error is not None:
+                        raise error
+                resultados = [futuro.result() for futuro in futuros]
+
+            for etapa, (resultado, segundos) in zip(oleada, resultados):
+                contexto.update(resultado)
+                contexto['tiempos'][etapa.nombre] = round(segundos, 3)
+
+        contexto['tiempos']['total'] = round(time.monotonic() - inicio, 3)
+        logger.info(
+            f"⏱️ Pipeline {self.nombre}: "
+            + ' | '.join(f"{nombre} {segundos:.2f}s" for nombre, segundos in contexto['tiempos'].items())
+        )
+        return contexto
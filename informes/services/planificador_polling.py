@@ -0,0 +1,273 @@
+"""
+Planificador de polling compartido para APIs con tareas asíncronas (EOSDA)
+- Token bucket a nivel de proceso dimensionado a la cuota de EOSDA
+- Backoff exponencial con jitter entre intentos
+- Respeta la cabecera Retry-After en respuestas 429/503
+- Métricas de tiempo esperando vs. tiempo trabajando
+"""
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterator, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def parsear_retry_after(valor: Optional[str]) -> Optional[float]:
+    """
+    Convierte la cabecera Retry-After (segundos o fecha HTTP) a segundos.
+
+    Returns:
+        Segundos a esperar o None si la cabecera no existe o no es válida
+    """
+    if not valor:
+        return None
+
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+
+    try:
+        fecha = parsedate_to_datetime(valor)
+        if fecha.tzinfo is None:
+            fecha = fecha.replace(tzinfo=dt_timezone.utc)
+        return max(0.0, (fecha - datetime.now(dt_timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class MetricasPolling:
+    """
+    Acumula tiempos de espera y de trabajo de todos los consumidores del proceso
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.peticiones = 0
+            self.respuestas_rate_limit = 0  # 429 y 503
+            self.segundos_trabajo = 0.0          # Tiempo dentro de peticiones HTTP
+            self.segundos_espera_cuota = 0.0     # Tiempo esperando tokens del bucket
+            self.segundos_espera_backoff = 0.0   # Tiempo durmiendo entre intentos
+
+    def registrar_peticion(self, segundos: float, rate_limited: bool = False):
+        with self._lock:
+            self.peticiones += 1
+            self.segundos_trabajo += segundos
+            if rate_limited:
+                self.respuestas_rate_limit += 1
+
+    def registrar_espera_cuota(self, segundos: float):
+        with self._lock:
+            self.segundos_espera_cuota += segundos
+
+    def registrar_espera_backoff(self, segundos: float):
+        with self._lock:
+            self.segundos_espera_backoff += segundos
+
+    def resumen(self) -> Dict:
+        """
+        Foto de las métricas acumuladas
+        """
+        with self._lock:
+            espera_total = self.segundos_espera_cuota + self.segundos_espera_backoff
+            total = espera_total + self.segundos_trabajo
+            return {
+                'peticiones': self.peticiones,
+                'respuestas_rate_limit': self.respuestas_rate_limit,
+                'segundos_trabajo': round(self.segundos_trabajo, 2),
+                'segundos_espera_cuota': round(self.segundos_espera_cuota, 2),
+                'segundos_espera_backoff': round(self.segundos_espera_backoff, 2),
+                'porcentaje_espera': round(espera_total / total * 100, 1) if total else 0.0,
+            }
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe compartido por todos los hilos del proceso.
+    Una pausa global (por Retry-After) bloquea a todos los consumidores.
+    """
+
+    def __init__(self, peticiones_por_minuto: int, rafaga: int = 1,
+                 metricas: Optional[MetricasPolling] = None):
+        self.tasa = max(1, peticiones_por_minuto) / 60.0  # tokens por segundo
+        self.capacidad = max(1, rafaga)
+        self.metricas = metricas
+        self._tokens = float(self.capacidad)
+        self._ultimo = time.monotonic()
+        self._pausado_hasta = 0.0
+        self._lock = threading.Lock()
+
+    def _recargar(self, ahora: float):
+        self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def adquirir(self) -> float:
+        """
+        Bloquea hasta obtener un token.
+
+        Returns:
+            Segundos esperados
+        """
+        esperado = 0.0
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._recargar(ahora)
+                espera = self._pausado_hasta - ahora
+                if espera <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    espera = (1 - self._tokens) / self.tasa
+            time.sleep(espera)
+            esperado += espera
+
+        if self.metricas and esperado:
+            self.metricas.registrar_espera_cuota(esperado)
+        return esperado
+
+    def ajustar(self, peticiones_por_minuto: float, rafaga: int = None):
+        """
+        Cambia la tasa (p. ej. para repartir una cuota entre varios procesos).
+        Admite fracciones: 15 por minuto entre 20 procesos son 0.75 por proceso.
+        """
+        if peticiones_por_minuto <= 0:
+            raise ValueError(f"Tasa inválida: {peticiones_por_minuto} peticiones por minuto")
+        with self._lock:
+            self._recargar(time.monotonic())
+            self.tasa = peticiones_por_minuto / 60.0
+            if rafaga is not None:
+                self.capacidad = max(1, rafaga)
+                self._tokens = min(self._tokens, self.capacidad)
+
+    def pausar(self, segundos: float):
+        """
+        Detiene el consumo de tokens para todo el proceso (p. ej. tras un 429)
+        """
+        with self._lock:
+            self._pausado_hasta = max(self._pausado_hasta, time.monotonic() + segundos)
+            self._tokens = 0.0
+
+
+class PlanificadorPolling:
+    """
+    Controla los intentos de una tarea de polling: cuándo volver a consultar
+    y cuándo rendirse. Cada instancia corresponde a UNA tarea.
+
+    Uso:
+        planificador = crear_planificador_eosda()
+        for intento in planificador.intentos():
+            response = planificador.peticion(session.get, url, timeout=30)
+            ...
+    """
+
+    def __init__(self, bucket: TokenBucket, metricas: MetricasPolling,
+                 espera_inicial: float = 2.0, factor: float = 1.6,
+                 espera_maxima: float = 30.0, timeout_total: float = 300.0,
+                 max_intentos: Optional[int] = None,
+                 espera_rate_limit: float = 15.0):
+        self.bucket = bucket
+        self.metricas = metricas
+        self.espera_inicial = espera_inicial
+        self.factor = factor
+        self.espera_maxima = espera_maxima
+        self.timeout_total = timeout_total
+        self.max_intentos = max_intentos
+        self.espera_rate_limit = espera_rate_limit
+        self._retry_after = None
+        self.inicio = time.monotonic()
+
+    def calcular_espera(self, intento: int) -> float:
+        """
+        Backoff exponencial con jitter ("equal jitter"): mitad fija, mitad aleatoria
+        """
+        techo = min(self.espera_maxima, self.espera_inicial * (self.factor ** intento))
+        return techo / 2 + random.uniform(0, techo / 2)
+
+    def transcurrido(self) -> float:
+        return time.monotonic() - self.inicio
+
+    def intentos(self) -> Iterator[int]:
+        """
+        Genera números de intento durmiendo entre ellos según backoff o Retry-After.
+        El primer intento es inmediato.
+        """
+        intento = 0
+        while True:
+            if self.max_intentos is not None and intento >= self.max_intentos:
+                return
+
+            if intento > 0:
+                espera = self.calcular_espera(intento - 1)
+                if self._retry_after is not None:
+                    espera = max(espera, self._retry_after)
+                    self._retry_after = None
+
+                restante = self.timeout_total - self.transcurrido()
+                if restante <= 0:
+                    return
+                espera = min(espera, restante)
+
+                time.sleep(espera)
+                self.metricas.registrar_espera_backoff(espera)
+
+            yield intento
+            intento += 1
+
+    def peticion(self, metodo: Callable, url: str, **kwargs):
+        """
+        Ejecuta una petición HTTP tras obtener token del bucket compartido.
+        Si la respuesta es 429/503 aplica Retry-After al bucket y al próximo intento.
+        """
+        self.bucket.adquirir()
+
+        inicio = time.monotonic()
+        response = metodo(url, **kwargs)
+        duracion = time.monotonic() - inicio
+
+        rate_limited = response.status_code in (429, 503)
+        self.metricas.registrar_peticion(duracion, rate_limited=rate_limited)
+
+        if rate_limited:
+            retry_after = parsear_retry_after(response.headers.get('Retry-After'))
+            if retry_after is None:
+                retry_after = self.espera_rate_limit
+            self._retry_after = retry_after
+            self.bucket.pausar(retry_after)
+            logger.warning(f"⚠️ Rate limit ({response.status_code}) - pausando peticiones {retry_after:.0f}s")
+
+        return response
+
+
+# Métricas y bucket compartidos por todo el proceso para EOSDA
+metricas_eosda = MetricasPolling()
+bucket_eosda = TokenBucket(
+    peticiones_por_minuto=getattr(settings, 'EOSDA_MAX_REQUESTS_POR_MINUTO', 60),
+    rafaga=getattr(settings, 'EOSDA_RATE_LIMIT_RAFAGA', 5),
+    metricas=metricas_eosda,
+)
+
+
+def crear_planificador_eosda(timeout_total: Optional[float] = None,
+                             max_intentos: Optional[int] = None) -> PlanificadorPolling:
+    """
+    Planificador para una tarea de EOSDA usando el bucket compartido del proceso
+    """
+    return PlanificadorPolling(
+        bucket=bucket_eosda,
+        metricas=metricas_eosda,
+        espera_inicial=getattr(settings, 'EOSDA_POLLING_ESPERA_INICIAL', 2.0),
+        espera_maxima=getattr(settings, 'EOSDA_POLLING_ESPERA_MAXIMA', 30.0),
+        timeout_total=timeout_total or getattr(settings, 'EOSDA_POLLING_TIMEOUT', 300),
+        max_intentos=max_intentos,
+    )
@@ -0,0 +1,259 @@
+"""
+Descarga anticipada de imágenes satelitales (Field Imagery API de EOSDA)
+- Genera NDVI/NDMI/SAVI de cada registro mensual con view_id_imagen
+- Envía las solicitudes en paralelo y persiste cada request_id (reanudable)
+- Consulta todas las solicitudes por rondas con la cuota compartida de EOSDA
+- Guarda cada PNG en el almacén por contenido desde un archivo temporal (sin cargarlo
+  entero en memoria) y reutiliza las imágenes que ya estaban almacenadas
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .almacen_imagenes import almacen_imagenes
+from .eosda_api import eosda_service
+from .planificador_polling import crear_planificador_eosda
+
+logger = logging.getLogger(__name__)
+
+INDICES_PREFETCH = ('NDVI', 'NDMI', 'SAVI')
+
+# Tras estos envíos fallidos, la solicitud deja de reintentarse automáticamente
+MAX_INTENTOS_SOLICITUD = 3
+
+# Un request_id más antiguo que esto probablemente ya expiró en EOSDA: se vuelve a pedir
+ANTIGUEDAD_MAXIMA_REQUEST = timedelta(hours=24)
+
+
+def _preparar_solicitudes(parcela, indices: Sequence[str]) -> Dict:
+    """
+    Crea (o recupera) una SolicitudImagenEOSDA por imagen que falta.
+    Las imágenes que ya están en el almacén se asignan directamente.
+
+    Returns:
+        Dict con 'por_enviar', 'enviadas' (request_id reutilizable),
+        'omitidas' y 'reutilizadas'
+    """
+    from ..models import IndiceMensual, SolicitudImagenEOSDA
+
+    registros = IndiceMensual.objects.filter(
+        parcela=parcela,
+        view_id_imagen__isnull=False,
+    ).exclude(view_id_imagen='').select_related('parcela').order_by('año', 'mes')
+
+    por_enviar: List = []
+    enviadas: List = []
+    omitidas = 0
+    reutilizadas = 0
+    limite_antiguedad = timezone.now() - ANTIGUEDAD_MAXIMA_REQUEST
+
+    for registro in registros:
+        for indice in indices:
+            if getattr(registro, f'imagen_{indice.lower()}').name:
+                omitidas += 1
+                continue
+
+            imagen = almacen_imagenes.buscar(parcela.eosda_field_id, registro.view_id_imagen, indice)
+            if imagen:
+                almacen_imagenes.asignar_a_registro(registro, indice, imagen)
+                reutilizadas += 1
+                continue
+
+            solicitud, _ = SolicitudImagenEOSDA.objects.get_or_create(
+                indice_mensual=registro,
+                indice=indice,
+                view_id=registro.view_id_imagen,
+                defaults={'field_id': parcela.eosda_field_id},
+            )
+            solicitud.indice_mensual = registro  # Reutilizar la instancia ya cargada
+
+            if solicitud.estado == 'fallida' and solicitud.intentos >= MAX_INTENTOS_SOLICITUD:
+                omitidas += 1
+                continue
+
+            if (solicitud.estado == 'enviada' and solicitud.request_id
+                    and solicitud.actualizado_en >= limite_antiguedad):
+                enviadas.append(solicitud)
+            else:
+                # Nueva, fallida, expirada o marcada descargada pero sin archivo
+                por_enviar.append(solicitud)
+
+    return {'por_enviar': por_enviar, 'enviadas': enviadas,
+            'omitidas': omitidas, 'reutilizadas': reutilizadas}
+
+
+def _marcar_fallida(solicitud, error: str):
+    solicitud.estado = 'fallida'
+    solicitud.request_id = ''
+    solicitud.error = error[:1000]
+    solicitud.save(update_fields=['estado', 'request_id', 'error', 'intentos', 'actualizado_en'])
+
+
+def _guardar_imagen(solicitud, archivo) -> int:
+    """
+    Guarda la imagen descargada en el almacén y la asigna al registro mensual.
+
+    Returns:
+        Tamaño en bytes de la imagen
+    """
+    with archivo:
+        imagen = almacen_imagenes.guardar(archivo, solicitud.field_id, solicitud.view_id, solicitud.indice)
+    almacen_imagenes.asignar_a_registro(solicitud.indice_mensual, solicitud.indice, imagen)
+    tamaño = imagen.tamaño_bytes
+
+    solicitud.estado = 'descargada'
+    solicitud.error = ''
+    solicitud.bytes_descargados = tamaño
+    solicitud.save(update_fields=['estado', 'error', 'bytes_descargados', 'actualizado_en'])
+    return tamaño
+
+
+def prefetch_imagenes_parcela(parcela, indices: Sequence[str] = INDICES_PREFETCH,
+                              max_workers: int = None, timeout_total: float = 900,
+                              reportar_progreso: Optional[Callable[[int, str], None]] = None) -> Dict:
+    """
+    Descarga todas las imágenes que faltan de una parcela.
+
+    Las solicitudes que no terminan antes de timeout_total quedan en estado
+    'enviada' con su request_id: la siguiente ejecución solo las consulta.
+
+    Args:
+        parcela: Parcela con eosda_field_id
+        indices: Índices a descargar (NDVI, NDMI, SAVI)
+        max_workers: Hilos para enviar/consultar (default: EOSDA_LOTE_MAX_WORKERS)
+        timeout_total: Segundos máximos de polling para todo el lote
+        reportar_progreso: Callback opcional (porcentaje, mensaje)
+
+    Returns:
+        Dict con 'solicitudes', 'descargadas', 'fallidas', 'pendientes',
+        'omitidas', 'reutilizadas', 'bytes_descargados' y 'mensaje'
+    """
+    def progreso(porcentaje: int, mensaje: str):
+        if reportar_progreso:
+            reportar_progreso(porcentaje, mensaje)
+
+    if not parcela.eosda_field_id:
+        return {'error': 'La parcela no está sincronizada con EOSDA'}
+
+    if max_workers is None:
+        max_workers = getattr(settings, 'EOSDA_LOTE_MAX_WORKERS', 4)
+    field_id = parcela.eosda_field_id
+    indices = [indice.upper() for indice in indices]
+
+    plan = _preparar_solicitudes(parcela, indices)
+    por_enviar = plan['por_enviar']
+    pendientes = {solicitud.pk: solicitud for solicitud in plan['enviadas']}
+    total = len(por_enviar) + len(pendientes)
+
+    resumen = {
+        'solicitudes': total,
+        'reanudadas': len(pendientes),
+        'descargadas': 0,
+        'fallidas': 0,
+        'pendientes': 0,
+        'omitidas': plan['omitidas'],
+        'reutilizadas': plan['reutilizadas'],
+        'bytes_descargados': 0,
+    }
+
+    logger.info(f"🖼️ Prefetch {parcela.nombre}: {len(por_enviar)} por enviar, "
+                f"{len(pendientes)} reanudadas, {plan['reutilizadas']} desde almacén, "
+                f"{plan['omitidas']} omitidas")
+
+    if total == 0:
+        resumen['mensaje'] = (f"No hay imágenes pendientes de descargar "
+                              f"({resumen['reutilizadas']} asignadas desde el almacén)")
+        return resumen
+
+    def solicitar(solicitud) -> Optional[str]:
+        try:
+            return eosda_service.solicitar_imagen_satelital(field_id, solicitud.indice, solicitud.view_id)
+        finally:
+            connection.close()  # El circuito de EOSDA consulta la BD desde este hilo
+
+    def consultar(solicitud, planificador) -> Dict:
+        try:
+            return eosda_service.consultar_imagen_satelital(field_id, solicitud.request_id, planificador)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        # 1. ENVÍO DE SOLICITUDES (la cuota la controla bucket_eosda en cada POST)
+        progreso(5, f'Solicitando {len(por_enviar)} imágenes a EOSDA')
+        futuros = {
+            executor.submit(solicitar, solicitud): solicitud
+            for solicitud in por_enviar
+        }
+        for futuro in as_completed(futuros):
+            solicitud = futuros[futuro]
+            solicitud.intentos += 1
+            try:
+                request_id = futuro.result()
+            except Exception as e:
+                logger.error(f"   ❌ Error solicitando {solicitud}: {str(e)}")
+                request_id = None
+
+            if request_id:
+                solicitud.estado = 'enviada'
+                solicitud.request_id = request_id
+                solicitud.error = ''
+                solicitud.save(update_fields=['estado', 'request_id', 'error', 'intentos', 'actualizado_en'])
+                pendientes[solicitud.pk] = solicitud
+            else:
+                _marcar_fallida(solicitud, 'EOSDA no devolvió request_id')
+                resumen['fallidas'] += 1
+
+        # 2. POLLING CONCURRENTE DE TODAS LAS SOLICITUDES
+        planificador = crear_planificador_eosda(timeout_total=timeout_total)
+
+        for ronda in planificador.intentos():
+            if not pendientes:
+                break
+
+            futuros = {
+                executor.submit(consultar, solicitud, planificador): pk
+                for pk, solicitud in pendientes.items()
+            }
+
+            # Las escrituras en BD/storage se hacen en este hilo
+            for futuro in as_completed(futuros):
+                pk = futuros[futuro]
+                solicitud = pendientes[pk]
+                try:
+                    estado = futuro.result()
+                except Exception as e:
+                    logger.warning(f"   ⚠️ Error consultando {solicitud}: {str(e)}")
+                    continue
+
+                if estado['estado'] == 'lista':
+                    try:
+                        resumen['bytes_descargados'] += _guardar_imagen(solicitud, estado['archivo'])
+                        resumen['descargadas'] += 1
+                    except Exception as e:
+                        logger.error(f"   ❌ Error guardando {solicitud}: {str(e)}")
+                        _marcar_fallida(solicitud, f'Error guardando imagen: {str(e)}')
+                        resumen['fallidas'] += 1
+                    del pendientes[pk]
+                elif estado['estado'] == 'error':
+                    _marcar_fallida(solicitud, estado.get('mensaje') or 'Error en generación')
+                    resumen['fallidas'] += 1
+                    del pendientes[pk]
+
+            terminadas = total - len(pendientes)
+            progreso(10 + int(85 * terminadas / total),
+                     f'{terminadas}/{total} imágenes procesadas (ronda {ronda + 1})')
+
+    resumen['pendientes'] = len(pendientes)
+    resumen['mensaje'] = (
+        f"{resumen['descargadas']} imágenes descargadas, {resumen['reutilizadas']} desde almacén, "
+        f"{resumen['fallidas']} fallidas, "
+        f"{resumen['pendientes']} pendientes ({resumen['bytes_descargados'] / 1024:.0f} KB)"
+    )
+    logger.info(f"✅ Prefetch {parcela.nombre}: {resumen['mensaje']}")
+    return resumen
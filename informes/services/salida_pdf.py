@@ -0,0 +1,118 @@
+"""
+Destino de escritura de los PDF de informes
+- ReportLab escribe directamente a un archivo temporal en disco (sin BytesIO ni
+  copias en memoria del documento completo)
+- SHA-256 y tamaño se calculan mientras se escribe
+- El archivo se mueve a su ruta final (rename atómico) o se sube por bloques al
+  storage de Django del FileField (disco local, S3...)
+
+ReportLab serializa el documento al final de doc.build(): lo que se ahorra es la
+copia en memoria y la relectura del archivo, no el tiempo de maquetación.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Optional
+
+from django.conf import settings
+from django.core.files import File
+
+logger = logging.getLogger(__name__)
+
+
+class SalidaPDF:
+    """
+    Archivo temporal de escritura para SimpleDocTemplate (acepta cualquier objeto con write).
+
+    Uso:
+        with SalidaPDF() as salida:
+            SimpleDocTemplate(salida, ...).build(story)
+            salida.guardar_en(informe.archivo_pdf, 'informe.pdf')
+    """
+
+    def __init__(self, ruta_final: Optional[str] = None):
+        """
+        Args:
+            ruta_final: Ruta local definitiva; el temporal se crea en su mismo directorio
+                para poder moverlo con un rename atómico
+        """
+        self.ruta_final = ruta_final
+        if ruta_final:
+            directorio = os.path.dirname(ruta_final)
+            os.makedirs(directorio, exist_ok=True)
+        else:
+            directorio = getattr(settings, 'INFORMES_PDF_DIRECTORIO_TEMPORAL', None)
+
+        self._archivo = tempfile.NamedTemporaryFile(
+            prefix='.informe_', suffix='.pdf', dir=directorio, delete=False
+        )
+        self.ruta = self._archivo.name
+        self.name = self.ruta  # ReportLab lo usa para sus mensajes
+        self._hash = hashlib.sha256()
+        self.tamaño = 0
+
+    def write(self, datos) -> int:
+        if isinstance(datos, str):
+            datos = datos.encode('latin1')
+        self._hash.update(datos)
+        self.tamaño += len(datos)
+        self._archivo.write(datos)
+        return len(datos)
+
+    def flush(self):
+        self._archivo.flush()
+
+    def tell(self) -> int:
+        # Solo se escribe al final: la posición es lo escrito (pypdf la usa para el xref)
+        return self.tamaño
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def cerrar(self):
+        if not self._archivo.closed:
+            self._archivo.close()
+
+    def mover_a(self, ruta: Optional[str] = None) -> str:
+        """Mueve el PDF terminado a 'ruta' (por defecto ruta_final) y devuelve la ruta"""
+        ruta = ruta or self.ruta_final
+        self.cerrar()
+        os.replace(self.ruta, ruta)
+        self.ruta = ruta
+        return ruta
+
+    def guardar_en(self, campo_archivo, nombre: str) -> str:
+        """
+        Sube el PDF al storage de un FileField (FieldFile) por bloques y borra el temporal.
+
+        Returns:
+            Nombre con el que quedó guardado en el storage
+        """
+        self.cerrar()
+        try:
+            with open(self.ruta, 'rb') as archivo:
+                campo_archivo.save(nombre, File(archivo, name=nombre), save=False)
+        finally:
+            self.descartar()
+        logger.info(f"📄 PDF guardado: {campo_archivo.name} ({self.tamaño / 1024:.0f} KB)")
+        return campo_archivo.name
+
+    def descartar(self):
+        self.cerrar()
+        if self.ruta != self.ruta_final and os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+    def a_dict(self) -> dict:
+        return {'sha256': self.sha256, 'tamaño_bytes': self.tamaño}
+
+    def __enter__(self) -> 'SalidaPDF':
+        return self
+
+    def __exit__(self, tipo_error, error, traza):
+        # Sin mover ni guardar (o con error), el temporal no debe quedar en disco
+        if self.ruta != self.ruta_final:
+            self.descartar()
+        return False
@@ -0,0 +1,100 @@
+"""
+Serie de IndiceMensual de una parcela cargada una sola vez en memoria
+- Índice por (año, mes) con enlaces al mes anterior y siguiente del calendario
+- Existencia de las imágenes NDVI/NDMI/SAVI comprobada una vez al cargar
+- Las secciones del informe leen de aquí en lugar de consultar mes a mes (N+1)
+"""
+
+import logging
+import os
+from datetime import date
+from typing import Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (tipo de índice, campo ImageField) de las imágenes de cada mes
+CAMPOS_IMAGEN = (
+    ('NDVI', 'imagen_ndvi'),
+    ('NDMI', 'imagen_ndmi'),
+    ('SAVI', 'imagen_savi'),
+)
+
+ClaveMes = Tuple[int, int]
+
+
+def mes_anterior(año: int, mes: int) -> ClaveMes:
+    return (año - 1, 12) if mes == 1 else (año, mes - 1)
+
+
+def mes_siguiente(año: int, mes: int) -> ClaveMes:
+    return (año + 1, 1) if mes == 12 else (año, mes + 1)
+
+
+def filtrar_periodo(indices: List, fecha_inicio: date, fecha_fin: date) -> List:
+    """
+    Meses del período del informe (mismo criterio que la consulta original:
+    si el período cruza de año se incluye el año de inicio completo)
+    """
+    mes_minimo = fecha_inicio.month if fecha_inicio.year == fecha_fin.year else 1
+    return [i for i in indices if i.año >= fecha_inicio.year and i.mes >= mes_minimo]
+
+
+class SerieIndicesMensuales:
+    """
+    Todos los IndiceMensual de una parcela, ordenados y accesibles por (año, mes)
+    """
+
+    def __init__(self, indices: List):
+        self.indices = sorted(indices, key=lambda i: (i.año, i.mes))
+        self._por_mes: Dict[ClaveMes, object] = {(i.año, i.mes): i for i in self.indices}
+        self._imagenes: Dict[ClaveMes, Dict[str, str]] = {
+            clave: self._imagenes_existentes(indice) for clave, indice in self._por_mes.items()
+        }
+
+    @classmethod
+    def cargar(cls, parcela) -> 'SerieIndicesMensuales':
+        """Una sola consulta; cada índice conserva la parcela ya cargada"""
+        return cls(list(parcela.indices_mensuales.all()))
+
+    @staticmethod
+    def _imagenes_existentes(indice) -> Dict[str, str]:
+        imagenes = {}
+        for tipo_indice, campo in CAMPOS_IMAGEN:
+            imagen = getattr(indice, campo)
+            if not imagen:
+                continue
+            try:
+                ruta = imagen.path
+            except (ValueError, NotImplementedError):
+                continue
+            if os.path.exists(ruta):
+                imagenes[tipo_indice] = ruta
+        return imagenes
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.indices)
+
+    def obtener(self, año: int, mes: int):
+        return self._por_mes.get((año, mes))
+
+    def anterior(self, indice):
+        """IndiceMensual del mes calendario anterior (None si no hay datos)"""
+        return self._por_mes.get(mes_anterior(indice.año, indice.mes))
+
+    def siguiente(self, indice):
+        """IndiceMensual del mes calendario siguiente (None si no hay datos)"""
+        return self._por_mes.get(mes_siguiente(indice.año, indice.mes))
+
+    def imagenes(self, indice) -> Dict[str, str]:
+        """Rutas de las imágenes que existen en disco para el mes: tipo -> ruta"""
+        return self._imagenes.get((indice.año, indice.mes), {})
+
+    def tiene_imagen(self, indice, tipo_indice: str) -> bool:
+        return tipo_indice in self.imagenes(indice)
+
+    def desde(self, fecha_inicio: date, fecha_fin: date) -> List:
+        """Meses del período del informe (ver filtrar_periodo)"""
+        return filtrar_periodo(self.indices, fecha_inicio, fecha_fin)
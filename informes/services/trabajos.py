@@ -0,0 +1,225 @@
+"""
+Ejecución de trabajos en segundo plano (TrabajoSegundoPlano)
+Cada tipo de trabajo tiene un manejador registrado en MANEJADORES
+"""
+
+import logging
+from datetime import date
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Errores de EOSDA que no justifican reintentar (el periodo simplemente no tiene escenas)
+ERRORES_EOSDA_DEFINITIVOS = ('Sin resultados', 'Sin geometría')
+
+
+def encolar_ingesta_historica(parcela, fecha_inicio: date, fecha_fin: date, usuario):
+    """
+    Encola la ingesta histórica de una parcela (una sola activa por parcela).
+
+    Returns:
+        Tupla (trabajo, creado)
+    """
+    from ..models import TrabajoSegundoPlano
+
+    return TrabajoSegundoPlano.encolar(
+        tipo='ingesta_historica',
+        clave_dedup=f'ingesta_historica:parcela:{parcela.id}',
+        parametros={
+            'fecha_inicio': fecha_inicio.isoformat(),
+            'fecha_fin': fecha_fin.isoformat(),
+        },
+        parcela=parcela,
+        usuario=usuario,
+    )
+
+
+def encolar_prefetch_imagenes(parcela, usuario=None):
+    """
+    Encola la descarga anticipada de imágenes de una parcela (una sola activa por parcela).
+
+    Returns:
+        Tupla (trabajo, creado)
+    """
+    from ..models import TrabajoSegundoPlano
+
+    return TrabajoSegundoPlano.encolar(
+        tipo='prefetch_imagenes',
+        clave_dedup=f'prefetch_imagenes:parcela:{parcela.id}',
+        parametros={},
+        parcela=parcela,
+        usuario=usuario,
+    )
+
+
+def encolar_informe_pdf(informe, usuario=None):
+    """
+    Encola la generación del PDF de un informe ya creado en estado 'en_cola'.
+
+    Returns:
+        Tupla (trabajo, creado)
+    """
+    from ..models import TrabajoSegundoPlano
+
+    return TrabajoSegundoPlano.encolar(
+        tipo='informe_pdf',
+        clave_dedup=f'informe_pdf:informe:{informe.pk}',
+        parametros={'informe_id': informe.pk},
+        parcela=informe.parcela,
+        usuario=usuario,
+        max_intentos=2,  # Cada intento repite llamadas a Gemini
+    )
+
+
+def encolar_analisis_parcela(parcela):
+    """
+    Encola el recálculo de las instantáneas de análisis de una parcela
+    (una sola activa por parcela: varios guardados seguidos se recalculan juntos).
+
+    Returns:
+        Tupla (trabajo, creado)
+    """
+    from ..models import TrabajoSegundoPlano
+
+    return TrabajoSegundoPlano.encolar(
+        tipo='analisis_parcela',
+        clave_dedup=f'analisis_parcela:parcela:{parcela.id}',
+        parametros={},
+        parcela=parcela,
+    )
+
+def _ejecutar_ingesta_historica(trabajo) -> Dict:
+    from .ingesta_satelital import ingestar_datos_historicos
+
+    resumen = ingestar_datos_historicos(
+        parcela=trabajo.parcela,
+        fecha_inicio=date.fromisoformat(trabajo.parametros['fecha_inicio']),
+        fecha_fin=date.fromisoformat(trabajo.parametros['fecha_fin']),
+        usuario=trabajo.usuario,
+        reportar_progreso=trabajo.actualizar_progreso,
+    )
+
+    error_eosda = resumen.get('error_eosda')
+    if error_eosda and resumen['meses_satelitales'] == 0 and error_eosda not in ERRORES_EOSDA_DEFINITIVOS:
+        # Fallo transitorio (timeout, 429, HTTP 5xx): reintentar más tarde
+        raise RuntimeError(f'EOSDA: {error_eosda}')
+
+    # Con los view_id ya guardados, descargar las imágenes sin esperar al usuario
+    if resumen['meses_satelitales'] > 0 and not resumen.get('simulado'):
+        trabajo_imagenes, _ = encolar_prefetch_imagenes(trabajo.parcela, trabajo.usuario)
+        resumen['trabajo_imagenes_id'] = trabajo_imagenes.pk
+
+    return resumen
+
+
+def _ejecutar_prefetch_imagenes(trabajo) -> Dict:
+    from .prefetch_imagenes import prefetch_imagenes_parcela
+
+    resumen = prefetch_imagenes_parcela(
+        parcela=trabajo.parcela,
+        reportar_progreso=trabajo.actualizar_progreso,
+    )
+
+    if resumen.get('error'):
+        raise RuntimeError(resumen['error'])
+    if resumen['pendientes']:
+        # Los request_id quedan guardados: el reintento solo consulta las pendientes
+        raise RuntimeError(f"{resumen['pendientes']} imágenes siguen en generación en EOSDA")
+
+    return resumen
+
+
+def _ejecutar_informe_pdf(trabajo) -> Dict:
+    from django.utils import timezone
+    from ..generador_pdf import GeneradorPDFProfesional
+    from ..models import Informe
+    from .salida_pdf import SalidaPDF
+
+    informe = Informe.objects.select_related('parcela').get(pk=trabajo.parametros['informe_id'])
+    inicio = timezone.now()
+
+    def reportar_progreso(etapa: str, porcentaje: int, mensaje: str):
+        informe.actualizar_generacion(etapa, porcentaje, mensaje)
+        trabajo.actualizar_progreso(porcentaje, mensaje)
+
+    salida = SalidaPDF()
+    try:
+        if informe.estado_generacion != 'en_cola':
+            # Reinicio tras caída del worker (recuperar_huerfanos): el informe quedó a medias
+            informe.actualizar_generacion('en_cola', 0, 'Reanudando generación')
+        informe.actualizar_generacion('analizando', 0, 'Iniciando generación')
+        with salida:
+            GeneradorPDFProfesional().generar_informe_completo(
+                parcela_id=informe.parcela_id,
+                meses_atras=informe.periodo_analisis_meses,
+                reportar_progreso=reportar_progreso,
+                salida=salida,
+            )
+            # Subida por bloques al storage del FileField (upload_to informes/pdfs/%Y/%m/)
+            nombre = f"informe_{informe.parcela.nombre.replace(' ', '_')}_{informe.pk}.pdf"
+            salida.guardar_en(informe.archivo_pdf, nombre)
+    except Exception as e:
+        if isinstance(e, ValueError):
+            # Parcela inactiva o sin datos: reintentar no cambia nada
+            trabajo.intentos = trabajo.max_intentos
+        if trabajo.intentos < trabajo.max_intentos:
+            informe.actualizar_generacion('en_cola', 0, 'Reintento programado', error=str(e))
+        else:
+            informe.actualizar_generacion('fallido', informe.progreso_generacion, 'Generación fallida', error=str(e))
+        raise
+
+    informe.tiempo_procesamiento = timezone.now() - inicio
+    Informe.objects.filter(pk=informe.pk).update(
+        archivo_pdf=informe.archivo_pdf.name,
+        sha256_pdf=salida.sha256,
+        tamaño_pdf_bytes=salida.tamaño,
+        tiempo_procesamiento=informe.tiempo_procesamiento,
+    )
+    informe.actualizar_generacion('listo', 100, 'Informe listo para descargar')
+
+    return {
+        'informe_id': informe.pk,
+        'archivo': informe.archivo_pdf.name,
+        'tamaño_bytes': salida.tamaño,
+        'sha256': salida.sha256,
+        'segundos': round(informe.tiempo_procesamiento.total_seconds(), 1),
+    }
+
+
+def _ejecutar_analisis_parcela(trabajo) -> Dict:
+    from .instantaneas_analisis import instantaneas_analisis
+
+    return instantaneas_analisis.recalcular(trabajo.parcela)
+
+
+MANEJADORES: Dict[str, Callable] = {
+    'ingesta_historica': _ejecutar_ingesta_historica,
+    'prefetch_imagenes': _ejecutar_prefetch_imagenes,
+    'informe_pdf': _ejecutar_informe_pdf,
+    'analisis_parcela': _ejecutar_analisis_parcela,
+}
+
+
+def ejecutar_trabajo(trabajo) -> bool:
+    """
+    Ejecuta un trabajo ya reservado por tomar_siguiente y registra el resultado.
+
+    Returns:
+        True si terminó correctamente
+    """
+    manejador = MANEJADORES.get(trabajo.tipo)
+    if not manejador:
+        trabajo.intentos = trabajo.max_intentos  # No tiene sentido reintentar
+        trabajo.marcar_fallido(f'Tipo de trabajo desconocido: {trabajo.tipo}')
+        return False
+
+    try:
+        logger.info(f"▶️ Ejecutando {trabajo} (intento {trabajo.intentos}/{trabajo.max_intentos})")
+        resultado = manejador(trabajo)
+        trabajo.marcar_completado(resultado)
+        logger.info(f"✅ Trabajo #{trabajo.pk} completado")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Trabajo #{trabajo.pk} falló: {str(e)}", exc_info=True)
+        trabajo.marcar_fallido(str(e))
+        return False
@@ -0,0 +1,110 @@
+"""
+Coalescencia de consultas idénticas a EOSDA ("single-flight")
+- Una sola consulta en curso por clave (CacheDatosEOSDA.generar_cache_key)
+- Se usa un advisory lock de PostgreSQL: vale entre workers y servidores
+- Quien llega después espera a que termine la primera y relee el caché
+
+Con otros motores de BD (desarrollo) se degrada a un lock por proceso.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Espacio de claves propio para no chocar con otros advisory locks de la BD
+NAMESPACE_LOCK = 0x45_4F_53  # 'EOS'
+
+INTERVALO_ESPERA = 0.5
+
+_locks_locales: Dict[str, threading.Lock] = {}
+_locks_locales_guard = threading.Lock()
+
+
+def _clave_numerica(clave: str) -> int:
+    """Entero de 32 bits con signo derivado de la clave (hash SHA-256 en hex)"""
+    try:
+        valor = int(clave[:8], 16)
+    except ValueError:
+        import hashlib
+        valor = int(hashlib.sha256(clave.encode()).hexdigest()[:8], 16)
+    return valor - 2 ** 31 if valor >= 2 ** 31 else valor
+
+
+def _usa_postgres() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def _lock_local(clave: str) -> threading.Lock:
+    with _locks_locales_guard:
+        return _locks_locales.setdefault(clave, threading.Lock())
+
+
+def intentar_adquirir(clave: str) -> bool:
+    """
+    Intenta tomar la consulta de 'clave' sin esperar.
+
+    Returns:
+        True si este proceso es quien debe consultar a EOSDA
+    """
+    if not _usa_postgres():
+        return _lock_local(clave).acquire(blocking=False)
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', [NAMESPACE_LOCK, _clave_numerica(clave)])
+        return bool(cursor.fetchone()[0])
+
+
+def liberar(clave: str):
+    """
+    Suelta la consulta de 'clave'. Solo debe llamarla quien obtuvo True de
+    intentar_adquirir: el lock local no sabe qué hilo lo tiene tomado.
+    """
+    if not _usa_postgres():
+        _lock_local(clave).release()
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_unlock(%s, %s)', [NAMESPACE_LOCK, _clave_numerica(clave)])
+
+
+@contextmanager
+def vuelo_unico(clave: str, timeout_espera: float = None) -> Iterator[bool]:
+    """
+    Serializa las consultas con la misma clave.
+
+    Uso:
+        with vuelo_unico(cache_key) as espero:
+            if espero:
+                ... releer caché: otro proceso acaba de consultar lo mismo
+            ... consultar EOSDA
+
+    Yields:
+        True si hubo que esperar a otra consulta idéntica en curso
+    """
+    if timeout_espera is None:
+        timeout_espera = getattr(settings, 'EOSDA_POLLING_TIMEOUT', 300) + 120
+
+    adquirido = intentar_adquirir(clave)
+    espero = not adquirido
+
+    if espero:
+        logger.info(f"⏳ Consulta idéntica en curso ({clave[:12]}…), esperando su resultado")
+        limite = time.monotonic() + timeout_espera
+        while not adquirido and time.monotonic() < limite:
+            time.sleep(INTERVALO_ESPERA)
+            adquirido = intentar_adquirir(clave)
+        if not adquirido:
+            logger.warning(f"⚠️ Espera agotada para {clave[:12]}…, se consulta sin coalescer")
+
+    try:
+        yield espero
+    finally:
+        if adquirido:
+            liberar(clave)
@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from .http_cliente import obtener_sesion
+
 logger = logging.getLogger(__name__)
 
 
@@ -75,8 +77,8 @@ class OpenMeteoWeatherService:
             logger.info(f"🌦️ Obteniendo datos climáticos Open-Meteo: {start_date} a {end_date}")
             logger.info(f"   Coordenadas: lat={latitud:.6f}, lon={longitud:.6f}")
             
-            # Realizar petición
-            response = requests.get(
+            # Realizar petición (sesión compartida: conexión keep-alive entre parcelas)
+            response = obtener_sesion('open-meteo').get(
                 OpenMeteoWeatherService.BASE_URL,
                 params=params,
                 timeout=30
@@ -0,0 +1,30 @@
+"""
+Señales de la aplicación informes
+- Guardar o borrar un IndiceMensual desactualiza las instantáneas de análisis de su parcela
+  (la ingesta en bloque usa bulk_create, que no emite señales: guardar_meses lo hace aparte)
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import IndiceMensual
+from .services.instantaneas_analisis import CAMPOS_ANALISIS, instantaneas_analisis
+
+
+def _desactualizar(parcela_id: int):
+    # Tras el commit: el worker debe ver los datos nuevos al recalcular
+    transaction.on_commit(lambda: instantaneas_analisis.marcar_desactualizadas([parcela_id]))
+
+
+@receiver(post_save, sender=IndiceMensual)
+def indice_guardado(sender, instance, created, update_fields=None, **kwargs):
+    # Guardados parciales que no tocan datos del análisis (imágenes, análisis Gemini) no invalidan
+    if update_fields and not set(update_fields) & set(CAMPOS_ANALISIS):
+        return
+    _desactualizar(instance.parcela_id)
+
+
+@receiver(post_delete, sender=IndiceMensual)
+def indice_eliminado(sender, instance, **kwargs):
+    _desactualizar(instance.parcela_id)
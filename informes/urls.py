@@ -54,12 +54,14 @@ urlpatterns = [
     path('sistema/probar-email/', views.probar_email, name='probar_email'),
     path('sistema/verificar-eosda/', views.verificar_eosda, name='verificar_eosda'),
     path('sistema/sincronizacion-eosda/', views.estado_sincronizacion_eosda, name='estado_sincronizacion_eosda'),
+    path('sistema/parcelas-atencion/', views.parcelas_atencion, name='parcelas_atencion'),
     
     # EOSDA y datos satelitales
     # Datos históricos y análisis
     path('parcelas/<int:parcela_id>/datos-historicos/', views.obtener_datos_historicos, name='obtener_datos_historicos'),
     path('parcelas/<int:parcela_id>/datos-guardados/', views.ver_datos_guardados, name='ver_datos_guardados'),
     path('parcelas/<int:parcela_id>/sincronizar-eosda/', views.sincronizar_con_eosda, name='sincronizar_con_eosda'),
+    path('trabajos/<int:trabajo_id>/estado/', views.estado_trabajo, name='estado_trabajo'),
     
     # Imágenes satelitales
     path('registro/<int:registro_id>/descargar-imagen/', views.descargar_imagen_indice, name='descargar_imagen_indice'),
@@ -67,6 +69,8 @@ urlpatterns = [
     
     # Generación de informes PDF
     path('parcelas/<int:parcela_id>/generar-informe/', views.generar_informe_pdf, name='generar_informe_pdf'),
+    path('informes/<int:informe_id>/estado-generacion/', views.estado_informe, name='estado_informe'),
+    path('informes/<int:informe_id>/descargar/', views.descargar_informe, name='descargar_informe'),
     
     # Timeline Visual
     path('parcelas/<int:parcela_id>/timeline/', views.timeline_parcela, name='timeline_parcela'),
@@ -16,7 +16,7 @@ from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
-from django.http import JsonResponse, HttpResponse, HttpResponseRedirect, FileResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseRedirect, HttpResponseNotModified, FileResponse
 from django.db.models import Q, Count, Avg, Sum
 from django.core.paginator import Paginator
 from django.conf import settings
@@ -29,10 +29,7 @@ from .models import Parcela, IndiceMensual, Informe, ConfiguracionAPI
 from .models_clientes import ClienteInvitacion, RegistroEconomico
 # Importaciones de servicios
 from .services.eosda_api import eosda_service
-from .services.weather_service import OpenMeteoWeatherService
 from .services.analisis_datos import analisis_service
-# Importar generador de PDF
-from .generador_pdf import GeneradorPDFProfesional
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -93,18 +90,18 @@ def dashboard(request):
                     ultimos_pagos = []
                 else:
                     # Totales generales
-                    ingresos_pagados = Informe.objects.filter(
+                    ingresos_pagados = Informe.objects.facturables().filter(
                         estado_pago='pagado'
                     ).aggregate(Sum('monto_pagado'))['monto_pagado__sum'] or Decimal('0')
                     
-                    ingresos_parciales = Informe.objects.filter(
+                    ingresos_parciales = Informe.objects.facturables().filter(
                         estado_pago='parcial'
                     ).aggregate(Sum('monto_pagado'))['monto_pagado__sum'] or Decimal('0')
                     
                     total_ingresos = ingresos_pagados + ingresos_parciales
                     
                     # Cuentas por cobrar (saldo pendiente)
-                    informes_con_saldo = Informe.objects.filter(
+                    informes_con_saldo = Informe.objects.facturables().filter(
                         estado_pago__in=['pendiente', 'parcial', 'vencido']
                     ).exclude(estado_pago='cortesia')
                     
@@ -114,27 +111,27 @@ def dashboard(request):
                     
                     # Informes vencidos
                     ahora = timezone.now()
-                    informes_vencidos = Informe.objects.filter(
+                    informes_vencidos = Informe.objects.facturables().filter(
                         fecha_vencimiento__lt=ahora,
                         estado_pago__in=['pendiente', 'parcial']
                     ).count()
                     
                     # Informes por vencer (próximos 7 días)
                     fecha_limite = ahora + timedelta(days=7)
-                    informes_por_vencer = Informe.objects.filter(
+                    informes_por_vencer = Informe.objects.facturables().filter(
                         fecha_vencimiento__gte=ahora,
                         fecha_vencimiento__lte=fecha_limite,
                         estado_pago__in=['pendiente', 'parcial']
                     ).count()
                     
                     # Informes pagados vs pendientes
-                    informes_pagados = Informe.objects.filter(estado_pago='pagado').count()
-                    informes_pendientes = Informe.objects.filter(
+                    informes_pagados = Informe.objects.facturables().filter(estado_pago='pagado').count()
+                    informes_pendientes = Informe.objects.facturables().filter(
                         estado_pago__in=['pendiente', 'parcial']
                     ).count()
                     
                     # Últimos pagos registrados
-                    ultimos_pagos = Informe.objects.filter(
+                    ultimos_pagos = Informe.objects.facturables().filter(
                         estado_pago__in=['pagado', 'parcial']
                     ).exclude(monto_pagado=0).order_by('-fecha_actualizacion')[:5]
                 
@@ -776,6 +773,48 @@ def estado_sistema(request):
         return render(request, 'informes/sistema/estado.html', {'error': str(e)})
 
 
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def parcelas_atencion(request):
+    """
+    Tablero de parcelas que requieren atención (lee ResumenAnalisisParcela,
+    recalculado en bloque con el comando analizar_flota)
+    """
+    from .models_analisis import ResumenAnalisisParcela
+    
+    orden = request.GET.get('orden', 'puntuacion')
+    ordenes = {
+        'puntuacion': ['puntuacion_salud'],
+        'pendiente': ['ndvi_pendiente'],
+        'anomalias': ['-anomalias', 'puntuacion_salud'],
+    }
+    mostrar_todas = request.GET.get('todas') == '1'
+    
+    resumenes = ResumenAnalisisParcela.objects.select_related('parcela')
+    if not mostrar_todas:
+        resumenes = resumenes.filter(requiere_atencion=True)
+    resumenes = resumenes.order_by(*ordenes.get(orden, ordenes['puntuacion']))
+    
+    paginator = Paginator(resumenes, 50)
+    pagina = paginator.get_page(request.GET.get('page'))
+    
+    totales = ResumenAnalisisParcela.objects.aggregate(
+        total=Count('id'),
+        atencion=Count('id', filter=Q(requiere_atencion=True)),
+        puntuacion_promedio=Avg('puntuacion_salud'),
+    )
+    ultimo = ResumenAnalisisParcela.objects.order_by('-calculado_en').values_list('calculado_en', flat=True).first()
+    
+    contexto = {
+        'resumenes': pagina,
+        'orden': orden,
+        'mostrar_todas': mostrar_todas,
+        'totales': totales,
+        'calculado_en': ultimo,
+    }
+    return render(request, 'informes/sistema/parcelas_atencion.html', contexto)
+
+
 @login_required
 def probar_email(request):
     """
@@ -1342,6 +1381,9 @@ def obtener_datos_historicos(request, parcela_id):
     Vista para obtener datos históricos de una parcela específica desde EOSDA.
     Soporta rangos predeterminados (6m, 12m, 24m) y personalizado.
     Requiere obligatoriamente parámetros de fecha.
+    
+    La ingesta se encola como TrabajoSegundoPlano (ver procesar_trabajos) y la
+    vista responde de inmediato. Peticiones AJAX reciben JSON con la URL de estado.
     """
     try:
         parcela = get_object_or_404(Parcela, id=parcela_id, activa=True)
@@ -1373,284 +1415,28 @@ def obtener_datos_historicos(request, parcela_id):
             messages.error(request, '❌ La fecha de inicio debe ser anterior a la fecha de fin.')
             return redirect('informes:detalle_parcela', parcela_id=parcela.id)
         
-        logger.info(f"Obteniendo datos históricos para {parcela.nombre} desde {fecha_inicio} hasta {fecha_fin}")
-        
-        # Verificar que la parcela esté sincronizada con EOSDA
-        if not parcela.eosda_sincronizada or not parcela.eosda_field_id:
-            logger.warning(f"Parcela {parcela.nombre} no sincronizada, sincronizando primero...")
-            resultado_sync = eosda_service.sincronizar_parcela_con_eosda(parcela)
-            if not resultado_sync['exito']:
-                messages.error(request, f'Error: La parcela debe estar sincronizada con EOSDA primero. {resultado_sync.get("error", "")}')
-                return redirect('informes:detalle_parcela', parcela_id=parcela.id)
-            # Recargar parcela después de sincronizar
-            parcela.refresh_from_db()
-        
-        # Obtener datos desde EOSDA usando método optimizado (1 request en lugar de 3)
-        datos_satelitales = eosda_service.obtener_datos_optimizado(
-            parcela=parcela,
-            fecha_inicio=fecha_inicio,
-            fecha_fin=fecha_fin,
-            indices=['NDVI', 'NDMI', 'SAVI'],  # ✅ MAYÚSCULAS según documentación EOSDA
-            usuario=request.user,
-            max_nubosidad=50
-        )
-        
-        # Debug: Log para ver estructura de datos
-        logger.info(f"Estructura de datos recibida: {list(datos_satelitales.keys())}")
-        for clave, valor in datos_satelitales.items():
-            if isinstance(valor, list):
-                logger.info(f"  {clave}: {len(valor)} elementos")
-                if valor:
-                    logger.info(f"    Ejemplo: {valor[0]}")
-        
-        # Procesar y guardar los datos en la base de datos
-        indices_creados = 0
-        datos_procesados = 0
-        
-        # Agrupar datos por año-mes desde la estructura real de EOSDA
-        from collections import defaultdict
-        datos_por_mes = defaultdict(lambda: {
-            'ndvi_valores': [], 'ndvi_max': [], 'ndvi_min': [],
-            'ndmi_valores': [], 'ndmi_max': [], 'ndmi_min': [],
-            'savi_valores': [], 'savi_max': [], 'savi_min': [],
-            'nubosidad': [],
-            'escenas': []  # Guardar todas las escenas para encontrar la mejor
-        })
-        
-        # Procesar cada escena satelital
-        for escena in datos_satelitales.get('resultados', []):
-            try:
-                fecha_str = escena.get('date')
-                if not fecha_str:
-                    continue
-                
-                fecha = datetime.fromisoformat(fecha_str).date()
-                clave_mes = (fecha.year, fecha.month)
-                
-                # Extraer índices de cada escena
-                indexes = escena.get('indexes', {})
-                nubosidad = escena.get('cloud', 0)
-                view_id = escena.get('view_id')  # ✅ view_id de la escena (campo correcto según API)
-                
-                # NDVI
-                if 'NDVI' in indexes:
-                    datos_por_mes[clave_mes]['ndvi_valores'].append(indexes['NDVI'].get('average', 0))
-                    datos_por_mes[clave_mes]['ndvi_max'].append(indexes['NDVI'].get('max', 0))
-                    datos_por_mes[clave_mes]['ndvi_min'].append(indexes['NDVI'].get('min', 0))
-                
-                # NDMI
-                if 'NDMI' in indexes:
-                    datos_por_mes[clave_mes]['ndmi_valores'].append(indexes['NDMI'].get('average', 0))
-                    datos_por_mes[clave_mes]['ndmi_max'].append(indexes['NDMI'].get('max', 0))
-                    datos_por_mes[clave_mes]['ndmi_min'].append(indexes['NDMI'].get('min', 0))
-                
-                # SAVI
-                if 'SAVI' in indexes:
-                    datos_por_mes[clave_mes]['savi_valores'].append(indexes['SAVI'].get('average', 0))
-                    datos_por_mes[clave_mes]['savi_max'].append(indexes['SAVI'].get('max', 0))
-                    datos_por_mes[clave_mes]['savi_min'].append(indexes['SAVI'].get('min', 0))
-                
-                datos_por_mes[clave_mes]['nubosidad'].append(nubosidad)
-                
-                # ✅ Guardar info completa de la escena para encontrar la mejor
-                datos_por_mes[clave_mes]['escenas'].append({
-                    'view_id': view_id,
-                    'fecha': fecha,
-                    'nubosidad': nubosidad
-                })
-                
-            except Exception as e:
-                logger.error(f"Error procesando escena: {str(e)}")
-                continue
-        
-        # Guardar datos agrupados por mes
-        for (year, month), datos in datos_por_mes.items():
-            try:
-                # Calcular promedios
-                ndvi_prom = sum(datos['ndvi_valores']) / len(datos['ndvi_valores']) if datos['ndvi_valores'] else None
-                ndvi_max = max(datos['ndvi_max']) if datos['ndvi_max'] else None
-                ndvi_min = min(datos['ndvi_min']) if datos['ndvi_min'] else None
-                
-                ndmi_prom = sum(datos['ndmi_valores']) / len(datos['ndmi_valores']) if datos['ndmi_valores'] else None
-                ndmi_max = max(datos['ndmi_max']) if datos['ndmi_max'] else None
-                ndmi_min = min(datos['ndmi_min']) if datos['ndmi_min'] else None
-                
-                savi_prom = sum(datos['savi_valores']) / len(datos['savi_valores']) if datos['savi_valores'] else None
-                savi_max = max(datos['savi_max']) if datos['savi_max'] else None
-                savi_min = min(datos['savi_min']) if datos['savi_min'] else None
-                
-                nub_prom = sum(datos['nubosidad']) / len(datos['nubosidad']) if datos['nubosidad'] else 0
-                
-                # ✅ Encontrar la escena con MENOR nubosidad del mes para imágenes
-                mejor_escena = None
-                if datos['escenas']:
-                    mejor_escena = min(datos['escenas'], key=lambda x: x['nubosidad'])
-                    logger.info(f"   🎯 Mejor escena para {month:02d}/{year}: "
-                               f"view_id={mejor_escena['view_id']}, "
-                               f"fecha={mejor_escena['fecha']}, "
-                               f"nubosidad={mejor_escena['nubosidad']:.1f}%")
-                
-                # Crear o actualizar registro mensual
-                defaults = {
-                    'ndvi_promedio': ndvi_prom,
-                    'ndvi_maximo': ndvi_max,
-                    'ndvi_minimo': ndvi_min,
-                    'ndmi_promedio': ndmi_prom,
-                    'ndmi_maximo': ndmi_max,
-                    'ndmi_minimo': ndmi_min,
-                    'savi_promedio': savi_prom,
-                    'savi_maximo': savi_max,
-                    'savi_minimo': savi_min,
-                    'nubosidad_promedio': nub_prom,
-                    'fuente_datos': 'EOSDA',
-                    'calidad_datos': 'buena' if nub_prom < 30 else ('regular' if nub_prom < 50 else 'pobre')
-                }
-                
-                # ✅ Agregar metadatos de la mejor escena para descarga de imágenes
-                if mejor_escena:
-                    defaults['view_id_imagen'] = mejor_escena['view_id']
-                    defaults['fecha_imagen'] = mejor_escena['fecha']
-                    defaults['nubosidad_imagen'] = mejor_escena['nubosidad']
-                
-                indice, created = IndiceMensual.objects.update_or_create(
-                    parcela=parcela,
-                    año=year,
-                    mes=month,
-                    defaults=defaults
-                )
-                
-                if created:
-                    indices_creados += 1
-                datos_procesados += 1
-                
-                # Log con formato correcto
-                ndvi_str = f"{ndvi_prom:.3f}" if ndvi_prom else "N/A"
-                ndmi_str = f"{ndmi_prom:.3f}" if ndmi_prom else "N/A"
-                savi_str = f"{savi_prom:.3f}" if savi_prom else "N/A"
-                logger.info(f"✅ Guardado {month:02d}/{year}: NDVI={ndvi_str}, "
-                           f"NDMI={ndmi_str}, SAVI={savi_str}, "
-                           f"Nubosidad={nub_prom:.1f}%")
-                
-            except Exception as e:
-                logger.error(f"Error guardando datos de {month}/{year}: {str(e)}")
-        
-        # 🌦️ OBTENER DATOS CLIMÁTICOS CON OPEN-METEO
-        # EOSDA Weather API deshabilitado (sin cobertura en Colombia)
-        # Usamos Open-Meteo como alternativa gratuita con cobertura global
-        logger.info("🌦️ Obteniendo datos climáticos con Open-Meteo...")
-        meses_clima_actualizados = 0
-        try:
-            # Calcular centroide de la parcela para las coordenadas
-            centroide = parcela.geometria.centroid
-            latitud = centroide.y
-            longitud = centroide.x
-            
-            # Obtener datos diarios de Open-Meteo
-            datos_diarios = OpenMeteoWeatherService.obtener_datos_historicos(
-                latitud=latitud,
-                longitud=longitud,
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin
-            )
-            
-            if datos_diarios:
-                # Agrupar por mes
-                datos_clima_por_mes = OpenMeteoWeatherService.agrupar_por_mes(datos_diarios)
-                
-                # Actualizar O CREAR registros mensuales con datos climáticos
-                for (year, month), datos in datos_clima_por_mes.items():
-                    try:
-                        # Verificar si ya existe el registro (creado por datos satelitales)
-                        registro_existente = IndiceMensual.objects.filter(
-                            parcela=parcela,
-                            año=year,
-                            mes=month
-                        ).first()
-                        
-                        if registro_existente:
-                            # ACTUALIZAR solo datos climáticos, mantener fuente_datos = 'EOSDA'
-                            registro_existente.temperatura_promedio = datos.get('temperatura_promedio')
-                            registro_existente.temperatura_maxima = datos.get('temperatura_maxima')
-                            registro_existente.temperatura_minima = datos.get('temperatura_minima')
-                            registro_existente.precipitacion_total = datos.get('precipitacion_total')
-                            registro_existente.save(update_fields=[
-                                'temperatura_promedio', 'temperatura_maxima', 
-                                'temperatura_minima', 'precipitacion_total'
-                            ])
-                            accion = "actualizado"
-                        else:
-                            # CREAR nuevo registro solo con datos climáticos (sin índices satelitales)
-                            IndiceMensual.objects.create(
-                                parcela=parcela,
-                                año=year,
-                                mes=month,
-                                temperatura_promedio=datos.get('temperatura_promedio'),
-                                temperatura_maxima=datos.get('temperatura_maxima'),
-                                temperatura_minima=datos.get('temperatura_minima'),
-                                precipitacion_total=datos.get('precipitacion_total'),
-                                fuente_datos='Solo Clima',  # Datos climáticos reales sin imágenes satelitales
-                                calidad_datos='buena'
-                            )
-                            accion = "creado"
-                        
-                        meses_clima_actualizados += 1
-                        temp = datos.get('temperatura_promedio')
-                        precip = datos.get('precipitacion_total')
-                        temp_str = f"{temp:.1f}" if temp else "N/A"
-                        precip_str = f"{precip:.1f}" if precip else "N/A"
-                        logger.info(f"   🌡️ Clima {accion} {month:02d}/{year}: "
-                                   f"Temp={temp_str}°C, Precip={precip_str}mm")
-                    except Exception as e:
-                        logger.error(f"Error actualizando datos climáticos de {month}/{year}: {str(e)}")
-                
-                logger.info(f"✅ Open-Meteo: {meses_clima_actualizados} meses con datos climáticos")
-            else:
-                logger.warning("⚠️ Open-Meteo no retornó datos climáticos")
-                
-        except Exception as e:
-            logger.error(f"Error obteniendo datos climáticos de Open-Meteo: {str(e)}")
-        
-        logger.info(f"Datos históricos procesados para {parcela.nombre}: {indices_creados} nuevos índices, {datos_procesados} meses satelitales, {meses_clima_actualizados} meses climáticos")
+        # Encolar ingesta (un solo trabajo activo por parcela)
+        from .services.trabajos import encolar_ingesta_historica
+        trabajo, creado = encolar_ingesta_historica(parcela, fecha_inicio, fecha_fin, request.user)
         
-        # Calcular meses esperados vs obtenidos
-        meses_esperados = ((fecha_fin.year - fecha_inicio.year) * 12 + fecha_fin.month - fecha_inicio.month) + 1
-        meses_faltantes = meses_esperados - datos_procesados
-        meses_solo_clima = meses_clima_actualizados - datos_procesados  # Meses con clima pero sin satélite
-        
-        # Mensaje informativo según disponibilidad de datos
-        if datos_satelitales.get('simulado'):
-            messages.info(request, 
-                f'Se obtuvieron datos para {parcela.nombre}. '
-                f'Procesados: {datos_procesados} registros, Nuevos: {indices_creados}. '
-                'Nota: Algunos datos pueden ser simulados si EOSDA no tiene cobertura completa.'
-            )
+        if creado:
+            logger.info(f"📥 Ingesta encolada para {parcela.nombre}: trabajo #{trabajo.id} ({fecha_inicio} a {fecha_fin})")
         else:
-            # Construir mensaje detallado y claro
-            mensaje_partes = []
-            
-            # Datos satelitales completos
-            if datos_procesados > 0:
-                msg_satelital = f'✅ {datos_procesados} mes(es) con datos satelitales completos (NDVI, NDMI, SAVI + clima)'
-                if indices_creados > 0:
-                    msg_satelital += f' - {indices_creados} nuevo(s)'
-                mensaje_partes.append(msg_satelital)
-            
-            # Meses solo con clima (sin imágenes satelitales)
-            if meses_solo_clima > 0:
-                mensaje_partes.append(
-                    f'🌦️ {meses_solo_clima} mes(es) solo con datos climáticos reales (temperatura, precipitación). '
-                    f'Sin imágenes satelitales disponibles (nubosidad alta o satélite no pasó por la zona).'
-                )
-            
-            # Meses completamente sin datos
-            if meses_faltantes > 0 and meses_solo_clima < meses_faltantes:
-                meses_sin_nada = meses_faltantes - meses_solo_clima
-                if meses_sin_nada > 0:
-                    mensaje_partes.append(f'⚠️ {meses_sin_nada} mes(es) sin ningún dato disponible.')
-            
-            mensaje_base = ' | '.join(mensaje_partes) if mensaje_partes else '✅ Datos actualizados.'
-            messages.success(request, mensaje_base)
+            logger.info(f"♻️ Ya existe ingesta activa para {parcela.nombre}: trabajo #{trabajo.id}")
         
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+            return JsonResponse({
+                'success': True,
+                'trabajo_id': trabajo.id,
+                'creado': creado,
+                'estado': trabajo.estado,
+                'url_estado': reverse('informes:estado_trabajo', args=[trabajo.id]),
+            }, status=202)
+        
+        if creado:
+            messages.info(request, '⏳ Obtención de datos satelitales en curso. Los datos aparecerán en unos minutos.')
+        else:
+            messages.info(request, '⏳ Ya hay una obtención de datos en curso para esta parcela.')
         return redirect('informes:detalle_parcela', parcela_id=parcela.id)
         
     except Exception as e:
@@ -1659,6 +1445,22 @@ def obtener_datos_historicos(request, parcela_id):
         return redirect('informes:detalle_parcela', parcela_id=parcela_id)
 
 
+@login_required
+def estado_trabajo(request, trabajo_id):
+    """
+    API JSON con el estado y progreso de un trabajo en segundo plano
+    """
+    from .models import TrabajoSegundoPlano
+    
+    trabajo = get_object_or_404(TrabajoSegundoPlano.objects.select_related('parcela'), id=trabajo_id)
+    
+    if not request.user.is_superuser and trabajo.usuario_id != request.user.id:
+        if not trabajo.parcela or trabajo.parcela.propietario != request.user.username:
+            return JsonResponse({'success': False, 'error': 'Sin permiso'}, status=403)
+    
+    return JsonResponse({'success': True, 'trabajo': trabajo.a_dict()})
+
+
 @login_required 
 def ver_datos_guardados(request, parcela_id):
     """
@@ -1855,8 +1657,8 @@ def descargar_imagen_indice(request, registro_id):
     
     try:
         from .services.eosda_api import EosdaAPIService
-        from django.core.files.base import ContentFile
-        import os
+        from .services.almacen_imagenes import almacen_imagenes
+        from .models import ImagenSatelitalAlmacenada
         
         # Obtener registro mensual
         registro = get_object_or_404(IndiceMensual, id=registro_id)
@@ -1924,19 +1726,9 @@ def descargar_imagen_indice(request, registro_id):
                 'error': f'No se pudo descargar imagen {indice}. Verifique que hay escenas disponibles con baja nubosidad.'
             }, status=500)
         
-        # Guardar imagen en el modelo
-        nombre_archivo = f"{registro.parcela.nombre}_{registro.año}_{registro.mes:02d}_{indice}.png"
-        nombre_archivo = nombre_archivo.replace(' ', '_').replace('/', '_')
-        
-        content_file = ContentFile(resultado['imagen'])
-        
-        # Guardar en el campo correspondiente
-        if indice == 'NDVI':
-            registro.imagen_ndvi.save(nombre_archivo, content_file, save=False)
-        elif indice == 'NDMI':
-            registro.imagen_ndmi.save(nombre_archivo, content_file, save=False)
-        elif indice == 'SAVI':
-            registro.imagen_savi.save(nombre_archivo, content_file, save=False)
+        # Apuntar el campo del modelo al archivo del almacén (sin duplicar el PNG)
+        imagen_almacenada = ImagenSatelitalAlmacenada.objects.get(sha256=resultado['sha256'])
+        almacen_imagenes.asignar_a_registro(registro, indice, imagen_almacenada)
         
         # Actualizar metadatos
         registro.view_id_imagen = resultado.get('view_id')
@@ -1971,18 +1763,70 @@ def descargar_imagen_indice(request, registro_id):
         }, status=500)
 
 
+def _calcular_precio_informe(parcela, meses_atras: int):
+    """
+    Precio base, cliente y vencimiento del informe según invitación, configuración o período
+    
+    Returns:
+        Tupla (precio_base, cliente_invitacion, fecha_vencimiento)
+    """
+    precio_base = Decimal('0.00')
+    cliente_invitacion = None
+    fecha_vencimiento = None
+    
+    # Verificar si la parcela tiene invitación asociada
+    if hasattr(parcela, 'invitacion_cliente'):
+        invitacion = parcela.invitacion_cliente
+        cliente_invitacion = invitacion
+        precio_base = invitacion.costo_servicio
+        logger.info(f"Precio asignado desde invitación: ${precio_base} COP")
+    else:
+        # Calcular precio según configuración
+        from .models_configuracion import ConfiguracionReporte
+        config = ConfiguracionReporte.objects.filter(
+            parcela=parcela
+        ).order_by('-creado_en').first()
+        
+        if config:
+            precio_base = config.costo_estimado
+            logger.info(f"Precio asignado desde configuración: ${precio_base} COP")
+        else:
+            # Precio por defecto según tipo de análisis
+            if meses_atras <= 6:
+                precio_base = Decimal('200000.00')  # Plan básico
+            elif meses_atras <= 12:
+                precio_base = Decimal('320000.00')  # Plan estándar
+            else:
+                precio_base = Decimal('560000.00')  # Plan avanzado
+            logger.info(f"Precio por defecto según período: ${precio_base} COP")
+    
+    # Calcular fecha de vencimiento (30 días desde hoy)
+    if precio_base > 0:
+        fecha_vencimiento = (datetime.now() + timedelta(days=30)).date()
+    
+    return precio_base, cliente_invitacion, fecha_vencimiento
+
+
+def _puede_ver_informes(request, parcela) -> bool:
+    return request.user.is_superuser or parcela.propietario == request.user.username
+
+
 @login_required
 def generar_informe_pdf(request, parcela_id):
     """
     Vista para generar informe PDF profesional de una parcela
     Accesible desde el botón "Generar Informe" en detalle de parcela
+    
+    La generación (análisis, Gemini, gráficos, ReportLab) se encola como
+    TrabajoSegundoPlano y la vista responde de inmediato. Peticiones AJAX reciben
+    JSON con las URLs de estado y de descarga del informe.
     """
     try:
         # Verificar que la parcela existe
         parcela = get_object_or_404(Parcela, id=parcela_id, activa=True)
         
         # Verificar permisos (propietario o superusuario)
-        if not request.user.is_superuser and parcela.propietario != request.user.username:
+        if not _puede_ver_informes(request, parcela):
             messages.error(request, 'No tiene permisos para generar informes de esta parcela.')
             return redirect('informes:detalle_parcela', parcela_id=parcela_id)
         
@@ -1997,54 +1841,19 @@ def generar_informe_pdf(request, parcela_id):
                            'Por favor sincronice datos primero.')
             return redirect('informes:detalle_parcela', parcela_id=parcela_id)
         
-        # Generar PDF
-        try:
-            generador = GeneradorPDFProfesional()
-            ruta_pdf = generador.generar_informe_completo(
-                parcela_id=parcela_id,
-                meses_atras=meses_atras
-            )
-            
-            # Verificar que el archivo se generó
-            if not os.path.exists(ruta_pdf):
-                raise FileNotFoundError(f"El PDF no se generó correctamente en {ruta_pdf}")
-            
-            # Determinar precio base del informe
-            precio_base = Decimal('0.00')
-            cliente_invitacion = None
-            fecha_vencimiento_calculada = None
-            
-            # Verificar si la parcela tiene invitación asociada
-            if hasattr(parcela, 'invitacion_cliente'):
-                invitacion = parcela.invitacion_cliente
-                cliente_invitacion = invitacion
-                precio_base = invitacion.costo_servicio
-                logger.info(f"Precio asignado desde invitación: ${precio_base} COP")
-            else:
-                # Calcular precio según configuración
-                from .models_configuracion import ConfiguracionReporte
-                config = ConfiguracionReporte.objects.filter(
-                    parcela=parcela
-                ).order_by('-creado_en').first()
-                
-                if config:
-                    precio_base = config.costo_estimado
-                    logger.info(f"Precio asignado desde configuración: ${precio_base} COP")
-                else:
-                    # Precio por defecto según tipo de análisis
-                    if meses_atras <= 6:
-                        precio_base = Decimal('200000.00')  # Plan básico
-                    elif meses_atras <= 12:
-                        precio_base = Decimal('320000.00')  # Plan estándar
-                    else:
-                        precio_base = Decimal('560000.00')  # Plan avanzado
-                    logger.info(f"Precio por defecto según período: ${precio_base} COP")
-            
-            # Calcular fecha de vencimiento (30 días desde hoy)
-            if precio_base > 0:
-                fecha_vencimiento_calculada = (datetime.now() + timedelta(days=30)).date()
+        # Un solo informe en generación por parcela y período
+        informe = Informe.objects.filter(
+            parcela=parcela,
+            periodo_analisis_meses=meses_atras,
+            estado_generacion__in=Informe.ESTADOS_GENERACION_ACTIVOS,
+        ).first()
+        
+        if informe:
+            logger.info(f"♻️ Ya hay un informe en generación para {parcela.nombre}: #{informe.id}")
+        else:
+            precio_base, cliente_invitacion, fecha_vencimiento = _calcular_precio_informe(parcela, meses_atras)
             
-            # Crear registro de informe en BD con datos de pago
+            # Crear registro de informe en BD con datos de pago; el PDF llega al terminar el trabajo
             titulo_informe = f"Informe - {parcela.nombre}"[:290]
             informe = Informe.objects.create(
                 parcela=parcela,
@@ -2053,45 +1862,33 @@ def generar_informe_pdf(request, parcela_id):
                 fecha_fin_analisis=datetime.now().date(),
                 titulo=titulo_informe,
                 resumen_ejecutivo=f"Informe generado con {indices_count} meses de datos satelitales.",
-                archivo_pdf=ruta_pdf,
+                estado_generacion='en_cola',
+                progreso_generacion=0,
+                mensaje_generacion='En cola',
                 # Campos de pago
                 precio_base=precio_base,
                 cliente=cliente_invitacion,
-                fecha_vencimiento=fecha_vencimiento_calculada
-            )
-            
-            logger.info(f"Informe creado con precio_base=${precio_base}, estado={informe.estado_pago}")
-            
-            # Enviar archivo para descarga
-            from django.http import FileResponse
-            response = FileResponse(
-                open(ruta_pdf, 'rb'),
-                content_type='application/pdf'
+                fecha_vencimiento=fecha_vencimiento
             )
-            response['Content-Disposition'] = f'attachment; filename="informe_{parcela.nombre.replace(" ", "_")}.pdf"'
-            
-            # Log de éxito
-            logger.info(f"Informe PDF generado exitosamente para parcela {parcela.nombre} (ID: {parcela_id})")
-            
-            if precio_base > 0:
-                messages.success(request, 
-                               f'¡Informe generado exitosamente! '
-                               f'Analizados {indices_count} registros mensuales. '
-                               f'Precio: ${precio_base:,.0f} COP - Estado: {informe.get_estado_pago_display()}')
-            else:
-                messages.success(request, 
-                               f'¡Informe generado exitosamente! '
-                               f'Analizados {indices_count} registros mensuales.')
-            
-            return response
-            
-        except Exception as e_generacion:
-            logger.error(f"Error generando PDF para parcela {parcela_id}: {str(e_generacion)}")
-            logger.exception(e_generacion)
-            messages.error(request, 
-                          f'Error generando el informe PDF: {str(e_generacion)}. '
-                          'Por favor contacte al administrador.')
-            return redirect('informes:detalle_parcela', parcela_id=parcela_id)
+            logger.info(f"📥 Informe #{informe.id} encolado con precio_base=${precio_base}, estado={informe.estado_pago}")
+        
+        from .services.trabajos import encolar_informe_pdf
+        trabajo, _ = encolar_informe_pdf(informe, request.user)
+        
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+            return JsonResponse({
+                'success': True,
+                'informe_id': informe.id,
+                'trabajo_id': trabajo.id,
+                'informe': informe.estado_generacion_dict(),
+                'url_estado': reverse('informes:estado_informe', args=[informe.id]),
+                'url_descarga': reverse('informes:descargar_informe', args=[informe.id]),
+            }, status=202)
+        
+        messages.info(request, 
+                      f'⏳ Generando informe con {indices_count} registros mensuales. '
+                      'Estará disponible para descarga en unos minutos.')
+        return redirect('informes:detalle_parcela', parcela_id=parcela_id)
         
     except Exception as e:
         logger.error(f"Error en generar_informe_pdf para parcela {parcela_id}: {str(e)}")
@@ -2100,6 +1897,64 @@ def generar_informe_pdf(request, parcela_id):
         return redirect('informes:lista_parcelas')
 
 
+@login_required
+def estado_informe(request, informe_id):
+    """
+    API JSON con el estado de generación (en cola, analizando, renderizando, listo) de un informe
+    """
+    informe = get_object_or_404(Informe.objects.select_related('parcela'), id=informe_id)
+    
+    if not _puede_ver_informes(request, informe.parcela):
+        return JsonResponse({'success': False, 'error': 'Sin permiso'}, status=403)
+    
+    datos = informe.estado_generacion_dict()
+    if datos['listo']:
+        datos['url_descarga'] = reverse('informes:descargar_informe', args=[informe.id])
+    return JsonResponse({'success': True, 'informe': datos})
+
+
+@login_required
+def descargar_informe(request, informe_id):
+    """
+    Descarga el PDF de un informe cuando su generación terminó
+    """
+    informe = get_object_or_404(Informe.objects.select_related('parcela'), id=informe_id)
+    
+    if not _puede_ver_informes(request, informe.parcela):
+        messages.error(request, 'No tiene permisos para descargar este informe.')
+        return redirect('informes:lista_parcelas')
+    
+    if informe.estado_generacion != 'listo' or not informe.archivo_pdf:
+        if informe.estado_generacion == 'fallido':
+            messages.error(request, f'La generación del informe falló: {informe.error_generacion}')
+        else:
+            messages.info(request, f'⏳ El informe aún se está generando ({informe.progreso_generacion}%).')
+        return redirect('informes:detalle_parcela', parcela_id=informe.parcela_id)
+    
+    # El hash se calculó al escribir el PDF: el navegador puede revalidar sin descargarlo
+    etag = f'"{informe.sha256_pdf}"' if informe.sha256_pdf else None
+    if etag and etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    
+    try:
+        archivo = informe.archivo_pdf.open('rb')
+    except FileNotFoundError:
+        logger.error(f"PDF del informe #{informe.id} no encontrado: {informe.archivo_pdf.name}")
+        messages.error(request, 'El archivo del informe ya no está disponible. Genérelo de nuevo.')
+        return redirect('informes:detalle_parcela', parcela_id=informe.parcela_id)
+    
+    # FileResponse envía el archivo por bloques desde el storage, sin cargarlo entero
+    response = FileResponse(archivo, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="informe_{informe.parcela.nombre.replace(" ", "_")}.pdf"'
+    if etag:
+        response['ETag'] = etag
+    if informe.tamaño_pdf_bytes:
+        response['Content-Length'] = str(informe.tamaño_pdf_bytes)
+    return response
+
+
 # ========================================
 # 🎬 TIMELINE VISUAL - VISTAS
 # ========================================
@@ -2414,7 +2269,7 @@ def arqueo_caja(request):
             return redirect('informes:dashboard')
         
         # Query base
-        informes_query = Informe.objects.select_related('parcela').order_by('-fecha_generacion')
+        informes_query = Informe.objects.facturables().select_related('parcela').order_by('-fecha_generacion')
         
         # Aplicar filtros
         if estado_filtro != 'todos':
@@ -2434,36 +2289,36 @@ def arqueo_caja(request):
         informes = paginator.get_page(page_number)
         
         # Estadísticas generales
-        total_informes = Informe.objects.count()
+        total_informes = Informe.objects.facturables().count()
         
         # Estadísticas financieras
-        ingresos_totales = Informe.objects.filter(
+        ingresos_totales = Informe.objects.facturables().filter(
             estado_pago__in=['pagado', 'parcial']
         ).aggregate(Sum('monto_pagado'))['monto_pagado__sum'] or Decimal('0')
         
         cuentas_por_cobrar = sum([
-            inf.saldo_pendiente for inf in Informe.objects.filter(
+            inf.saldo_pendiente for inf in Informe.objects.facturables().filter(
                 estado_pago__in=['pendiente', 'parcial', 'vencido']
             )
         ])
         
         ahora = timezone.now()
-        informes_vencidos = Informe.objects.filter(
+        informes_vencidos = Informe.objects.facturables().filter(
             fecha_vencimiento__lt=ahora,
             estado_pago__in=['pendiente', 'parcial']
         ).count()
         
-        informes_pagados = Informe.objects.filter(estado_pago='pagado').count()
-        informes_pendientes = Informe.objects.filter(estado_pago='pendiente').count()
-        informes_parciales = Informe.objects.filter(estado_pago='parcial').count()
+        informes_pagados = Informe.objects.facturables().filter(estado_pago='pagado').count()
+        informes_pendientes = Informe.objects.facturables().filter(estado_pago='pendiente').count()
+        informes_parciales = Informe.objects.facturables().filter(estado_pago='parcial').count()
         
         # Distribución por estado
         estados_count = {
-            'pagado': Informe.objects.filter(estado_pago='pagado').count(),
-            'parcial': Informe.objects.filter(estado_pago='parcial').count(),
-            'pendiente': Informe.objects.filter(estado_pago='pendiente').count(),
-            'vencido': Informe.objects.filter(estado_pago='vencido').count(),
-            'cortesia': Informe.objects.filter(estado_pago='cortesia').count(),
+            'pagado': Informe.objects.facturables().filter(estado_pago='pagado').count(),
+            'parcial': Informe.objects.facturables().filter(estado_pago='parcial').count(),
+            'pendiente': Informe.objects.facturables().filter(estado_pago='pendiente').count(),
+            'vencido': Informe.objects.facturables().filter(estado_pago='vencido').count(),
+            'cortesia': Informe.objects.facturables().filter(estado_pago='cortesia').count(),
         }
         
         contexto = {
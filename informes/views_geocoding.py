@@ -6,6 +6,8 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_GET
 import logging
 
+from .services.http_cliente import obtener_sesion
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,7 +36,7 @@ def geocode_proxy(request):
             'User-Agent': 'AgroTech-Historico/1.0 (Django Application)'
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = obtener_sesion('nominatim').get(url, params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
             return JsonResponse(response.json(), safe=False)
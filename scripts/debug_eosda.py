@@ -15,6 +15,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'agrotech_historico.settings')
 django.setup()
 
 from django.conf import settings
+from informes.services.http_cliente import crear_sesion
 
 def debug_eosda_request():
     """
@@ -37,7 +38,7 @@ def debug_eosda_request():
     print(f"   Base URL: {base_url}")
     
     # 2. Preparar sesión HTTP
-    session = requests.Session()
+    session = crear_sesion()
     session.headers.update({
         'x-api-key': api_key,  # EOSDA usa x-api-key
         'Content-Type': 'application/json'